@@ -0,0 +1,168 @@
+# backend/benchmarks/api.py
+#
+# End-to-end API benchmark: p50/p99 latency and requests/sec for
+# register, diagnose, connect-doctor and search.
+#
+# By default everything runs in-process with no AWS: the in-memory
+# DynamoDB stand-in, FakeBedrockClient and httpx's ASGI transport.
+#
+#   python -m backend.benchmarks.api
+#   python -m backend.benchmarks.api --requests 2000 --concurrency 64 --bedrock-ms 400
+#   python -m backend.benchmarks.api --url http://127.0.0.1:8000   # live server
+#
+# Results are reproducible for a given --seed.
+
+import argparse
+import asyncio
+import os
+import random
+import statistics
+import time
+from decimal import Decimal
+
+
+VILLAGES = ["Bikram", "Naubatpur", "Paliganj", "Dulhin Bazar", "Masaurhi", "Punpun"]
+NAMES = ["Priya Devi", "Sunita Kumari", "Rekha Devi", "Ramesh Yadav", "Anil Paswan", "Geeta Devi"]
+SYMPTOMS = [
+    "bukhar, sir dard",
+    "teen din se tez bukhar",
+    "pet dard aur dast",
+    "khansi aur saans lene mein taklif",
+    "haath pair mein sujan",
+]
+SPECIALIZATIONS = ["General Physician", "Gynaecologist", "Paediatrician"]
+
+
+def configure_offline(args):
+    """Must run before anything under backend/ is imported."""
+    os.environ.setdefault("STORAGE_BACKEND", "memory")
+    os.environ.setdefault("BEDROCK_BACKEND", "fake")
+    os.environ.setdefault("FAKE_BEDROCK_FIRST_TOKEN_MS", str(args.bedrock_ms))
+    os.environ.setdefault("FAKE_BEDROCK_PER_TOKEN_MS", "0")
+    os.environ.setdefault("MEMORY_DB_LATENCY_MS", str(args.db_ms))
+    os.environ.setdefault("DIAGNOSIS_CACHE_BACKEND", "off")
+
+
+def seed_doctors(n: int, rng: random.Random):
+    from backend.core.database import doctors_table
+
+    for i in range(n):
+        doctors_table.put_item(Item={
+            "DoctorID": f"DR-B{i:05d}",
+            "Name": f"Dr. Bench {i}",
+            "Specialization": rng.choice(SPECIALIZATIONS),
+            "Lat": Decimal(str(round(rng.uniform(25.3, 25.9), 4))),
+            "Lng": Decimal(str(round(rng.uniform(84.8, 85.5), 4))),
+            "IsAvailable": True,
+            "MaxActiveCases": 1_000_000,
+        })
+
+
+def summarize(name: str, latencies, errors: int, wall: float):
+    latencies = sorted(latencies)
+    p99 = latencies[min(len(latencies) - 1, int(0.99 * len(latencies)))] if latencies else 0.0
+    print(
+        f"{name:>15} | {len(latencies) / wall:>8.1f} req/s"
+        f" | p50 {statistics.median(latencies) if latencies else 0.0:>8.2f} ms"
+        f" | p99 {p99:>8.2f} ms | n {len(latencies):>6} | errors {errors}"
+    )
+
+
+async def run_scenario(client, name, make_request, count: int, concurrency: int):
+    """make_request(i) -> (method, url, json) ; returns list of responses."""
+    semaphore = asyncio.Semaphore(concurrency)
+    latencies, responses = [], []
+    errors = 0
+
+    async def one(i):
+        nonlocal errors
+        method, url, body = make_request(i)
+        async with semaphore:
+            start = time.perf_counter()
+            response = await client.request(method, url, json=body)
+            elapsed = (time.perf_counter() - start) * 1000
+        if response.status_code == 200:
+            latencies.append(elapsed)
+            responses.append(response.json())
+        else:
+            errors += 1
+
+    start = time.perf_counter()
+    await asyncio.gather(*[one(i) for i in range(count)])
+    summarize(name, latencies, errors, time.perf_counter() - start)
+    return responses
+
+
+async def main(args):
+    import httpx
+
+    rng = random.Random(args.seed)
+
+    if args.url:
+        client = httpx.AsyncClient(base_url=args.url, timeout=120)
+    else:
+        from backend.main import app
+
+        seed_doctors(args.doctors, rng)
+        client = httpx.AsyncClient(
+            transport=httpx.ASGITransport(app=app),
+            base_url="http://bench",
+            timeout=120,
+        )
+
+    asha_id = "ASHA-BENCH"
+
+    async with client:
+        registered = await run_scenario(
+            client, "register",
+            lambda i: ("POST", "/patients/register", {
+                "Name": f"{rng.choice(NAMES)} {i}",
+                "Age": rng.randint(1, 80),
+                "Gender": rng.choice(["F", "M"]),
+                "Village": rng.choice(VILLAGES),
+                "ASHAWorkerID": asha_id,
+            }),
+            args.requests, args.concurrency,
+        )
+        patient_ids = [p["PatientID"] for p in registered]
+
+        diagnosed = await run_scenario(
+            client, "diagnose",
+            lambda i: ("POST", "/cases/diagnose", {
+                "PatientID": patient_ids[i % len(patient_ids)],
+                "ASHAWorkerID": asha_id,
+                "SymptomsRaw": f"{rng.choice(SYMPTOMS)} #{i}",
+                "Language": "hi-IN",
+            }),
+            args.requests, args.concurrency,
+        )
+        case_ids = [c["CaseID"] for c in diagnosed]
+
+        await run_scenario(
+            client, "connect-doctor",
+            lambda i: ("POST", f"/cases/{case_ids[i]}/connect-doctor", None),
+            len(case_ids), args.concurrency,
+        )
+
+        await run_scenario(
+            client, "search",
+            lambda i: ("GET", f"/patients/search?asha_id={asha_id}&q={rng.choice(VILLAGES)[:4]}", None),
+            args.requests, args.concurrency,
+        )
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--url", help="benchmark a running server instead of in-process")
+    parser.add_argument("--requests", type=int, default=500)
+    parser.add_argument("--concurrency", type=int, default=32)
+    parser.add_argument("--doctors", type=int, default=1000)
+    parser.add_argument("--bedrock-ms", type=float, default=50.0, help="fake model latency")
+    parser.add_argument("--db-ms", type=float, default=2.0, help="in-memory DynamoDB latency per call")
+    parser.add_argument("--seed", type=int, default=7)
+    args = parser.parse_args()
+
+    if not args.url:
+        configure_offline(args)
+
+    asyncio.run(main(args))
@@ -0,0 +1,45 @@
+# backend/benchmarks/bedrock_streaming.py
+#
+# Offline comparison of blocking vs streaming Bedrock invocation using
+# FakeBedrockClient. Streaming stops reading once the JSON object closes,
+# so the saving grows with how much the model rambles afterwards.
+#
+#   python -m backend.benchmarks.bedrock_streaming
+
+import statistics
+import time
+
+from backend.config import settings
+from backend.services import diagnosis_service
+from backend.services.fake_bedrock import FakeBedrockClient, DEFAULT_RAMBLE
+
+
+RUNS = 10
+
+
+def measure(client: FakeBedrockClient, streaming: bool):
+    settings.BEDROCK_STREAMING = streaming
+    diagnosis_service.set_bedrock_client(client)
+    client.tokens_generated = 0
+
+    latencies = []
+    for _ in range(RUNS):
+        start = time.perf_counter()
+        diagnosis_service.call_bedrock("benchmark prompt")
+        latencies.append((time.perf_counter() - start) * 1000)
+
+    return statistics.median(latencies), max(latencies), client.tokens_generated / RUNS
+
+
+if __name__ == "__main__":
+    for label, ramble in (("no ramble", ""), ("default ramble", DEFAULT_RAMBLE), ("long ramble", DEFAULT_RAMBLE * 4)):
+        client = FakeBedrockClient(ramble=ramble, first_token_ms=150, per_token_ms=2)
+
+        blocking = measure(client, streaming=False)
+        streaming = measure(client, streaming=True)
+
+        print(
+            f"{label:>15} | blocking p50 {blocking[0]:>7.1f} ms max {blocking[1]:>7.1f} ms"
+            f" {blocking[2]:>5.0f} tok | streaming p50 {streaming[0]:>7.1f} ms"
+            f" max {streaming[1]:>7.1f} ms {streaming[2]:>5.0f} tok"
+        )
@@ -0,0 +1,160 @@
+# backend/benchmarks/concurrent_diagnose.py
+#
+# Concurrency check for the diagnose write path: --parallel diagnoses
+# for ONE patient at once, each tagging a different condition, then
+# verify the patient record lost nothing. Exits non-zero on a mismatch.
+#
+#   python -m backend.benchmarks.concurrent_diagnose
+#   python -m backend.benchmarks.concurrent_diagnose --parallel 200 --db-ms 10
+#
+# Runs in-process (in-memory DynamoDB stand-in, FakeBedrockClient). The
+# previous write path (case put, then SET KnownConditions from the list
+# read before the model call) is replayed first for comparison. The
+# transactional path is then run for a patient registered with a string
+# set and for one still holding the older list form, which the first
+# diagnosis converts.
+
+import argparse
+import asyncio
+import io
+import json
+import os
+import sys
+import time
+
+
+def configure_offline(args):
+    """Must run before anything under backend/ is imported."""
+    os.environ.setdefault("STORAGE_BACKEND", "memory")
+    os.environ.setdefault("BEDROCK_BACKEND", "fake")
+    os.environ.setdefault("MEMORY_DB_LATENCY_MS", str(args.db_ms))
+    os.environ.setdefault("DIAGNOSIS_CACHE_BACKEND", "off")
+    os.environ.setdefault("EMERGENCY_FAST_PATH", "false")
+
+
+def tagging_client(args):
+    """FakeBedrockClient whose auto_tag_conditions come from the symptoms."""
+    from backend.services.fake_bedrock import FakeBedrockClient, DEFAULT_DIAGNOSIS
+
+    class TaggingBedrock(FakeBedrockClient):
+
+        def invoke_model(self, modelId: str, body: str, **kwargs):
+            prompt = json.loads(body)["prompt"]
+            visit = prompt.split("Current symptoms: \"")[1].split()[0]
+            output = {**DEFAULT_DIAGNOSIS, "auto_tag_conditions": [f"condition-{visit}"]}
+
+            time.sleep(self.first_token_ms / 1000)
+            text = json.dumps(output)
+            self.calls += 1
+            return {"body": io.BytesIO(json.dumps({"generation": text}).encode())}
+
+    return TaggingBedrock(first_token_ms=args.model_ms)
+
+
+def register(patient_id: str, conditions):
+    from backend.core.database import patients_table
+
+    patients_table.put_item(Item={
+        "PatientID": patient_id,
+        "ASHAWorkerID": "ASHA-BENCH",
+        "Name": "Concurrency Check",
+        "Age": 30,
+        "Gender": "F",
+        "Village": "Bikram",
+        "KnownConditions": conditions,
+        "RegisteredDate": "2026-01-01T00:00:00",
+        "LastVisitDate": None,
+    })
+
+
+def requests_for(patient_id: str, n: int):
+    from backend.models.case import CaseDiagnoseRequest
+
+    return [
+        CaseDiagnoseRequest(
+            PatientID=patient_id,
+            ASHAWorkerID="ASHA-BENCH",
+            SymptomsRaw=f"{i} bukhar aur sir dard",
+            Language="hi-IN",
+        )
+        for i in range(n)
+    ]
+
+
+async def previous_path(payload):
+    """The write path before transactions, as diagnose_case ran it."""
+    from backend.core.concurrency import run_db
+    from backend.core.database import cases_table, patients_table
+    from backend.services.diagnosis_service import fetch_patient, prepare_case
+
+    patient = await fetch_patient(payload.PatientID)
+    case_item, ai_output, patient = await prepare_case(payload, patient=patient)
+
+    await run_db(cases_table.put_item, Item=case_item)
+    await run_db(
+        patients_table.update_item,
+        Key={"PatientID": patient["PatientID"]},
+        UpdateExpression="SET KnownConditions = :kc",
+        ExpressionAttributeValues={":kc": list(set(patient.get("KnownConditions", []) + ai_output.auto_tag_conditions))},
+    )
+    return case_item
+
+
+async def run(title: str, patient_id: str, initial, diagnose, args) -> bool:
+    from backend.core.database import patients_table
+
+    register(patient_id, initial)
+    payloads = requests_for(patient_id, args.parallel)
+
+    start = time.perf_counter()
+    results = await asyncio.gather(*(diagnose(p) for p in payloads), return_exceptions=True)
+    seconds = time.perf_counter() - start
+
+    cases = [r for r in results if not isinstance(r, Exception)]
+    errors = [r for r in results if isinstance(r, Exception)]
+
+    patient = patients_table.get_item(Key={"PatientID": patient_id}, ConsistentRead=True)["Item"]
+    expected_tags = set(initial) | {f"condition-{i}" for i in range(args.parallel)}
+    stored_tags = set(patient.get("KnownConditions", []))
+    latest = max((c["CreatedAt"] for c in cases), default=None)
+
+    checks = {
+        "cases stored": (len(cases), args.parallel),
+        "conditions kept": (len(stored_tags & expected_tags), len(expected_tags)),
+        "CaseCount": (int(patient.get("CaseCount", 0)), args.parallel),
+        "LastVisitDate": (patient.get("LastVisitDate"), latest),
+    }
+
+    print(f"\n{title} ({seconds:.2f} s, {len(errors)} errors)")
+    for name, (got, want) in checks.items():
+        print(f"  {name:16} {str(got):28} expected {want}  {'ok' if got == want else 'MISMATCH'}")
+    for error in errors[:3]:
+        print(f"  error: {error}")
+
+    return not errors and all(got == want for got, want in checks.values())
+
+
+async def main(args):
+    from backend.services.diagnosis_service import diagnose_case, set_bedrock_client
+
+    set_bedrock_client(tagging_client(args))
+    print(f"{args.parallel} parallel diagnoses for one patient, {args.db_ms:g} ms per DynamoDB call")
+
+    await run("previous: put case, then SET the list read earlier", "PAT-RMW", ["anemia"], previous_path, args)
+
+    ok = await run("transaction, string set", "PAT-SET", {"anemia"}, diagnose_case, args)
+    ok &= await run("transaction, patient still on the list form", "PAT-LIST", ["anemia"], diagnose_case, args)
+
+    print("\nPASS" if ok else "\nFAIL")
+    return ok
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--parallel", type=int, default=50)
+    parser.add_argument("--db-ms", type=float, default=5)
+    parser.add_argument("--model-ms", type=float, default=50)
+    args = parser.parse_args()
+
+    configure_offline(args)
+    sys.exit(0 if asyncio.run(main(args)) else 1)
@@ -0,0 +1,195 @@
+# backend/benchmarks/connect_doctor.py
+#
+# The doctor lookup behind connect-doctor, under steady traffic while
+# doctors keep toggling availability, for three ways of knowing who is
+# available:
+#
+#   scan     full table scan + filter + sort on every match (the original)
+#   refresh  spatial index re-synced inline by a full scan at most every
+#            --refresh seconds (the previous tree)
+#   roster   spatial index kept current from the change feed, polled in
+#            the background every --poll seconds; matches only read memory
+#
+#   python -m backend.benchmarks.connect_doctor
+#   python -m backend.benchmarks.connect_doctor --doctors 10000 --seconds 30 --refresh 30
+#
+# Runs in-process on the in-memory DynamoDB stand-in, each call (one scan
+# page included) paying --db-ms. --refresh defaults below the app's 30 s
+# so a short run sees several refreshes. "stale" counts matches that
+# returned a doctor the table already had as unavailable.
+
+import argparse
+import os
+import random
+import threading
+import time
+from decimal import Decimal
+
+
+def configure_offline(args):
+    """Must run before anything under backend/ is imported."""
+    os.environ.setdefault("STORAGE_BACKEND", "memory")
+    os.environ.setdefault("MEMORY_DB_LATENCY_MS", str(args.db_ms))
+
+
+def percentile(values, pct):
+    if not values:
+        return 0.0
+    values = sorted(values)
+    return values[min(len(values) - 1, int(round(pct / 100 * (len(values) - 1))))]
+
+
+def seed(table, n: int, rng: random.Random):
+    from backend.benchmarks.doctor_match import make_doctors
+    from backend.core.database import get_dynamodb
+
+    memory_table = get_dynamodb().Table(table.name)
+    latency, memory_table.latency_ms = memory_table.latency_ms, 0
+    for doctor in make_doctors(n, rng):
+        doctor["Lat"] = Decimal(str(round(doctor["Lat"], 4)))
+        doctor["Lng"] = Decimal(str(round(doctor["Lng"], 4)))
+        table.put_item(Item=doctor)
+    memory_table.latency_ms = latency
+
+
+def matchers(args, table):
+    from backend.benchmarks.doctor_match import scan_and_sort
+    from backend.core.database import scan_items
+    from backend.services.doctor_index import DoctorSpatialIndex
+    from backend.services.doctor_roster import DoctorRoster
+
+    def scan(spec, lat, lng):
+        doctors = scan_items(table, page_size=args.page_size)
+        for doc in doctors:
+            doc["Lat"], doc["Lng"] = float(doc["Lat"]), float(doc["Lng"])
+        return scan_and_sort(doctors, spec, lat, lng)
+
+    index = DoctorSpatialIndex()
+    lock = threading.Lock()
+    refreshed = [0.0]
+
+    def refresh(spec, lat, lng):
+        if time.monotonic() - refreshed[0] >= args.refresh:
+            with lock:
+                if time.monotonic() - refreshed[0] >= args.refresh:
+                    index.sync(scan_items(table, page_size=args.page_size))
+                    refreshed[0] = time.monotonic()
+        hits = index.nearest(lat, lng, 1, spec) or index.nearest(lat, lng, 1)
+        return hits[0] if hits else None
+
+    roster = DoctorRoster(
+        DoctorSpatialIndex(),
+        table,
+        max_staleness=args.staleness,
+        page_size=args.page_size,
+    )
+
+    def from_roster(spec, lat, lng):
+        roster.ensure_fresh()
+        hits = roster.index.nearest(lat, lng, 1, spec) or roster.index.nearest(lat, lng, 1)
+        return hits[0] if hits else None
+
+    return {"scan": (scan, None), "refresh": (refresh, None), "roster": (from_roster, roster)}
+
+
+def run_mode(args, table, name, match, roster, rng):
+    from backend.benchmarks.doctor_match import SPECIALIZATIONS, LAT_RANGE, LNG_RANGE
+    from backend.core.database import get_dynamodb
+
+    memory_table = get_dynamodb().Table(table.name)
+    doctor_ids = list(memory_table._items)
+    stop = threading.Event()
+    latencies, stale = [], [0]
+    background = []
+
+    def churn():
+        local = random.Random(rng.random())
+        while not stop.is_set():
+            doctor_id = local.choice(doctor_ids)
+            table.update_item(
+                Key={"DoctorID": doctor_id},
+                UpdateExpression="SET IsAvailable = :a",
+                ExpressionAttributeValues={":a": local.random() < 0.8},
+            )
+            stop.wait(1 / args.churn)
+
+    def poller():
+        while not stop.is_set():
+            roster.refresh()
+            stop.wait(args.poll)
+
+    def client(seed_value):
+        local = random.Random(seed_value)
+        interval = args.clients / args.rps
+        deadline = time.monotonic() + args.seconds
+        while time.monotonic() < deadline:
+            spec = local.choice(SPECIALIZATIONS)
+            lat, lng = local.uniform(*LAT_RANGE), local.uniform(*LNG_RANGE)
+
+            start = time.perf_counter()
+            doctor = match(spec, lat, lng)
+            latencies.append((time.perf_counter() - start) * 1000)
+
+            if doctor and memory_table._items[doctor["DoctorID"]].get("IsAvailable") is not True:
+                stale[0] += 1
+            time.sleep(local.uniform(0, 2 * interval))
+
+    if roster is not None:
+        roster.resync()
+        background.append(threading.Thread(target=poller, daemon=True))
+    background.append(threading.Thread(target=churn, daemon=True))
+    for thread in background:
+        thread.start()
+
+    clients = [threading.Thread(target=client, args=(rng.random(),)) for _ in range(args.clients)]
+    for thread in clients:
+        thread.start()
+    for thread in clients:
+        thread.join()
+
+    stop.set()
+    for thread in background:
+        thread.join()
+
+    print(
+        f"{name:>8} | n {len(latencies):6} | p50 {percentile(latencies, 50):8.2f} ms"
+        f" | p99 {percentile(latencies, 99):8.2f} ms | max {max(latencies, default=0):8.2f} ms"
+        f" | stale {stale[0]:5}"
+    )
+    if roster is not None:
+        stats = roster.stats()
+        print(f"{'':>8} | events applied {stats['events_applied']}, resyncs {stats['resyncs']}")
+
+
+def main(args):
+    configure_offline(args)
+
+    from backend.core.database import doctors_table
+
+    rng = random.Random(args.seed)
+    seed(doctors_table, args.doctors, rng)
+
+    print(
+        f"{args.doctors:,} doctors, {args.rps:g} matches/s from {args.clients} clients, "
+        f"{args.churn:g} availability changes/s, {args.db_ms:g} ms per DynamoDB call, {args.seconds:g} s per mode"
+    )
+    for name, (match, roster) in matchers(args, doctors_table).items():
+        if name in args.modes:
+            run_mode(args, doctors_table, name, match, roster, rng)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--doctors", type=int, default=10_000)
+    parser.add_argument("--seconds", type=float, default=20)
+    parser.add_argument("--rps", type=float, default=50)
+    parser.add_argument("--clients", type=int, default=4)
+    parser.add_argument("--churn", type=float, default=20, help="availability changes per second")
+    parser.add_argument("--db-ms", type=float, default=5)
+    parser.add_argument("--page-size", type=int, default=1000)
+    parser.add_argument("--refresh", type=float, default=5)
+    parser.add_argument("--poll", type=float, default=1)
+    parser.add_argument("--staleness", type=float, default=30)
+    parser.add_argument("--modes", nargs="+", default=["scan", "refresh", "roster"])
+    parser.add_argument("--seed", type=int, default=7)
+    main(parser.parse_args())
@@ -0,0 +1,86 @@
+# backend/benchmarks/doctor_match.py
+#
+# Compare the scan-and-sort doctor match against the spatial index.
+#
+#   python -m backend.benchmarks.doctor_match
+
+import random
+import time
+from typing import Dict, Any, List
+
+from backend.services.doctor_index import DoctorSpatialIndex
+from backend.services.doctor_match_service import haversine
+
+
+SPECIALIZATIONS = ["General Physician", "Gynaecologist", "Paediatrician"]
+
+# Rough bounding box of Bihar
+LAT_RANGE = (24.3, 27.5)
+LNG_RANGE = (83.3, 88.3)
+
+QUERIES = 200
+
+
+def make_doctors(n: int, rng: random.Random) -> List[Dict[str, Any]]:
+    return [
+        {
+            "DoctorID": f"DR-{i:06d}",
+            "Name": f"Dr. Bench {i}",
+            "Specialization": rng.choice(SPECIALIZATIONS),
+            "Lat": rng.uniform(*LAT_RANGE),
+            "Lng": rng.uniform(*LNG_RANGE),
+            "IsAvailable": rng.random() < 0.8,
+        }
+        for i in range(n)
+    ]
+
+
+def scan_and_sort(doctors, spec, lat, lng):
+    """
+    The previous match_doctor body: filter, haversine every doctor, sort.
+    """
+    available = [doc for doc in doctors if doc.get("IsAvailable") is True]
+    specialists = [doc for doc in available if doc.get("Specialization") == spec]
+    pool = specialists if specialists else available
+
+    for doc in pool:
+        doc["DistanceKm"] = haversine(lat, lng, doc["Lat"], doc["Lng"])
+
+    pool.sort(key=lambda x: x["DistanceKm"])
+    return pool[0] if pool else None
+
+
+def run(n: int):
+    rng = random.Random(n)
+    doctors = make_doctors(n, rng)
+    queries = [
+        (rng.choice(SPECIALIZATIONS), rng.uniform(*LAT_RANGE), rng.uniform(*LNG_RANGE))
+        for _ in range(QUERIES)
+    ]
+
+    start = time.perf_counter()
+    index = DoctorSpatialIndex()
+    index.sync(doctors)
+    build_ms = (time.perf_counter() - start) * 1000
+
+    start = time.perf_counter()
+    expected = [scan_and_sort(doctors, *q) for q in queries]
+    scan_us = (time.perf_counter() - start) / QUERIES * 1e6
+
+    start = time.perf_counter()
+    got = [index.nearest(lat, lng, k=1, specialization=spec) for spec, lat, lng in queries]
+    index_us = (time.perf_counter() - start) / QUERIES * 1e6
+
+    for want, have in zip(expected, got):
+        assert have and have[0]["DoctorID"] == want["DoctorID"], "index disagrees with scan"
+
+    print(
+        f"{n:>8} doctors | scan+sort {scan_us:>10.1f} us/query"
+        f" | index {index_us:>8.1f} us/query"
+        f" | speedup {scan_us / index_us:>7.1f}x | build {build_ms:>8.1f} ms"
+    )
+
+
+if __name__ == "__main__":
+    for n in (100, 10_000, 100_000):
+        run(n)
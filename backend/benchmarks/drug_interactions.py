@@ -0,0 +1,188 @@
+# backend/benchmarks/drug_interactions.py
+#
+# Prescription checks against a synthetic formulary of --drugs drugs
+# (10k by default) in --classes drug classes, with --pairs drug-drug and
+# --class-pairs class-class interactions:
+#
+#   build      compile the dataset into the index file, and open it
+#              (what every later worker does: one mmap, no parsing)
+#   scan       no index: walk the interaction list for every check
+#   cold       check_prescription with nothing memoized (fresh worker)
+#   warm       check_prescription once names / partner maps are memoized
+#   batch      check_prescriptions over --batch prescriptions
+#
+# Prescriptions are 1-5 drugs against 0-8 current medications and 0-3
+# allergies, names written the way doctors do ("Tab. X 500mg BD").
+#
+#   python -m backend.benchmarks.drug_interactions
+#   python -m backend.benchmarks.drug_interactions --drugs 50000 --pairs 400000
+
+import argparse
+import os
+import random
+import tempfile
+import time
+
+
+def percentile(values, pct):
+    if not values:
+        return 0.0
+    values = sorted(values)
+    return values[min(len(values) - 1, int(round(pct / 100 * (len(values) - 1))))]
+
+
+def synthetic_dataset(args, rng):
+    classes = {}
+    for c in range(args.classes):
+        parents = [f"c{rng.randrange(c)}"] if c >= 20 and rng.random() < 0.3 else []
+        classes[f"c{c}"] = {"name": f"Class {c}", "parents": parents}
+
+    drugs = {}
+    for d in range(args.drugs):
+        drugs[f"drug{d}"] = {
+            "name": f"Drugamine {d}",
+            "classes": [f"c{rng.randrange(args.classes)}" for _ in range(rng.randint(1, 3))],
+            "aliases": [f"brand{d}"],
+        }
+
+    severities = ["MINOR", "MODERATE", "MAJOR", "CONTRAINDICATED"]
+    interactions = [
+        [f"drug{rng.randrange(args.drugs)}", f"drug{rng.randrange(args.drugs)}", rng.choice(severities), f"Pair note {i}"]
+        for i in range(args.pairs)
+    ]
+    interactions += [
+        [f"class:c{rng.randrange(args.classes)}", f"class:c{rng.randrange(args.classes)}", rng.choice(severities), f"Class note {i}"]
+        for i in range(args.class_pairs)
+    ]
+    cross = [
+        [f"class:c{rng.randrange(args.classes)}", f"class:c{rng.randrange(args.classes)}", "MODERATE", f"Cross note {i}"]
+        for i in range(args.class_pairs // 10)
+    ]
+    return {"classes": classes, "drugs": drugs, "interactions": interactions, "cross_reactions": cross}
+
+
+def prescriptions(args, rng, n):
+    def name():
+        d = rng.randrange(args.drugs)
+        return rng.choice([f"Drugamine {d}", f"Tab. Drugamine {d} 500mg BD", f"BRAND{d}", f"brand{d} 10 ml"])
+
+    return [
+        (
+            [name() for _ in range(rng.randint(1, 5))],
+            [name() for _ in range(rng.randint(0, 8))],
+            [f"Class {rng.randrange(args.classes)}" for _ in range(rng.randint(0, 3))],
+        )
+        for _ in range(n)
+    ]
+
+
+def scan_check(dataset, drugs, medications, allergies):
+    """What the check looks like without an index: expand by walking classes, scan every row."""
+    from backend.services.drug_index import normalize_drug_name
+
+    names = {}
+    for key, spec in dataset["drugs"].items():
+        for alias in [spec["name"]] + spec.get("aliases", []):
+            names[normalize_drug_name(alias)] = key
+
+    def expand(key):
+        out = {key}
+        todo = [f"class:{c}" for c in dataset["drugs"][key]["classes"]]
+        while todo:
+            ref = todo.pop()
+            if ref not in out:
+                out.add(ref)
+                todo += [f"class:{p}" for p in dataset["classes"][ref[6:]].get("parents", [])]
+        return out
+
+    prescribed = [expand(names[normalize_drug_name(n)]) for n in drugs if normalize_drug_name(n) in names]
+    current = [expand(names[normalize_drug_name(n)]) for n in medications if normalize_drug_name(n) in names]
+    hits = 0
+    for a, b, _, _ in dataset["interactions"]:
+        for i, x in enumerate(prescribed):
+            for y in prescribed[i + 1:] + current:
+                if (a in x and b in y) or (b in x and a in y):
+                    hits += 1
+    return hits
+
+
+def report(label, values, unit="us"):
+    print(f"  {label:34} | p50 {percentile(values, 50):9.1f} {unit} | p99 {percentile(values, 99):9.1f} {unit}")
+
+
+def main(args):
+    from backend.services.drug_index import open_index, DrugIndex
+    from backend.services.prescription_service import check_prescription, check_prescriptions
+
+    rng = random.Random(args.seed)
+    dataset = synthetic_dataset(args, rng)
+    path = os.path.join(tempfile.mkdtemp(), "drug_index.bin")
+
+    start = time.perf_counter()
+    index = open_index(dataset, path)
+    build = time.perf_counter() - start
+
+    start = time.perf_counter()
+    DrugIndex(path)
+    reopen = time.perf_counter() - start
+
+    stats = index.stats()
+    print(
+        f"{args.drugs:,} drugs, {args.classes} classes, {args.pairs:,} drug pairs + {args.class_pairs:,} class pairs"
+        f" -> {stats['records']:,} records, {stats['bytes'] / 1e6:.1f} MB index"
+        f" (longest name probe {stats['max_name_probe']})\n"
+    )
+    print(f"  {'compile + write':34} | {build * 1000:9.1f} ms (once per dataset change)")
+    print(f"  {'open (mmap) in another worker':34} | {reopen * 1000:9.3f} ms\n")
+
+    checks = prescriptions(args, rng, args.checks)
+
+    scan = []
+    for drugs, medications, allergies in checks[:args.scan_checks]:
+        start = time.perf_counter()
+        scan_check(dataset, drugs, medications, allergies)
+        scan.append((time.perf_counter() - start) * 1000)
+    report(f"scan, no index ({args.scan_checks} checks)", scan, "ms")
+
+    cold = []
+    for drugs, medications, allergies in checks:
+        index.resolve.cache_clear()
+        index.expand.cache_clear()
+        index.partners.cache_clear()
+        start = time.perf_counter()
+        check_prescription(drugs, medications, allergies, index=index)
+        cold.append((time.perf_counter() - start) * 1e6)
+    report("single, cold", cold)
+
+    warm = []
+    for drugs, medications, allergies in checks:
+        start = time.perf_counter()
+        check_prescription(drugs, medications, allergies, index=index)
+        warm.append((time.perf_counter() - start) * 1e6)
+    report("single, warm", warm)
+
+    batch = checks[:args.batch]
+    start = time.perf_counter()
+    results = check_prescriptions(batch, index=index)
+    seconds = time.perf_counter() - start
+
+    flagged = sum(not r["Safe"] for r in results)
+    print(
+        f"\n  batch of {len(batch):,}: {seconds * 1000:.1f} ms ({len(batch) / seconds:,.0f} prescriptions/s);"
+        f" {flagged} flagged unsafe"
+    )
+    stats = index.stats()
+    print(f"  memoized per worker: {stats['cached_names']:,} names, {stats['cached_partner_maps']:,} partner maps")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--drugs", type=int, default=10_000)
+    parser.add_argument("--classes", type=int, default=400)
+    parser.add_argument("--pairs", type=int, default=100_000)
+    parser.add_argument("--class-pairs", type=int, default=2_000)
+    parser.add_argument("--checks", type=int, default=5_000)
+    parser.add_argument("--scan-checks", type=int, default=20)
+    parser.add_argument("--batch", type=int, default=1_000)
+    parser.add_argument("--seed", type=int, default=7)
+    main(parser.parse_args())
@@ -0,0 +1,98 @@
+# backend/benchmarks/emergency_triage.py
+#
+# Emergency keyword matching: the Aho-Corasick automaton against the
+# previous any(keyword in text) loop, as the keyword set grows.
+#
+#   python -m backend.benchmarks.emergency_triage
+#   python -m backend.benchmarks.emergency_triage --keywords 5000 --texts 5000
+#
+# The real keyword set is padded with synthetic Hinglish-looking phrases
+# up to --keywords. Symptom texts mix everyday complaints with an
+# emergency phrase in --emergency of them. The loop is timed both as it
+# was (stop at the first hit) and collecting every hit, which is what
+# the automaton returns.
+
+import argparse
+import random
+import time
+
+from backend.services.emergency_triage import EMERGENCY_KEYWORDS, KeywordAutomaton, normalize, triage
+
+SYLLABLES = ["ka", "ra", "ma", "ta", "pa", "la", "na", "sa", "ha", "ja", "da", "ba", "ga", "va", "sha", "chh"]
+FILLER = [
+    "bukhar", "sir", "dard", "khansi", "pet", "mein", "hai", "teen", "din", "se", "bahut",
+    "ulti", "dast", "kamzori", "fever", "cough", "since", "two", "days", "and", "mild",
+    "headache", "body", "ache", "thakan", "bachche", "ko", "raat", "subah", "khana", "nahi",
+    "बुखार", "सिर", "दर्द", "खांसी", "पेट", "में", "है",
+]
+
+
+def synthetic_keywords(n: int, rng: random.Random):
+    words = ["".join(rng.choice(SYLLABLES) for _ in range(rng.randint(2, 4))) for _ in range(n)]
+    return [" ".join(rng.sample(words, rng.randint(1, 3))) for _ in range(n)]
+
+
+def symptom_texts(n: int, emergency_share: float, emergencies, rng: random.Random):
+    texts = []
+    for _ in range(n):
+        words = [rng.choice(FILLER) for _ in range(rng.randint(8, 30))]
+        if rng.random() < emergency_share:
+            words.insert(rng.randrange(len(words) + 1), rng.choice(emergencies))
+        texts.append(" ".join(words))
+    return texts
+
+
+def time_per_text(fn, texts) -> float:
+    start = time.perf_counter()
+    for text in texts:
+        fn(text)
+    return (time.perf_counter() - start) / len(texts) * 1e6
+
+
+def main(args):
+    rng = random.Random(args.seed)
+
+    real = [(phrase, category) for category, phrases in EMERGENCY_KEYWORDS.items() for phrase in phrases]
+    padding = [(phrase, "synthetic") for phrase in synthetic_keywords(max(0, args.keywords - len(real)), rng)]
+    keywords = real + padding
+    texts = symptom_texts(args.texts, args.emergency, [phrase for phrase, _ in real], rng)
+
+    start = time.perf_counter()
+    automaton = KeywordAutomaton(keywords)
+    build_ms = (time.perf_counter() - start) * 1000
+
+    # The previous check: lowercase substring tests, one per keyword
+    lowered = [phrase.lower() for phrase, _ in keywords]
+
+    def loop_any(text):
+        text = text.lower()
+        return any(keyword in text for keyword in lowered)
+
+    def loop_all(text):
+        text = text.lower()
+        return [keyword for keyword in lowered if keyword in text]
+
+    loop_any_us = time_per_text(loop_any, texts)
+    loop_all_us = time_per_text(loop_all, texts)
+    normalize_us = time_per_text(normalize, texts)
+    automaton_us = time_per_text(automaton.find, texts)
+    triage_us = time_per_text(triage, texts)
+
+    hits = sum(1 for text in texts if automaton.find(text))
+
+    print(f"keywords       : {len(keywords):,} ({len(real)} real, {automaton.size:,} distinct after folding)")
+    print(f"texts          : {len(texts):,}, {hits:,} with an emergency hit")
+    print(f"build          : {build_ms:8.1f} ms")
+    print(f"loop, any()    : {loop_any_us:8.1f} us/text")
+    print(f"loop, all hits : {loop_all_us:8.1f} us/text")
+    print(f"automaton      : {automaton_us:8.1f} us/text (of which normalize {normalize_us:.1f})")
+    print(f"triage()       : {triage_us:8.1f} us/text (real keywords, per clause, with negation)")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--keywords", type=int, default=2000)
+    parser.add_argument("--texts", type=int, default=2000)
+    parser.add_argument("--emergency", type=float, default=0.05, help="share of texts with an emergency phrase")
+    parser.add_argument("--seed", type=int, default=7)
+    main(parser.parse_args())
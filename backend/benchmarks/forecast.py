@@ -0,0 +1,126 @@
+# backend/benchmarks/forecast.py
+#
+# Fit the vectorized seasonal forecaster to blocks x diagnoses series
+# over several years of synthetic daily counts, then time an
+# incremental one-day refit and a next-week forecast.
+#
+#   python -m backend.benchmarks.forecast
+#   python -m backend.benchmarks.forecast --blocks 100 --diagnoses 50 --years 1
+#
+# Counts are Poisson around a per-series base rate with a weekly dip
+# (Sundays), an annual wave with a random phase per diagnosis and a
+# slow drift. History is generated and fed in chunks so the full
+# series x days matrix is never held at once. The last week is held
+# out and scored against the seasonal-naive forecast (same weekday
+# last week). A per-series Python loop is timed on a sample and
+# extrapolated, for comparison.
+
+import argparse
+import time
+
+import numpy as np
+
+from backend.services.forecast_service import SeasonalForecaster, HORIZON_DAYS
+
+WEEKLY = np.array([1.0, 1.05, 1.05, 1.0, 1.0, 0.95, 0.6])
+FEED_CHUNK_DAYS = 91
+FIRST_DAY = 738521   # 2023-01-01
+
+
+class Generator:
+
+    def __init__(self, blocks: int, diagnoses: int, days: int, rng: np.random.Generator):
+        self.rng = rng
+        self.days = days
+        series = blocks * diagnoses
+        self.base = rng.lognormal(mean=-1.6, sigma=1.0, size=series)
+        self.amplitude = np.repeat(rng.uniform(0, 0.8, size=diagnoses)[None, :], blocks, axis=0).ravel()
+        self.phase = np.repeat(rng.uniform(0, 1, size=diagnoses)[None, :], blocks, axis=0).ravel()
+        self.drift = rng.normal(0, 0.2, size=series)
+
+    def chunk(self, start: int, days: int) -> np.ndarray:
+        t = np.arange(start, start + days)
+        annual = 1 + self.amplitude[:, None] * np.cos(2 * np.pi * (t[None, :] / 365.25 - self.phase[:, None]))
+        drift = 1 + self.drift[:, None] * t[None, :] / self.days
+        weekly = WEEKLY[(FIRST_DAY + t) % 7]
+        rate = np.clip(self.base[:, None] * annual * drift * weekly[None, :], 0, None)
+        return self.rng.poisson(rate).astype(np.uint16)
+
+
+def loop_fit(series: np.ndarray, alpha=0.2, beta=0.02, gamma=0.1, phi=0.9):
+    """The same recursion, one series and one day at a time."""
+    for y in series:
+        level = trend = 0.0
+        season = [0.0] * 7
+        for day, value in enumerate(y):
+            s = (FIRST_DAY + day) % 7
+            damped = phi * trend
+            new_level = alpha * (value - season[s]) + (1 - alpha) * (level + damped)
+            trend = beta * (new_level - level) + (1 - beta) * damped
+            season[s] = gamma * (value - new_level) + (1 - gamma) * season[s]
+            level = new_level
+
+
+def main(args):
+    rng = np.random.default_rng(args.seed)
+    days = int(args.years * 365)
+    fit_days = days - HORIZON_DAYS
+    series = args.blocks * args.diagnoses
+    keys = [(f"Block-{b}", f"D{d:03d}") for b in range(args.blocks) for d in range(args.diagnoses)]
+    gen = Generator(args.blocks, args.diagnoses, days, rng)
+
+    print(f"series {series:,} x days {days:,} ({args.blocks} blocks x {args.diagnoses} diagnoses)")
+
+    model = SeasonalForecaster()
+    fit_seconds = 0.0
+    last_week = None
+
+    for start in range(0, fit_days, FEED_CHUNK_DAYS):
+        n = min(FEED_CHUNK_DAYS, fit_days - start)
+        chunk = gen.chunk(start, n)
+        if start == 0:
+            sample = chunk[:args.loop_sample]
+
+        t0 = time.perf_counter()
+        model.update(FIRST_DAY + start, keys, chunk)
+        fit_seconds += time.perf_counter() - t0
+
+        last_week = np.concatenate([last_week, chunk], axis=1)[:, -7:] if last_week is not None else chunk[:, -7:]
+
+    held_out = gen.chunk(fit_days, HORIZON_DAYS)
+
+    t0 = time.perf_counter()
+    forecast = model.forecast(HORIZON_DAYS)
+    forecast_seconds = time.perf_counter() - t0
+
+    model_mae = np.abs(forecast - held_out).mean()
+    naive_mae = np.abs(last_week.astype(np.float64) - held_out).mean()
+    model_week = np.abs(forecast.sum(axis=1) - held_out.sum(axis=1)).mean()
+    naive_week = np.abs(last_week.sum(axis=1) - held_out.sum(axis=1).astype(np.int64)).mean()
+
+    t0 = time.perf_counter()
+    model.update(FIRST_DAY + fit_days, keys, held_out[:, :1])
+    refit_seconds = time.perf_counter() - t0
+
+    # Per-series loop on a sample of the first chunk, scaled up
+    t0 = time.perf_counter()
+    loop_fit(sample)
+    loop_seconds = (time.perf_counter() - t0) * (series / len(sample)) * (fit_days / sample.shape[1])
+
+    print(f"full fit        : {fit_seconds:8.2f} s  ({fit_days} days, {fit_seconds / fit_days * 1000:.1f} ms/day)")
+    print(f"per-series loop : {loop_seconds:8.2f} s  (extrapolated from {len(sample)} series, single alpha)")
+    print(f"incremental day : {refit_seconds * 1000:8.1f} ms")
+    print(f"forecast 7 days : {forecast_seconds * 1000:8.1f} ms")
+    print(f"model state     : {model.nbytes() / 2**20:8.1f} MiB")
+    print(f"daily MAE       : model {model_mae:.3f} | seasonal naive {naive_mae:.3f}")
+    print(f"weekly-total MAE: model {model_week:.3f} | seasonal naive {naive_week:.3f}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--blocks", type=int, default=1000)
+    parser.add_argument("--diagnoses", type=int, default=200)
+    parser.add_argument("--years", type=float, default=3)
+    parser.add_argument("--loop-sample", type=int, default=200)
+    parser.add_argument("--seed", type=int, default=7)
+    main(parser.parse_args())
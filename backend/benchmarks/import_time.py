@@ -0,0 +1,64 @@
+# backend/benchmarks/import_time.py
+#
+# Cold-start budget: how long `import backend.main` takes in a fresh
+# interpreter, and which modules dominate it. Exits non-zero when the
+# cumulative import time is over budget, so it can gate CI.
+#
+#   python -m backend.benchmarks.import_time
+#   python -m backend.benchmarks.import_time --budget-ms 2000 --top 20
+#
+# AWS clients are built lazily (backend/core/aws.py); nothing here should
+# need credentials or network.
+
+import argparse
+import os
+import re
+import subprocess
+import sys
+
+# fastapi + pydantic are ~0.8 s of this and boto3 another ~0.13 s; the
+# budget is for everything the app adds on top (numpy, sqlite3 and the
+# drug index build stay out of import, see drug_index / diagnosis_cache)
+DEFAULT_BUDGET_MS = 2000.0
+
+_LINE_RE = re.compile(r"import time:\s+(\d+)\s+\|\s+(\d+)\s+\|(\s+)(\S+)")
+
+
+def measure(module: str):
+    """Returns [(module, self_us, cumulative_us, depth)] from -X importtime."""
+    env = dict(os.environ, PYTHONDONTWRITEBYTECODE="1")
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", f"import {module}"],
+        capture_output=True, text=True, env=env,
+    )
+    if result.returncode != 0:
+        sys.stderr.write(result.stderr)
+        raise SystemExit(f"import {module} failed")
+
+    rows = []
+    for line in result.stderr.splitlines():
+        match = _LINE_RE.match(line)
+        if match:
+            self_us, cumulative_us, indent, name = match.groups()
+            rows.append((name, int(self_us), int(cumulative_us), (len(indent) - 1) // 2))
+    return rows
+
+
+def main(args):
+    rows = measure(args.module)
+    total_ms = next((cum for name, _, cum, _ in rows if name == args.module), 0) / 1000
+
+    print(f"{'module':<50} | {'self ms':>8} | {'cum ms':>8}")
+    for name, self_us, cumulative_us, depth in sorted(rows, key=lambda r: -r[2])[:args.top]:
+        print(f"{'  ' * depth + name:<50} | {self_us / 1000:>8.1f} | {cumulative_us / 1000:>8.1f}")
+
+    print(f"\nimport {args.module}: {total_ms:.1f} ms (budget {args.budget_ms:.0f} ms)")
+    return 0 if total_ms <= args.budget_ms else 1
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--module", default="backend.main")
+    parser.add_argument("--budget-ms", type=float, default=DEFAULT_BUDGET_MS)
+    parser.add_argument("--top", type=int, default=15)
+    sys.exit(main(parser.parse_args()))
@@ -0,0 +1,105 @@
+# backend/benchmarks/load_diagnose.py
+#
+# Closed-loop load test for POST /cases/diagnose against one running worker.
+#
+#   uvicorn backend.main:app --workers 1
+#   python -m backend.benchmarks.load_diagnose --patient-id PAT-xxxx
+#
+# For each concurrency level, N clients post back-to-back for --duration
+# seconds. The highest level whose p99 stays under --p99-budget-ms with
+# no errors is reported as the sustainable concurrency.
+
+import argparse
+import asyncio
+import statistics
+import time
+
+import httpx
+
+
+SYMPTOMS = [
+    "bukhar, sir dard",
+    "teen din se tez bukhar aur kamjori",
+    "pet dard aur ulti",
+    "khansi aur saans lene mein taklif",
+]
+
+
+def percentile(values, pct):
+    if not values:
+        return 0.0
+    values = sorted(values)
+    idx = min(len(values) - 1, int(round(pct / 100 * (len(values) - 1))))
+    return values[idx]
+
+
+async def client_loop(client, args, deadline, latencies, errors, seed):
+    i = seed
+    while time.perf_counter() < deadline:
+        payload = {
+            "PatientID": args.patient_id,
+            "ASHAWorkerID": args.asha_id,
+            "SymptomsRaw": SYMPTOMS[i % len(SYMPTOMS)],
+            "Language": "hi-IN",
+        }
+        i += 1
+
+        start = time.perf_counter()
+        try:
+            response = await client.post("/cases/diagnose", json=payload)
+            if response.status_code != 200:
+                errors.append(response.status_code)
+                continue
+        except httpx.HTTPError as e:
+            errors.append(type(e).__name__)
+            continue
+        latencies.append((time.perf_counter() - start) * 1000)
+
+
+async def run_level(args, concurrency):
+    latencies, errors = [], []
+    limits = httpx.Limits(max_connections=concurrency)
+
+    async with httpx.AsyncClient(base_url=args.url, timeout=args.timeout, limits=limits) as client:
+        deadline = time.perf_counter() + args.duration
+        await asyncio.gather(*[
+            client_loop(client, args, deadline, latencies, errors, n)
+            for n in range(concurrency)
+        ])
+
+    return {
+        "concurrency": concurrency,
+        "ok": len(latencies),
+        "errors": len(errors),
+        "rps": len(latencies) / args.duration,
+        "p50": statistics.median(latencies) if latencies else 0.0,
+        "p99": percentile(latencies, 99),
+    }
+
+
+async def main(args):
+    sustained = None
+
+    for level in args.levels:
+        r = await run_level(args, level)
+        print(
+            f"concurrency {r['concurrency']:>4} | {r['rps']:>7.1f} req/s"
+            f" | p50 {r['p50']:>8.1f} ms | p99 {r['p99']:>8.1f} ms"
+            f" | ok {r['ok']:>6} | errors {r['errors']}"
+        )
+        if r["errors"] == 0 and r["p99"] <= args.p99_budget_ms:
+            sustained = level
+
+    print(f"\nSustained concurrency (p99 <= {args.p99_budget_ms} ms, no errors): {sustained}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--url", default="http://127.0.0.1:8000")
+    parser.add_argument("--patient-id", required=True)
+    parser.add_argument("--asha-id", default="ASHA-001")
+    parser.add_argument("--levels", type=int, nargs="+", default=[1, 4, 16, 32, 64, 128])
+    parser.add_argument("--duration", type=float, default=20.0)
+    parser.add_argument("--timeout", type=float, default=60.0)
+    parser.add_argument("--p99-budget-ms", type=float, default=10_000)
+    asyncio.run(main(parser.parse_args()))
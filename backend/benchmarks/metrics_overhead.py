@@ -0,0 +1,136 @@
+# backend/benchmarks/metrics_overhead.py
+#
+# What the stage timers, DynamoDB/Bedrock recording and /metrics cost:
+#
+#   1. one stage() block and one histogram observe, in microseconds
+#   2. a whole diagnosis (patient read, prompt, model, parse, case write)
+#      with METRICS_ENABLED off and on, interleaved so drift hits both
+#   3. rendering /metrics once series have accumulated
+#
+#   python -m backend.benchmarks.metrics_overhead
+#   python -m backend.benchmarks.metrics_overhead --diagnoses 2000
+#
+# Runs in-process with the model and DynamoDB stand-ins set to 0 ms, so
+# the per-diagnosis difference is all instrumentation; against real
+# calls (tens of ms to DynamoDB, seconds to Bedrock) it is far smaller
+# in relative terms.
+
+import argparse
+import asyncio
+import os
+import time
+
+
+def configure_offline(args):
+    """Must run before anything under backend/ is imported."""
+    os.environ.setdefault("STORAGE_BACKEND", "memory")
+    os.environ.setdefault("BEDROCK_BACKEND", "fake")
+    os.environ.setdefault("MEMORY_DB_LATENCY_MS", "0")
+    os.environ.setdefault("FAKE_BEDROCK_FIRST_TOKEN_MS", "0")
+    os.environ.setdefault("FAKE_BEDROCK_PER_TOKEN_MS", "0")
+    os.environ.setdefault("DIAGNOSIS_CACHE_BACKEND", "off")
+    os.environ.setdefault("EMERGENCY_FAST_PATH", "false")
+    # The scheduler's token bucket would otherwise pace the run at 10/s
+    os.environ.setdefault("BEDROCK_MAX_TPS", "0")
+
+
+def percentile(values, pct):
+    if not values:
+        return 0.0
+    values = sorted(values)
+    return values[min(len(values) - 1, int(round(pct / 100 * (len(values) - 1))))]
+
+
+def per_call_us(fn, n: int) -> float:
+    start = time.perf_counter()
+    for _ in range(n):
+        fn()
+    return (time.perf_counter() - start) / n * 1e6
+
+
+def micro(args, settings):
+    from backend.core.metrics import stage, STAGE_SECONDS
+
+    def timed_block():
+        with stage("bench"):
+            pass
+
+    def observe():
+        STAGE_SECONDS.observe(0.0042, ("bench",))
+
+    rows = []
+    for enabled in (False, True):
+        settings.METRICS_ENABLED = enabled
+        rows.append((enabled, per_call_us(timed_block, args.calls), per_call_us(observe, args.calls)))
+
+    print(f"\nper call ({args.calls:,} calls)")
+    for enabled, block_us, observe_us in rows:
+        print(f"  metrics {'on ' if enabled else 'off'} | stage() {block_us:6.2f} us | observe {observe_us:6.2f} us")
+
+
+async def end_to_end(args, settings):
+    from backend.core.database import patients_table
+    from backend.models.case import CaseDiagnoseRequest
+    from backend.services.diagnosis_service import diagnose_case
+
+    patients_table.put_item(Item={
+        "PatientID": "PAT-METRICS",
+        "ASHAWorkerID": "ASHA-BENCH",
+        "Name": "Metrics Check",
+        "Age": 40,
+        "Gender": "M",
+        "Village": "Bikram",
+        "RegisteredDate": "2026-01-01T00:00:00",
+    })
+
+    latencies = {False: [], True: []}
+    for i in range(args.warmup + args.diagnoses):
+        enabled = i % 2 == 1
+        settings.METRICS_ENABLED = enabled
+        payload = CaseDiagnoseRequest(
+            PatientID="PAT-METRICS",
+            ASHAWorkerID="ASHA-BENCH",
+            SymptomsRaw=f"bukhar aur khansi {i}",
+            Language="hi-IN",
+        )
+
+        start = time.perf_counter()
+        await diagnose_case(payload)
+        if i >= args.warmup:
+            latencies[enabled].append((time.perf_counter() - start) * 1000)
+
+    print(f"\ndiagnose_case, {args.diagnoses:,} diagnoses alternating off/on")
+    for enabled, values in latencies.items():
+        print(
+            f"  metrics {'on ' if enabled else 'off'} | p50 {percentile(values, 50):6.3f} ms"
+            f" | p99 {percentile(values, 99):6.3f} ms | mean {sum(values) / len(values):6.3f} ms"
+        )
+    added = percentile(latencies[True], 50) - percentile(latencies[False], 50)
+    print(f"  added at p50: {added * 1000:.1f} us")
+
+
+def render(args):
+    from backend.core.metrics import REGISTRY
+
+    text = REGISTRY.render()
+    us = per_call_us(REGISTRY.render, args.renders)
+    print(f"\n/metrics render: {len(text.splitlines())} lines, {len(text):,} bytes, {us / 1000:.2f} ms")
+
+
+def main(args):
+    configure_offline(args)
+
+    from backend.config import settings
+
+    micro(args, settings)
+    asyncio.run(end_to_end(args, settings))
+    render(args)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--calls", type=int, default=200_000)
+    parser.add_argument("--diagnoses", type=int, default=1000)
+    parser.add_argument("--warmup", type=int, default=50)
+    parser.add_argument("--renders", type=int, default=200)
+    main(parser.parse_args())
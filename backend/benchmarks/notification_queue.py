@@ -0,0 +1,195 @@
+# backend/benchmarks/notification_queue.py
+#
+# A district-wide outbreak alert (one message to each of --recipients
+# doctors) plus a burst of case reports to a few busy doctors, sent:
+#
+#   inline     one awaited send per message, as a request handler would
+#   queue      enqueue everything, background workers batch and send
+#
+# The queue runs twice: with the provider limit (--provider-rate,
+# WhatsApp Cloud API's 80 msg/s by default) and with it lifted, to show
+# the pipeline's own ceiling. Reports caller time (how long the request
+# that raised the alert is held), messages/s, enqueue -> accepted delay,
+# and the busiest 1 s (provider) and 60 s (recipient) windows actually
+# sent, against the configured limits.
+#
+#   python -m backend.benchmarks.notification_queue
+#   python -m backend.benchmarks.notification_queue --recipients 5000 --sink-ms 300 --failure-rate 0.05
+#
+# Uses MockWhatsAppSink; no WhatsApp API is called.
+
+import argparse
+import asyncio
+import time
+from collections import defaultdict
+
+
+def percentile(values, pct):
+    if not values:
+        return 0.0
+    values = sorted(values)
+    return values[min(len(values) - 1, int(round(pct / 100 * (len(values) - 1))))]
+
+
+def recording_sink(args):
+    from backend.services.notification_service import MockWhatsAppSink
+
+    class RecordingSink(MockWhatsAppSink):
+        """Notes when each accepted message went out."""
+
+        def __init__(self, **kwargs):
+            super().__init__(**kwargs)
+            self.sent_at = []   # (monotonic, recipient)
+
+        async def send_batch(self, messages):
+            results = await super().send_batch(messages)
+            now = time.monotonic()
+            self.sent_at += [(now, m["Recipient"]) for m, r in zip(messages, results) if r is None]
+            return results
+
+    return RecordingSink(
+        latency_ms=args.sink_ms,
+        per_message_ms=args.per_message_ms,
+        failure_rate=args.failure_rate,
+        seed=args.seed,
+    )
+
+
+def workload(args):
+    from backend.services.notification_service import OUTBREAK_ALERT, CASE_ASSIGNED
+
+    alert = {
+        "district": "Patna", "block": "Bikram", "village": "Bikram", "icd10_code": "A90",
+        "count": 9, "expected": 1.4, "z_score": 6.2, "date": "2026-10-18",
+    }
+    report = {
+        "case_id": "CASE-BENCH", "patient_name": "Sita", "patient_age": 30, "patient_gender": "F",
+        "symptoms": "bukhar aur sir dard", "diagnosis": "Dengue fever", "confidence": 78,
+        "icd10_code": "A90", "icd10_description": "Dengue fever", "risk_level": "URGENT",
+        "risk_reason": "High fever", "actions": "  1. Check platelets\n", "protocol": "ICMR dengue",
+        "doctor_name": "Dr A", "specialization": "General Physician", "distance_km": 3.2,
+    }
+
+    messages = [(f"DOC-{i:05d}", OUTBREAK_ALERT.name, alert) for i in range(args.recipients)]
+    messages += [(f"DOC-{i:05d}", CASE_ASSIGNED.name, report) for i in range(args.busy) for _ in range(args.reports)]
+    return messages
+
+
+def busiest_window(times, seconds: float) -> int:
+    times = sorted(times)
+    best, lo = 0, 0
+    for hi, t in enumerate(times):
+        while t - times[lo] >= seconds:
+            lo += 1
+        best = max(best, hi - lo + 1)
+    return best
+
+
+async def inline(args, messages):
+    from backend.services.notification_service import TEMPLATES
+
+    sink = recording_sink(args)
+    start = time.perf_counter()
+    limit = time.perf_counter() + args.inline_seconds
+    sent = 0
+    for recipient, template, values in messages:
+        text = TEMPLATES[template].render(values)
+        await sink.send_batch([{"Recipient": recipient, "Text": text}])
+        sent += 1
+        if time.perf_counter() > limit:
+            break
+    seconds = time.perf_counter() - start
+
+    rate = sent / seconds
+    print(
+        f"{'inline':>22} | caller held {len(messages) / rate:8.1f} s (extrapolated from {sent} sends)"
+        f" | {rate:7.1f} msg/s"
+    )
+
+
+async def queued(args, messages, label: str, provider_rate: float):
+    from backend.services.notification_service import NotificationQueue
+
+    sink = recording_sink(args)
+    queue = NotificationQueue(
+        sink=sink,
+        workers=args.workers,
+        batch_size=args.batch_size,
+        provider_rate=provider_rate,
+        provider_burst=provider_rate,
+        recipient_per_minute=args.recipient_per_minute,
+        recipient_burst=args.recipient_burst,
+        max_attempts=args.max_attempts,
+        retry_base_seconds=args.retry_seconds,
+    )
+    await queue.start()
+
+    start = time.perf_counter()
+    for recipient, template, values in messages:
+        queue.enqueue(recipient, template, values)
+    caller = time.perf_counter() - start
+
+    # Busy doctors' later reports wait on their per-recipient pacing;
+    # measure throughput on the alert fan-out, then let the rest finish
+    first = time.monotonic()
+    await queue.drain(timeout=args.timeout)
+    await queue.stop()
+
+    stats = queue.stats()
+    times = [t for t, _ in sink.sent_at]
+    alert_times = sorted(t for t, r in sink.sent_at if int(r[4:]) >= args.busy)
+    alert_seconds = (alert_times[-1] - first) if alert_times else 0.0
+
+    per_recipient = defaultdict(list)
+    for t, recipient in sink.sent_at:
+        per_recipient[recipient].append(t)
+    worst_recipient = max((busiest_window(ts, 60) for ts in per_recipient.values()), default=0)
+
+    delays = sorted(queue.delays)
+    print(
+        f"{label:>22} | caller held {caller * 1000:8.1f} ms ({caller / len(messages) * 1e6:.1f} us/msg)"
+        f" | {len(alert_times) / alert_seconds if alert_seconds else 0:7.1f} msg/s"
+        f" | delay p50 {percentile(delays, 50):6.2f} s p99 {percentile(delays, 99):6.2f} s"
+        f" | avg batch {stats['avg_batch_size']:5.1f}"
+    )
+    provider_limit = f"<= {provider_rate * 2:g} allowed" if provider_rate > 0 else "unlimited"
+    print(
+        f"{'':>22} | sent {stats['sent']}, retried {stats['retried']}, dead-lettered {stats['dead_lettered']},"
+        f" left {stats['queued'] + stats['in_flight']}"
+        f" | busiest 1 s: {busiest_window(times, 1)} ({provider_limit})"
+        f" | busiest recipient 60 s: {worst_recipient}"
+        f" (<= {args.recipient_burst + args.recipient_per_minute:g} allowed)"
+    )
+
+
+async def main(args):
+    messages = workload(args)
+    print(
+        f"{args.recipients} alert recipients + {args.busy} doctors x {args.reports} case reports"
+        f" = {len(messages)} messages; sink {args.sink_ms:g} ms/batch, {args.failure_rate:.0%} transient failures\n"
+    )
+
+    await inline(args, messages)
+    await queued(args, messages, f"queue {args.provider_rate:g} msg/s", args.provider_rate)
+    await queued(args, messages, "queue, no provider cap", 0)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--recipients", type=int, default=1000)
+    parser.add_argument("--busy", type=int, default=10, help="doctors receiving several case reports")
+    parser.add_argument("--reports", type=int, default=8, help="case reports per busy doctor")
+    parser.add_argument("--sink-ms", type=float, default=200, help="mock API round trip per batch")
+    parser.add_argument("--per-message-ms", type=float, default=0.5)
+    parser.add_argument("--failure-rate", type=float, default=0.02)
+    parser.add_argument("--workers", type=int, default=4)
+    parser.add_argument("--batch-size", type=int, default=50)
+    parser.add_argument("--provider-rate", type=float, default=80)
+    parser.add_argument("--recipient-per-minute", type=float, default=10)
+    parser.add_argument("--recipient-burst", type=float, default=5)
+    parser.add_argument("--max-attempts", type=int, default=5)
+    parser.add_argument("--retry-seconds", type=float, default=0.2)
+    parser.add_argument("--inline-seconds", type=float, default=5, help="stop the inline run after this long")
+    parser.add_argument("--timeout", type=float, default=120)
+    parser.add_argument("--seed", type=int, default=7)
+    asyncio.run(main(parser.parse_args()))
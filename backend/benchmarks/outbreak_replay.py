@@ -0,0 +1,148 @@
+# backend/benchmarks/outbreak_replay.py
+#
+# Push a synthetic year of cases through the outbreak detector and
+# report throughput plus how many injected outbreaks it caught.
+#
+#   python -m backend.benchmarks.outbreak_replay
+#   python -m backend.benchmarks.outbreak_replay --villages 2000 --outbreaks 40
+#
+# Background incidence is seasonal Poisson per village and disease;
+# outbreaks add a burst of extra cases to one village for a few days.
+
+import argparse
+import time
+from datetime import date, timedelta
+
+import numpy as np
+
+from backend.services.outbreak_service import OutbreakDetector, ANY_VILLAGE
+
+
+# ICD-10 code -> (mean cases/village/day, peak month or None)
+DISEASES = {
+    "A90": (0.02, 9),     # dengue
+    "B54": (0.03, 8),     # malaria
+    "A01.0": (0.02, 6),   # typhoid
+    "A09": (0.08, 7),     # diarrhoea / gastroenteritis
+    "J06.9": (0.10, 1),   # upper respiratory infection
+}
+
+OUTBREAK_DAYS = 5
+OUTBREAK_EXTRA_PER_DAY = 3.0
+
+
+def seasonal_rate(base: float, peak_month, day: date) -> float:
+    if peak_month is None:
+        return base
+    # Cosine bump peaking mid-month, 3x at peak, 0.5x at the trough
+    offset = (day.month - peak_month + day.day / 30) * np.pi / 6
+    return base * (1.75 + 1.25 * np.cos(offset))
+
+
+def make_geography(villages: int):
+    places = []
+    for v in range(villages):
+        district = f"District-{v % 5}"
+        block = f"{district}/Block-{(v // 5) % 10}"
+        places.append((district, block, f"{block}/Village-{v}"))
+    return places
+
+
+def make_events(args, rng: np.random.Generator):
+    """Returns ((case, patient) pairs in day order, injected, places, start)."""
+    places = make_geography(args.villages)
+    start = date(args.year, 1, 1)
+
+    injected = []
+    for _ in range(args.outbreaks):
+        injected.append((
+            int(rng.integers(len(places))),
+            str(rng.choice(list(DISEASES))),
+            int(rng.integers(30, 360 - OUTBREAK_DAYS)),
+        ))
+    burst = {(v, code, d0 + i) for v, code, d0 in injected for i in range(OUTBREAK_DAYS)}
+
+    events = []
+    for offset in range(365):
+        day = start + timedelta(days=offset)
+        ordinal = day.toordinal()
+        for code, (base, peak) in DISEASES.items():
+            counts = rng.poisson(seasonal_rate(base, peak, day), size=len(places))
+            for v in np.nonzero(counts)[0]:
+                events.extend([(v, code, ordinal)] * int(counts[v]))
+        for v, code, d in burst:
+            if d == offset:
+                extra = int(rng.poisson(OUTBREAK_EXTRA_PER_DAY)) + 1
+                events.extend([(v, code, ordinal)] * extra)
+
+    patients = [
+        {"District": d, "Block": b, "Village": name} for d, b, name in places
+    ]
+    cases = [
+        ({"ICD10Code": code, "CreatedAt": date.fromordinal(ordinal).isoformat() + "T10:00:00"}, patients[v])
+        for v, code, ordinal in events
+    ]
+    return cases, injected, places, start
+
+
+def main(args):
+    rng = np.random.default_rng(args.seed)
+
+    print("generating events ...")
+    cases, injected, places, start = make_events(args, rng)
+
+    detector = OutbreakDetector(
+        window_days=args.window,
+        z_threshold=args.z,
+        min_cases=args.min_cases,
+        min_baseline_days=args.min_baseline_days,
+        max_alerts=len(cases),
+    )
+
+    t0 = time.perf_counter()
+    for case, patient in cases:
+        detector.observe_case(case, patient)
+    elapsed = time.perf_counter() - t0
+
+    alerts = detector.alerts(limit=len(cases))
+    village_alerts = [a for a in alerts if a["Village"] != ANY_VILLAGE]
+    block_alerts = [a for a in alerts if a["Village"] == ANY_VILLAGE]
+
+    # An outbreak counts as caught if its village/code alerted during the burst
+    bursts = {}
+    for v, code, d0 in injected:
+        first = (start + timedelta(days=d0)).isoformat()
+        last = (start + timedelta(days=d0 + OUTBREAK_DAYS - 1)).isoformat()
+        bursts.setdefault((places[v][2], code), []).append((first, last))
+
+    caught, false_alerts = set(), 0
+    for a in village_alerts:
+        hits = [
+            (a["Village"], a["ICD10Code"], first)
+            for first, last in bursts.get((a["Village"], a["ICD10Code"]), [])
+            if first <= a["Date"] <= last
+        ]
+        caught.update(hits)
+        false_alerts += not hits
+
+    stats = detector.stats()
+    print(f"events          : {len(cases):,}")
+    print(f"elapsed         : {elapsed:.2f} s")
+    print(f"throughput      : {len(cases) / elapsed:,.0f} events/s")
+    print(f"series          : {stats['series']:,}")
+    print(f"village alerts  : {len(village_alerts):,} ({false_alerts} outside injected bursts)")
+    print(f"block alerts    : {len(block_alerts):,}")
+    print(f"outbreaks caught: {len(caught)}/{len(injected)}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--villages", type=int, default=1000)
+    parser.add_argument("--outbreaks", type=int, default=20)
+    parser.add_argument("--year", type=int, default=2025)
+    parser.add_argument("--window", type=int, default=28)
+    parser.add_argument("--z", type=float, default=3.0)
+    parser.add_argument("--min-cases", type=int, default=3)
+    parser.add_argument("--min-baseline-days", type=int, default=7)
+    parser.add_argument("--seed", type=int, default=7)
+    main(parser.parse_args())
@@ -0,0 +1,161 @@
+# backend/benchmarks/profiler_overhead.py
+#
+# What the profiling hook costs a request that is NOT being profiled,
+# and what sampling costs one that is:
+#
+#   off        PROFILER_SECRET unset (the default)
+#   idle       secret set, request carries no X-Profile header
+#   armed      secret set, another route armed (armed routes are matched)
+#   profiled   valid signed X-Profile header, sampler running
+#
+#   python -m backend.benchmarks.profiler_overhead
+#   python -m backend.benchmarks.profiler_overhead --requests 50000
+#
+# Requests go straight into the ASGI app in-process (no server, no
+# sockets). "middleware" wraps a bare endpoint so only the hook is
+# measured; "app" is GET /patients/profile/{id} through the whole
+# middleware stack, router and the in-memory DynamoDB stand-in, with
+# the modes interleaved in rounds so drift hits them all alike.
+
+import argparse
+import asyncio
+import os
+import time
+
+
+def configure_offline(args):
+    """Must run before anything under backend/ is imported."""
+    os.environ.setdefault("STORAGE_BACKEND", "memory")
+    os.environ.setdefault("MEMORY_DB_LATENCY_MS", "0")
+    os.environ.setdefault("PROFILER_INTERVAL_MS", str(args.interval_ms))
+
+
+SECRET = "benchmark-secret"
+
+
+def percentile(values, pct):
+    if not values:
+        return 0.0
+    values = sorted(values)
+    return values[min(len(values) - 1, int(round(pct / 100 * (len(values) - 1))))]
+
+
+def http_scope(app, path: str, headers=()):
+    return {
+        "type": "http",
+        "asgi": {"version": "3.0"},
+        "http_version": "1.1",
+        "method": "GET",
+        "scheme": "http",
+        "path": path,
+        "raw_path": path.encode(),
+        "root_path": "",
+        "query_string": b"",
+        "headers": [(b"host", b"bench")] + list(headers),
+        "client": ("127.0.0.1", 1),
+        "server": ("bench", 80),
+        "app": app,
+    }
+
+
+async def receive():
+    return {"type": "http.request", "body": b"", "more_body": False}
+
+
+async def send(message):
+    pass
+
+
+async def bare_endpoint(scope, receive, send):
+    await send({"type": "http.response.start", "status": 200, "headers": []})
+    await send({"type": "http.response.body", "body": b"{}"})
+
+
+async def run_mode(args, settings, profiler, target, app, path, mode: str, n: int):
+    from backend.core.profiler import sign_profile_request
+
+    settings.PROFILER_SECRET = "" if mode == "off" else SECRET
+    profiler.armed.clear()
+    if mode == "armed":
+        diagnose = next(r for r in app.router.routes if getattr(r, "path", None) == "/cases/diagnose")
+        profiler.arm("POST", diagnose, 10 ** 9)
+
+    headers = ()
+    if mode == "profiled":
+        headers = ((b"x-profile", sign_profile_request(path, secret=SECRET).encode()),)
+
+    latencies = []
+    for i in range(args.warmup + n):
+        scope = http_scope(app, path, headers)
+        start = time.perf_counter()
+        await target(scope, receive, send)
+        if i >= args.warmup:
+            latencies.append((time.perf_counter() - start) * 1e6)
+
+    profiler.armed.clear()
+    return latencies
+
+
+def report(label: str, latencies, baseline=None, against: str = "off"):
+    p50 = percentile(latencies, 50)
+    line = f"  {label:9} | p50 {p50:8.2f} us | p99 {percentile(latencies, 99):8.2f} us"
+    if baseline is not None:
+        line += f" | {p50 - baseline:+7.2f} us vs {against}"
+    print(line)
+    return p50
+
+
+async def main(args):
+    configure_offline(args)
+
+    from backend.config import settings
+    from backend.core.database import patients_table
+    from backend.core.profiler import ProfilerMiddleware, profiler
+    from backend.main import app
+
+    patients_table.put_item(Item={
+        "PatientID": "PAT-PROFILE",
+        "ASHAWorkerID": "ASHA-BENCH",
+        "Name": "Profiler Check",
+        "Age": 40,
+        "Gender": "M",
+        "Village": "Bikram",
+        "RegisteredDate": "2026-01-01T00:00:00",
+    })
+
+    wrapped = ProfilerMiddleware(bare_endpoint)
+    modes = ["off", "idle", "armed"]
+
+    print(f"middleware around a bare endpoint, {args.requests:,} requests per mode")
+    baseline = report("no hook", await run_mode(args, settings, profiler, bare_endpoint, app, "/", "off", args.requests))
+    for mode in modes:
+        report(mode, await run_mode(args, settings, profiler, wrapped, app, "/", mode, args.requests), baseline, "no hook")
+
+    path = "/patients/profile/PAT-PROFILE"
+    print(f"\nGET {path} through the app, {args.app_requests:,} requests per mode")
+    # Each profiled request keeps its profile; a few hundred is plenty
+    rounds = max(1, args.app_requests // 250)
+    per_round = {"off": 250, "idle": 250, "armed": 250, "profiled": max(1, 300 // rounds)}
+    latencies = {mode: [] for mode in per_round}
+    for _ in range(rounds):
+        for mode, n in per_round.items():
+            latencies[mode] += await run_mode(args, settings, profiler, app, app, path, mode, n)
+
+    baseline = report("off", latencies.pop("off"))
+    for mode, values in latencies.items():
+        report(mode, values, baseline)
+
+    bind_n = 1_000_000
+    start = time.perf_counter()
+    for _ in range(bind_n):
+        profiler.bind(len)
+    print(f"\nprofiler.bind (every run_db / run_model) while idle: {(time.perf_counter() - start) / bind_n * 1e9:.0f} ns")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--requests", type=int, default=100_000)
+    parser.add_argument("--app-requests", type=int, default=5_000)
+    parser.add_argument("--warmup", type=int, default=50)
+    parser.add_argument("--interval-ms", type=float, default=5)
+    asyncio.run(main(parser.parse_args()))
@@ -0,0 +1,134 @@
+# backend/benchmarks/soap_stream.py
+#
+# What the doctor waits for when asking for a SOAP note:
+#
+#   blocking   invoke_model, note shown when the whole generation is back
+#   streamed   stream_soap_note, time to the first delta and to each
+#              finished section (SUBJECTIVE readable while PLAN is written)
+#   cached     the same case version asked again (replayed from the cache)
+#   abandoned  consumer goes away after the first section; how long the
+#              model stream keeps running afterwards
+#
+#   python -m backend.benchmarks.soap_stream
+#   python -m backend.benchmarks.soap_stream --notes 20 --per-token-ms 25
+#
+# Uses FakeBedrockClient with simulated time-to-first-token and
+# per-token latency; no AWS calls.
+
+import argparse
+import asyncio
+import os
+import time
+
+
+def configure_offline(args):
+    """Must run before anything under backend/ is imported."""
+    os.environ.setdefault("STORAGE_BACKEND", "memory")
+    os.environ.setdefault("MEMORY_DB_LATENCY_MS", "0")
+    os.environ.setdefault("BEDROCK_BACKEND", "fake")
+    os.environ.setdefault("BEDROCK_MAX_TPS", "0")
+    os.environ.setdefault("SOAP_CACHE_BACKEND", "memory")
+
+
+def percentile(values, pct):
+    if not values:
+        return 0.0
+    values = sorted(values)
+    return values[min(len(values) - 1, int(round(pct / 100 * (len(values) - 1))))]
+
+
+def sample_case(i: int):
+    case = {
+        "CaseID": f"CASE-SOAP-{i:04d}",
+        "PatientID": "PAT-SOAP",
+        "SymptomsEnglish": "fever and headache for three days, body ache",
+        "PrimaryDiagnosis": "Dengue fever",
+        "ConfidencePercent": 78,
+        "RiskLevel": "URGENT",
+        "ICD10Code": "A90",
+        "ICD10Description": "Dengue fever",
+        "ImmediateActions": ["Check platelet count", "Oral fluids", "Paracetamol only, no NSAIDs"],
+        "ICMRProtocol": "ICMR dengue case management",
+        "UpdatedAt": "2026-10-18T10:00:00",
+    }
+    patient = {"Name": "Sita", "Age": 30, "Gender": "F", "KnownAllergies": []}
+    return case, patient
+
+
+def report(label: str, values, unit: str = "ms"):
+    print(f"  {label:24} | p50 {percentile(values, 50):8.1f} {unit} | p99 {percentile(values, 99):8.1f} {unit}")
+
+
+async def main(args):
+    configure_offline(args)
+
+    from backend.services.diagnosis_service import get_bedrock
+    from backend.services.soap_service import (
+        build_soap_prompt,
+        _soap_request_body,
+        stream_soap_note,
+        soap_cache,
+    )
+    from backend.config import settings
+
+    client = get_bedrock()
+    client.first_token_ms = args.first_token_ms
+    client.per_token_ms = args.per_token_ms
+
+    blocking, first_delta, first_section, complete, cached, leftover = [], [], [], [], [], []
+
+    for i in range(args.notes):
+        case, patient = sample_case(i)
+        prompt = build_soap_prompt(case, patient, "fever")
+
+        start = time.perf_counter()
+        await asyncio.to_thread(client.invoke_model, modelId=settings.BEDROCK_MODEL_ID, body=_soap_request_body(prompt))
+        blocking.append((time.perf_counter() - start) * 1000)
+
+        start = time.perf_counter()
+        seen_delta = seen_section = None
+        async for event in stream_soap_note(case, patient, "fever"):
+            now = (time.perf_counter() - start) * 1000
+            if event["type"] == "delta" and seen_delta is None:
+                seen_delta = now
+            if event["type"] == "section" and seen_section is None:
+                seen_section = now
+        first_delta.append(seen_delta)
+        first_section.append(seen_section)
+        complete.append((time.perf_counter() - start) * 1000)
+
+        start = time.perf_counter()
+        async for event in stream_soap_note(case, patient, "fever"):
+            pass
+        cached.append((time.perf_counter() - start) * 1000)
+
+        # Abandon after the first section; count tokens generated after that
+        abandoned_case = dict(case, UpdatedAt=f"2026-10-18T11:{i % 60:02d}:00")
+        stream = stream_soap_note(abandoned_case, patient, "fever")
+        async for event in stream:
+            if event["type"] == "section":
+                break
+        await stream.aclose()
+        before = client.tokens_generated
+        await asyncio.sleep(args.per_token_ms * 20 / 1000)
+        leftover.append(client.tokens_generated - before)
+
+    print(
+        f"{args.notes} notes, fake model {args.first_token_ms:g} ms to first token + {args.per_token_ms:g} ms/token\n"
+    )
+    report("blocking, whole note", blocking)
+    report("streamed, first delta", first_delta)
+    report("streamed, first section", first_section)
+    report("streamed, whole note", complete)
+    report("cached reopen", cached)
+    report("tokens after abandon", leftover, "tok")
+    if soap_cache:
+        print(f"\ncache: {soap_cache.stats()}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--notes", type=int, default=10)
+    parser.add_argument("--first-token-ms", type=float, default=300)
+    parser.add_argument("--per-token-ms", type=float, default=15)
+    asyncio.run(main(parser.parse_args()))
@@ -0,0 +1,150 @@
+# backend/benchmarks/websocket_fanout.py
+#
+# Fan-out throughput of the WebSocket hub with many idle sockets and a
+# smaller set of active ones, split across several hubs sharing one
+# InProcessBroker (i.e. several workers on a common broker).
+#
+#   python -m backend.benchmarks.websocket_fanout
+#   python -m backend.benchmarks.websocket_fanout --idle 10000 --active 1000 --events 20000
+#
+# Sockets are in-memory fakes, so this measures the hub (encoding,
+# topic lookup, buffering, sender tasks, heartbeat sweeps), not the
+# kernel or network. A few active sockets are deliberately slow to show
+# coalescing and drop-oldest keeping their buffers bounded.
+
+import argparse
+import asyncio
+import random
+import time
+
+from backend.core.websocket import (
+    WebSocketHub,
+    InProcessBroker,
+    case_topic,
+    district_topic,
+)
+
+
+class FakeSocket:
+
+    def __init__(self, delay: float = 0.0):
+        self.delay = delay
+        self.received = 0
+
+    async def send_text(self, data: str):
+        if self.delay:
+            await asyncio.sleep(self.delay)
+        self.received += 1
+
+    async def close(self, code: int = 1000):
+        pass
+
+
+async def main(args):
+    rng = random.Random(args.seed)
+    broker = InProcessBroker()
+    hubs = [
+        WebSocketHub(broker=broker, max_queue=args.queue, heartbeat_seconds=3600, idle_timeout_seconds=7200)
+        for _ in range(args.workers)
+    ]
+    for hub in hubs:
+        await hub.start()
+
+    districts = [f"District-{i}" for i in range(args.districts)]
+
+    # Idle sockets: subscribed to their own case, which never changes
+    for i in range(args.idle):
+        hub = hubs[i % len(hubs)]
+        hub.subscribe(hub.connect(FakeSocket()), case_topic(f"IDLE-{i}"))
+
+    # Active sockets: one district dashboard each, plus their own case
+    sockets, active_conns = [], []
+    district_members = {d: [] for d in districts}
+    for i in range(args.active):
+        hub = hubs[i % len(hubs)]
+        socket = FakeSocket(delay=0.01 if i < args.slow else 0.0)
+        conn = hub.connect(socket)
+        district = districts[i % len(districts)]
+        hub.subscribe(conn, district_topic(district))
+        hub.subscribe(conn, case_topic(f"ACTIVE-{i}"))
+        district_members[district].append(i)
+        sockets.append(socket)
+        active_conns.append(conn)
+
+    expected = [0] * args.active
+
+    deliveries = 0
+    start = time.perf_counter()
+
+    for n in range(args.events):
+        publisher = hubs[n % len(hubs)]
+        if rng.random() < 0.5:
+            district = rng.choice(districts)
+            await publisher.publish(
+                district_topic(district),
+                {"type": "case_created", "case": {"CaseID": f"C-{n}", "RiskLevel": "URGENT"}},
+            )
+            members = district_members[district]
+        else:
+            i = rng.randrange(args.active)
+            await publisher.publish(
+                case_topic(f"ACTIVE-{i}"),
+                {"type": "case_status", "case": {"CaseID": f"ACTIVE-{i}", "Status": "DOCTOR_ASSIGNED"}},
+                coalesce_key=f"status:ACTIVE-{i}",
+            )
+            members = [i]
+
+        for i in members:
+            expected[i] += 1
+        deliveries += len(members)
+
+        if n % args.batch == 0:
+            await asyncio.sleep(0)
+
+    publish_seconds = time.perf_counter() - start
+
+    # Wait for fast sockets to drain; a buffered status update may have
+    # been superseded (coalesced) before its sender got to it
+    def drained(i):
+        conn = active_conns[i]
+        return sockets[i].received + conn.coalesced + conn.dropped >= expected[i]
+
+    while not all(drained(i) for i in range(args.slow, args.active)):
+        await asyncio.sleep(0.001)
+    drain_seconds = time.perf_counter() - start
+
+    sweep_start = time.perf_counter()
+    for hub in hubs:
+        for conn in list(hub.connections):
+            conn.enqueue(hub._ping, coalesce_key="ping")
+    sweep_ms = (time.perf_counter() - sweep_start) * 1000
+
+    slow = active_conns[:args.slow]
+    dropped = sum(conn.dropped for conn in slow)
+    coalesced = sum(conn.coalesced for conn in slow)
+    backlog = max((len(conn._pending) for conn in slow), default=0)
+
+    total = args.idle + args.active
+    print(f"sockets        : {total:,} ({args.idle:,} idle, {args.active:,} active, {args.slow} slow) on {args.workers} hubs")
+    print(f"events         : {args.events:,} published, {deliveries:,} socket deliveries")
+    print(f"publish        : {args.events / publish_seconds:,.0f} events/s")
+    print(f"delivered      : {deliveries / drain_seconds:,.0f} messages/s (until fast sockets drained)")
+    print(f"heartbeat sweep: {sweep_ms:.1f} ms for {total:,} sockets")
+    print(f"slow sockets   : {dropped:,} dropped, {coalesced:,} coalesced, max backlog {backlog} (cap {args.queue})")
+
+    for hub in hubs:
+        await hub.stop()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--idle", type=int, default=10_000)
+    parser.add_argument("--active", type=int, default=1_000)
+    parser.add_argument("--slow", type=int, default=20, help="active sockets that take 10 ms per send")
+    parser.add_argument("--districts", type=int, default=20)
+    parser.add_argument("--events", type=int, default=20_000)
+    parser.add_argument("--workers", type=int, default=2)
+    parser.add_argument("--queue", type=int, default=100)
+    parser.add_argument("--batch", type=int, default=50, help="events published between yields")
+    parser.add_argument("--seed", type=int, default=7)
+    asyncio.run(main(parser.parse_args()))
@@ -11,16 +11,138 @@ class Settings:
     AWS_SECRET_ACCESS_KEY: str = os.getenv("AWS_SECRET_ACCESS_KEY")
     AWS_REGION: str = os.getenv("AWS_REGION", "us-east-1")
 
+    # AWS client tuning (per worker process)
+    AWS_MAX_POOL_CONNECTIONS: int = int(os.getenv("AWS_MAX_POOL_CONNECTIONS", "50"))
+    AWS_MAX_ATTEMPTS: int = int(os.getenv("AWS_MAX_ATTEMPTS", "3"))
+    AWS_CONNECT_TIMEOUT_SECONDS: float = float(os.getenv("AWS_CONNECT_TIMEOUT_SECONDS", "2"))
+    AWS_READ_TIMEOUT_SECONDS: float = float(os.getenv("AWS_READ_TIMEOUT_SECONDS", "60"))
+    PREWARM_CLIENTS: bool = os.getenv("PREWARM_CLIENTS", "true").lower() == "true"
+
+    # Storage backend: dynamodb / memory (in-process stand-in, no AWS)
+    STORAGE_BACKEND: str = os.getenv("STORAGE_BACKEND", "dynamodb").lower()
+    MEMORY_DB_LATENCY_MS: float = float(os.getenv("MEMORY_DB_LATENCY_MS", "0"))
+
     # DynamoDB Tables
     DYNAMODB_PATIENTS_TABLE: str = os.getenv("DYNAMODB_PATIENTS_TABLE", "mediconnect-patients")
     DYNAMODB_CASES_TABLE: str = os.getenv("DYNAMODB_CASES_TABLE", "mediconnect-cases")
     DYNAMODB_DOCTORS_TABLE: str = os.getenv("DYNAMODB_DOCTORS_TABLE", "mediconnect-doctors")
+    DYNAMODB_ANALYTICS_TABLE: str = os.getenv("DYNAMODB_ANALYTICS_TABLE", "mediconnect-analytics")
 
     # WebSocket
     WEBSOCKET_URL: str = os.getenv("WEBSOCKET_URL")
+    WS_SEND_QUEUE_SIZE: int = int(os.getenv("WS_SEND_QUEUE_SIZE", "100"))
+    WS_HEARTBEAT_SECONDS: float = float(os.getenv("WS_HEARTBEAT_SECONDS", "20"))
+    WS_IDLE_TIMEOUT_SECONDS: float = float(os.getenv("WS_IDLE_TIMEOUT_SECONDS", "60"))
 
     # Bedrock
     BEDROCK_MODEL_ID: str = os.getenv("BEDROCK_MODEL_ID", "meta.llama3-8b-instruct-v1:0")
+    BEDROCK_STREAMING: bool = os.getenv("BEDROCK_STREAMING", "false").lower() == "true"
+
+    # Model backend: bedrock / fake (offline FakeBedrockClient)
+    BEDROCK_BACKEND: str = os.getenv("BEDROCK_BACKEND", "bedrock").lower()
+    FAKE_BEDROCK_FIRST_TOKEN_MS: float = float(os.getenv("FAKE_BEDROCK_FIRST_TOKEN_MS", "200"))
+    FAKE_BEDROCK_PER_TOKEN_MS: float = float(os.getenv("FAKE_BEDROCK_PER_TOKEN_MS", "5"))
+    FAKE_BEDROCK_MAX_TPS: float = float(os.getenv("FAKE_BEDROCK_MAX_TPS", "0"))   # 0 = never throttle
+
+    # Emergency keyword hits skip waiting for the model (case + doctor first)
+    EMERGENCY_FAST_PATH: bool = os.getenv("EMERGENCY_FAST_PATH", "true").lower() == "true"
+
+    # Duplicate diagnose submissions within this window share one case
+    DIAGNOSIS_DEDUP_SECONDS: float = float(os.getenv("DIAGNOSIS_DEDUP_SECONDS", "120"))
+
+    # Diagnosis Cache (memory / sqlite / off)
+    DIAGNOSIS_CACHE_BACKEND: str = os.getenv("DIAGNOSIS_CACHE_BACKEND", "memory").lower()
+    DIAGNOSIS_CACHE_PATH: str = os.getenv("DIAGNOSIS_CACHE_PATH", "diagnosis_cache.sqlite3")
+    DIAGNOSIS_CACHE_TTL_SECONDS: int = int(os.getenv("DIAGNOSIS_CACHE_TTL_SECONDS", "21600"))
+    DIAGNOSIS_CACHE_MAX_ENTRIES: int = int(os.getenv("DIAGNOSIS_CACHE_MAX_ENTRIES", "10000"))
+
+    # Finished SOAP notes, keyed by case version (UpdatedAt) and
+    # consultation text: memory / sqlite / off
+    SOAP_CACHE_BACKEND: str = os.getenv("SOAP_CACHE_BACKEND", "memory").lower()
+    SOAP_CACHE_PATH: str = os.getenv("SOAP_CACHE_PATH", "soap_cache.sqlite3")
+    SOAP_CACHE_TTL_SECONDS: int = int(os.getenv("SOAP_CACHE_TTL_SECONDS", "604800"))
+    SOAP_CACHE_MAX_ENTRIES: int = int(os.getenv("SOAP_CACHE_MAX_ENTRIES", "5000"))
+
+    # Drug interaction index: compiled from DRUG_DATASET_PATH (JSON; empty
+    # = built-in set) into DRUG_INDEX_PATH, mmap'd by every worker
+    DRUG_DATASET_PATH: str = os.getenv("DRUG_DATASET_PATH", "")
+    DRUG_INDEX_PATH: str = os.getenv("DRUG_INDEX_PATH", "drug_index.bin")
+
+    # Read-through item cache for patient / case gets (0 entries = off)
+    ITEM_CACHE_MAX_ENTRIES: int = int(os.getenv("ITEM_CACHE_MAX_ENTRIES", "10000"))
+    PATIENT_CACHE_TTL_SECONDS: float = float(os.getenv("PATIENT_CACHE_TTL_SECONDS", "300"))
+    CASE_CACHE_TTL_SECONDS: float = float(os.getenv("CASE_CACHE_TTL_SECONDS", "5"))
+
+    # Patient Search
+    PATIENT_SEARCH_REFRESH_SECONDS: int = int(os.getenv("PATIENT_SEARCH_REFRESH_SECONDS", "300"))
+
+    # Concurrency (per worker)
+    DB_MAX_CONCURRENCY: int = int(os.getenv("DB_MAX_CONCURRENCY", "32"))
+    BEDROCK_MAX_CONCURRENCY: int = int(os.getenv("BEDROCK_MAX_CONCURRENCY", "16"))
+
+    # Bedrock admission (token bucket; 0 = unlimited). Per worker, like
+    # the concurrency limits above: with N workers the account sees up
+    # to N x BEDROCK_MAX_TPS, so set it to the provisioned rate / N
+    BEDROCK_MAX_TPS: float = float(os.getenv("BEDROCK_MAX_TPS", "10"))
+    BEDROCK_BURST: float = float(os.getenv("BEDROCK_BURST", "10"))
+    BEDROCK_THROTTLE_RETRIES: int = int(os.getenv("BEDROCK_THROTTLE_RETRIES", "3"))
+
+    # Doctor Matching
+    DOCTOR_SCAN_SEGMENTS: int = int(os.getenv("DOCTOR_SCAN_SEGMENTS", "1"))
+    DOCTOR_SCAN_PAGE_SIZE: int = int(os.getenv("DOCTOR_SCAN_PAGE_SIZE", "1000"))
+
+    # Doctor roster: change feed (auto / streams / memory / off), how often
+    # it is polled, the oldest roster a match may read before forcing a
+    # full resync, and the periodic safety resync
+    DOCTOR_FEED: str = os.getenv("DOCTOR_FEED", "auto").lower()
+    DOCTOR_FEED_POLL_SECONDS: float = float(os.getenv("DOCTOR_FEED_POLL_SECONDS", "1"))
+    DOCTOR_ROSTER_MAX_STALENESS_SECONDS: float = float(os.getenv("DOCTOR_ROSTER_MAX_STALENESS_SECONDS", "30"))
+    DOCTOR_ROSTER_RESYNC_SECONDS: float = float(os.getenv("DOCTOR_ROSTER_RESYNC_SECONDS", "900"))
+    DOCTOR_DEFAULT_CAPACITY: int = int(os.getenv("DOCTOR_DEFAULT_CAPACITY", "5"))
+    # With DynamoDB Streams, one worker per host reads the feed and shares
+    # the roster with the others through this file (empty = every worker reads)
+    DOCTOR_ROSTER_SHARE_PATH: str = os.getenv("DOCTOR_ROSTER_SHARE_PATH", "doctor_roster.json")
+
+    # Outbreak Detection
+    OUTBREAK_WINDOW_DAYS: int = int(os.getenv("OUTBREAK_WINDOW_DAYS", "28"))
+    OUTBREAK_EWMA_ALPHA: float = float(os.getenv("OUTBREAK_EWMA_ALPHA", "0.1"))
+    OUTBREAK_Z_THRESHOLD: float = float(os.getenv("OUTBREAK_Z_THRESHOLD", "3.0"))
+    OUTBREAK_CUSUM_K: float = float(os.getenv("OUTBREAK_CUSUM_K", "0.5"))
+    OUTBREAK_CUSUM_H: float = float(os.getenv("OUTBREAK_CUSUM_H", "5.0"))
+    OUTBREAK_MIN_CASES: int = int(os.getenv("OUTBREAK_MIN_CASES", "3"))
+    OUTBREAK_MIN_BASELINE_DAYS: int = int(os.getenv("OUTBREAK_MIN_BASELINE_DAYS", "7"))
+    # How often each worker merges all workers' block counts (DX# rollups)
+    OUTBREAK_SYNC_SECONDS: float = float(os.getenv("OUTBREAK_SYNC_SECONDS", "30"))
+
+    # District Analytics (rollup counters are flushed write-behind)
+    ANALYTICS_FLUSH_SECONDS: float = float(os.getenv("ANALYTICS_FLUSH_SECONDS", "5"))
+    FORECAST_HISTORY_DAYS: int = int(os.getenv("FORECAST_HISTORY_DAYS", "365"))
+
+    # Observability: /metrics (stage, DynamoDB and Bedrock timings) and
+    # OpenTelemetry spans (needs opentelemetry-api plus an SDK/exporter)
+    METRICS_ENABLED: bool = os.getenv("METRICS_ENABLED", "true").lower() == "true"
+    OTEL_ENABLED: bool = os.getenv("OTEL_ENABLED", "false").lower() == "true"
+
+    # On-demand request profiling (signed X-Profile header or routes armed
+    # via /admin/profiler). Off unless a secret is set; the secret is also
+    # the admin token (X-Profiler-Token).
+    PROFILER_SECRET: str = os.getenv("PROFILER_SECRET", "")
+    PROFILER_INTERVAL_MS: float = float(os.getenv("PROFILER_INTERVAL_MS", "5"))
+    PROFILER_MAX_SECONDS: float = float(os.getenv("PROFILER_MAX_SECONDS", "30"))
+    PROFILER_KEEP: int = int(os.getenv("PROFILER_KEEP", "50"))
+
+    # Outbound WhatsApp queue. Provider default is the Cloud API's
+    # 80 msg/s; recipients are paced like WhatsApp's per-user limit.
+    NOTIFY_WORKERS: int = int(os.getenv("NOTIFY_WORKERS", "4"))
+    NOTIFY_BATCH_SIZE: int = int(os.getenv("NOTIFY_BATCH_SIZE", "50"))
+    NOTIFY_PROVIDER_RATE: float = float(os.getenv("NOTIFY_PROVIDER_RATE", "80"))   # 0 = unlimited
+    NOTIFY_PROVIDER_BURST: float = float(os.getenv("NOTIFY_PROVIDER_BURST", "80"))
+    NOTIFY_RECIPIENT_PER_MINUTE: float = float(os.getenv("NOTIFY_RECIPIENT_PER_MINUTE", "10"))
+    NOTIFY_RECIPIENT_BURST: float = float(os.getenv("NOTIFY_RECIPIENT_BURST", "5"))
+    NOTIFY_MAX_ATTEMPTS: int = int(os.getenv("NOTIFY_MAX_ATTEMPTS", "5"))
+    NOTIFY_RETRY_BASE_SECONDS: float = float(os.getenv("NOTIFY_RETRY_BASE_SECONDS", "1"))
+    NOTIFY_MAX_QUEUE: int = int(os.getenv("NOTIFY_MAX_QUEUE", "100000"))
+    MOCK_WHATSAPP_LATENCY_MS: float = float(os.getenv("MOCK_WHATSAPP_LATENCY_MS", "50"))
 
     # Feature Flags
     MOCK_WHATSAPP: bool = os.getenv("MOCK_WHATSAPP", "true").lower() == "true"
@@ -0,0 +1,63 @@
+# backend/core/aws.py
+
+import threading
+from functools import lru_cache
+
+from backend.config import settings
+
+
+# -------------------------------------------------
+# Lazily Built, Per-Process AWS Clients
+# -------------------------------------------------
+# Building a boto3 resource/client loads its service model from disk,
+# which is most of the cost of importing the app. Nothing here runs at
+# import time; the first caller (or the startup pre-warm in main.py)
+# pays it once per worker process, after uvicorn has forked.
+
+_build_lock = threading.Lock()
+
+
+def _boto_config():
+    from botocore.config import Config
+
+    return Config(
+        max_pool_connections=settings.AWS_MAX_POOL_CONNECTIONS,
+        retries={"max_attempts": settings.AWS_MAX_ATTEMPTS, "mode": "adaptive"},
+        connect_timeout=settings.AWS_CONNECT_TIMEOUT_SECONDS,
+        read_timeout=settings.AWS_READ_TIMEOUT_SECONDS,
+    )
+
+
+@lru_cache(maxsize=None)
+def get_session():
+    import boto3
+
+    # boto3's default session is not safe to build resources from
+    # concurrently, so each process gets its own explicit session.
+    with _build_lock:
+        return boto3.session.Session(
+            region_name=settings.AWS_REGION,
+            aws_access_key_id=settings.AWS_ACCESS_KEY_ID,
+            aws_secret_access_key=settings.AWS_SECRET_ACCESS_KEY,
+        )
+
+
+@lru_cache(maxsize=None)
+def get_dynamodb_resource():
+    session = get_session()
+    with _build_lock:
+        return session.resource("dynamodb", config=_boto_config())
+
+
+@lru_cache(maxsize=None)
+def get_bedrock_runtime():
+    session = get_session()
+    with _build_lock:
+        return session.client("bedrock-runtime", config=_boto_config())
+
+
+@lru_cache(maxsize=None)
+def get_dynamodb_streams():
+    session = get_session()
+    with _build_lock:
+        return session.client("dynamodbstreams", config=_boto_config())
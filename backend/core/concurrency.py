@@ -0,0 +1,115 @@
+# backend/core/concurrency.py
+
+import asyncio
+import contextvars
+import time
+from concurrent.futures import ThreadPoolExecutor
+from functools import partial
+from typing import Any, Awaitable, Callable, Dict, Hashable, Tuple
+
+from backend.config import settings
+from backend.core.profiler import profiler
+
+
+# -------------------------------------------------
+# Bounded Executors
+# -------------------------------------------------
+# boto3 is blocking. Instead of letting every handler borrow FastAPI's
+# shared threadpool, DynamoDB and Bedrock calls each get their own
+# fixed-size pool, so slow model generations queue among themselves
+# and never starve patient/case reads.
+
+db_executor = ThreadPoolExecutor(
+    max_workers=settings.DB_MAX_CONCURRENCY,
+    thread_name_prefix="dynamodb",
+)
+
+model_executor = ThreadPoolExecutor(
+    max_workers=settings.BEDROCK_MAX_CONCURRENCY,
+    thread_name_prefix="bedrock",
+)
+
+
+# Calls run in a copy of the caller's context (as asyncio.to_thread
+# does), so trace spans opened in the pool nest under the request's.
+# profiler.bind returns fn untouched unless the request is being profiled.
+
+async def run_db(fn: Callable[..., Any], *args, **kwargs) -> Any:
+    """Run a blocking DynamoDB call on the DynamoDB pool."""
+    loop = asyncio.get_running_loop()
+    context = contextvars.copy_context()
+    return await loop.run_in_executor(db_executor, partial(context.run, profiler.bind(fn), *args, **kwargs))
+
+
+async def run_model(fn: Callable[..., Any], *args, **kwargs) -> Any:
+    """Run a blocking Bedrock call on the model pool."""
+    loop = asyncio.get_running_loop()
+    context = contextvars.copy_context()
+    return await loop.run_in_executor(model_executor, partial(context.run, profiler.bind(fn), *args, **kwargs))
+
+
+def shutdown_executors() -> None:
+    db_executor.shutdown(wait=False, cancel_futures=True)
+    model_executor.shutdown(wait=False, cancel_futures=True)
+
+
+# -------------------------------------------------
+# Single-Flight Coalescing
+# -------------------------------------------------
+
+class SingleFlight:
+    """
+    Calls with the same key share one execution: callers arriving while
+    it runs, or up to window seconds after it succeeded, get its result.
+    Failures are not remembered, so the next caller tries again.
+
+    The shared work is shielded; a caller that goes away (client
+    disconnect) does not cancel it for the others.
+    """
+
+    def __init__(self, window: float):
+        self.window = window
+        self._calls: Dict[Hashable, Tuple[asyncio.Future, float]] = {}   # key -> (task, expires)
+        self._next_purge = 0.0
+        self.started = 0
+        self.joined = 0
+
+    async def do(self, key: Hashable, fn: Callable[[], Awaitable[Any]]) -> Any:
+        now = time.monotonic()
+        self._purge(now)
+
+        entry = self._calls.get(key)
+        if entry is not None and entry[1] > now:
+            self.joined += 1
+            return await asyncio.shield(entry[0])
+
+        task = asyncio.ensure_future(fn())
+        self._calls[key] = (task, float("inf"))
+        self.started += 1
+        task.add_done_callback(partial(self._finished, key))
+        return await asyncio.shield(task)
+
+    def _finished(self, key: Hashable, task: asyncio.Future):
+        entry = self._calls.get(key)
+        if entry is None or entry[0] is not task:
+            return
+
+        if task.cancelled() or task.exception() is not None:
+            del self._calls[key]
+        else:
+            self._calls[key] = (task, time.monotonic() + self.window)
+
+    def _purge(self, now: float):
+        if now < self._next_purge:
+            return
+        self._next_purge = now + 1.0
+        for key in [k for k, (_, expires) in self._calls.items() if expires <= now]:
+            del self._calls[key]
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "window_seconds": self.window,
+            "tracked": len(self._calls),
+            "executed": self.started,
+            "coalesced": self.joined,
+        }
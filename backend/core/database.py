@@ -1,26 +1,198 @@
 # backend/core/database.py
 
+import base64
+import hashlib
+import json
+import queue
+import threading
+import time
 import uuid
-from typing import Optional, Dict, Any, List
+from concurrent.futures import ThreadPoolExecutor
+from decimal import Decimal
+from typing import Optional, Dict, Any, List, Iterator, Tuple
 
-import boto3
 from boto3.dynamodb.conditions import Key, Attr
 from botocore.exceptions import ClientError
 
 from backend.config import settings
+from backend.core.aws import get_dynamodb_resource
+from backend.core.item_cache import ItemCache
+from backend.core.metrics import record_dynamodb, span
 
 
-# Initialize DynamoDB resource (single instance)
-dynamodb = boto3.resource(
-    "dynamodb",
-    region_name=settings.AWS_REGION,
-    aws_access_key_id=settings.AWS_ACCESS_KEY_ID,
-    aws_secret_access_key=settings.AWS_SECRET_ACCESS_KEY,
+# -----------------------------
+# DynamoDB Resource (lazy, one per process)
+# -----------------------------
+
+_memory_db = None
+
+
+def get_dynamodb():
+    global _memory_db
+
+    if settings.STORAGE_BACKEND == "memory":
+        if _memory_db is None:
+            from backend.core.memory_db import MemoryDynamoDB
+
+            _memory_db = MemoryDynamoDB(latency_ms=settings.MEMORY_DB_LATENCY_MS)
+        return _memory_db
+
+    return get_dynamodb_resource()
+
+
+# -----------------------------
+# Instrumentation
+# -----------------------------
+
+def timed_call(table_name: str, operation: str, fn, **params):
+    """
+    fn(**params) with ReturnConsumedCapacity=TOTAL, recording latency,
+    consumed capacity and error codes under (table, operation).
+    """
+    if not settings.METRICS_ENABLED:
+        return fn(**params)
+
+    params.setdefault("ReturnConsumedCapacity", "TOTAL")
+
+    with span(f"DynamoDB.{operation}", table=table_name):
+        start = time.perf_counter()
+        try:
+            response = fn(**params)
+        except ClientError as e:
+            record_dynamodb(table_name, operation, time.perf_counter() - start,
+                            error_code=e.response.get("Error", {}).get("Code"))
+            raise
+
+    record_dynamodb(table_name, operation, time.perf_counter() - start, response.get("ConsumedCapacity"))
+    return response
+
+
+TABLE_OPERATIONS = {
+    "get_item": "GetItem",
+    "put_item": "PutItem",
+    "update_item": "UpdateItem",
+    "delete_item": "DeleteItem",
+    "query": "Query",
+    "scan": "Scan",
+}
+
+
+class InstrumentedTable:
+    """
+    Wraps a boto3 Table so each item/query/scan call goes through
+    timed_call. Anything else passes straight through.
+    """
+
+    def __init__(self, table):
+        self._table = table
+        self.name = table.name
+
+    def __getattr__(self, attr):
+        target = getattr(self._table, attr)
+        operation = TABLE_OPERATIONS.get(attr)
+        if operation is None:
+            return target
+
+        def call(**params):
+            return timed_call(self.name, operation, target, **params)
+
+        # Cache the wrapper; __getattr__ only runs on the first lookup
+        setattr(self, attr, call)
+        return call
+
+
+class LazyTable:
+    """
+    Stands in for dynamodb.Table(name) and builds it on first use, so
+    importing modules that hold table references stays cheap.
+    """
+
+    def __init__(self, name: str):
+        self.name = name
+        self._table = None
+
+    def resolve(self):
+        if self._table is None:
+            self._table = InstrumentedTable(get_dynamodb().Table(self.name))
+        return self._table
+
+    def __getattr__(self, attr):
+        return getattr(self.resolve(), attr)
+
+
+class CachedTable(LazyTable):
+    """
+    LazyTable whose plain get_item calls are served read-through from an
+    ItemCache. put/update/delete through it invalidate the key once the
+    write is done. Reads with a projection or ConsistentRead go straight
+    to DynamoDB.
+    """
+
+    def __init__(self, name: str, key_name: str, cache: ItemCache):
+        super().__init__(name)
+        self.key_name = key_name
+        self.cache = cache
+
+    def get_item(self, Key: Dict[str, Any], **params) -> Dict[str, Any]:
+        if params or not self.cache.enabled:
+            return self.resolve().get_item(Key=Key, **params)
+
+        item = self.cache.get(Key)
+        if item is not None:
+            return {"Item": item}
+
+        since = self.cache.snapshot()
+        response = self.resolve().get_item(Key=Key)
+        if "Item" in response:
+            self.cache.fill(Key, response["Item"], since)
+        return response
+
+    def put_item(self, Item: Dict[str, Any], **params) -> Dict[str, Any]:
+        try:
+            return self.resolve().put_item(Item=Item, **params)
+        finally:
+            self.cache.invalidate({self.key_name: Item[self.key_name]})
+
+    def update_item(self, Key: Dict[str, Any], **params) -> Dict[str, Any]:
+        try:
+            return self.resolve().update_item(Key=Key, **params)
+        finally:
+            self.cache.invalidate(Key)
+
+    def delete_item(self, Key: Dict[str, Any], **params) -> Dict[str, Any]:
+        try:
+            return self.resolve().delete_item(Key=Key, **params)
+        finally:
+            self.cache.invalidate(Key)
+
+
+# Patients change rarely; cases change status, so other workers' writes
+# are only allowed to look stale for a few seconds
+patients_table = CachedTable(
+    settings.DYNAMODB_PATIENTS_TABLE,
+    "PatientID",
+    ItemCache(settings.ITEM_CACHE_MAX_ENTRIES, settings.PATIENT_CACHE_TTL_SECONDS),
 )
+cases_table = CachedTable(
+    settings.DYNAMODB_CASES_TABLE,
+    "CaseID",
+    ItemCache(settings.ITEM_CACHE_MAX_ENTRIES, settings.CASE_CACHE_TTL_SECONDS),
+)
+doctors_table = LazyTable(settings.DYNAMODB_DOCTORS_TABLE)
+analytics_table = LazyTable(settings.DYNAMODB_ANALYTICS_TABLE)
+
+
+def item_cache_stats() -> Dict[str, Any]:
+    return {
+        "patients": patients_table.cache.stats(),
+        "cases": cases_table.cache.stats(),
+    }
+
 
-patients_table = dynamodb.Table(settings.DYNAMODB_PATIENTS_TABLE)
-cases_table = dynamodb.Table(settings.DYNAMODB_CASES_TABLE)
-doctors_table = dynamodb.Table(settings.DYNAMODB_DOCTORS_TABLE)
+def warm_up():
+    """Build the resource and tables now rather than on the first request."""
+    for table in (patients_table, cases_table, doctors_table, analytics_table):
+        table.resolve()
 
 
 # -----------------------------
@@ -32,6 +204,15 @@ def generate_uuid(prefix: str) -> str:
     return f"{prefix}-{str(uuid.uuid4())[:8]}"
 
 
+def deterministic_id(prefix: str, *parts: str) -> str:
+    """
+    Stable ID derived from client-supplied parts, so a retried offline
+    sync maps to the same record (e.g. ASHA ID + device record ID).
+    """
+    digest = hashlib.sha256("\x1f".join(parts).encode("utf-8")).hexdigest()
+    return f"{prefix}-{digest[:12]}"
+
+
 # -----------------------------
 # Generic CRUD Helpers
 # -----------------------------
@@ -72,37 +253,364 @@ def update_item(
         raise Exception(f"DynamoDB Update Error: {e.response['Error']['Message']}")
 
 
-def query_items(
+# -----------------------------
+# Pagination
+# -----------------------------
+
+def encode_cursor(last_key: Optional[Dict[str, Any]]) -> Optional[str]:
+    """Opaque, URL-safe token for a LastEvaluatedKey."""
+    if not last_key:
+        return None
+
+    typed = {
+        k: ["N", str(v)] if isinstance(v, (int, float, Decimal)) else ["S", v]
+        for k, v in last_key.items()
+    }
+    raw = json.dumps(typed, separators=(",", ":")).encode()
+    return base64.urlsafe_b64encode(raw).decode().rstrip("=")
+
+
+def decode_cursor(token: Optional[str]) -> Optional[Dict[str, Any]]:
+    if not token:
+        return None
+
+    try:
+        raw = base64.urlsafe_b64decode(token + "=" * (-len(token) % 4))
+        typed = json.loads(raw)
+        return {
+            k: Decimal(v) if kind == "N" else v
+            for k, (kind, v) in typed.items()
+        }
+    except (ValueError, TypeError, AttributeError):
+        raise ValueError("Invalid pagination token")
+
+
+def _read_params(
+    filter_expression=None,
+    projection: Optional[List[str]] = None,
+) -> Dict[str, Any]:
+    params: Dict[str, Any] = {}
+
+    if filter_expression is not None:
+        params["FilterExpression"] = filter_expression
+
+    if projection:
+        # Placeholders avoid clashes with reserved words (Name, Status...)
+        params["ProjectionExpression"] = ", ".join(f"#p{i}" for i in range(len(projection)))
+        params["ExpressionAttributeNames"] = {f"#p{i}": attr for i, attr in enumerate(projection)}
+
+    return params
+
+
+def iter_query(
     table,
     key_condition,
     index_name: Optional[str] = None,
     filter_expression=None,
-) -> List[Dict[str, Any]]:
+    projection: Optional[List[str]] = None,
+    page_size: Optional[int] = None,
+) -> Iterator[Dict[str, Any]]:
+    """
+    Yield every matching item, following LastEvaluatedKey across pages.
+    """
+    params = _read_params(filter_expression, projection)
+    params["KeyConditionExpression"] = key_condition
+    if index_name:
+        params["IndexName"] = index_name
+    if page_size:
+        params["Limit"] = page_size
+
     try:
-        params = {
-            "KeyConditionExpression": key_condition,
-        }
-        if index_name:
-            params["IndexName"] = index_name
-        if filter_expression:
-            params["FilterExpression"] = filter_expression
+        while True:
+            response = table.query(**params)
+            yield from response.get("Items", [])
 
+            last_key = response.get("LastEvaluatedKey")
+            if not last_key:
+                return
+            params["ExclusiveStartKey"] = last_key
+    except ClientError as e:
+        raise Exception(f"DynamoDB Query Error: {e.response['Error']['Message']}")
+
+
+def _iter_scan_segment(
+    table,
+    params: Dict[str, Any],
+    stop: Optional[threading.Event] = None,
+) -> Iterator[List[Dict[str, Any]]]:
+    params = dict(params)
+
+    try:
+        while stop is None or not stop.is_set():
+            response = table.scan(**params)
+            yield response.get("Items", [])
+
+            last_key = response.get("LastEvaluatedKey")
+            if not last_key:
+                return
+            params["ExclusiveStartKey"] = last_key
+    except ClientError as e:
+        raise Exception(f"DynamoDB Scan Error: {e.response['Error']['Message']}")
+
+
+def iter_scan(
+    table,
+    filter_expression=None,
+    projection: Optional[List[str]] = None,
+    segments: int = 1,
+    page_size: Optional[int] = None,
+) -> Iterator[Dict[str, Any]]:
+    """
+    Yield every item in the table. With segments > 1 the table is read
+    as a parallel scan (Segment/TotalSegments), one thread per segment;
+    items are yielded as pages arrive, in no particular order.
+    """
+    params = _read_params(filter_expression, projection)
+    if page_size:
+        params["Limit"] = page_size
+
+    if segments <= 1:
+        for page in _iter_scan_segment(table, params):
+            yield from page
+        return
+
+    pages: "queue.Queue" = queue.Queue(maxsize=segments * 2)
+    stop = threading.Event()
+    done = object()
+
+    def worker(segment: int):
+        try:
+            segment_params = {**params, "Segment": segment, "TotalSegments": segments}
+            for page in _iter_scan_segment(table, segment_params, stop):
+                pages.put(page)
+        except Exception as e:
+            pages.put(e)
+        finally:
+            pages.put(done)
+
+    with ThreadPoolExecutor(max_workers=segments, thread_name_prefix="scan") as pool:
+        for segment in range(segments):
+            pool.submit(worker, segment)
+
+        remaining = segments
+        try:
+            while remaining:
+                page = pages.get()
+                if page is done:
+                    remaining -= 1
+                elif isinstance(page, Exception):
+                    raise page
+                else:
+                    yield from page
+        finally:
+            stop.set()
+            # Unblock workers waiting on a full queue
+            while remaining:
+                if pages.get() is done:
+                    remaining -= 1
+
+
+def query_page(
+    table,
+    key_condition,
+    limit: int,
+    next_token: Optional[str] = None,
+    index_name: Optional[str] = None,
+    filter_expression=None,
+    projection: Optional[List[str]] = None,
+) -> Tuple[List[Dict[str, Any]], Optional[str]]:
+    """
+    One page of at most `limit` items plus an opaque token for the next
+    page (None when exhausted). Pass the token back to continue.
+    """
+    params = _read_params(filter_expression, projection)
+    params["KeyConditionExpression"] = key_condition
+    params["Limit"] = limit
+    if index_name:
+        params["IndexName"] = index_name
+
+    start_key = decode_cursor(next_token)
+    if start_key:
+        params["ExclusiveStartKey"] = start_key
+
+    try:
         response = table.query(**params)
-        return response.get("Items", [])
     except ClientError as e:
         raise Exception(f"DynamoDB Query Error: {e.response['Error']['Message']}")
 
+    return response.get("Items", []), encode_cursor(response.get("LastEvaluatedKey"))
+
+
+def query_items(
+    table,
+    key_condition,
+    index_name: Optional[str] = None,
+    filter_expression=None,
+    projection: Optional[List[str]] = None,
+) -> List[Dict[str, Any]]:
+    return list(iter_query(
+        table,
+        key_condition,
+        index_name=index_name,
+        filter_expression=filter_expression,
+        projection=projection,
+    ))
+
 
 def scan_items(
     table,
-    filter_expression=None
+    filter_expression=None,
+    projection: Optional[List[str]] = None,
+    segments: int = 1,
+    page_size: Optional[int] = None,
 ) -> List[Dict[str, Any]]:
+    return list(iter_scan(
+        table,
+        filter_expression=filter_expression,
+        projection=projection,
+        segments=segments,
+        page_size=page_size,
+    ))
+
+
+def batch_get_items(
+    table,
+    keys: List[Dict[str, Any]],
+    projection: Optional[List[str]] = None,
+    max_retries: int = 5,
+) -> List[Dict[str, Any]]:
+    """
+    Fetch many items by key in chunks of 100, retrying UnprocessedKeys
+    with exponential backoff. Order of results is not guaranteed.
+    Keys cached by a CachedTable are not fetched.
+    """
+    items: List[Dict[str, Any]] = []
+
+    # De-duplicate keys; DynamoDB rejects repeats within one request
+    unique = list({tuple(sorted(k.items())): k for k in keys}.values())
+
+    cache = getattr(table, "cache", None)
+    use_cache = cache is not None and cache.enabled and not projection
+    if use_cache:
+        missing = []
+        for key in unique:
+            item = cache.get(key)
+            if item is None:
+                missing.append(key)
+            else:
+                items.append(item)
+        unique = missing
+        since = cache.snapshot()
+        fetched_from = len(items)
+
+    try:
+        for start in range(0, len(unique), 100):
+            request = {table.name: {"Keys": unique[start:start + 100], **_read_params(projection=projection)}}
+
+            for attempt in range(max_retries + 1):
+                response = timed_call(table.name, "BatchGetItem", get_dynamodb().batch_get_item, RequestItems=request)
+                items.extend(response.get("Responses", {}).get(table.name, []))
+
+                request = response.get("UnprocessedKeys") or {}
+                if not request:
+                    break
+                time.sleep(0.05 * (2 ** attempt))
+            else:
+                raise Exception("DynamoDB BatchGet Error: unprocessed keys after retries")
+
+        if use_cache:
+            for item in items[fetched_from:]:
+                cache.fill({table.key_name: item[table.key_name]}, item, since)
+
+        return items
+    except ClientError as e:
+        raise Exception(f"DynamoDB BatchGet Error: {e.response['Error']['Message']}")
+
+
+def batch_write_items(
+    table,
+    items: List[Dict[str, Any]],
+    max_retries: int = 5,
+) -> List[Dict[str, Any]]:
+    """
+    Put items in chunks of 25, retrying UnprocessedItems with exponential
+    backoff. Returns the items that still could not be written.
+    """
+    failed: List[Dict[str, Any]] = []
+
     try:
-        params = {}
-        if filter_expression:
-            params["FilterExpression"] = filter_expression
+        for start in range(0, len(items), 25):
+            requests = [{"PutRequest": {"Item": item}} for item in items[start:start + 25]]
+
+            for attempt in range(max_retries + 1):
+                response = timed_call(
+                    table.name, "BatchWriteItem", get_dynamodb().batch_write_item,
+                    RequestItems={table.name: requests},
+                )
+
+                requests = (response.get("UnprocessedItems") or {}).get(table.name, [])
+                if not requests:
+                    break
+                if attempt < max_retries:
+                    time.sleep(0.05 * (2 ** attempt))
+
+            failed.extend(r["PutRequest"]["Item"] for r in requests)
+
+            cache = getattr(table, "cache", None)
+            if cache is not None:
+                for item in items[start:start + 25]:
+                    cache.invalidate({table.key_name: item[table.key_name]})
 
-        response = table.scan(**params)
-        return response.get("Items", [])
+        return failed
     except ClientError as e:
-        raise Exception(f"DynamoDB Scan Error: {e.response['Error']['Message']}")
\ No newline at end of file
+        raise Exception(f"DynamoDB BatchWrite Error: {e.response['Error']['Message']}")
+
+
+# -----------------------------
+# Transactions
+# -----------------------------
+
+def transact_write_items(operations: List[Tuple[str, Any, Dict[str, Any]]]) -> None:
+    """
+    Apply up to 100 writes atomically in one TransactWriteItems round
+    trip. Each operation is (kind, table, params): kind is Put, Update,
+    Delete or ConditionCheck, and params are what the Table method
+    would take (plain values, string expressions). A failed condition
+    raises ClientError TransactionCanceledException, whose
+    CancellationReasons line up with operations; it is left unwrapped
+    so callers can tell which one failed. Keys written through a
+    CachedTable are invalidated.
+    """
+    from boto3.dynamodb.types import TypeSerializer
+
+    serializer = TypeSerializer()
+    typed_params = ("Item", "Key", "ExpressionAttributeValues")
+
+    transact_items = [
+        {kind: {
+            "TableName": table.name,
+            **{
+                name: {k: serializer.serialize(v) for k, v in value.items()} if name in typed_params else value
+                for name, value in params.items()
+            },
+        }}
+        for kind, table, params in operations
+    ]
+
+    try:
+        timed_call(
+            "+".join(sorted({table.name for _, table, _ in operations})),
+            "TransactWriteItems",
+            get_dynamodb().meta.client.transact_write_items,
+            TransactItems=transact_items,
+        )
+    finally:
+        for kind, table, params in operations:
+            cache = getattr(table, "cache", None)
+            if cache is not None and kind != "ConditionCheck":
+                cache.invalidate(params.get("Key") or {table.key_name: params["Item"][table.key_name]})
+
+
+def cancellation_reasons(error: ClientError) -> List[str]:
+    """Per-operation codes of a cancelled transaction ("None" = passed)."""
+    return [reason.get("Code", "None") for reason in error.response.get("CancellationReasons", [])]
@@ -0,0 +1,128 @@
+# backend/core/item_cache.py
+
+import copy
+import json
+import math
+import threading
+import time
+from collections import OrderedDict
+from typing import Optional, Dict, Any, Tuple
+
+
+def item_rcu(item: Dict[str, Any]) -> float:
+    """Approximate eventually-consistent read cost: 0.5 RCU per 4 KB."""
+    size = len(json.dumps(item, default=str).encode("utf-8"))
+    return 0.5 * max(1, math.ceil(size / 4096))
+
+
+class ItemCache:
+    """
+    LRU of DynamoDB items by primary key, each kept for ttl seconds.
+
+    Writes through this worker invalidate their key; writes from other
+    workers are bounded by the TTL. A read that started before a write
+    to its key is not allowed to put the older item back afterwards
+    (each invalidation bumps a counter that fills are checked against).
+    """
+
+    def __init__(self, max_entries: int, ttl: float):
+        self.max_entries = max_entries
+        self.ttl = ttl
+
+        self._items: "OrderedDict[Tuple, Tuple[float, Dict[str, Any], float]]" = OrderedDict()
+        self._lock = threading.Lock()
+
+        # Invalidation counter, per-key last invalidation, and the floor
+        # below which fills are refused after _written_at is pruned
+        self._writes = 0
+        self._written_at: Dict[Tuple, int] = {}
+        self._floor = 0
+
+        self.hits = 0
+        self.misses = 0
+        self.invalidations = 0
+        self.evictions = 0
+        self.rcu_saved = 0.0
+
+    @staticmethod
+    def _key(key: Dict[str, Any]) -> Tuple:
+        return tuple(sorted(key.items()))
+
+    @property
+    def enabled(self) -> bool:
+        return self.max_entries > 0
+
+    def get(self, key: Dict[str, Any]) -> Optional[Dict[str, Any]]:
+        k = self._key(key)
+        with self._lock:
+            entry = self._items.get(k)
+            if entry is None or entry[0] <= time.monotonic():
+                if entry is not None:
+                    del self._items[k]
+                self.misses += 1
+                return None
+
+            self._items.move_to_end(k)
+            self.hits += 1
+            self.rcu_saved += entry[2]
+            item = entry[1]
+
+        # Callers are free to mutate what they get back
+        return copy.deepcopy(item)
+
+    def snapshot(self) -> int:
+        """Take before reading from DynamoDB; pass to fill()."""
+        with self._lock:
+            return self._writes
+
+    def fill(self, key: Dict[str, Any], item: Dict[str, Any], since: int):
+        if not self.enabled:
+            return
+
+        k = self._key(key)
+        item = copy.deepcopy(item)
+        rcu = item_rcu(item)
+
+        with self._lock:
+            if since < self._floor or self._written_at.get(k, 0) > since:
+                return
+
+            self._items[k] = (time.monotonic() + self.ttl, item, rcu)
+            self._items.move_to_end(k)
+            while len(self._items) > self.max_entries:
+                self._items.popitem(last=False)
+                self.evictions += 1
+
+    def invalidate(self, key: Dict[str, Any]):
+        k = self._key(key)
+        with self._lock:
+            self._writes += 1
+            self._written_at[k] = self._writes
+            if self._items.pop(k, None) is not None:
+                self.invalidations += 1
+
+            if len(self._written_at) > max(1024, self.max_entries):
+                self._written_at.clear()
+                self._floor = self._writes
+
+    def clear(self):
+        with self._lock:
+            self._items.clear()
+            self._writes += 1
+            self._written_at.clear()
+            self._floor = self._writes
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "entries": len(self._items),
+                "max_entries": self.max_entries,
+                "ttl_seconds": self.ttl,
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_rate": round(self.hits / lookups, 3) if lookups else 0.0,
+                "invalidations": self.invalidations,
+                "evictions": self.evictions,
+                "rcu_saved": self.rcu_saved,
+            }
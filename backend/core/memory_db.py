@@ -0,0 +1,972 @@
+# backend/core/memory_db.py
+#
+# In-process stand-in for the boto3 DynamoDB resource, used when
+# STORAGE_BACKEND=memory. It implements the subset of the Table API this
+# backend calls (put/get/update/delete, query on GSIs, scan, batch
+# get/write, plus the client's TransactWriteItems) with DynamoDB
+# semantics where they matter: Decimal numbers, float rejection,
+# condition failures as ClientError, sparse GSIs and
+# Limit/ExclusiveStartKey pagination. Tables can also keep a change
+# stream, the stand-in for DynamoDB Streams.
+
+import contextlib
+import copy
+import re
+import threading
+import time
+import zlib
+from collections import deque
+from decimal import Decimal
+from types import SimpleNamespace
+from typing import Optional, Dict, Any, List, Tuple, Callable
+
+from boto3.dynamodb.conditions import AttributeBase, ConditionBase
+from botocore.exceptions import ClientError
+
+from backend.config import settings
+
+
+# -------------------------------------------------
+# Table Schemas (mirror seed.py)
+# -------------------------------------------------
+
+def default_schemas() -> Dict[str, Tuple[str, Dict[str, str]]]:
+    """table name -> (hash key, {index name: index hash key})"""
+    return {
+        settings.DYNAMODB_PATIENTS_TABLE: (
+            "PatientID",
+            {"ASHAWorkerID-index": "ASHAWorkerID", "Village-index": "Village"},
+        ),
+        settings.DYNAMODB_CASES_TABLE: (
+            "CaseID",
+            {"PatientID-index": "PatientID", "Status-index": "Status"},
+        ),
+        settings.DYNAMODB_DOCTORS_TABLE: ("DoctorID", {}),
+        settings.DYNAMODB_ANALYTICS_TABLE: ("RollupID", {}),
+    }
+
+
+_MISSING = object()
+
+
+def _client_error(code: str, message: str, operation: str) -> ClientError:
+    return ClientError({"Error": {"Code": code, "Message": message}}, operation)
+
+
+# -------------------------------------------------
+# Value Normalization (what boto3 would store/return)
+# -------------------------------------------------
+
+def to_dynamo(value):
+    if isinstance(value, bool) or value is None or isinstance(value, (str, bytes, Decimal)):
+        return value
+    if isinstance(value, int):
+        return Decimal(value)
+    if isinstance(value, float):
+        raise TypeError("Float types are not supported. Use Decimal types instead.")
+    if isinstance(value, dict):
+        return {k: to_dynamo(v) for k, v in value.items()}
+    if isinstance(value, (list, tuple)):
+        return [to_dynamo(v) for v in value]
+    if isinstance(value, (set, frozenset)):
+        if not value:
+            raise _client_error(
+                "ValidationException",
+                "One or more parameter values were invalid: An string set may not be empty",
+                "PutItem",
+            )
+        return {to_dynamo(v) for v in value}
+    raise TypeError(f"Unsupported type {type(value).__name__} for DynamoDB")
+
+
+# -------------------------------------------------
+# Attribute Paths
+# -------------------------------------------------
+
+def _split_path(path: str, names: Optional[Dict[str, str]] = None) -> List[Any]:
+    parts: List[Any] = []
+    for segment in path.split("."):
+        match = re.fullmatch(r"([^\[\]]+)((?:\[\d+\])*)", segment.strip())
+        if not match:
+            raise ValueError(f"Invalid attribute path: {path}")
+        name = match.group(1)
+        if names and name.startswith("#"):
+            if name not in names:
+                raise ValueError(f"Undefined attribute name placeholder: {name}")
+            name = names[name]
+        parts.append(name)
+        parts.extend(int(i) for i in re.findall(r"\[(\d+)\]", match.group(2)))
+    return parts
+
+
+def _get_path(item: Dict[str, Any], parts: List[Any]):
+    current: Any = item
+    for part in parts:
+        try:
+            current = current[part]
+        except (KeyError, IndexError, TypeError):
+            return _MISSING
+    return current
+
+
+def _set_path(item: Dict[str, Any], parts: List[Any], value):
+    current: Any = item
+    for part in parts[:-1]:
+        current = current[part]
+    current[parts[-1]] = value
+
+
+def _remove_path(item: Dict[str, Any], parts: List[Any]):
+    current: Any = item
+    for part in parts[:-1]:
+        current = current.get(part) if isinstance(current, dict) else current[part]
+        if current is None:
+            return
+    if isinstance(current, dict):
+        current.pop(parts[-1], None)
+    elif isinstance(current, list) and parts[-1] < len(current):
+        current.pop(parts[-1])
+
+
+# -------------------------------------------------
+# Comparison Semantics
+# -------------------------------------------------
+
+def _compare(op: str, left, right) -> bool:
+    if left is _MISSING or right is _MISSING:
+        return False
+    if op == "=":
+        return left == right
+    if op == "<>":
+        return left != right
+    try:
+        if op == "<":
+            return left < right
+        if op == "<=":
+            return left <= right
+        if op == ">":
+            return left > right
+        if op == ">=":
+            return left >= right
+    except TypeError:
+        return False
+    raise ValueError(f"Unsupported comparator {op}")
+
+
+def _contains(value, operand) -> bool:
+    if value is _MISSING:
+        return False
+    if isinstance(value, str):
+        return isinstance(operand, str) and operand in value
+    if isinstance(value, (list, set)):
+        return operand in value
+    return False
+
+
+def _size(value):
+    if value is _MISSING:
+        return _MISSING
+    if isinstance(value, (str, bytes, list, set, dict)):
+        return Decimal(len(value))
+    return _MISSING
+
+
+# -------------------------------------------------
+# boto3 Condition Objects (Key/Attr builders)
+# -------------------------------------------------
+
+def _operand_from_object(value, item):
+    if isinstance(value, AttributeBase):
+        return _get_path(item, _split_path(value.name))
+    if isinstance(value, ConditionBase) and value.expression_operator == "size":
+        return _size(_operand_from_object(value.get_expression()["values"][0], item))
+    return to_dynamo(value)
+
+
+def evaluate_condition_object(condition, item: Dict[str, Any]) -> bool:
+    expr = condition.get_expression()
+    op = expr["operator"]
+    values = expr["values"]
+
+    if op == "AND":
+        return all(evaluate_condition_object(v, item) for v in values)
+    if op == "OR":
+        return any(evaluate_condition_object(v, item) for v in values)
+    if op == "NOT":
+        return not evaluate_condition_object(values[0], item)
+
+    operand = _operand_from_object(values[0], item)
+
+    if op == "attribute_exists":
+        return operand is not _MISSING
+    if op == "attribute_not_exists":
+        return operand is _MISSING
+    if op == "begins_with":
+        prefix = _operand_from_object(values[1], item)
+        return isinstance(operand, str) and operand.startswith(prefix)
+    if op == "contains":
+        return _contains(operand, _operand_from_object(values[1], item))
+    if op == "BETWEEN":
+        low = _operand_from_object(values[1], item)
+        high = _operand_from_object(values[2], item)
+        return _compare(">=", operand, low) and _compare("<=", operand, high)
+    if op == "IN":
+        return operand is not _MISSING and operand in [to_dynamo(v) for v in values[1]]
+
+    return _compare(op, operand, _operand_from_object(values[1], item))
+
+
+def _key_equalities(condition) -> Dict[str, Any]:
+    """Attribute -> value for every Key(...).eq(...) in an AND tree."""
+    expr = condition.get_expression()
+    if expr["operator"] == "AND":
+        found: Dict[str, Any] = {}
+        for v in expr["values"]:
+            found.update(_key_equalities(v))
+        return found
+    if expr["operator"] == "=" and isinstance(expr["values"][0], AttributeBase):
+        return {expr["values"][0].name: to_dynamo(expr["values"][1])}
+    return {}
+
+
+# -------------------------------------------------
+# Expression Strings (ConditionExpression / UpdateExpression)
+# -------------------------------------------------
+
+_TOKEN_RE = re.compile(
+    r"\s*(?:(<>|<=|>=|[=<>(),+\-])|(:[A-Za-z0-9_]+)|((?:#?[A-Za-z0-9_]+(?:\[\d+\])*)(?:\.#?[A-Za-z0-9_]+(?:\[\d+\])*)*))"
+)
+
+_FUNCTIONS = {
+    "attribute_exists", "attribute_not_exists", "attribute_type",
+    "begins_with", "contains", "size", "if_not_exists", "list_append",
+}
+
+
+def _tokenize(expression: str) -> List[str]:
+    tokens = []
+    pos = 0
+    expression = expression.rstrip()
+    while pos < len(expression):
+        match = _TOKEN_RE.match(expression, pos)
+        if not match or match.end() == pos:
+            raise ValueError(f"Invalid expression near: {expression[pos:]!r}")
+        tokens.append(next(g for g in match.groups() if g is not None))
+        pos = match.end()
+    return tokens
+
+
+class _Parser:
+    """
+    Small recursive-descent parser producing closures over an item.
+    """
+
+    def __init__(self, expression: str, names: Optional[Dict[str, str]], values: Optional[Dict[str, Any]]):
+        self.tokens = _tokenize(expression)
+        self.pos = 0
+        self.names = names or {}
+        self.values = {k: to_dynamo(v) for k, v in (values or {}).items()}
+
+    # ---------- token helpers ----------
+
+    def peek(self, offset: int = 0) -> Optional[str]:
+        i = self.pos + offset
+        return self.tokens[i] if i < len(self.tokens) else None
+
+    def take(self, expected: Optional[str] = None) -> str:
+        token = self.peek()
+        if token is None or (expected is not None and token.upper() != expected.upper()):
+            raise ValueError(f"Expected {expected!r}, got {token!r}")
+        self.pos += 1
+        return token
+
+    def at_keyword(self, *words: str) -> bool:
+        token = self.peek()
+        return token is not None and token.upper() in words
+
+    def done(self) -> bool:
+        return self.pos >= len(self.tokens)
+
+    # ---------- operands ----------
+
+    def path(self) -> List[Any]:
+        return _split_path(self.take(), self.names)
+
+    def operand(self) -> Callable[[Dict[str, Any]], Any]:
+        token = self.peek()
+
+        if token is None:
+            raise ValueError("Unexpected end of expression")
+
+        if token.startswith(":"):
+            self.take()
+            if token not in self.values:
+                raise ValueError(f"Undefined expression attribute value: {token}")
+            value = self.values[token]
+            return lambda item: value
+
+        if token.lower() in _FUNCTIONS and self.peek(1) == "(":
+            return self.function()
+
+        parts = self.path()
+        return lambda item: _get_path(item, parts)
+
+    def function(self) -> Callable[[Dict[str, Any]], Any]:
+        name = self.take().lower()
+        self.take("(")
+        args = [self.value_expression()]
+        while self.peek() == ",":
+            self.take(",")
+            args.append(self.value_expression())
+        self.take(")")
+
+        if name == "size":
+            return lambda item: _size(args[0](item))
+        if name == "if_not_exists":
+            return lambda item: args[1](item) if args[0](item) is _MISSING else args[0](item)
+        if name == "list_append":
+            return lambda item: list(args[0](item)) + list(args[1](item))
+        if name == "attribute_exists":
+            return lambda item: args[0](item) is not _MISSING
+        if name == "attribute_not_exists":
+            return lambda item: args[0](item) is _MISSING
+        if name == "begins_with":
+            return lambda item: isinstance(args[0](item), str) and args[0](item).startswith(args[1](item))
+        if name == "contains":
+            return lambda item: _contains(args[0](item), args[1](item))
+        if name == "attribute_type":
+            return lambda item: True
+        raise ValueError(f"Unsupported function {name}")
+
+    def value_expression(self) -> Callable[[Dict[str, Any]], Any]:
+        left = self.operand()
+        while self.peek() in ("+", "-"):
+            op = self.take()
+            right = self.operand()
+            left = (
+                (lambda l, r: lambda item: l(item) + r(item))(left, right)
+                if op == "+" else
+                (lambda l, r: lambda item: l(item) - r(item))(left, right)
+            )
+        return left
+
+    # ---------- conditions ----------
+
+    def condition(self) -> Callable[[Dict[str, Any]], bool]:
+        left = self.and_condition()
+        while self.at_keyword("OR"):
+            self.take()
+            right = self.and_condition()
+            left = (lambda l, r: lambda item: l(item) or r(item))(left, right)
+        return left
+
+    def and_condition(self) -> Callable[[Dict[str, Any]], bool]:
+        left = self.not_condition()
+        while self.at_keyword("AND"):
+            self.take()
+            right = self.not_condition()
+            left = (lambda l, r: lambda item: l(item) and r(item))(left, right)
+        return left
+
+    def not_condition(self) -> Callable[[Dict[str, Any]], bool]:
+        if self.at_keyword("NOT"):
+            self.take()
+            inner = self.not_condition()
+            return lambda item: not inner(item)
+        return self.comparison()
+
+    def comparison(self) -> Callable[[Dict[str, Any]], bool]:
+        if self.peek() == "(":
+            self.take("(")
+            inner = self.condition()
+            self.take(")")
+            return inner
+
+        left = self.operand()
+        token = self.peek()
+
+        if token in ("=", "<>", "<", "<=", ">", ">="):
+            op = self.take()
+            right = self.operand()
+            return lambda item: _compare(op, left(item), right(item))
+
+        if self.at_keyword("BETWEEN"):
+            self.take()
+            low = self.operand()
+            self.take("AND")
+            high = self.operand()
+            return lambda item: _compare(">=", left(item), low(item)) and _compare("<=", left(item), high(item))
+
+        if self.at_keyword("IN"):
+            self.take()
+            self.take("(")
+            options = [self.operand()]
+            while self.peek() == ",":
+                self.take(",")
+                options.append(self.operand())
+            self.take(")")
+            return lambda item: any(_compare("=", left(item), o(item)) for o in options)
+
+        # Bare function call such as attribute_exists(x)
+        return lambda item: bool(left(item))
+
+    def parse_condition(self) -> Callable[[Dict[str, Any]], bool]:
+        result = self.condition()
+        if not self.done():
+            raise ValueError(f"Unexpected token {self.peek()!r}")
+        return result
+
+    # ---------- updates ----------
+
+    def parse_update(self) -> List[Tuple[str, List[Any], Optional[Callable]]]:
+        actions = []
+        while not self.done():
+            clause = self.take().upper()
+            if clause not in ("SET", "REMOVE", "ADD", "DELETE"):
+                raise ValueError(f"Unknown update clause {clause}")
+
+            while True:
+                parts = self.path()
+                if clause == "SET":
+                    self.take("=")
+                    actions.append(("SET", parts, self.value_expression()))
+                elif clause == "REMOVE":
+                    actions.append(("REMOVE", parts, None))
+                else:
+                    actions.append((clause, parts, self.operand()))
+
+                if self.peek() != ",":
+                    break
+                self.take(",")
+        return actions
+
+
+def evaluate_condition(
+    condition,
+    item: Dict[str, Any],
+    names: Optional[Dict[str, str]] = None,
+    values: Optional[Dict[str, Any]] = None,
+) -> bool:
+    if condition is None:
+        return True
+    if isinstance(condition, ConditionBase):
+        return evaluate_condition_object(condition, item)
+    return _Parser(condition, names, values).parse_condition()(item)
+
+
+def apply_update(
+    item: Dict[str, Any],
+    expression: str,
+    names: Optional[Dict[str, str]] = None,
+    values: Optional[Dict[str, Any]] = None,
+):
+    # All right-hand sides see the item as it was before the update
+    before = copy.deepcopy(item)
+
+    for action, parts, operand in _Parser(expression, names, values).parse_update():
+        if action == "SET":
+            _set_path(item, parts, operand(before))
+        elif action == "REMOVE":
+            _remove_path(item, parts)
+        elif action == "ADD":
+            value = operand(before)
+            current = _get_path(item, parts)
+            if current is _MISSING:
+                _set_path(item, parts, value)
+            elif isinstance(current, set) and isinstance(value, set):
+                _set_path(item, parts, current | value)
+            elif isinstance(current, Decimal) and isinstance(value, Decimal):
+                _set_path(item, parts, current + value)
+            else:
+                raise _client_error(
+                    "ValidationException",
+                    "An operand in the update expression has an incorrect data type",
+                    "UpdateItem",
+                )
+        elif action == "DELETE":
+            current = _get_path(item, parts)
+            if isinstance(current, set):
+                remaining = current - operand(before)
+                if remaining:
+                    _set_path(item, parts, remaining)
+                else:
+                    _remove_path(item, parts)
+
+
+def _project(item: Dict[str, Any], projection: Optional[str], names: Optional[Dict[str, str]]):
+    if not projection:
+        return item
+    result: Dict[str, Any] = {}
+    for raw in projection.split(","):
+        parts = _split_path(raw.strip(), names)
+        value = _get_path(item, parts[:1])
+        if value is not _MISSING:
+            result[parts[0]] = value
+    return result
+
+
+# -------------------------------------------------
+# Change Stream
+# -------------------------------------------------
+
+class MemoryStream:
+    """
+    A table's change records in write order, like a single-shard
+    DynamoDB stream with the NEW_IMAGE view type (images are plain
+    Python, as the resource API would return them). Only the last
+    `retention` records are kept; reading from before that raises
+    TrimmedDataAccessException, as an expired shard iterator would.
+    """
+
+    def __init__(self, retention: int = 100_000):
+        self._records: deque = deque(maxlen=retention)
+        self._sequence = 0
+        self._lock = threading.Lock()
+
+    def append(self, event_name: str, keys: Dict[str, Any], new_image: Optional[Dict[str, Any]]):
+        with self._lock:
+            self._sequence += 1
+            record = {
+                "eventName": event_name,
+                "dynamodb": {"Keys": keys, "SequenceNumber": str(self._sequence)},
+            }
+            if new_image is not None:
+                record["dynamodb"]["NewImage"] = new_image
+            self._records.append((self._sequence, record))
+
+    def latest(self) -> int:
+        """Position after the newest record (a LATEST iterator)."""
+        with self._lock:
+            return self._sequence
+
+    def read(self, after: int, limit: int = 1000) -> Tuple[List[Dict[str, Any]], int]:
+        """Records after position `after`, and the position to read from next."""
+        with self._lock:
+            if after >= self._sequence:
+                return [], after
+
+            first = self._records[0][0] if self._records else self._sequence + 1
+            if after + 1 < first:
+                raise _client_error(
+                    "TrimmedDataAccessException",
+                    f"Records before sequence {first} are no longer available",
+                    "GetRecords",
+                )
+
+            start = after + 1 - first
+            batch = [self._records[i] for i in range(start, min(start + limit, len(self._records)))]
+            return [copy.deepcopy(record) for _, record in batch], batch[-1][0]
+
+
+# -------------------------------------------------
+# Table
+# -------------------------------------------------
+
+class MemoryTable:
+
+    def __init__(self, name: str, hash_key: str, indexes: Dict[str, str], latency_ms: float = 0.0):
+        self.name = name
+        self.hash_key = hash_key
+        self.indexes = indexes
+        self.latency_ms = latency_ms
+        self._items: Dict[Any, Dict[str, Any]] = {}
+        self._index_data: Dict[str, Dict[Any, Dict[Any, None]]] = {n: {} for n in indexes}
+        self._lock = threading.RLock()
+        self.stream: Optional[MemoryStream] = None
+
+    def enable_stream(self, retention: int = 100_000) -> MemoryStream:
+        with self._lock:
+            if self.stream is None:
+                self.stream = MemoryStream(retention)
+            return self.stream
+
+    # ---------- internals ----------
+
+    def _delay(self):
+        if self.latency_ms:
+            time.sleep(self.latency_ms / 1000)
+
+    def _pk(self, key: Dict[str, Any], operation: str):
+        if set(key) != {self.hash_key}:
+            raise _client_error(
+                "ValidationException",
+                "The provided key element does not match the schema",
+                operation,
+            )
+        return to_dynamo(key[self.hash_key])
+
+    def _index_add(self, item: Dict[str, Any]):
+        pk = item[self.hash_key]
+        for index_name, attr in self.indexes.items():
+            value = item.get(attr)
+            if value is not None:
+                self._index_data[index_name].setdefault(value, {})[pk] = None
+
+    def _index_remove(self, item: Dict[str, Any]):
+        pk = item[self.hash_key]
+        for index_name, attr in self.indexes.items():
+            value = item.get(attr)
+            bucket = self._index_data[index_name].get(value)
+            if bucket is not None:
+                bucket.pop(pk, None)
+                if not bucket:
+                    del self._index_data[index_name][value]
+
+    def _store(self, item: Dict[str, Any]):
+        pk = item[self.hash_key]
+        old = self._items.get(pk)
+        if old is not None:
+            self._index_remove(old)
+        self._items[pk] = item
+        self._index_add(item)
+
+        if self.stream is not None:
+            self.stream.append(
+                "MODIFY" if old is not None else "INSERT",
+                {self.hash_key: pk},
+                copy.deepcopy(item),
+            )
+
+    def _discard(self, pk):
+        old = self._items.pop(pk, None)
+        if old is None:
+            return
+        self._index_remove(old)
+        if self.stream is not None:
+            self.stream.append("REMOVE", {self.hash_key: pk}, None)
+
+    def _check(self, condition, item, names, values, operation: str):
+        if not evaluate_condition(condition, item or {}, names, values):
+            raise _client_error(
+                "ConditionalCheckFailedException",
+                "The conditional request failed",
+                operation,
+            )
+
+    @staticmethod
+    def _consumed(name: str, units: float, params: Dict[str, Any]) -> Dict[str, Any]:
+        if params.get("ReturnConsumedCapacity") in ("TOTAL", "INDEXES"):
+            return {"ConsumedCapacity": {"TableName": name, "CapacityUnits": units}}
+        return {}
+
+    # ---------- item operations ----------
+
+    def put_item(self, Item: Dict[str, Any], ConditionExpression=None,
+                 ExpressionAttributeNames=None, ExpressionAttributeValues=None,
+                 ReturnValues: str = "NONE", **params) -> Dict[str, Any]:
+        self._delay()
+        item = to_dynamo(Item)
+        if self.hash_key not in item:
+            raise _client_error("ValidationException", f"Missing key {self.hash_key}", "PutItem")
+
+        with self._lock:
+            old = self._items.get(item[self.hash_key])
+            self._check(ConditionExpression, old, ExpressionAttributeNames, ExpressionAttributeValues, "PutItem")
+            self._store(item)
+
+        response = self._consumed(self.name, 1.0, params)
+        if ReturnValues == "ALL_OLD" and old is not None:
+            response["Attributes"] = copy.deepcopy(old)
+        return response
+
+    def get_item(self, Key: Dict[str, Any], ProjectionExpression=None,
+                 ExpressionAttributeNames=None, **params) -> Dict[str, Any]:
+        self._delay()
+        pk = self._pk(Key, "GetItem")
+        with self._lock:
+            item = self._items.get(pk)
+            response = self._consumed(self.name, 0.5, params)
+            if item is not None:
+                response["Item"] = copy.deepcopy(_project(item, ProjectionExpression, ExpressionAttributeNames))
+            return response
+
+    def delete_item(self, Key: Dict[str, Any], ConditionExpression=None,
+                    ExpressionAttributeNames=None, ExpressionAttributeValues=None,
+                    ReturnValues: str = "NONE", **params) -> Dict[str, Any]:
+        self._delay()
+        pk = self._pk(Key, "DeleteItem")
+        with self._lock:
+            old = self._items.get(pk)
+            self._check(ConditionExpression, old, ExpressionAttributeNames, ExpressionAttributeValues, "DeleteItem")
+            self._discard(pk)
+
+        response = self._consumed(self.name, 1.0, params)
+        if ReturnValues == "ALL_OLD" and old is not None:
+            response["Attributes"] = copy.deepcopy(old)
+        return response
+
+    def update_item(self, Key: Dict[str, Any], UpdateExpression: str,
+                    ExpressionAttributeValues=None, ExpressionAttributeNames=None,
+                    ConditionExpression=None, ReturnValues: str = "NONE", **params) -> Dict[str, Any]:
+        self._delay()
+        pk = self._pk(Key, "UpdateItem")
+
+        with self._lock:
+            old = self._items.get(pk)
+            self._check(ConditionExpression, old, ExpressionAttributeNames, ExpressionAttributeValues, "UpdateItem")
+
+            item = copy.deepcopy(old) if old is not None else {self.hash_key: pk}
+            apply_update(item, UpdateExpression, ExpressionAttributeNames, ExpressionAttributeValues)
+            self._store(item)
+
+        response = self._consumed(self.name, 1.0, params)
+        if ReturnValues in ("ALL_NEW", "UPDATED_NEW"):
+            response["Attributes"] = copy.deepcopy(item)
+        elif ReturnValues in ("ALL_OLD", "UPDATED_OLD") and old is not None:
+            response["Attributes"] = copy.deepcopy(old)
+        return response
+
+    # ---------- reads ----------
+
+    def _page(self, candidates: List[Dict[str, Any]], params: Dict[str, Any],
+              key_attrs: List[str], operation: str) -> Dict[str, Any]:
+        start = params.get("ExclusiveStartKey")
+        if start:
+            start_pk = to_dynamo(start[self.hash_key])
+            for i, item in enumerate(candidates):
+                if item[self.hash_key] == start_pk:
+                    candidates = candidates[i + 1:]
+                    break
+            else:
+                candidates = []
+
+        limit = params.get("Limit")
+        evaluated = candidates[:limit] if limit else candidates
+
+        names = params.get("ExpressionAttributeNames")
+        values = params.get("ExpressionAttributeValues")
+        filter_expression = params.get("FilterExpression")
+
+        items = [
+            copy.deepcopy(_project(item, params.get("ProjectionExpression"), names))
+            for item in evaluated
+            if evaluate_condition(filter_expression, item, names, values)
+        ]
+
+        response: Dict[str, Any] = {
+            "Items": items,
+            "Count": len(items),
+            "ScannedCount": len(evaluated),
+            **self._consumed(self.name, max(0.5, len(evaluated) * 0.5), params),
+        }
+        if limit and len(candidates) > limit:
+            last = evaluated[-1]
+            response["LastEvaluatedKey"] = {a: last[a] for a in key_attrs if a in last}
+        return response
+
+    def query(self, KeyConditionExpression, IndexName: Optional[str] = None, **params) -> Dict[str, Any]:
+        self._delay()
+        names = params.get("ExpressionAttributeNames")
+        values = params.get("ExpressionAttributeValues")
+
+        with self._lock:
+            if IndexName:
+                if IndexName not in self.indexes:
+                    raise _client_error("ValidationException", f"Index {IndexName} not found", "Query")
+                hash_attr = self.indexes[IndexName]
+            else:
+                hash_attr = self.hash_key
+
+            equalities = (
+                _key_equalities(KeyConditionExpression)
+                if isinstance(KeyConditionExpression, ConditionBase) else {}
+            )
+
+            if hash_attr in equalities:
+                value = equalities[hash_attr]
+                if IndexName:
+                    pks = self._index_data[IndexName].get(value, {})
+                    candidates = [self._items[pk] for pk in pks]
+                else:
+                    item = self._items.get(value)
+                    candidates = [item] if item is not None else []
+            else:
+                candidates = [
+                    item for item in self._items.values()
+                    if item.get(hash_attr) is not None
+                    and evaluate_condition(KeyConditionExpression, item, names, values)
+                ]
+
+            key_attrs = [self.hash_key] + ([hash_attr] if IndexName else [])
+            return self._page(candidates, params, key_attrs, "Query")
+
+    def scan(self, IndexName: Optional[str] = None, Segment: Optional[int] = None,
+             TotalSegments: Optional[int] = None, **params) -> Dict[str, Any]:
+        self._delay()
+        with self._lock:
+            candidates = list(self._items.values())
+            if TotalSegments:
+                candidates = [
+                    item for item in candidates
+                    if zlib.crc32(str(item[self.hash_key]).encode()) % TotalSegments == Segment
+                ]
+            return self._page(candidates, params, [self.hash_key], "Scan")
+
+    def __len__(self) -> int:
+        return len(self._items)
+
+
+# -------------------------------------------------
+# Low-Level Client (resource.meta.client)
+# -------------------------------------------------
+
+class MemoryClient:
+    """
+    The client calls that have no Table equivalent. Like the real
+    client they take typed attribute values ({"S": ...}).
+    """
+
+    def __init__(self, db: "MemoryDynamoDB"):
+        self.db = db
+
+    def transact_write_items(self, TransactItems: List[Dict[str, Any]], **params) -> Dict[str, Any]:
+        """
+        All-or-nothing: every condition is checked and every update
+        evaluated with the involved tables locked, and nothing is
+        stored unless all of them pass.
+        """
+        from boto3.dynamodb.types import TypeDeserializer
+
+        deserializer = TypeDeserializer()
+
+        def plain(values):
+            return {k: deserializer.deserialize(v) for k, v in (values or {}).items()}
+
+        if len(TransactItems) > 100:
+            raise _client_error("ValidationException", "Too many items in the TransactWriteItems call", "TransactWriteItems")
+
+        operations = []
+        seen = set()
+        for entry in TransactItems:
+            (kind, request), = entry.items()
+            table = self.db.Table(request["TableName"])
+            if kind == "Put":
+                item = to_dynamo(plain(request["Item"]))
+                if table.hash_key not in item:
+                    raise _client_error("ValidationException", f"Missing key {table.hash_key}", "TransactWriteItems")
+                pk = item[table.hash_key]
+            else:
+                item = None
+                pk = table._pk(plain(request["Key"]), "TransactWriteItems")
+
+            if (table.name, pk) in seen:
+                raise _client_error(
+                    "ValidationException",
+                    "Transaction request cannot include multiple operations on one item",
+                    "TransactWriteItems",
+                )
+            seen.add((table.name, pk))
+            operations.append((kind, table, pk, item, request, plain(request.get("ExpressionAttributeValues"))))
+
+        # One round trip
+        if operations:
+            operations[0][1]._delay()
+
+        with contextlib.ExitStack() as stack:
+            for table in sorted({op[1] for op in operations}, key=lambda t: t.name):
+                stack.enter_context(table._lock)
+
+            reasons = []
+            writes = []
+            for kind, table, pk, item, request, values in operations:
+                old = table._items.get(pk)
+                names = request.get("ExpressionAttributeNames")
+
+                if evaluate_condition(request.get("ConditionExpression"), old or {}, names, values):
+                    reasons.append({"Code": "None"})
+                else:
+                    reasons.append({"Code": "ConditionalCheckFailed", "Message": "The conditional request failed"})
+
+                if kind == "Update":
+                    item = copy.deepcopy(old) if old is not None else {table.hash_key: pk}
+                    apply_update(item, request["UpdateExpression"], names, values)
+                if kind != "ConditionCheck":
+                    writes.append((table, pk, item))
+
+            if any(reason["Code"] != "None" for reason in reasons):
+                codes = ", ".join(reason["Code"] for reason in reasons)
+                raise ClientError(
+                    {
+                        "Error": {
+                            "Code": "TransactionCanceledException",
+                            "Message": f"Transaction cancelled, please refer cancellation reasons for specific reasons [{codes}]",
+                        },
+                        "CancellationReasons": reasons,
+                    },
+                    "TransactWriteItems",
+                )
+
+            for table, pk, item in writes:
+                if item is None:
+                    table._discard(pk)
+                else:
+                    table._store(item)
+
+        if params.get("ReturnConsumedCapacity") in ("TOTAL", "INDEXES"):
+            # Transactional writes cost two units per item
+            units: Dict[str, float] = {}
+            for _, table, *_ in operations:
+                units[table.name] = units.get(table.name, 0.0) + 2.0
+            return {"ConsumedCapacity": [{"TableName": n, "CapacityUnits": u} for n, u in sorted(units.items())]}
+        return {}
+
+
+# -------------------------------------------------
+# Resource
+# -------------------------------------------------
+
+class MemoryDynamoDB:
+    """
+    Drop-in for boto3.resource("dynamodb") as used by core.database.
+    """
+
+    def __init__(self, schemas: Optional[Dict[str, Tuple[str, Dict[str, str]]]] = None,
+                 latency_ms: float = 0.0):
+        self.latency_ms = latency_ms
+        self.tables: Dict[str, MemoryTable] = {
+            name: MemoryTable(name, hash_key, indexes, latency_ms)
+            for name, (hash_key, indexes) in (schemas or default_schemas()).items()
+        }
+        # Where boto3 exposes the low-level client
+        self.meta = SimpleNamespace(client=MemoryClient(self))
+
+    def Table(self, name: str) -> MemoryTable:
+        if name not in self.tables:
+            raise _client_error("ResourceNotFoundException", f"Table {name} not found", "DescribeTable")
+        return self.tables[name]
+
+    def batch_get_item(self, RequestItems: Dict[str, Dict[str, Any]], **params) -> Dict[str, Any]:
+        total = sum(len(r["Keys"]) for r in RequestItems.values())
+        if total > 100:
+            raise _client_error("ValidationException", "Too many items requested for the BatchGetItem call", "BatchGetItem")
+
+        responses = {}
+        for name, request in RequestItems.items():
+            table = self.Table(name)
+            found = []
+            for key in request["Keys"]:
+                item = table.get_item(
+                    Key=key,
+                    ProjectionExpression=request.get("ProjectionExpression"),
+                    ExpressionAttributeNames=request.get("ExpressionAttributeNames"),
+                ).get("Item")
+                if item is not None:
+                    found.append(item)
+            responses[name] = found
+
+        return {"Responses": responses, "UnprocessedKeys": {}}
+
+    def batch_write_item(self, RequestItems: Dict[str, List[Dict[str, Any]]], **params) -> Dict[str, Any]:
+        total = sum(len(r) for r in RequestItems.values())
+        if total > 25:
+            raise _client_error("ValidationException", "Too many items requested for the BatchWriteItem call", "BatchWriteItem")
+
+        for name, requests in RequestItems.items():
+            table = self.Table(name)
+            for request in requests:
+                if "PutRequest" in request:
+                    table.put_item(Item=request["PutRequest"]["Item"])
+                elif "DeleteRequest" in request:
+                    table.delete_item(Key=request["DeleteRequest"]["Key"])
+
+        return {"UnprocessedItems": {}}
@@ -0,0 +1,300 @@
+# backend/core/metrics.py
+
+import logging
+import threading
+import time
+from bisect import bisect_left
+from contextlib import contextmanager, nullcontext
+from typing import Optional, Dict, Any, List, Tuple, Iterator
+
+from backend.config import settings
+
+
+logger = logging.getLogger("mediconnect")
+
+
+# -------------------------------------------------
+# Metric Types (Prometheus text exposition format)
+# -------------------------------------------------
+# Kept in-process and rendered on GET /metrics. Each metric holds one
+# series per tuple of label values; updates take a short lock.
+
+# Seconds; DynamoDB calls sit at the low end, model calls at the top
+DEFAULT_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+
+
+def _escape(value: str) -> str:
+    return str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+def _format_labels(names: Tuple[str, ...], values: Tuple[str, ...], extra: str = "") -> str:
+    pairs = [f'{n}="{_escape(v)}"' for n, v in zip(names, values)]
+    if extra:
+        pairs.append(extra)
+    return "{" + ",".join(pairs) + "}" if pairs else ""
+
+
+class Counter:
+
+    kind = "counter"
+
+    def __init__(self, name: str, help: str, labels: Tuple[str, ...] = ()):
+        self.name = name
+        self.help = help
+        self.labels = labels
+        self._values: Dict[Tuple[str, ...], float] = {}
+        self._lock = threading.Lock()
+
+    def inc(self, labels: Tuple[str, ...] = (), amount: float = 1.0):
+        with self._lock:
+            self._values[labels] = self._values.get(labels, 0.0) + amount
+
+    def value(self, labels: Tuple[str, ...] = ()) -> float:
+        return self._values.get(labels, 0.0)
+
+    def render(self) -> List[str]:
+        with self._lock:
+            values = sorted(self._values.items())
+        return [f"{self.name}{_format_labels(self.labels, k)} {v:g}" for k, v in values]
+
+
+class Histogram:
+
+    kind = "histogram"
+
+    def __init__(self, name: str, help: str, labels: Tuple[str, ...] = (), buckets=DEFAULT_BUCKETS):
+        self.name = name
+        self.help = help
+        self.labels = labels
+        self.buckets = tuple(buckets)
+        # labels -> [per-bucket counts (last is +Inf), sum, count]
+        self._series: Dict[Tuple[str, ...], list] = {}
+        self._lock = threading.Lock()
+
+    def observe(self, value: float, labels: Tuple[str, ...] = ()):
+        i = bisect_left(self.buckets, value)
+        with self._lock:
+            series = self._series.get(labels)
+            if series is None:
+                series = self._series[labels] = [[0] * (len(self.buckets) + 1), 0.0, 0]
+            series[0][i] += 1
+            series[1] += value
+            series[2] += 1
+
+    def count(self, labels: Tuple[str, ...] = ()) -> int:
+        series = self._series.get(labels)
+        return series[2] if series else 0
+
+    def render(self) -> List[str]:
+        with self._lock:
+            snapshot = sorted((k, list(s[0]), s[1], s[2]) for k, s in self._series.items())
+
+        lines = []
+        for labels, counts, total, count in snapshot:
+            cumulative = 0
+            for bound, n in zip(self.buckets + (float("inf"),), counts):
+                cumulative += n
+                le = 'le="+Inf"' if bound == float("inf") else f'le="{bound:g}"'
+                lines.append(f"{self.name}_bucket{_format_labels(self.labels, labels, le)} {cumulative}")
+            lines.append(f"{self.name}_sum{_format_labels(self.labels, labels)} {total:g}")
+            lines.append(f"{self.name}_count{_format_labels(self.labels, labels)} {count}")
+        return lines
+
+
+class Registry:
+
+    def __init__(self):
+        self._metrics: List[Any] = []
+
+    def counter(self, name: str, help: str, labels: Tuple[str, ...] = ()) -> Counter:
+        metric = Counter(name, help, labels)
+        self._metrics.append(metric)
+        return metric
+
+    def histogram(self, name: str, help: str, labels: Tuple[str, ...] = (), buckets=DEFAULT_BUCKETS) -> Histogram:
+        metric = Histogram(name, help, labels, buckets)
+        self._metrics.append(metric)
+        return metric
+
+    def render(self) -> str:
+        lines = []
+        for metric in self._metrics:
+            lines.append(f"# HELP {metric.name} {metric.help}")
+            lines.append(f"# TYPE {metric.name} {metric.kind}")
+            lines.extend(metric.render())
+        return "\n".join(lines) + "\n"
+
+
+REGISTRY = Registry()
+
+STAGE_SECONDS = REGISTRY.histogram(
+    "mediconnect_stage_seconds",
+    "Wall time per request stage (patient read, prompt, model, parse, writes, matching)",
+    ("stage",),
+)
+STAGE_ERRORS = REGISTRY.counter(
+    "mediconnect_stage_errors_total",
+    "Stages that raised",
+    ("stage",),
+)
+DYNAMODB_SECONDS = REGISTRY.histogram(
+    "mediconnect_dynamodb_seconds",
+    "DynamoDB call latency per table and operation",
+    ("table", "operation"),
+)
+DYNAMODB_CAPACITY = REGISTRY.counter(
+    "mediconnect_dynamodb_consumed_capacity_total",
+    "Capacity units reported by ReturnConsumedCapacity",
+    ("table", "operation"),
+)
+DYNAMODB_ERRORS = REGISTRY.counter(
+    "mediconnect_dynamodb_errors_total",
+    "DynamoDB calls that failed, by error code",
+    ("table", "operation", "code"),
+)
+BEDROCK_TOKENS = REGISTRY.counter(
+    "mediconnect_bedrock_tokens_total",
+    "Bedrock tokens by direction (prompt / generation)",
+    ("kind",),
+)
+HTTP_SECONDS = REGISTRY.histogram(
+    "mediconnect_http_request_seconds",
+    "HTTP request latency per route template",
+    ("method", "route", "status"),
+)
+BACKGROUND_ERRORS = REGISTRY.counter(
+    "mediconnect_background_errors_total",
+    "Failures caught and handled off the request path (flushes, feeds, follow-up steps)",
+    ("task",),
+)
+
+
+# -------------------------------------------------
+# Tracing (optional OpenTelemetry)
+# -------------------------------------------------
+# Only the opentelemetry-api package is used here; the SDK/exporter is
+# configured by whoever runs the app (opentelemetry-instrument, env).
+
+_tracer = None
+_tracer_loaded = False
+
+
+def get_tracer():
+    global _tracer, _tracer_loaded
+
+    if not _tracer_loaded:
+        _tracer_loaded = True
+        if settings.OTEL_ENABLED:
+            try:
+                from opentelemetry import trace
+
+                _tracer = trace.get_tracer("mediconnect")
+            except ImportError:
+                logger.warning("OTEL_ENABLED is set but opentelemetry-api is not installed; spans disabled")
+    return _tracer
+
+
+_NO_SPAN = nullcontext()
+
+
+def span(name: str, **attributes):
+    """An OpenTelemetry span when tracing is on, else a no-op context."""
+    tracer = get_tracer()
+    if tracer is None:
+        return _NO_SPAN
+    return tracer.start_as_current_span(name, attributes=attributes)
+
+
+def stage(name: str, **attributes):
+    """
+    Time a block into mediconnect_stage_seconds{stage=name}, inside a
+    span of the same name when tracing is on. A shared no-op context
+    when metrics are off.
+    """
+    if not settings.METRICS_ENABLED:
+        return _NO_SPAN
+    return _timed_stage(name, attributes)
+
+
+@contextmanager
+def _timed_stage(name: str, attributes: Dict[str, Any]) -> Iterator[None]:
+    with span(name, **attributes):
+        start = time.perf_counter()
+        try:
+            yield
+        except BaseException:
+            STAGE_ERRORS.inc((name,))
+            raise
+        finally:
+            STAGE_SECONDS.observe(time.perf_counter() - start, (name,))
+
+
+def record_dynamodb(table: str, operation: str, seconds: float, consumed=None, error_code: Optional[str] = None):
+    """consumed is a ConsumedCapacity dict, or the list batch calls return."""
+    if not settings.METRICS_ENABLED:
+        return
+
+    DYNAMODB_SECONDS.observe(seconds, (table, operation))
+
+    if error_code:
+        DYNAMODB_ERRORS.inc((table, operation, error_code))
+
+    if isinstance(consumed, dict):
+        consumed = [consumed]
+    for entry in consumed or ():
+        DYNAMODB_CAPACITY.inc((entry.get("TableName", table), operation), float(entry.get("CapacityUnits", 0)))
+
+
+def record_failure(task: str, error: BaseException):
+    """
+    A failure that is handled (retried, skipped, reported to the client)
+    rather than raised: counted per task and logged with its traceback.
+    """
+    if settings.METRICS_ENABLED:
+        BACKGROUND_ERRORS.inc((task,))
+    logger.warning("%s failed: %s", task, error, exc_info=error)
+
+
+def record_tokens(prompt: Optional[int] = None, generation: Optional[int] = None):
+    if not settings.METRICS_ENABLED:
+        return
+    if prompt:
+        BEDROCK_TOKENS.inc(("prompt",), prompt)
+    if generation:
+        BEDROCK_TOKENS.inc(("generation",), generation)
+
+
+# -------------------------------------------------
+# HTTP Middleware (plain ASGI; no per-request task or copy)
+# -------------------------------------------------
+
+class MetricsMiddleware:
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or not settings.METRICS_ENABLED:
+            await self.app(scope, receive, send)
+            return
+
+        status = [500]
+
+        async def send_with_status(message):
+            if message["type"] == "http.response.start":
+                status[0] = message["status"]
+            await send(message)
+
+        with span(scope["method"]) as current:
+            start = time.perf_counter()
+            try:
+                await self.app(scope, receive, send_with_status)
+            finally:
+                # The router leaves the matched route in scope
+                route = getattr(scope.get("route"), "path", "unmatched")
+                HTTP_SECONDS.observe(time.perf_counter() - start, (scope["method"], route, str(status[0])))
+
+                if current is not None:
+                    current.update_name(f"{scope['method']} {route}")
+                    current.set_attribute("http.route", route)
+                    current.set_attribute("http.status_code", status[0])
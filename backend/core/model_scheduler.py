@@ -0,0 +1,264 @@
+# backend/core/model_scheduler.py
+
+import asyncio
+import heapq
+import itertools
+import random
+import time
+from collections import deque
+from typing import Any, Callable, Dict, List, Optional
+
+from botocore.exceptions import ClientError
+
+from backend.config import settings
+from backend.core.concurrency import run_model
+
+
+# -------------------------------------------------
+# Priority Lanes (served strictly in this order)
+# -------------------------------------------------
+
+EMERGENCY = 0   # emergency keywords in the symptoms
+URGENT = 1      # an ASHA worker is waiting on the answer
+ROUTINE = 2     # bulk sync / backfill
+
+LANE_NAMES = {EMERGENCY: "EMERGENCY", URGENT: "URGENT", ROUTINE: "ROUTINE"}
+
+THROTTLE_ERRORS = {
+    "ThrottlingException",
+    "TooManyRequestsException",
+    "ServiceUnavailableException",
+    "ModelNotReadyException",
+}
+
+
+def is_throttle(error: Exception) -> bool:
+    return (
+        isinstance(error, ClientError)
+        and error.response.get("Error", {}).get("Code") in THROTTLE_ERRORS
+    )
+
+
+def _percentile(values, pct: float) -> float:
+    if not values:
+        return 0.0
+    values = sorted(values)
+    return values[min(len(values) - 1, int(round(pct / 100 * (len(values) - 1))))]
+
+
+# -------------------------------------------------
+# Token Bucket
+# -------------------------------------------------
+
+class TokenBucket:
+    """
+    rate tokens per second, holding at most burst. A rate of zero or
+    less means unlimited.
+    """
+
+    def __init__(self, rate: float, burst: float):
+        self.rate = rate
+        self.burst = max(1.0, burst)
+        self.tokens = self.burst
+        self.updated = time.monotonic()
+
+    def _refill(self):
+        now = time.monotonic()
+        self.tokens = min(self.burst, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+
+    def take(self) -> float:
+        """Take a token and return 0, or return seconds until one is due."""
+        if self.rate <= 0:
+            return 0.0
+
+        self._refill()
+        if self.tokens >= 1:
+            self.tokens -= 1
+            return 0.0
+        return (1 - self.tokens) / self.rate
+
+    def drain(self):
+        """The service throttled us anyway; spend the saved-up burst."""
+        if self.rate > 0:
+            self._refill()
+            self.tokens = min(self.tokens, 0.0)
+
+
+# -------------------------------------------------
+# Scheduler
+# -------------------------------------------------
+
+class _LaneStats:
+
+    def __init__(self, window: int):
+        self.submitted = 0
+        self.completed = 0
+        self.failed = 0
+        self.throttled = 0
+        self.positions = deque(maxlen=window)
+        self.waits = deque(maxlen=window)
+        self.services = deque(maxlen=window)
+
+    def summary(self, queued: int) -> Dict[str, Any]:
+        return {
+            "queued": queued,
+            "submitted": self.submitted,
+            "completed": self.completed,
+            "failed": self.failed,
+            "throttled_retries": self.throttled,
+            "queue_position_p50": _percentile(self.positions, 50),
+            "queue_position_max": max(self.positions, default=0),
+            "wait_ms_p50": round(_percentile(self.waits, 50) * 1000, 1),
+            "wait_ms_p95": round(_percentile(self.waits, 95) * 1000, 1),
+            "service_ms_p50": round(_percentile(self.services, 50) * 1000, 1),
+            "service_ms_p95": round(_percentile(self.services, 95) * 1000, 1),
+        }
+
+
+class ModelScheduler:
+    """
+    Admission control in front of the model pool. A call starts only
+    when fewer than max_concurrency are running and the token bucket
+    (the provisioned requests per second) has a token; waiting calls
+    are started lane by lane, oldest first within a lane.
+
+    Throttling errors that still get through are retried with jittered
+    exponential backoff, after draining the bucket so the whole worker
+    slows down rather than just the one call.
+
+    Limits are per process: every worker has its own scheduler. A caller
+    cancelled mid-call cannot stop the model thread, so its slot stays
+    taken until the thread returns.
+    """
+
+    def __init__(
+        self,
+        max_concurrency: int,
+        rate: float,
+        burst: float,
+        max_retries: int = 3,
+        backoff_seconds: float = 0.5,
+        runner: Callable[..., Any] = run_model,
+        window: int = 1000,
+    ):
+        self.max_concurrency = max_concurrency
+        self.bucket = TokenBucket(rate, burst)
+        self.max_retries = max_retries
+        self.backoff_seconds = backoff_seconds
+        self.runner = runner
+
+        self._queue: List[tuple] = []   # heap of (lane, seq, future)
+        self._seq = itertools.count()
+        self._in_flight = 0
+        self._timer: Optional[asyncio.TimerHandle] = None
+        self._lanes = {lane: _LaneStats(window) for lane in LANE_NAMES}
+
+    async def submit(self, fn: Callable[..., Any], *args, priority: int = URGENT, **kwargs) -> Any:
+        """Run fn(*args, **kwargs) on the model pool once admitted."""
+        lane = self._lanes[priority]
+        lane.submitted += 1
+        lane.positions.append(self._ahead(priority))
+        enqueued = time.monotonic()
+
+        for attempt in range(self.max_retries + 1):
+            await self._acquire(priority)
+            if attempt == 0:
+                lane.waits.append(time.monotonic() - enqueued)
+
+            started = time.monotonic()
+            call = asyncio.ensure_future(self.runner(fn, *args, **kwargs))
+            try:
+                result = await asyncio.shield(call)
+            except asyncio.CancelledError:
+                # The thread is still calling Bedrock: keep its slot until it returns
+                call.add_done_callback(self._release_after)
+                raise
+            except Exception as e:
+                self._release()
+                error = e
+            else:
+                self._release()
+                lane.completed += 1
+                lane.services.append(time.monotonic() - started)
+                return result
+
+            if not is_throttle(error) or attempt == self.max_retries:
+                lane.failed += 1
+                raise error
+
+            lane.throttled += 1
+            self.bucket.drain()
+            await asyncio.sleep(self.backoff_seconds * 2 ** attempt * random.uniform(0.5, 1.5))
+
+    def _ahead(self, priority: int) -> int:
+        return sum(1 for lane, _, future in self._queue if lane <= priority and not future.done())
+
+    async def _acquire(self, priority: int):
+        future = asyncio.get_running_loop().create_future()
+        heapq.heappush(self._queue, (priority, next(self._seq), future))
+        self._pump()
+
+        try:
+            await future
+        except asyncio.CancelledError:
+            # Admitted in the same tick we were cancelled: give the slot back
+            if future.done() and not future.cancelled():
+                self._release()
+            raise
+
+    def _release(self):
+        self._in_flight -= 1
+        self._pump()
+
+    def _release_after(self, call: asyncio.Future):
+        if not call.cancelled():
+            call.exception()   # nobody awaits it any more; mark it retrieved
+        self._release()
+
+    def _on_timer(self):
+        self._timer = None
+        self._pump()
+
+    def _pump(self):
+        while self._queue and self._in_flight < self.max_concurrency:
+            future = self._queue[0][2]
+            if future.done():
+                # Caller was cancelled while waiting
+                heapq.heappop(self._queue)
+                continue
+
+            wait = self.bucket.take()
+            if wait > 0:
+                if self._timer is None:
+                    self._timer = asyncio.get_running_loop().call_later(wait, self._on_timer)
+                return
+
+            heapq.heappop(self._queue)
+            self._in_flight += 1
+            future.set_result(None)
+
+    def stats(self) -> Dict[str, Any]:
+        queued = {lane: 0 for lane in LANE_NAMES}
+        for lane, _, future in self._queue:
+            if not future.done():
+                queued[lane] += 1
+
+        return {
+            "in_flight": self._in_flight,
+            "max_concurrency": self.max_concurrency,
+            "rate_per_second": self.bucket.rate,
+            "burst": self.bucket.burst,
+            "lanes": {
+                name: self._lanes[lane].summary(queued[lane])
+                for lane, name in LANE_NAMES.items()
+            },
+        }
+
+
+model_scheduler = ModelScheduler(
+    max_concurrency=settings.BEDROCK_MAX_CONCURRENCY,
+    rate=settings.BEDROCK_MAX_TPS,
+    burst=settings.BEDROCK_BURST,
+    max_retries=settings.BEDROCK_THROTTLE_RETRIES,
+)
@@ -0,0 +1,413 @@
+# backend/core/profiler.py
+
+import asyncio
+import contextvars
+import hashlib
+import hmac
+import os
+import sys
+import threading
+import time
+import uuid
+import weakref
+from collections import OrderedDict
+from typing import Optional, Dict, Any, List, Tuple, Callable
+
+from backend.config import settings
+
+
+# -------------------------------------------------
+# On-Demand Request Profiling
+# -------------------------------------------------
+# A request is profiled when it carries a valid signed X-Profile header,
+# or when an admin armed its route for the next N requests. While at
+# least one profiled request is in flight, a sampler thread reads every
+# thread's stack each PROFILER_INTERVAL_MS and keeps the samples that
+# belong to one:
+#
+#   event loop thread   only while that request's task, or a task it
+#                       spawned, is the one running (tasks are tracked
+#                       by a loop task factory installed meanwhile)
+#   DynamoDB / Bedrock  only while running a call the request submitted
+#   pool threads        through run_db / run_model
+#
+# Nothing is sampled, wrapped or allocated otherwise: with no secret
+# configured the middleware is a single attribute check per request.
+
+Frame = Tuple[str, str, int]   # (function, file, first line)
+
+_current_session: contextvars.ContextVar[Optional["ProfileSession"]] = contextvars.ContextVar(
+    "profile_session", default=None
+)
+
+
+def _frame_key(code, _cache: Dict[Any, Frame] = {}) -> Frame:
+    key = _cache.get(code)
+    if key is None:
+        key = _cache[code] = (code.co_qualname, code.co_filename, code.co_firstlineno)
+    return key
+
+
+def _stack(frame, limit: int = 128) -> Tuple[Frame, ...]:
+    """Root-first tuple of frames."""
+    frames = []
+    while frame is not None and len(frames) < limit:
+        frames.append(_frame_key(frame.f_code))
+        frame = frame.f_back
+    frames.reverse()
+    return tuple(frames)
+
+
+class ProfileSession:
+
+    def __init__(self, method: str, path: str, trigger: str, loop, interval: float):
+        self.id = uuid.uuid4().hex[:12]
+        self.method = method
+        self.path = path
+        self.route: Optional[str] = None
+        self.status: Optional[int] = None
+        self.trigger = trigger
+        self.loop = loop
+        self.loop_thread = threading.get_ident()
+        self.tasks: "weakref.WeakSet[asyncio.Task]" = weakref.WeakSet()
+        self.interval = interval
+        self.started_at = time.time()
+        self.started = time.perf_counter()
+        self.duration = 0.0
+        self.samples: Dict[Tuple[str, Tuple[Frame, ...]], int] = {}   # (thread, stack) -> count
+        self.sample_count = 0
+
+    def add(self, thread: str, stack: Tuple[Frame, ...]):
+        key = (thread, stack)
+        self.samples[key] = self.samples.get(key, 0) + 1
+        self.sample_count += 1
+
+    def summary(self) -> Dict[str, Any]:
+        return {
+            "ProfileID": self.id,
+            "Method": self.method,
+            "Path": self.path,
+            "Route": self.route,
+            "Status": self.status,
+            "Trigger": self.trigger,
+            "StartedAt": self.started_at,
+            "DurationMs": round(self.duration * 1000, 2),
+            "Samples": self.sample_count,
+            "IntervalMs": self.interval * 1000,
+        }
+
+    # ---------- output ----------
+
+    @staticmethod
+    def _label(frame: Frame) -> str:
+        name, filename, line = frame
+        return f"{name} ({os.path.basename(filename)}:{line})"
+
+    def collapsed(self) -> str:
+        """Brendan Gregg's folded format: 'thread;root;...;leaf count' per line."""
+        lines = [
+            ";".join([thread] + [self._label(f) for f in stack]) + f" {count}"
+            for (thread, stack), count in self.samples.items()
+        ]
+        return "\n".join(sorted(lines)) + "\n"
+
+    def speedscope(self) -> Dict[str, Any]:
+        """speedscope's file format, one sampled profile per thread group."""
+        frames: List[Dict[str, Any]] = []
+        index: Dict[Any, int] = {}
+
+        def frame_index(key) -> int:
+            i = index.get(key)
+            if i is None:
+                i = index[key] = len(frames)
+                if isinstance(key, str):
+                    frames.append({"name": key})
+                else:
+                    frames.append({"name": key[0], "file": key[1], "line": key[2]})
+            return i
+
+        interval_ms = self.interval * 1000
+        profiles: Dict[str, Dict[str, Any]] = {}
+        for (thread, stack), count in sorted(self.samples.items()):
+            profile = profiles.setdefault(thread, {
+                "type": "sampled",
+                "name": f"{self.method} {self.route or self.path} [{thread}]",
+                "unit": "milliseconds",
+                "startValue": 0,
+                "endValue": 0,
+                "samples": [],
+                "weights": [],
+            })
+            profile["samples"].append([frame_index(thread)] + [frame_index(f) for f in stack])
+            profile["weights"].append(count * interval_ms)
+            profile["endValue"] += count * interval_ms
+
+        return {
+            "$schema": "https://www.speedscope.app/file-format-schema.json",
+            "name": f"{self.method} {self.route or self.path} ({self.id})",
+            "exporter": "mediconnect",
+            "activeProfileIndex": 0,
+            "shared": {"frames": frames},
+            "profiles": list(profiles.values()),
+        }
+
+
+class Profiler:
+
+    def __init__(self, interval: float, max_seconds: float, keep: int):
+        self.interval = interval
+        self.max_seconds = max_seconds
+        self.keep = keep
+
+        self.active: Dict[str, ProfileSession] = {}
+        self.threads: Dict[int, ProfileSession] = {}   # pool thread -> session it is running for
+        self.armed: Dict[Tuple[str, str], list] = {}   # (method, route template) -> [route, requests left]
+        self.finished: "OrderedDict[str, ProfileSession]" = OrderedDict()
+
+        self._lock = threading.Lock()
+        self._task_factories: Dict[Any, Any] = {}   # loop -> factory it had before
+        self._sampler: Optional[threading.Thread] = None
+        self._wake = threading.Event()
+
+    # ---------- triggers ----------
+
+    def arm(self, method: str, route, count: int):
+        """route is the app's Route object; only armed routes are matched per request."""
+        with self._lock:
+            self.armed[(method.upper(), route.path)] = [route, count]
+
+    def disarm(self, method: str, route: str):
+        with self._lock:
+            self.armed.pop((method.upper(), route), None)
+
+    def claim_armed(self, scope) -> Optional[str]:
+        """Route template if scope hits an armed route, using up one of its requests."""
+        from starlette.routing import Match
+
+        for key, (route, _) in list(self.armed.items()):
+            if key[0] != scope["method"] or route.matches(scope)[0] != Match.FULL:
+                continue
+            with self._lock:
+                entry = self.armed.get(key)
+                if entry is None:
+                    return None
+                entry[1] -= 1
+                if entry[1] <= 0:
+                    del self.armed[key]
+            return key[1]
+        return None
+
+    # ---------- sessions ----------
+
+    def start(self, method: str, path: str, trigger: str) -> ProfileSession:
+        loop = asyncio.get_running_loop()
+        session = ProfileSession(method, path, trigger, loop, self.interval)
+        session.tasks.add(asyncio.current_task())
+        if loop not in self._task_factories:
+            self._task_factories[loop] = loop.get_task_factory()
+            loop.set_task_factory(_tracking_task_factory(self._task_factories[loop]))
+
+        with self._lock:
+            self.active[session.id] = session
+            self._wake.clear()
+            if self._sampler is None or not self._sampler.is_alive():
+                self._sampler = threading.Thread(target=self._sample_loop, name="profiler", daemon=True)
+                self._sampler.start()
+        return session
+
+    def stop(self, session: ProfileSession):
+        session.duration = time.perf_counter() - session.started
+        with self._lock:
+            self.active.pop(session.id, None)
+            self.finished[session.id] = session
+            while len(self.finished) > self.keep:
+                self.finished.popitem(last=False)
+            if not self.active:
+                self._wake.set()
+            loop_idle = not any(s.loop is session.loop for s in self.active.values())
+
+        if loop_idle and session.loop in self._task_factories:
+            session.loop.set_task_factory(self._task_factories.pop(session.loop))
+
+    def get(self, profile_id: str) -> Optional[ProfileSession]:
+        return self.finished.get(profile_id)
+
+    def bind(self, fn: Callable[..., Any]) -> Callable[..., Any]:
+        """
+        fn itself unless the calling request is being profiled; then a
+        wrapper that marks the pool thread as working for it.
+        """
+        if not self.active:
+            return fn
+        session = _current_session.get()
+        if session is None:
+            return fn
+
+        def profiled(*args, **kwargs):
+            thread = threading.get_ident()
+            self.threads[thread] = session
+            try:
+                return fn(*args, **kwargs)
+            finally:
+                self.threads.pop(thread, None)
+
+        return profiled
+
+    # ---------- sampling ----------
+
+    def _sample_loop(self):
+        me = threading.get_ident()
+        names: Dict[int, str] = {}
+
+        while True:
+            with self._lock:
+                if not self.active:
+                    self._sampler = None
+                    return
+                sessions = list(self.active.values())
+
+            frames = sys._current_frames()
+            now = time.perf_counter()
+
+            for session in sessions:
+                if now - session.started > self.max_seconds:
+                    continue
+
+                # Loop thread: only while this request's tasks are running
+                task = asyncio.current_task(session.loop)
+                frame = frames.get(session.loop_thread)
+                if task is not None and frame is not None and task in session.tasks:
+                    session.add("event-loop", _stack(frame))
+
+            for thread, session in list(self.threads.items()):
+                frame = frames.get(thread)
+                if frame is None or thread == me or now - session.started > self.max_seconds:
+                    continue
+                name = names.get(thread)
+                if name is None:
+                    name = names[thread] = _thread_group(thread)
+                session.add(name, _stack(frame))
+
+            del frames
+            self._wake.wait(self.interval)
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "enabled": bool(settings.PROFILER_SECRET),
+            "interval_ms": self.interval * 1000,
+            "active": [s.summary() for s in self.active.values()],
+            "armed": [{"Method": m, "Route": r, "Remaining": n} for (m, r), (_, n) in self.armed.items()],
+            "profiles": [s.summary() for s in reversed(self.finished.values())],
+        }
+
+
+def _tracking_task_factory(previous):
+    """Task factory adding tasks created inside a profiled request to its session."""
+
+    def factory(loop, coro, **kwargs):
+        if previous is not None:
+            task = previous(loop, coro, **kwargs)
+        else:
+            task = asyncio.Task(coro, loop=loop, **kwargs)
+        session = _current_session.get()
+        if session is not None:
+            session.tasks.add(task)
+        return task
+
+    return factory
+
+
+def _thread_group(ident: int) -> str:
+    """'dynamodb_3' -> 'dynamodb'; pool threads of one executor share a profile."""
+    for thread in threading.enumerate():
+        if thread.ident == ident:
+            return thread.name.rsplit("_", 1)[0]
+    return f"thread-{ident}"
+
+
+profiler = Profiler(
+    interval=settings.PROFILER_INTERVAL_MS / 1000,
+    max_seconds=settings.PROFILER_MAX_SECONDS,
+    keep=settings.PROFILER_KEEP,
+)
+
+
+# -------------------------------------------------
+# Signed Header
+# -------------------------------------------------
+# X-Profile: <unix expiry>.<hex HMAC-SHA256(PROFILER_SECRET, "<expiry>:<path>")>
+# Bound to one path and short-lived, so a leaked header can't be replayed
+# against other routes or later on.
+
+PROFILE_HEADER = b"x-profile"
+
+
+def sign_profile_request(path: str, ttl_seconds: float = 300, secret: Optional[str] = None) -> str:
+    expires = int(time.time() + ttl_seconds)
+    key = (secret or settings.PROFILER_SECRET).encode()
+    signature = hmac.new(key, f"{expires}:{path}".encode(), hashlib.sha256).hexdigest()
+    return f"{expires}.{signature}"
+
+
+def verify_profile_header(value: str, path: str) -> bool:
+    if not settings.PROFILER_SECRET:
+        return False
+    expires, _, signature = value.partition(".")
+    if not expires.isdigit() or int(expires) < time.time():
+        return False
+    expected = hmac.new(settings.PROFILER_SECRET.encode(), f"{expires}:{path}".encode(), hashlib.sha256).hexdigest()
+    return hmac.compare_digest(expected, signature)
+
+
+def verify_admin_token(token: Optional[str]) -> bool:
+    return bool(settings.PROFILER_SECRET) and token is not None and hmac.compare_digest(token, settings.PROFILER_SECRET)
+
+
+# -------------------------------------------------
+# Middleware (plain ASGI, outermost so the whole request is covered)
+# -------------------------------------------------
+
+class ProfilerMiddleware:
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if not settings.PROFILER_SECRET or scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        trigger = None
+        for name, value in scope["headers"]:
+            if name == PROFILE_HEADER:
+                if verify_profile_header(value.decode("latin-1"), scope["path"]):
+                    trigger = "header"
+                break
+
+        route = None
+        if trigger is None and profiler.armed:
+            route = profiler.claim_armed(scope)
+            if route is not None:
+                trigger = "armed"
+
+        if trigger is None:
+            await self.app(scope, receive, send)
+            return
+
+        session = profiler.start(scope["method"], scope["path"], trigger)
+        session.route = route
+
+        async def send_with_id(message):
+            if message["type"] == "http.response.start":
+                session.status = message["status"]
+                message["headers"] = list(message.get("headers", [])) + [(b"x-profile-id", session.id.encode())]
+            await send(message)
+
+        token = _current_session.set(session)
+        try:
+            await self.app(scope, receive, send_with_id)
+        finally:
+            _current_session.reset(token)
+            if session.route is None:
+                session.route = getattr(scope.get("route"), "path", None)
+            profiler.stop(session)
@@ -0,0 +1,353 @@
+# backend/core/websocket.py
+
+import asyncio
+import itertools
+import json
+import time
+from collections import OrderedDict
+from typing import Optional, Dict, Any, Set, Callable, List
+
+from fastapi import WebSocket, WebSocketDisconnect
+
+from backend.config import settings
+
+
+# -------------------------------------------------
+# Topics
+# -------------------------------------------------
+# case:<CaseID>          status changes for one case (ASHA app)
+# doctor:<DoctorID>      a doctor's incoming queue
+# district:<District>    new cases, assignments and outbreak alerts
+
+TOPIC_PREFIXES = ("case:", "doctor:", "district:")
+
+
+def case_topic(case_id: str) -> str:
+    return f"case:{case_id}"
+
+
+def doctor_topic(doctor_id: str) -> str:
+    return f"doctor:{doctor_id}"
+
+
+def district_topic(district: str) -> str:
+    return f"district:{district}"
+
+
+def valid_topic(topic: str) -> bool:
+    return topic.startswith(TOPIC_PREFIXES) and len(topic) <= 256
+
+
+# -------------------------------------------------
+# Brokers (share events between workers)
+# -------------------------------------------------
+
+Deliver = Callable[[str, str, Optional[str]], None]
+
+
+class Broker:
+    """
+    Carries published events to every worker's hub. Each hub attaches
+    a deliver(topic, data, coalesce_key) callback; publish() must
+    eventually call it on all attached hubs, including the publisher's.
+    A cross-process implementation (Redis pub/sub, SNS/SQS, API Gateway)
+    subclasses this.
+    """
+
+    def attach(self, deliver: Deliver) -> None:
+        raise NotImplementedError
+
+    def detach(self, deliver: Deliver) -> None:
+        raise NotImplementedError
+
+    async def publish(self, topic: str, data: str, coalesce_key: Optional[str] = None) -> None:
+        raise NotImplementedError
+
+    async def start(self) -> None:
+        pass
+
+    async def stop(self) -> None:
+        pass
+
+
+class InProcessBroker(Broker):
+    """
+    Delivers synchronously to every hub attached in this process. One
+    instance shared by several hubs behaves like several workers on a
+    common broker.
+    """
+
+    def __init__(self):
+        self._targets: List[Deliver] = []
+
+    def attach(self, deliver: Deliver) -> None:
+        self._targets.append(deliver)
+
+    def detach(self, deliver: Deliver) -> None:
+        if deliver in self._targets:
+            self._targets.remove(deliver)
+
+    async def publish(self, topic: str, data: str, coalesce_key: Optional[str] = None) -> None:
+        for deliver in self._targets:
+            deliver(topic, data, coalesce_key)
+
+
+# -------------------------------------------------
+# Connection
+# -------------------------------------------------
+
+_sequence = itertools.count()
+
+
+class Connection:
+    """
+    One socket and its bounded send buffer. Buffered events that share a
+    coalesce key (e.g. a case's status) are replaced in place by the
+    newer one. When the buffer is full the oldest event is dropped, so a
+    slow client costs memory proportional to max_queue, never to the
+    publish rate.
+    """
+
+    def __init__(self, websocket, max_queue: int):
+        self.websocket = websocket
+        self.max_queue = max_queue
+        self.topics: Set[str] = set()
+        self.last_seen = time.monotonic()
+
+        self.sent = 0
+        self.dropped = 0
+        self.coalesced = 0
+
+        self._pending: "OrderedDict[Any, str]" = OrderedDict()
+        self._wake = asyncio.Event()
+        self._closed = False
+        self._sender: Optional[asyncio.Task] = None
+
+    def start(self):
+        self._sender = asyncio.create_task(self._send_loop())
+
+    def enqueue(self, data: str, coalesce_key: Optional[str] = None):
+        if self._closed:
+            return
+
+        if coalesce_key is not None and coalesce_key in self._pending:
+            self._pending[coalesce_key] = data
+            self.coalesced += 1
+            return
+
+        if len(self._pending) >= self.max_queue:
+            self._pending.popitem(last=False)
+            self.dropped += 1
+
+        self._pending[coalesce_key if coalesce_key is not None else next(_sequence)] = data
+        self._wake.set()
+
+    async def _send_loop(self):
+        try:
+            while not self._closed:
+                await self._wake.wait()
+                self._wake.clear()
+                while self._pending and not self._closed:
+                    _, data = self._pending.popitem(last=False)
+                    await self.websocket.send_text(data)
+                    self.sent += 1
+        except Exception:
+            # Socket went away mid-send; the receive side cleans up
+            self._closed = True
+
+    async def close(self, code: int = 1000):
+        if self._closed:
+            return
+        self._closed = True
+        self._wake.set()
+        try:
+            await self.websocket.close(code=code)
+        except Exception:
+            pass
+
+    async def wait_closed(self):
+        if self._sender:
+            self._sender.cancel()
+            try:
+                await self._sender
+            except (asyncio.CancelledError, Exception):
+                pass
+
+
+# -------------------------------------------------
+# Hub
+# -------------------------------------------------
+
+class WebSocketHub:
+    """
+    Topic fan-out for this worker's sockets. Events are JSON-encoded once
+    per publish and handed to each subscriber's buffer without awaiting
+    any socket, so one slow client never holds up the others.
+
+    A single heartbeat task pings every connection each
+    heartbeat_seconds and closes those silent for idle_timeout_seconds.
+    """
+
+    def __init__(
+        self,
+        broker: Optional[Broker] = None,
+        max_queue: int = 100,
+        heartbeat_seconds: float = 20.0,
+        idle_timeout_seconds: float = 60.0,
+    ):
+        self.broker = broker or InProcessBroker()
+        self.max_queue = max_queue
+        self.heartbeat_seconds = heartbeat_seconds
+        self.idle_timeout_seconds = idle_timeout_seconds
+
+        self.connections: Set[Connection] = set()
+        self.topics: Dict[str, Set[Connection]] = {}
+        self.published = 0
+        self.delivered = 0
+
+        self._heartbeat: Optional[asyncio.Task] = None
+        self._ping = json.dumps({"type": "ping"})
+
+    # ---------- lifecycle ----------
+
+    async def start(self):
+        self.broker.attach(self._deliver)
+        await self.broker.start()
+        self._heartbeat = asyncio.create_task(self._heartbeat_loop())
+
+    async def stop(self):
+        if self._heartbeat:
+            self._heartbeat.cancel()
+            self._heartbeat = None
+        self.broker.detach(self._deliver)
+        await self.broker.stop()
+
+        for conn in list(self.connections):
+            await conn.close(code=1001)
+            await self.disconnect(conn)
+
+    # ---------- connections ----------
+
+    def connect(self, websocket) -> Connection:
+        conn = Connection(websocket, self.max_queue)
+        conn.start()
+        self.connections.add(conn)
+        return conn
+
+    async def disconnect(self, conn: Connection):
+        for topic in list(conn.topics):
+            self.unsubscribe(conn, topic)
+        self.connections.discard(conn)
+        await conn.close()
+        await conn.wait_closed()
+
+    def subscribe(self, conn: Connection, topic: str):
+        self.topics.setdefault(topic, set()).add(conn)
+        conn.topics.add(topic)
+
+    def unsubscribe(self, conn: Connection, topic: str):
+        subscribers = self.topics.get(topic)
+        if subscribers is not None:
+            subscribers.discard(conn)
+            if not subscribers:
+                del self.topics[topic]
+        conn.topics.discard(topic)
+
+    # ---------- events ----------
+
+    async def publish(self, topic: str, event: Dict[str, Any], coalesce_key: Optional[str] = None):
+        """
+        Send event to topic subscribers on every worker. Events with the
+        same coalesce_key supersede each other in slow clients' buffers.
+        """
+        data = json.dumps({"topic": topic, **event}, default=str)
+        self.published += 1
+        await self.broker.publish(topic, data, coalesce_key)
+
+    def _deliver(self, topic: str, data: str, coalesce_key: Optional[str] = None):
+        for conn in self.topics.get(topic, ()):
+            conn.enqueue(data, coalesce_key)
+            self.delivered += 1
+
+    async def _heartbeat_loop(self):
+        while True:
+            await asyncio.sleep(self.heartbeat_seconds)
+            cutoff = time.monotonic() - self.idle_timeout_seconds
+
+            for conn in list(self.connections):
+                if conn.last_seen < cutoff:
+                    await conn.close(code=1001)
+                else:
+                    conn.enqueue(self._ping, coalesce_key="ping")
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "connections": len(self.connections),
+            "topics": len(self.topics),
+            "published": self.published,
+            "delivered": self.delivered,
+            "dropped": sum(c.dropped for c in self.connections),
+            "coalesced": sum(c.coalesced for c in self.connections),
+        }
+
+
+hub = WebSocketHub(
+    max_queue=settings.WS_SEND_QUEUE_SIZE,
+    heartbeat_seconds=settings.WS_HEARTBEAT_SECONDS,
+    idle_timeout_seconds=settings.WS_IDLE_TIMEOUT_SECONDS,
+)
+
+
+# -------------------------------------------------
+# Endpoint
+# -------------------------------------------------
+# Client messages (JSON):
+#   {"action": "subscribe",   "topic": "case:CASE-1a2b3c4d"}
+#   {"action": "unsubscribe", "topic": "case:CASE-1a2b3c4d"}
+#   {"action": "ping"} -> {"type": "pong"};  {"action": "pong"} answers a ping
+# Initial topics may also be passed as ?topics=case:X,district:Patna
+
+async def websocket_endpoint(websocket: WebSocket):
+
+    await websocket.accept()
+    conn = hub.connect(websocket)
+
+    def reply(message: Dict[str, Any]):
+        conn.enqueue(json.dumps(message))
+
+    def subscribe(topic: str):
+        if valid_topic(topic):
+            hub.subscribe(conn, topic)
+            reply({"type": "subscribed", "topic": topic})
+        else:
+            reply({"type": "error", "detail": f"Unknown topic: {topic}"})
+
+    try:
+        for topic in filter(None, websocket.query_params.get("topics", "").split(",")):
+            subscribe(topic)
+
+        while True:
+            raw = await websocket.receive_text()
+            conn.last_seen = time.monotonic()
+
+            try:
+                message = json.loads(raw)
+                action = message.get("action")
+            except (ValueError, AttributeError):
+                reply({"type": "error", "detail": "Messages must be JSON objects"})
+                continue
+
+            if action == "subscribe":
+                subscribe(str(message.get("topic", "")))
+            elif action == "unsubscribe":
+                hub.unsubscribe(conn, str(message.get("topic", "")))
+            elif action == "ping":
+                reply({"type": "pong"})
+            elif action != "pong":
+                reply({"type": "error", "detail": f"Unknown action: {action}"})
+
+    except (WebSocketDisconnect, RuntimeError):
+        # RuntimeError: receive after the heartbeat closed the socket
+        pass
+    finally:
+        await hub.disconnect(conn)
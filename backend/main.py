@@ -1,9 +1,64 @@
+import asyncio
+from contextlib import asynccontextmanager
+
 from fastapi import FastAPI
+from fastapi.responses import PlainTextResponse
 from fastapi.middleware.cors import CORSMiddleware
 
+from backend.config import settings
+from backend.core.concurrency import run_db, shutdown_executors
+from backend.core.database import warm_up as warm_up_database
+from backend.core.metrics import MetricsMiddleware, REGISTRY
+from backend.core.profiler import ProfilerMiddleware
+from backend.core.websocket import hub, websocket_endpoint
+from backend.services.analytics_service import flush_periodically, rollups
+from backend.services.diagnosis_service import get_bedrock
+from backend.services.doctor_match_service import doctor_roster
+from backend.services.live_events import outbreaks_detected
+from backend.services.notification_service import notification_queue
+from backend.services.outbreak_service import seed_baselines, sync_periodically as sync_outbreaks
+from backend.services.prescription_service import get_drug_index
 from backend.routes.asha import auth, patients, cases
+from backend.routes.district import analytics, prediction
+from backend.routes.doctor import consultation, prescription
+from backend.routes.admin import profiler as admin_profiler, stats as admin_stats
+
+# ----------------------------------------
+# Lifespan: pre-warm AWS clients per worker
+# ----------------------------------------
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    if settings.PREWARM_CLIENTS:
+        await run_db(warm_up_database)
+        await run_db(get_bedrock)
+
+    # Compile (first worker) or just mmap the drug interaction index
+    await run_db(get_drug_index)
+
+    await hub.start()
+    await notification_queue.start()
+
+    # Outbreak baselines from the shared rollups, so a restart is not blind
+    await seed_baselines(outbreaks_detected)
+
+    flusher = asyncio.create_task(flush_periodically(settings.ANALYTICS_FLUSH_SECONDS))
+    roster = asyncio.create_task(doctor_roster.run(settings.DOCTOR_FEED_POLL_SECONDS))
+    outbreaks = asyncio.create_task(sync_outbreaks(settings.OUTBREAK_SYNC_SECONDS, outbreaks_detected))
 
-app = FastAPI(title="MediConnect AI")
+    yield
+
+    await notification_queue.stop()
+    await hub.stop()
+    flusher.cancel()
+    roster.cancel()
+    outbreaks.cancel()
+    await run_db(rollups.flush)
+
+    shutdown_executors()
+
+
+app = FastAPI(title="MediConnect AI", lifespan=lifespan)
 
 # ----------------------------------------
 # CORS Configuration (for frontend)
@@ -15,8 +70,15 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
+    expose_headers=["X-Next-Token"],
 )
 
+# Per-route latency histograms for /metrics
+app.add_middleware(MetricsMiddleware)
+
+# On-demand sampling profiles (added last, so it wraps everything else)
+app.add_middleware(ProfilerMiddleware)
+
 # ----------------------------------------
 # Include Routers
 # ----------------------------------------
@@ -24,8 +86,23 @@ app.add_middleware(
 app.include_router(auth.router)
 app.include_router(patients.router)
 app.include_router(cases.router)
+app.include_router(analytics.router)
+app.include_router(prediction.router)
+app.include_router(consultation.router)
+app.include_router(prescription.router)
+app.include_router(admin_profiler.router)
+app.include_router(admin_stats.router)
+
+# Live case / doctor queue / district updates
+app.add_api_websocket_route("/ws", websocket_endpoint)
 
 
 @app.get("/")
 def root():
-    return {"message": "MediConnect AI Backend Running"}
\ No newline at end of file
+    return {"message": "MediConnect AI Backend Running"}
+
+
+@app.get("/metrics", include_in_schema=False)
+def metrics():
+    # Prometheus text exposition format
+    return PlainTextResponse(REGISTRY.render(), media_type="text/plain; version=0.0.4")
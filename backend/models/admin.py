@@ -0,0 +1,13 @@
+# backend/models/admin.py
+
+from pydantic import BaseModel, Field
+
+
+# -------------------------------------------------
+# Request: Arm the Profiler for a Route
+# -------------------------------------------------
+
+class ProfilerArmRequest(BaseModel):
+    Method: str = Field("POST", example="POST")
+    Route: str = Field(..., example="/cases/diagnose")   # route template, as in the OpenAPI paths
+    Count: int = Field(1, ge=1, le=100)
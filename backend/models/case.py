@@ -1,8 +1,8 @@
 # backend/models/case.py
 
 from typing import List, Optional
-from datetime import datetime
-from pydantic import BaseModel, Field
+from datetime import datetime, timezone
+from pydantic import BaseModel, Field, field_validator
 
 
 # -------------------------------------------------
@@ -16,6 +16,23 @@ class CaseDiagnoseRequest(BaseModel):
     Language: str = Field(..., example="hi-IN")  # hi-IN / en-IN
 
 
+# -------------------------------------------------
+# Request: Bulk Sync Record (offline case capture)
+# -------------------------------------------------
+
+class CaseSyncRecord(CaseDiagnoseRequest):
+    ClientID: str = Field(..., min_length=1, example="device-7f3a-0042")
+    CapturedAt: Optional[datetime] = Field(None, example="2026-10-18T06:30:00")
+
+    @field_validator("CapturedAt")
+    @classmethod
+    def naive_utc(cls, value: Optional[datetime]) -> Optional[datetime]:
+        # Stored CreatedAt values are naive UTC; devices may send an offset
+        if value is not None and value.tzinfo is not None:
+            value = value.astimezone(timezone.utc).replace(tzinfo=None)
+        return value
+
+
 # -------------------------------------------------
 # Bedrock Diagnosis Output Structure
 # -------------------------------------------------
@@ -59,6 +76,8 @@ class CaseDB(BaseModel):
     ICD10Description: str
 
     Status: str  # PENDING / DOCTOR_ASSIGNED / COMPLETED / CLOSED
+    DiagnosisPending: bool = False  # emergency fast path, model still running
+    DiagnosisFailed: bool = False   # ... and the model call failed: diagnose by hand
     CreatedAt: str
     UpdatedAt: str
 
@@ -77,6 +96,8 @@ class CaseResponse(BaseModel):
     ICD10Code: str
     ICD10Description: str
     Status: str
+    DiagnosisPending: bool = False
+    DiagnosisFailed: bool = False
 
     class Config:
         from_attributes = True
\ No newline at end of file
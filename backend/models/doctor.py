@@ -0,0 +1,42 @@
+# backend/models/doctor.py
+
+from typing import List, Optional
+from pydantic import BaseModel, Field
+
+
+# -------------------------------------------------
+# Request: SOAP Note for a Consultation
+# -------------------------------------------------
+
+class SoapNoteRequest(BaseModel):
+    DoctorID: Optional[str] = Field(None, example="DOC-001")
+    ConsultationText: str = Field(
+        "",
+        max_length=20000,
+        example="Fever since 3 days, no bleeding gums. Advised CBC and NS1. Paracetamol 500mg SOS.",
+    )
+
+
+# -------------------------------------------------
+# Request: Prescription Check
+# -------------------------------------------------
+# The patient's recorded CurrentMedications / KnownAllergies are used
+# when PatientID is given; the lists here are checked in addition.
+
+class PrescriptionItem(BaseModel):
+    DrugName: str = Field(..., min_length=1, max_length=200, example="Ibuprofen 400mg")
+    Dose: Optional[str] = Field(None, example="400 mg")
+    Frequency: Optional[str] = Field(None, example="TDS")
+    DurationDays: Optional[int] = Field(None, ge=1, le=365, example=5)
+
+
+class PrescriptionCheckRequest(BaseModel):
+    PatientID: Optional[str] = Field(None, example="PAT-1a2b3c4d")
+    CaseID: Optional[str] = None
+    Items: List[PrescriptionItem] = Field(..., min_length=1, max_length=50)
+    CurrentMedications: Optional[List[str]] = Field(None, example=["Warfarin 5mg"])
+    KnownAllergies: Optional[List[str]] = Field(None, example=["Penicillin"])
+
+
+class BatchPrescriptionCheckRequest(BaseModel):
+    Prescriptions: List[PrescriptionCheckRequest] = Field(..., min_length=1, max_length=1000)
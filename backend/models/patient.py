@@ -23,6 +23,8 @@ class PatientBase(BaseModel):
     KnownConditions: Optional[List[str]] = []
     KnownAllergies: Optional[List[str]] = []
     CurrentMedications: Optional[List[str]] = []
+    Lat: Optional[float] = Field(None, ge=-90, le=90, example=25.5921)    # home, for doctor matching
+    Lng: Optional[float] = Field(None, ge=-180, le=180, example=85.1376)
 
 
 # -------------------------------------------------
@@ -33,6 +35,14 @@ class PatientCreate(PatientBase):
     ASHAWorkerID: str = Field(..., example="ASHA-001")
 
 
+# -------------------------------------------------
+# Request: Bulk Sync Record (offline registration)
+# -------------------------------------------------
+
+class PatientSyncRecord(PatientCreate):
+    ClientID: str = Field(..., min_length=1, example="device-7f3a-0012")
+
+
 # -------------------------------------------------
 # Request: Update Patient
 # -------------------------------------------------
@@ -54,6 +64,7 @@ class PatientResponse(PatientBase):
     ASHAWorkerID: str
     RegisteredDate: str
     LastVisitDate: Optional[str] = None
+    CaseCount: int = 0
 
     class Config:
         from_attributes = True
@@ -67,4 +78,5 @@ class PatientDB(PatientBase):
     PatientID: str
     ASHAWorkerID: str
     RegisteredDate: str
-    LastVisitDate: Optional[str] = None
\ No newline at end of file
+    LastVisitDate: Optional[str] = None
+    CaseCount: int = 0
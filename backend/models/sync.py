@@ -0,0 +1,50 @@
+# backend/models/sync.py
+
+from typing import Any, Dict, List, Optional
+
+from pydantic import BaseModel, Field, ValidationError
+
+
+# -------------------------------------------------
+# Request: Offline Sync Batch
+# -------------------------------------------------
+# Records are validated one by one (against PatientCreate /
+# CaseDiagnoseRequest) so a single bad record does not reject the batch.
+
+class BulkSyncRequest(BaseModel):
+    Records: List[Dict[str, Any]] = Field(..., max_length=1000)
+
+
+# -------------------------------------------------
+# Response: Per-Record Outcome
+# -------------------------------------------------
+
+class BulkRecordResult(BaseModel):
+    Index: int
+    ClientID: Optional[str] = None
+    Status: str  # CREATED / DUPLICATE / INVALID / FAILED
+    RecordID: Optional[str] = None
+    Error: Optional[str] = None
+
+
+class BulkSyncResponse(BaseModel):
+    Created: int
+    Duplicates: int
+    Failed: int
+    Results: List[BulkRecordResult]
+
+    @classmethod
+    def from_results(cls, results: List[BulkRecordResult]) -> "BulkSyncResponse":
+        return cls(
+            Created=sum(r.Status == "CREATED" for r in results),
+            Duplicates=sum(r.Status == "DUPLICATE" for r in results),
+            Failed=sum(r.Status in ("INVALID", "FAILED") for r in results),
+            Results=results,
+        )
+
+
+def format_validation_error(error: ValidationError) -> str:
+    return "; ".join(
+        f"{'.'.join(str(part) for part in err['loc'])}: {err['msg']}"
+        for err in error.errors()
+    )
@@ -0,0 +1,99 @@
+# backend/routes/admin/profiler.py
+
+import json
+from typing import Optional, Literal
+
+from fastapi import APIRouter, HTTPException, Header, Query, Request
+from fastapi.responses import PlainTextResponse, Response
+
+from backend.core.profiler import profiler, verify_admin_token
+from backend.models.admin import ProfilerArmRequest
+
+
+router = APIRouter(prefix="/admin/profiler", tags=["Admin - Profiler"])
+
+
+def require_admin(token: Optional[str]):
+    # Unconfigured looks the same as absent
+    if not verify_admin_token(token):
+        raise HTTPException(status_code=404, detail="Not Found")
+
+
+# -------------------------------------------------
+# Status: armed routes, in-flight and kept profiles
+# -------------------------------------------------
+
+@router.get("")
+def profiler_status(token: Optional[str] = Header(None, alias="X-Profiler-Token")):
+
+    require_admin(token)
+    return profiler.stats()
+
+
+# -------------------------------------------------
+# Arm / Disarm (profile the next N requests to a route)
+# -------------------------------------------------
+
+@router.post("/arm")
+def arm_route(
+    payload: ProfilerArmRequest,
+    request: Request,
+    token: Optional[str] = Header(None, alias="X-Profiler-Token"),
+):
+
+    require_admin(token)
+
+    method = payload.Method.upper()
+    route = next(
+        (
+            r for r in request.app.router.routes
+            if getattr(r, "path", None) == payload.Route and method in (getattr(r, "methods", None) or ())
+        ),
+        None,
+    )
+    if route is None:
+        raise HTTPException(status_code=400, detail=f"No route {method} {payload.Route}")
+
+    profiler.arm(method, route, payload.Count)
+    return {"Method": method, "Route": payload.Route, "Remaining": payload.Count}
+
+
+@router.delete("/arm")
+def disarm_route(
+    method: str = Query(...),
+    route: str = Query(...),
+    token: Optional[str] = Header(None, alias="X-Profiler-Token"),
+):
+
+    require_admin(token)
+    profiler.disarm(method, route)
+    return {"Method": method.upper(), "Route": route, "Remaining": 0}
+
+
+# -------------------------------------------------
+# Download (collapsed stacks for flamegraph.pl / speedscope JSON)
+# -------------------------------------------------
+
+@router.get("/profiles/{profile_id}")
+def get_profile(
+    profile_id: str,
+    format: Literal["speedscope", "collapsed", "summary"] = Query("speedscope"),
+    token: Optional[str] = Header(None, alias="X-Profiler-Token"),
+):
+
+    require_admin(token)
+
+    session = profiler.get(profile_id)
+    if session is None:
+        raise HTTPException(status_code=404, detail="Profile not found")
+
+    if format == "collapsed":
+        return PlainTextResponse(session.collapsed())
+    if format == "summary":
+        return session.summary()
+
+    return Response(
+        json.dumps(session.speedscope()),
+        media_type="application/json",
+        headers={"Content-Disposition": f'attachment; filename="{profile_id}.speedscope.json"'},
+    )
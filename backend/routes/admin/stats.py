@@ -0,0 +1,76 @@
+# backend/routes/admin/stats.py
+
+from typing import Optional
+
+from fastapi import APIRouter, Depends, Header
+
+from backend.core.database import item_cache_stats
+from backend.core.model_scheduler import model_scheduler
+from backend.services.diagnosis_cache import diagnosis_cache
+from backend.services.diagnosis_service import diagnosis_flights
+from backend.services.doctor_match_service import doctor_roster
+from backend.services.notification_service import notification_queue
+from backend.routes.admin.profiler import require_admin
+
+
+def admin_only(token: Optional[str] = Header(None, alias="X-Profiler-Token")):
+    require_admin(token)
+
+
+# Every route here is internal: all of them need the admin token
+router = APIRouter(prefix="/admin", tags=["Admin - Stats"], dependencies=[Depends(admin_only)])
+
+
+# -------------------------------------------------
+# Item Cache (patient / case read-through LRU)
+# -------------------------------------------------
+
+@router.get("/db/cache-stats")
+def db_cache_stats():
+    return item_cache_stats()
+
+
+# -------------------------------------------------
+# Diagnosis Cache / Coalescing
+# -------------------------------------------------
+
+@router.get("/diagnose/cache-stats")
+def diagnosis_cache_stats():
+
+    coalescing = diagnosis_flights.stats()
+
+    if not diagnosis_cache:
+        return {"enabled": False, "coalescing": coalescing}
+
+    return {"enabled": True, **diagnosis_cache.stats(), "coalescing": coalescing}
+
+
+# -------------------------------------------------
+# Model Scheduler (queue positions, waits, throttling)
+# -------------------------------------------------
+
+@router.get("/diagnose/scheduler-stats")
+def diagnosis_scheduler_stats():
+
+    return model_scheduler.stats()
+
+
+# -------------------------------------------------
+# Doctor Roster (change feed lag, resyncs)
+# -------------------------------------------------
+
+@router.get("/db/doctor-roster")
+def doctor_roster_stats():
+    return doctor_roster.stats()
+
+
+# -------------------------------------------------
+# WhatsApp Queue (depth, batches, last dead letters)
+# -------------------------------------------------
+
+@router.get("/notifications/stats")
+async def notification_stats():
+    return {
+        **notification_queue.stats(),
+        "dead_letters": list(notification_queue.dead_letters)[-20:],
+    }
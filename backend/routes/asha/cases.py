@@ -1,22 +1,53 @@
 # backend/routes/asha/cases.py
 
-from fastapi import APIRouter, HTTPException
-from typing import List
+import asyncio
+from fastapi import APIRouter, HTTPException, Header, Query, Response
+from typing import List, Optional, Dict
 from datetime import datetime
 
+from pydantic import ValidationError
+
 from boto3.dynamodb.conditions import Key
+from botocore.exceptions import ClientError
 
 from backend.models.case import (
     CaseDiagnoseRequest,
     CaseResponse,
+    CaseSyncRecord,
+)
+from backend.models.sync import (
+    BulkSyncRequest,
+    BulkSyncResponse,
+    BulkRecordResult,
+    format_validation_error,
 )
+from backend.config import settings
+from backend.core.concurrency import run_db
+from backend.core.metrics import record_failure
+from backend.core.model_scheduler import ROUTINE
 from backend.core.database import (
     cases_table,
     patients_table,
+    batch_get_items,
+    deterministic_id,
+    query_items,
+    query_page,
+)
+from backend.services.diagnosis_service import (
+    diagnose_case,
+    prepare_case,
+    auto_tag_patient,
+)
+from backend.services.analytics_service import record_case, record_status_change
+from backend.services.live_events import case_created, case_assigned
+from backend.services.doctor_match_service import (
+    match_doctor,
+    assign_doctors_batch,
+    get_available_doctors,
+    patient_location,
 )
-from backend.services.diagnosis_service import diagnose_case
-from backend.services.doctor_match_service import match_doctor
 from backend.services.notification_service import format_whatsapp_case_message
+from backend.services.outbreak_service import outbreak_detector, claim_alerts
 
 
 router = APIRouter(prefix="/cases", tags=["ASHA - Cases"])
@@ -27,36 +58,180 @@ router = APIRouter(prefix="/cases", tags=["ASHA - Cases"])
 # -------------------------------------------------
 
 @router.post("/diagnose", response_model=CaseResponse)
-def diagnose(payload: CaseDiagnoseRequest):
+async def diagnose(
+    payload: CaseDiagnoseRequest,
+    idempotency_key: Optional[str] = Header(
+        None,
+        alias="Idempotency-Key",
+        max_length=128,
+        description="Client-generated per diagnose attempt; retries with the same key return the same case",
+    ),
+):
 
     try:
-        case_item = diagnose_case(payload)
+        case_item = await diagnose_case(payload, idempotency_key=idempotency_key)
         return case_item
     except Exception as e:
-        print("DIAGNOSIS ERROR:", str(e))
+        record_failure("diagnose", e)
         raise HTTPException(status_code=500, detail=str(e))
 
-    return {
-        "CaseID": case_item["CaseID"],
-        "PrimaryDiagnosis": case_item["PrimaryDiagnosis"],
-        "ConfidencePercent": case_item["ConfidencePercent"],
-        "RiskLevel": case_item["RiskLevel"],
-        "RiskReason": case_item["RiskReason"],
-        "ImmediateActions": case_item["ImmediateActions"],
-        "ICD10Code": case_item["ICD10Code"],
-        "ICD10Description": case_item["ICD10Description"],
-        "Status": case_item["Status"],
+
+# -------------------------------------------------
+# Bulk Sync (Offline-Captured Cases)
+# -------------------------------------------------
+
+async def _put_new_case(case_item) -> bool:
+    """Store case_item; False if its CaseID was stored by someone else."""
+    try:
+        await run_db(
+            cases_table.put_item,
+            Item=case_item,
+            ConditionExpression="attribute_not_exists(CaseID)",
+        )
+        return True
+    except ClientError as e:
+        if e.response["Error"]["Code"] != "ConditionalCheckFailedException":
+            raise
+        return False
+
+
+@router.post("/bulk-sync", response_model=BulkSyncResponse)
+async def bulk_sync_cases(payload: BulkSyncRequest):
+
+    results: Dict[int, BulkRecordResult] = {}
+    pending: Dict[str, tuple] = {}   # CaseID -> (index, record)
+
+    # 1️⃣ Validate; CaseID is derived from ASHA + ClientID
+    for index, raw in enumerate(payload.Records):
+        client_id = raw.get("ClientID")
+        if client_id is not None:
+            client_id = str(client_id)
+
+        try:
+            record = CaseSyncRecord(**raw)
+        except ValidationError as e:
+            results[index] = BulkRecordResult(
+                Index=index, ClientID=client_id, Status="INVALID",
+                Error=format_validation_error(e),
+            )
+            continue
+
+        case_id = deterministic_id("CASE", record.ASHAWorkerID, record.ClientID)
+
+        if case_id in pending:
+            results[index] = BulkRecordResult(
+                Index=index, ClientID=client_id, Status="DUPLICATE", RecordID=case_id,
+            )
+            continue
+
+        pending[case_id] = (index, record)
+
+    # 2️⃣ Drop cases already synced, so retries never re-diagnose
+    existing = {
+        c["CaseID"]
+        for c in await run_db(
+            batch_get_items,
+            cases_table,
+            [{"CaseID": case_id} for case_id in pending],
+            projection=["CaseID"],
+        )
     }
 
+    for case_id in existing:
+        index, record = pending.pop(case_id)
+        results[index] = BulkRecordResult(
+            Index=index, ClientID=record.ClientID, Status="DUPLICATE", RecordID=case_id,
+        )
+
+    # 3️⃣ Diagnose concurrently (ROUTINE lane: live requests go first)
+    patients = {
+        p["PatientID"]: p
+        for p in await run_db(
+            batch_get_items,
+            patients_table,
+            [{"PatientID": record.PatientID} for _, record in pending.values()],
+        )
+    }
+
+    prepared = await asyncio.gather(
+        *[
+            prepare_case(
+                record,
+                case_id=case_id,
+                created_at=record.CapturedAt.isoformat() if record.CapturedAt else None,
+                patient=patients.get(record.PatientID),
+                priority=ROUTINE,
+            )
+            for case_id, (_, record) in pending.items()
+        ],
+        return_exceptions=True,
+    )
+
+    diagnosed = {}
+    for (case_id, (index, record)), outcome in zip(pending.items(), prepared):
+        if isinstance(outcome, Exception):
+            results[index] = BulkRecordResult(
+                Index=index, ClientID=record.ClientID, Status="FAILED",
+                RecordID=case_id, Error=str(outcome),
+            )
+        else:
+            diagnosed[case_id] = outcome
+
+    # 4️⃣ Conditional puts: a concurrent retry of the same batch may have
+    #    stored the case since step 2, and only the winner counts it
+    stored = await asyncio.gather(
+        *[_put_new_case(case_item) for case_item, _, _ in diagnosed.values()],
+        return_exceptions=True,
+    )
+
+    # 5️⃣ One visit update per patient (tags, case count, last visit)
+    tags: Dict[str, set] = {}
+    visits: Dict[str, List[str]] = {}
+    for (case_id, (case_item, ai_output, patient)), outcome in zip(diagnosed.items(), stored):
+        index, record = pending[case_id]
+
+        if isinstance(outcome, Exception):
+            results[index] = BulkRecordResult(
+                Index=index, ClientID=record.ClientID, Status="FAILED",
+                RecordID=case_id, Error=str(outcome),
+            )
+            continue
+
+        if not outcome:
+            results[index] = BulkRecordResult(
+                Index=index, ClientID=record.ClientID, Status="DUPLICATE", RecordID=case_id,
+            )
+            continue
+
+        results[index] = BulkRecordResult(
+            Index=index, ClientID=record.ClientID, Status="CREATED", RecordID=case_id,
+        )
+        tags.setdefault(patient["PatientID"], set()).update(ai_output.auto_tag_conditions)
+        visits.setdefault(patient["PatientID"], []).append(case_item["CreatedAt"])
+        alerts = await claim_alerts(outbreak_detector.observe_case(case_item, patient))
+        record_case(case_item, patient)
+        await case_created(case_item, patient, alerts)
+
+    for patient_id, conditions in tags.items():
+        patient = patients[patient_id]
+        await auto_tag_patient(
+            patient,
+            list(conditions),
+            visited_at=max(visits[patient_id] + [patient.get("LastVisitDate") or ""]),
+            cases=len(visits[patient_id]),
+        )
+
+    return BulkSyncResponse.from_results([results[i] for i in sorted(results)])
+
 
 # -------------------------------------------------
 # Get Single Case
 # -------------------------------------------------
 
 @router.get("/{case_id}")
-def get_case(case_id: str):
+async def get_case(case_id: str):
 
-    response = cases_table.get_item(Key={"CaseID": case_id})
+    response = await run_db(cases_table.get_item, Key={"CaseID": case_id})
     item = response.get("Item")
 
     if not item:
@@ -70,14 +245,37 @@ def get_case(case_id: str):
 # -------------------------------------------------
 
 @router.get("/patient/{patient_id}", response_model=List[CaseResponse])
-def get_cases_for_patient(patient_id: str):
-
-    response = cases_table.query(
-        IndexName="PatientID-index",
-        KeyConditionExpression=Key("PatientID").eq(patient_id)
-    )
-
-    items = response.get("Items", [])
+async def get_cases_for_patient(
+    patient_id: str,
+    response: Response,
+    limit: Optional[int] = Query(None, ge=1, le=500),
+    next_token: Optional[str] = Query(None),
+):
+
+    key_condition = Key("PatientID").eq(patient_id)
+
+    if limit is None:
+        items = await run_db(
+            query_items,
+            cases_table,
+            key_condition,
+            index_name="PatientID-index",
+        )
+    else:
+        try:
+            items, token = await run_db(
+                query_page,
+                cases_table,
+                key_condition,
+                limit=limit,
+                next_token=next_token,
+                index_name="PatientID-index",
+            )
+        except ValueError as e:
+            raise HTTPException(status_code=400, detail=str(e))
+
+        if token:
+            response.headers["X-Next-Token"] = token
 
     return [
         {
@@ -100,10 +298,10 @@ def get_cases_for_patient(patient_id: str):
 # -------------------------------------------------
 
 @router.post("/{case_id}/connect-doctor")
-def connect_doctor(case_id: str):
+async def connect_doctor(case_id: str):
 
     # 1️⃣ Fetch Case
-    case_response = cases_table.get_item(Key={"CaseID": case_id})
+    case_response = await run_db(cases_table.get_item, Key={"CaseID": case_id})
     case_item = case_response.get("Item")
 
     if not case_item:
@@ -116,7 +314,8 @@ def connect_doctor(case_id: str):
         )
 
     # 2️⃣ Fetch Patient
-    patient_response = patients_table.get_item(
+    patient_response = await run_db(
+        patients_table.get_item,
         Key={"PatientID": case_item["PatientID"]}
     )
     patient = patient_response.get("Item")
@@ -124,37 +323,48 @@ def connect_doctor(case_id: str):
     if not patient:
         raise HTTPException(status_code=404, detail="Patient not found")
 
-    # Demo ASHA coordinates (Bikram)
-    asha_lat = 25.5921
-    asha_lng = 85.1376
-
-    # 3️⃣ Match Doctor
-    matched_doctor = match_doctor(
+    # 3️⃣ Match Doctor (nearest to the patient's home)
+    location = patient_location(patient)
+    matched_doctor = await run_db(
+        match_doctor,
         primary_diagnosis=case_item["PrimaryDiagnosis"],
         patient_age=patient["Age"],
-        asha_lat=asha_lat,
-        asha_lng=asha_lng
+        asha_lat=location["Lat"],
+        asha_lng=location["Lng"]
     )
 
     if not matched_doctor:
         raise HTTPException(status_code=404, detail="No available doctor found")
 
     # 4️⃣ Update Case with Doctor
-    update_response = cases_table.update_item(
-        Key={"CaseID": case_id},
-        UpdateExpression="SET DoctorID = :d, #st = :s, UpdatedAt = :u",
-        ExpressionAttributeValues={
-            ":d": matched_doctor["DoctorID"],
-            ":s": "DOCTOR_ASSIGNED",
-            ":u": datetime.utcnow().isoformat(),
-        },
-        ExpressionAttributeNames={
-            "#st": "Status"
-        },
-        ReturnValues="ALL_NEW",
-    )
+    now = datetime.utcnow().isoformat()
+
+    # Conditional: the case read above may come from the item cache
+    try:
+        update_response = await run_db(
+            cases_table.update_item,
+            Key={"CaseID": case_id},
+            UpdateExpression="SET DoctorID = :d, #st = :s, UpdatedAt = :u",
+            ConditionExpression="#st = :pending",
+            ExpressionAttributeValues={
+                ":d": matched_doctor["DoctorID"],
+                ":s": "DOCTOR_ASSIGNED",
+                ":u": now,
+                ":pending": "PENDING",
+            },
+            ExpressionAttributeNames={
+                "#st": "Status"
+            },
+            ReturnValues="ALL_NEW",
+        )
+    except ClientError as e:
+        if e.response["Error"]["Code"] != "ConditionalCheckFailedException":
+            raise
+        raise HTTPException(status_code=400, detail="Doctor already assigned")
 
     updated_case = update_response.get("Attributes")
+    record_status_change(case_item, patient, "PENDING", "DOCTOR_ASSIGNED", now)
+    await case_assigned(updated_case, patient, matched_doctor)
 
     # 5️⃣ Generate WhatsApp Preview (Mock)
     whatsapp_message = format_whatsapp_case_message(
@@ -171,4 +381,123 @@ def connect_doctor(case_id: str):
         "DistanceKm": round(matched_doctor["DistanceKm"], 2),
         "CaseStatus": updated_case["Status"],
         "whatsapp_preview": whatsapp_message,
-    }
\ No newline at end of file
+    }
+
+
+# -------------------------------------------------
+# Assign Doctors to PENDING Backlog (Batch)
+# -------------------------------------------------
+
+@router.post("/assign-pending")
+async def assign_pending(limit: int = Query(200, ge=1, le=1000)):
+
+    # 1️⃣ Pending backlog, oldest first
+    pending = await run_db(
+        query_items,
+        cases_table,
+        Key("Status").eq("PENDING"),
+        index_name="Status-index",
+    )
+
+    pending.sort(key=lambda c: c.get("CreatedAt", ""))
+    pending = pending[:limit]
+
+    if not pending:
+        return {"assigned": [], "unassigned": [], "conflicted": []}
+
+    # 2️⃣ Patients in one batched read
+    patients = {
+        p["PatientID"]: p
+        for p in await run_db(
+            batch_get_items,
+            patients_table,
+            [{"PatientID": c["PatientID"]} for c in pending]
+        )
+    }
+
+    # 3️⃣ Doctor capacity = limit minus cases already assigned
+    doctors = await run_db(get_available_doctors)
+
+    active = await run_db(
+        query_items,
+        cases_table,
+        Key("Status").eq("DOCTOR_ASSIGNED"),
+        index_name="Status-index",
+        projection=["DoctorID"],
+    )
+
+    active_count = {}
+    for c in active:
+        active_count[c.get("DoctorID")] = active_count.get(c.get("DoctorID"), 0) + 1
+
+    capacity = {
+        d["DoctorID"]: int(d.get("MaxActiveCases", settings.DOCTOR_DEFAULT_CAPACITY))
+        - active_count.get(d["DoctorID"], 0)
+        for d in doctors
+    }
+
+    # 4️⃣ Vectorized matching over the full case x doctor matrix
+    candidates = [
+        {
+            "CaseID": c["CaseID"],
+            "PrimaryDiagnosis": c["PrimaryDiagnosis"],
+            "PatientAge": int(patients[c["PatientID"]]["Age"]),
+            "RiskLevel": c.get("RiskLevel"),
+            "CreatedAt": c.get("CreatedAt", ""),
+            **patient_location(patients[c["PatientID"]]),
+        }
+        for c in pending
+        if c["PatientID"] in patients
+    ]
+
+    assignments, unassigned = assign_doctors_batch(candidates, doctors, capacity)
+
+    unassigned += [c["CaseID"] for c in pending if c["PatientID"] not in patients]
+
+    # 5️⃣ Persist; cases another request assigned meanwhile are "conflicted"
+    assigned, conflicted = [], []
+    pending_by_id = {c["CaseID"]: c for c in pending}
+    now = datetime.utcnow().isoformat()
+
+    for a in assignments:
+        doctor = a["Doctor"]
+        try:
+            await run_db(
+                cases_table.update_item,
+                Key={"CaseID": a["CaseID"]},
+                UpdateExpression="SET DoctorID = :d, #st = :s, UpdatedAt = :u",
+                ConditionExpression="#st = :pending",
+                ExpressionAttributeValues={
+                    ":d": doctor["DoctorID"],
+                    ":s": "DOCTOR_ASSIGNED",
+                    ":u": now,
+                    ":pending": "PENDING",
+                },
+                ExpressionAttributeNames={
+                    "#st": "Status"
+                },
+            )
+        except ClientError as e:
+            if e.response["Error"]["Code"] != "ConditionalCheckFailedException":
+                raise
+            conflicted.append(a["CaseID"])
+            continue
+
+        case_item = pending_by_id[a["CaseID"]]
+        patient = patients[case_item["PatientID"]]
+        record_status_change(case_item, patient, "PENDING", "DOCTOR_ASSIGNED", now)
+        await case_assigned(
+            {**case_item, "Status": "DOCTOR_ASSIGNED", "DoctorID": doctor["DoctorID"], "UpdatedAt": now},
+            patient,
+            doctor,
+        )
+
+        assigned.append({
+            "CaseID": a["CaseID"],
+            "DoctorID": doctor["DoctorID"],
+            "DoctorName": doctor["Name"],
+            "Specialization": doctor["Specialization"],
+            "DistanceKm": round(doctor["DistanceKm"], 2),
+        })
+
+    return {"assigned": assigned, "unassigned": unassigned, "conflicted": conflicted}
@@ -1,20 +1,38 @@
 # backend/routes/asha/patients.py
 
-from fastapi import APIRouter, HTTPException, Query
-from typing import List
+from fastapi import APIRouter, HTTPException, Query, Response
+from typing import List, Optional, Dict, Any
 from datetime import datetime
+from decimal import Decimal
+
+from pydantic import ValidationError
 
 from backend.models.patient import (
     PatientCreate,
     PatientUpdate,
     PatientResponse,
+    PatientSyncRecord,
+)
+from backend.models.sync import (
+    BulkSyncRequest,
+    BulkSyncResponse,
+    BulkRecordResult,
+    format_validation_error,
 )
+from backend.core.concurrency import run_db
 from backend.core.database import (
     patients_table,
     generate_uuid,
+    deterministic_id,
+    query_items,
+    query_page,
+    batch_get_items,
+    batch_write_items,
 )
 
-from boto3.dynamodb.conditions import Key, Attr
+from backend.services.patient_search import patient_search_index
+
+from boto3.dynamodb.conditions import Key
 
 
 router = APIRouter(prefix="/patients", tags=["ASHA - Patients"])
@@ -24,10 +42,7 @@ router = APIRouter(prefix="/patients", tags=["ASHA - Patients"])
 # Register New Patient
 # -------------------------------------------------
 
-@router.post("/register", response_model=PatientResponse)
-def register_patient(payload: PatientCreate):
-    patient_id = generate_uuid("PAT")
-
+def build_patient_item(payload: PatientCreate, patient_id: str) -> Dict[str, Any]:
     item = {
         "PatientID": patient_id,
         "ASHAWorkerID": payload.ASHAWorkerID,
@@ -40,63 +55,178 @@ def register_patient(payload: PatientCreate):
         "Phone": payload.Phone,
         "ABHA_ID": payload.ABHA_ID,
         "BloodGroup": payload.BloodGroup,
-        "KnownConditions": payload.KnownConditions or [],
         "KnownAllergies": payload.KnownAllergies or [],
         "CurrentMedications": payload.CurrentMedications or [],
         "RegisteredDate": datetime.utcnow().isoformat(),
         "LastVisitDate": None,
     }
 
-    patients_table.put_item(Item=item)
+    if payload.Lat is not None and payload.Lng is not None:
+        item["Lat"] = Decimal(str(payload.Lat))
+        item["Lng"] = Decimal(str(payload.Lng))
+
+    # A string set, which diagnoses ADD to (DynamoDB sets can't be empty)
+    if payload.KnownConditions:
+        item["KnownConditions"] = set(payload.KnownConditions)
 
     return item
 
 
-# -------------------------------------------------
-# Get All Patients for ASHA
-# -------------------------------------------------
+@router.post("/register", response_model=PatientResponse)
+async def register_patient(payload: PatientCreate):
+    patient_id = generate_uuid("PAT")
 
-@router.get("/{asha_id}", response_model=List[PatientResponse])
-def get_patients_for_asha(asha_id: str):
-    response = patients_table.query(
-        IndexName="ASHAWorkerID-index",
-        KeyConditionExpression=Key("ASHAWorkerID").eq(asha_id)
-    )
+    item = build_patient_item(payload, patient_id)
 
-    return response.get("Items", [])
+    await run_db(patients_table.put_item, Item=item)
+    patient_search_index.upsert(item)
+
+    return item
 
 
 # -------------------------------------------------
-# Get Single Patient Profile
+# Bulk Register (Offline Sync)
 # -------------------------------------------------
 
-@router.get("/profile/{patient_id}", response_model=PatientResponse)
-def get_patient(patient_id: str):
-    response = patients_table.get_item(Key={"PatientID": patient_id})
-    item = response.get("Item")
+@router.post("/bulk", response_model=BulkSyncResponse)
+async def bulk_register_patients(payload: BulkSyncRequest):
+
+    results: Dict[int, BulkRecordResult] = {}
+    pending: Dict[str, tuple] = {}   # PatientID -> (index, client_id, item)
+
+    # 1️⃣ Validate each record; PatientID is derived from ASHA + ClientID
+    for index, record in enumerate(payload.Records):
+        client_id = record.get("ClientID")
+        if client_id is not None:
+            client_id = str(client_id)
+
+        try:
+            patient = PatientSyncRecord(**record)
+        except ValidationError as e:
+            results[index] = BulkRecordResult(
+                Index=index, ClientID=client_id, Status="INVALID",
+                Error=format_validation_error(e),
+            )
+            continue
+
+        patient_id = deterministic_id("PAT", patient.ASHAWorkerID, patient.ClientID)
+
+        if patient_id in pending:
+            results[index] = BulkRecordResult(
+                Index=index, ClientID=client_id, Status="DUPLICATE", RecordID=patient_id,
+            )
+            continue
+
+        pending[patient_id] = (index, client_id, build_patient_item(patient, patient_id))
+
+    # 2️⃣ Skip records synced by an earlier attempt
+    existing = {
+        p["PatientID"]
+        for p in await run_db(
+            batch_get_items,
+            patients_table,
+            [{"PatientID": patient_id} for patient_id in pending],
+            projection=["PatientID"],
+        )
+    }
 
-    if not item:
-        raise HTTPException(status_code=404, detail="Patient not found")
+    # 3️⃣ Write the rest in batches of 25
+    new_items = [item for pid, (_, _, item) in pending.items() if pid not in existing]
+    failed = {
+        item["PatientID"]
+        for item in await run_db(batch_write_items, patients_table, new_items)
+    }
 
-    return item
+    for patient_id, (index, client_id, item) in pending.items():
+        if patient_id in existing:
+            status = "DUPLICATE"
+        elif patient_id in failed:
+            status = "FAILED"
+        else:
+            status = "CREATED"
+
+        results[index] = BulkRecordResult(
+            Index=index, ClientID=client_id, Status=status, RecordID=patient_id,
+            Error="Write throttled, retry sync" if status == "FAILED" else None,
+        )
+
+        if status == "CREATED":
+            patient_search_index.upsert(item)
+
+    return BulkSyncResponse.from_results([results[i] for i in sorted(results)])
 
 
 # -------------------------------------------------
-# Search Patients (Name or Village)
+# Search Patients (Name or Village, typeahead)
 # -------------------------------------------------
 
 @router.get("/search")
-def search_patients(
+async def search_patients(
     asha_id: str = Query(...),
-    q: str = Query(...)
+    q: str = Query(...),
+    limit: int = Query(20, ge=1, le=100),
 ):
-    response = patients_table.query(
-        IndexName="ASHAWorkerID-index",
-        KeyConditionExpression=Key("ASHAWorkerID").eq(asha_id),
-        FilterExpression=Attr("Name").contains(q) | Attr("Village").contains(q)
-    )
+    # Served from the in-memory index; only a cold ASHA touches DynamoDB
+    if patient_search_index.is_warm(asha_id):
+        return patient_search_index.search(asha_id, q, limit)
+
+    return await run_db(patient_search_index.search, asha_id, q, limit)
+
+
+# -------------------------------------------------
+# Get All Patients for ASHA
+# -------------------------------------------------
 
-    return response.get("Items", [])
+@router.get("/{asha_id}", response_model=List[PatientResponse])
+async def get_patients_for_asha(
+    asha_id: str,
+    response: Response,
+    limit: Optional[int] = Query(None, ge=1, le=500),
+    next_token: Optional[str] = Query(None),
+):
+    key_condition = Key("ASHAWorkerID").eq(asha_id)
+
+    # No limit: full list across all pages
+    if limit is None:
+        return await run_db(
+            query_items,
+            patients_table,
+            key_condition,
+            index_name="ASHAWorkerID-index",
+        )
+
+    # Paged: next page token travels in the X-Next-Token header
+    try:
+        items, token = await run_db(
+            query_page,
+            patients_table,
+            key_condition,
+            limit=limit,
+            next_token=next_token,
+            index_name="ASHAWorkerID-index",
+        )
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+    if token:
+        response.headers["X-Next-Token"] = token
+
+    return items
+
+
+# -------------------------------------------------
+# Get Single Patient Profile
+# -------------------------------------------------
+
+@router.get("/profile/{patient_id}", response_model=PatientResponse)
+async def get_patient(patient_id: str):
+    response = await run_db(patients_table.get_item, Key={"PatientID": patient_id})
+    item = response.get("Item")
+
+    if not item:
+        raise HTTPException(status_code=404, detail="Patient not found")
+
+    return item
 
 
 # -------------------------------------------------
@@ -104,26 +234,43 @@ def search_patients(
 # -------------------------------------------------
 
 @router.put("/{patient_id}", response_model=PatientResponse)
-def update_patient(patient_id: str, payload: PatientUpdate):
+async def update_patient(patient_id: str, payload: PatientUpdate):
 
     update_fields = {k: v for k, v in payload.dict().items() if v is not None}
 
     if not update_fields:
         raise HTTPException(status_code=400, detail="No fields to update")
 
-    update_expression = "SET " + ", ".join(
-        f"{key} = :{key}" for key in update_fields.keys()
-    )
-
-    expression_values = {
-        f":{key}": value for key, value in update_fields.items()
-    }
-
-    response = patients_table.update_item(
+    # KnownConditions is a string set; an empty list clears it
+    removes = []
+    if "KnownConditions" in update_fields:
+        conditions = set(update_fields.pop("KnownConditions"))
+        if conditions:
+            update_fields["KnownConditions"] = conditions
+        else:
+            removes.append("KnownConditions")
+
+    clauses = []
+    if update_fields:
+        clauses.append("SET " + ", ".join(f"{key} = :{key}" for key in update_fields))
+    if removes:
+        clauses.append("REMOVE " + ", ".join(removes))
+
+    params = {}
+    if update_fields:
+        params["ExpressionAttributeValues"] = {
+            f":{key}": value for key, value in update_fields.items()
+        }
+
+    response = await run_db(
+        patients_table.update_item,
         Key={"PatientID": patient_id},
-        UpdateExpression=update_expression,
-        ExpressionAttributeValues=expression_values,
+        UpdateExpression=" ".join(clauses),
         ReturnValues="ALL_NEW",
+        **params,
     )
 
-    return response.get("Attributes")
\ No newline at end of file
+    patient = response.get("Attributes")
+    patient_search_index.upsert(patient)
+
+    return patient
\ No newline at end of file
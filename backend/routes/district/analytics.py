@@ -0,0 +1,91 @@
+# backend/routes/district/analytics.py
+
+from datetime import date, datetime, timedelta
+from typing import Optional, Literal
+
+from fastapi import APIRouter, HTTPException, Query
+
+from backend.core.concurrency import run_db
+from backend.services.analytics_service import (
+    case_counts,
+    status_funnel,
+    time_to_doctor,
+)
+from backend.services.outbreak_service import outbreak_detector, read_alerts
+
+
+router = APIRouter(prefix="/district/analytics", tags=["District - Analytics"])
+
+
+MAX_RANGE_DAYS = 366
+
+
+# -------------------------------------------------
+# Cases by Day / Block / Risk / ICD-10 Chapter
+# -------------------------------------------------
+
+@router.get("/cases")
+async def cases_summary(
+    district: str = Query(..., example="Patna"),
+    start: Optional[date] = Query(None, description="Defaults to 29 days before end"),
+    end: Optional[date] = Query(None, description="Defaults to today (UTC)"),
+    group_by: Literal["day", "block", "risk", "chapter"] = Query("day"),
+    block: Optional[str] = Query(None),
+):
+
+    end = end or datetime.utcnow().date()
+    start = start or end - timedelta(days=29)
+
+    if start > end:
+        raise HTTPException(status_code=400, detail="start must not be after end")
+
+    if (end - start).days + 1 > MAX_RANGE_DAYS:
+        raise HTTPException(status_code=400, detail=f"Range is limited to {MAX_RANGE_DAYS} days")
+
+    return await run_db(case_counts, district, start, end, group_by, block)
+
+
+# -------------------------------------------------
+# Status Funnel (PENDING -> DOCTOR_ASSIGNED -> COMPLETED)
+# -------------------------------------------------
+
+@router.get("/funnel")
+async def funnel(district: str = Query(..., example="Patna")):
+
+    return await run_db(status_funnel, district)
+
+
+# -------------------------------------------------
+# Time-to-Doctor Percentiles
+# -------------------------------------------------
+
+@router.get("/time-to-doctor")
+async def time_to_doctor_summary(
+    district: str = Query(..., example="Patna"),
+    months: int = Query(3, ge=1, le=24, description="Calendar months, including the current one"),
+):
+
+    year, month = datetime.utcnow().year, datetime.utcnow().month
+    keys = []
+    for _ in range(months):
+        keys.append(f"{year:04d}-{month:02d}")
+        year, month = (year, month - 1) if month > 1 else (year - 1, 12)
+
+    return await run_db(time_to_doctor, district, keys[::-1])
+
+
+# -------------------------------------------------
+# Outbreak Alerts (claimed by any worker's detector)
+# -------------------------------------------------
+
+@router.get("/outbreaks")
+async def outbreaks(
+    district: str = Query(..., example="Patna"),
+    days: int = Query(7, ge=1, le=90, description="Alert days to include, up to today"),
+    limit: int = Query(100, ge=1, le=1000),
+):
+
+    return {
+        "alerts": await run_db(read_alerts, district, days, limit),
+        "stats": outbreak_detector.stats(),   # this worker's detector
+    }
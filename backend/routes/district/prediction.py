@@ -0,0 +1,27 @@
+# backend/routes/district/prediction.py
+
+from typing import Optional
+
+from fastapi import APIRouter, Query
+
+from backend.core.concurrency import run_db
+
+
+router = APIRouter(prefix="/district/prediction", tags=["District - Prediction"])
+
+
+# -------------------------------------------------
+# Next-Week Case Load per Block and Diagnosis
+# -------------------------------------------------
+
+@router.get("/next-week")
+async def next_week(
+    district: str = Query(..., example="Patna"),
+    block: Optional[str] = Query(None),
+    limit: int = Query(50, ge=1, le=1000, description="Top block x diagnosis series to return"),
+):
+
+    # numpy-backed; imported here to keep it off the app import path
+    from backend.services.forecast_service import district_forecasts
+
+    return await run_db(district_forecasts.next_week, district, block, limit)
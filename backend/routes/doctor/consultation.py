@@ -0,0 +1,79 @@
+# backend/routes/doctor/consultation.py
+
+import json
+from fastapi import APIRouter, HTTPException
+from fastapi.responses import StreamingResponse
+
+from backend.core.metrics import record_failure
+from backend.models.doctor import SoapNoteRequest
+from backend.services.soap_service import (
+    cached_note,
+    load_note_inputs,
+    stream_soap_note,
+)
+
+
+router = APIRouter(prefix="/doctor/consultation", tags=["Doctor - Consultation"])
+
+
+def _sse(event: dict) -> str:
+    return f"event: {event['type']}\ndata: {json.dumps(event, ensure_ascii=False)}\n\n"
+
+
+async def _load(case_id: str):
+    try:
+        return await load_note_inputs(case_id)
+    except Exception as e:
+        if str(e) == "Case not found":
+            raise HTTPException(status_code=404, detail="Case not found")
+        raise HTTPException(status_code=500, detail=str(e))
+
+
+# -------------------------------------------------
+# Generate SOAP Note (Server-Sent Events)
+# -------------------------------------------------
+# Sections are sent as they are written, so the doctor can start
+# reading SUBJECTIVE while PLAN is still being generated:
+#
+#   event: delta     {"section": "SUBJECTIVE", "text": "..."}
+#   event: section   {"section": "SUBJECTIVE", "text": "<whole section>"}
+#   event: done      {"cached": false, "note": {...}}
+#   event: error     {"detail": "..."}
+
+@router.post("/{case_id}/soap")
+async def generate_soap_note(case_id: str, payload: SoapNoteRequest):
+
+    case, patient = await _load(case_id)
+
+    async def events():
+        try:
+            async for event in stream_soap_note(case, patient, payload.ConsultationText):
+                yield _sse(event)
+        except Exception as e:
+            record_failure("soap_note", e)
+            yield _sse({"type": "error", "detail": str(e)})
+
+    return StreamingResponse(
+        events(),
+        media_type="text/event-stream",
+        headers={
+            "Cache-Control": "no-cache",
+            "X-Accel-Buffering": "no",   # nginx: don't buffer the stream
+        },
+    )
+
+
+# -------------------------------------------------
+# Latest SOAP Note for the Current Case Version
+# -------------------------------------------------
+
+@router.get("/{case_id}/soap")
+async def get_soap_note(case_id: str):
+
+    case, _ = await _load(case_id)
+
+    note = cached_note(case)
+    if note is None:
+        raise HTTPException(status_code=404, detail="No SOAP note for this case version")
+
+    return note
@@ -0,0 +1,97 @@
+# backend/routes/doctor/prescription.py
+
+from fastapi import APIRouter, HTTPException
+
+from backend.core.concurrency import run_db
+from backend.core.database import patients_table, batch_get_items
+from backend.models.doctor import PrescriptionCheckRequest, BatchPrescriptionCheckRequest
+from backend.services.diagnosis_service import fetch_patient
+from backend.services.prescription_service import (
+    check_prescription,
+    check_prescriptions,
+    get_drug_index,
+    patient_lists,
+)
+
+
+router = APIRouter(prefix="/doctor/prescription", tags=["Doctor - Prescription"])
+
+
+# -------------------------------------------------
+# Check One Prescription
+# -------------------------------------------------
+# Prescribed drugs are checked against each other and against the
+# patient's current medications and allergies. "Safe" is false when
+# anything is MAJOR or CONTRAINDICATED, or when an allergy could not be
+# resolved. Names that are not in the interaction dataset come back in
+# "Unrecognized", "UnrecognizedMedications" and "UnrecognizedAllergies"
+# (not checked).
+
+@router.post("/check")
+async def check(payload: PrescriptionCheckRequest):
+
+    patient = None
+    if payload.PatientID:
+        patient = await fetch_patient(payload.PatientID)
+        if not patient:
+            raise HTTPException(status_code=404, detail="Patient not found")
+
+    medications, allergies = patient_lists(patient, payload.CurrentMedications, payload.KnownAllergies)
+
+    # Index lookups only (no I/O): tens of microseconds, fine on the loop
+    result = check_prescription([item.DrugName for item in payload.Items], medications, allergies)
+
+    return {"PatientID": payload.PatientID, "CaseID": payload.CaseID, **result}
+
+
+# -------------------------------------------------
+# Check Many Prescriptions (pharmacy / audit batches)
+# -------------------------------------------------
+
+@router.post("/check/batch")
+async def check_batch(payload: BatchPrescriptionCheckRequest):
+
+    patient_ids = {p.PatientID for p in payload.Prescriptions if p.PatientID}
+    patients = {}
+    if patient_ids:
+        patients = {
+            p["PatientID"]: p
+            for p in await run_db(
+                batch_get_items,
+                patients_table,
+                [{"PatientID": pid} for pid in patient_ids],
+                ["PatientID", "CurrentMedications", "KnownAllergies"],
+            )
+        }
+
+    results = [None] * len(payload.Prescriptions)
+    pending, inputs = [], []
+
+    for index, prescription in enumerate(payload.Prescriptions):
+        if prescription.PatientID and prescription.PatientID not in patients:
+            results[index] = {"Index": index, "PatientID": prescription.PatientID, "Error": "Patient not found"}
+            continue
+
+        medications, allergies = patient_lists(
+            patients.get(prescription.PatientID),
+            prescription.CurrentMedications,
+            prescription.KnownAllergies,
+        )
+        pending.append(index)
+        inputs.append(([item.DrugName for item in prescription.Items], medications, allergies))
+
+    # The whole batch in one trip to the pool, off the event loop
+    for index, result in zip(pending, await run_db(check_prescriptions, inputs)):
+        prescription = payload.Prescriptions[index]
+        results[index] = {"Index": index, "PatientID": prescription.PatientID, "CaseID": prescription.CaseID, **result}
+
+    return {
+        "Checked": len(pending),
+        "Unsafe": sum(1 for index in pending if not results[index]["Safe"]),
+        "Results": results,
+    }
+
+
+@router.get("/index")
+def index_stats():
+    return get_drug_index().stats()
@@ -102,6 +102,8 @@ def create_doctors_table():
                 {"AttributeName": "DoctorID", "AttributeType": "S"},
             ],
             BillingMode="PAY_PER_REQUEST",
+            # Feeds the in-memory availability roster (doctor_roster.py)
+            StreamSpecification={"StreamEnabled": True, "StreamViewType": "NEW_IMAGE"},
         )
         print("✅ Doctors table created")
     except ClientError as e:
@@ -111,6 +113,26 @@ def create_doctors_table():
             raise
 
 
+def create_analytics_table():
+    try:
+        dynamodb.create_table(
+            TableName=settings.DYNAMODB_ANALYTICS_TABLE,
+            KeySchema=[
+                {"AttributeName": "RollupID", "KeyType": "HASH"}
+            ],
+            AttributeDefinitions=[
+                {"AttributeName": "RollupID", "AttributeType": "S"},
+            ],
+            BillingMode="PAY_PER_REQUEST",
+        )
+        print("✅ Analytics table created")
+    except ClientError as e:
+        if e.response["Error"]["Code"] == "ResourceInUseException":
+            print("ℹ️ Analytics table already exists")
+        else:
+            raise
+
+
 def seed_demo_doctors():
     table = boto3.resource(
         "dynamodb",
@@ -156,6 +178,7 @@ if __name__ == "__main__":
     create_patients_table()
     create_cases_table()
     create_doctors_table()
+    create_analytics_table()
 
     print("⏳ Waiting 5 seconds for tables...")
     time.sleep(5)
@@ -0,0 +1,463 @@
+# backend/services/analytics_service.py
+
+import asyncio
+import threading
+from bisect import bisect_right
+from collections import Counter
+from datetime import date, datetime, timedelta, timezone
+from math import floor, log
+from typing import Optional, Dict, Any, List, Iterable
+
+from backend.core.concurrency import run_db
+from backend.core.metrics import record_failure
+from backend.core.database import (
+    analytics_table,
+    cases_table,
+    patients_table,
+    batch_get_items,
+    iter_scan,
+)
+
+
+# -------------------------------------------------
+# Rollup Layout (mediconnect-analytics, hash key RollupID)
+# -------------------------------------------------
+# DAY#<district>#<yyyy-mm-dd>  "<block>|<risk>|<chapter>" -> cases created
+# DX#<district>#<yyyy-mm-dd>   "<block>|<icd10 category>" -> cases created
+# FUNNEL#<district>            "NOW|<status>"  -> cases currently in status
+#                              "EVER|<status>" -> cases that ever reached it
+# TTD#<district>#<yyyy-mm>     "B<i>" -> assignments in time-to-doctor bin i,
+#                              "N", "SUM_MIN" -> count and total minutes
+# DISTRICTS                    "<district>" -> cases created (district list)
+#
+# Every dashboard read is a batch_get of the buckets in its range, so
+# cost depends on the range asked for, never on how many cases exist.
+
+FUNNEL_STAGES = ["PENDING", "DOCTOR_ASSIGNED", "COMPLETED"]
+
+UNKNOWN = "UNKNOWN"
+SEP = "|"
+
+# Counters per UpdateItem, to stay well inside expression size limits
+MAX_ATTRIBUTES_PER_UPDATE = 50
+
+
+def _clean(value: Optional[str]) -> str:
+    # SEP would break the attribute name apart again on read
+    value = (value or "").strip().replace(SEP, "/")
+    return value or UNKNOWN
+
+
+def _day(timestamp: str) -> date:
+    return date.fromisoformat(timestamp[:10])
+
+
+def _parse_ts(timestamp: str) -> datetime:
+    """ISO timestamp as naive UTC (offline clients may send an offset)."""
+    parsed = datetime.fromisoformat(timestamp)
+    if parsed.tzinfo is not None:
+        parsed = parsed.astimezone(timezone.utc).replace(tzinfo=None)
+    return parsed
+
+
+def day_rollup_id(district: str, day: date) -> str:
+    return f"DAY#{district}#{day.isoformat()}"
+
+
+def dx_rollup_id(district: str, day: date) -> str:
+    return f"DX#{district}#{day.isoformat()}"
+
+
+DISTRICTS_ROLLUP_ID = "DISTRICTS"
+
+
+def funnel_rollup_id(district: str) -> str:
+    return f"FUNNEL#{district}"
+
+
+def ttd_rollup_id(district: str, month: str) -> str:
+    return f"TTD#{district}#{month}"
+
+
+# -------------------------------------------------
+# ICD-10 Chapters
+# -------------------------------------------------
+
+ICD10_CHAPTERS = [
+    ("A00", "B99"), ("C00", "D48"), ("D50", "D89"), ("E00", "E90"),
+    ("F00", "F99"), ("G00", "G99"), ("H00", "H59"), ("H60", "H95"),
+    ("I00", "I99"), ("J00", "J99"), ("K00", "K93"), ("L00", "L99"),
+    ("M00", "M99"), ("N00", "N99"), ("O00", "O99"), ("P00", "P96"),
+    ("Q00", "Q99"), ("R00", "R99"), ("S00", "T98"), ("U00", "U85"),
+    ("V01", "Y98"), ("Z00", "Z99"),
+]
+_CHAPTER_STARTS = [start for start, _ in ICD10_CHAPTERS]
+
+
+def icd10_category(code: Optional[str]) -> str:
+    """Three-character category: "O14.1" -> "O14"."""
+    code = (code or "").strip().upper()[:3]
+    return code if len(code) == 3 else UNKNOWN
+
+
+def icd10_chapter(code: Optional[str]) -> str:
+    """"A90" -> "A00-B99"; anything unrecognised -> UNKNOWN."""
+    code = icd10_category(code)
+    if code == UNKNOWN:
+        return UNKNOWN
+
+    i = bisect_right(_CHAPTER_STARTS, code) - 1
+    if i < 0:
+        return UNKNOWN
+    start, end = ICD10_CHAPTERS[i]
+    return f"{start}-{end}" if code <= end else UNKNOWN
+
+
+# -------------------------------------------------
+# Time-to-Doctor Histogram
+# -------------------------------------------------
+# Log-spaced minute bins: bin 0 is < 1 min, bin i covers
+# [GROWTH^(i-1), GROWTH^i). Percentiles are reported as the bin's upper
+# edge, i.e. within 25% of the true value.
+
+TTD_GROWTH = 1.25
+TTD_BINS = 64   # last bin is open-ended (> ~1.3 years)
+
+
+def ttd_bin(minutes: float) -> int:
+    if minutes < 1:
+        return 0
+    return min(TTD_BINS - 1, 1 + floor(log(minutes) / log(TTD_GROWTH)))
+
+
+def ttd_bin_upper(i: int) -> float:
+    return TTD_GROWTH ** i
+
+
+def histogram_percentile(bins: List[int], q: float) -> Optional[float]:
+    total = sum(bins)
+    if not total:
+        return None
+
+    rank = q * total
+    seen = 0
+    for i, n in enumerate(bins):
+        seen += n
+        if seen >= rank:
+            return round(ttd_bin_upper(i), 1)
+    return round(ttd_bin_upper(len(bins) - 1), 1)
+
+
+# -------------------------------------------------
+# Write-Behind Counter Buffer
+# -------------------------------------------------
+
+class RollupBuffer:
+    """
+    Counter deltas per rollup item, accumulated in memory and flushed
+    with atomic ADD updates, so a case write costs a dict increment
+    rather than extra DynamoDB round trips.
+
+    Reads merge this worker's unflushed deltas, so its own writes are
+    visible immediately; other workers' appear after their next flush.
+    """
+
+    def __init__(self, table):
+        self.table = table
+        self._pending: Dict[str, Counter] = {}
+        self._lock = threading.Lock()
+        # Held across flush and read, so a read never sees a delta both
+        # in DynamoDB and in memory
+        self._flush_lock = threading.Lock()
+
+    def add(self, deltas: Iterable[tuple]):
+        """deltas: (rollup_id, attribute, amount)"""
+        with self._lock:
+            for rollup_id, attribute, amount in deltas:
+                self._pending.setdefault(rollup_id, Counter())[attribute] += amount
+
+    def _write(self, rollup_id: str, counters: List[tuple]):
+        names = {f"#a{i}": attribute for i, (attribute, _) in enumerate(counters)}
+        values = {f":v{i}": amount for i, (_, amount) in enumerate(counters)}
+
+        self.table.update_item(
+            Key={"RollupID": rollup_id},
+            UpdateExpression="ADD " + ", ".join(f"#a{i} :v{i}" for i in range(len(counters))),
+            ExpressionAttributeNames=names,
+            ExpressionAttributeValues=values,
+        )
+
+    def flush(self) -> int:
+        """Write pending deltas; returns the number of UpdateItem calls."""
+        with self._flush_lock:
+            with self._lock:
+                batch, self._pending = self._pending, {}
+
+            writes = 0
+            failed: Dict[str, Counter] = {}
+
+            for rollup_id, counter in batch.items():
+                counters = [(a, n) for a, n in counter.items() if n]
+                for start in range(0, len(counters), MAX_ATTRIBUTES_PER_UPDATE):
+                    chunk = counters[start:start + MAX_ATTRIBUTES_PER_UPDATE]
+                    try:
+                        self._write(rollup_id, chunk)
+                        writes += 1
+                    except Exception as e:
+                        record_failure("analytics_flush", e)
+                        failed.setdefault(rollup_id, Counter()).update(dict(chunk))
+
+            # Failed chunks go back for the next flush
+            if failed:
+                self.add(
+                    (rollup_id, attribute, amount)
+                    for rollup_id, counter in failed.items()
+                    for attribute, amount in counter.items()
+                )
+
+            return writes
+
+    def read(self, rollup_ids: List[str]) -> Dict[str, Counter]:
+        with self._flush_lock:
+            items = batch_get_items(self.table, [{"RollupID": r} for r in rollup_ids])
+
+            with self._lock:
+                local = {r: Counter(self._pending[r]) for r in rollup_ids if r in self._pending}
+
+        result = {r: Counter() for r in rollup_ids}
+        for item in items:
+            rollup_id = item.pop("RollupID")
+            result[rollup_id].update({a: int(n) for a, n in item.items()})
+        for rollup_id, counter in local.items():
+            result[rollup_id].update(counter)
+        return result
+
+
+rollups = RollupBuffer(analytics_table)
+
+
+async def flush_periodically(interval: float):
+    """Background flush loop, started from the app lifespan."""
+    while True:
+        await asyncio.sleep(interval)
+        try:
+            await run_db(rollups.flush)
+        except Exception as e:
+            record_failure("analytics_flush", e)
+
+
+# -------------------------------------------------
+# Recording (called on case writes / status changes)
+# -------------------------------------------------
+
+def _case_deltas(case: Dict[str, Any], patient: Dict[str, Any]) -> List[tuple]:
+    district = _clean(patient.get("District"))
+    block = _clean(patient.get("Block"))
+    day = _day(case["CreatedAt"])
+    status = case.get("Status", "PENDING")
+    bucket = SEP.join([
+        block,
+        _clean(case.get("RiskLevel")),
+        icd10_chapter(case.get("ICD10Code")),
+    ])
+
+    return [
+        (day_rollup_id(district, day), bucket, 1),
+        (dx_rollup_id(district, day), SEP.join([block, icd10_category(case.get("ICD10Code"))]), 1),
+        (funnel_rollup_id(district), f"NOW{SEP}{status}", 1),
+        (funnel_rollup_id(district), f"EVER{SEP}{status}", 1),
+        (DISTRICTS_ROLLUP_ID, district, 1),
+    ]
+
+
+def _status_deltas(
+    case: Dict[str, Any],
+    patient: Dict[str, Any],
+    old_status: str,
+    new_status: str,
+    changed_at: Optional[str],
+) -> List[tuple]:
+    district = _clean(patient.get("District"))
+    funnel = funnel_rollup_id(district)
+
+    deltas = [
+        (funnel, f"NOW{SEP}{old_status}", -1),
+        (funnel, f"NOW{SEP}{new_status}", 1),
+        (funnel, f"EVER{SEP}{new_status}", 1),
+    ]
+
+    # Time-to-doctor needs the assignment time; skipped when unknown
+    if new_status == "DOCTOR_ASSIGNED" and changed_at and case.get("CreatedAt"):
+        waited = _parse_ts(changed_at) - _parse_ts(case["CreatedAt"])
+        minutes = max(0.0, waited.total_seconds() / 60)
+        ttd = ttd_rollup_id(district, changed_at[:7])
+        deltas += [
+            (ttd, f"B{ttd_bin(minutes)}", 1),
+            (ttd, "N", 1),
+            (ttd, "SUM_MIN", round(minutes)),
+        ]
+
+    return deltas
+
+
+def record_case(case: Dict[str, Any], patient: Dict[str, Any]):
+    rollups.add(_case_deltas(case, patient))
+
+
+def record_status_change(
+    case: Dict[str, Any],
+    patient: Dict[str, Any],
+    old_status: str,
+    new_status: str,
+    changed_at: Optional[str] = None,
+):
+    changed_at = changed_at or datetime.utcnow().isoformat()
+    rollups.add(_status_deltas(case, patient, old_status, new_status, changed_at))
+
+
+# -------------------------------------------------
+# Queries
+# -------------------------------------------------
+
+GROUP_FIELDS = {"block": 0, "risk": 1, "chapter": 2}
+
+
+def case_counts(
+    district: str,
+    start: date,
+    end: date,
+    group_by: str = "day",
+    block: Optional[str] = None,
+) -> Dict[str, Any]:
+    days = [start + timedelta(days=i) for i in range((end - start).days + 1)]
+    buckets = rollups.read([day_rollup_id(district, d) for d in days])
+
+    groups: Counter = Counter()
+    for day in days:
+        for attribute, n in buckets[day_rollup_id(district, day)].items():
+            fields = attribute.split(SEP)
+            if block and fields[0] != block:
+                continue
+            key = day.isoformat() if group_by == "day" else fields[GROUP_FIELDS[group_by]]
+            groups[key] += n
+
+    if group_by == "day":
+        rows = [{"Key": d.isoformat(), "Count": groups.get(d.isoformat(), 0)} for d in days]
+    else:
+        rows = [{"Key": k, "Count": n} for k, n in groups.most_common()]
+
+    return {
+        "District": district,
+        "Start": start.isoformat(),
+        "End": end.isoformat(),
+        "GroupBy": group_by,
+        "Total": sum(groups.values()),
+        "Groups": rows,
+    }
+
+
+def status_funnel(district: str) -> Dict[str, Any]:
+    counters = rollups.read([funnel_rollup_id(district)])[funnel_rollup_id(district)]
+
+    stages = []
+    previous = None
+    for status in FUNNEL_STAGES:
+        reached = counters.get(f"EVER{SEP}{status}", 0)
+        stages.append({
+            "Status": status,
+            "Current": counters.get(f"NOW{SEP}{status}", 0),
+            "Reached": reached,
+            "ConversionPercent": round(100 * reached / previous, 1) if previous else None,
+        })
+        previous = reached
+
+    return {"District": district, "Stages": stages}
+
+
+def time_to_doctor(district: str, months: List[str]) -> Dict[str, Any]:
+    buckets = rollups.read([ttd_rollup_id(district, m) for m in months])
+
+    bins = [0] * TTD_BINS
+    count = total_minutes = 0
+    for counter in buckets.values():
+        for i in range(TTD_BINS):
+            bins[i] += counter.get(f"B{i}", 0)
+        count += counter.get("N", 0)
+        total_minutes += counter.get("SUM_MIN", 0)
+
+    return {
+        "District": district,
+        "Months": months,
+        "Assignments": count,
+        "MeanMinutes": round(total_minutes / count, 1) if count else None,
+        "P50Minutes": histogram_percentile(bins, 0.50),
+        "P90Minutes": histogram_percentile(bins, 0.90),
+        "P99Minutes": histogram_percentile(bins, 0.99),
+    }
+
+
+# -------------------------------------------------
+# Outbreak Detection Inputs (all workers' counts)
+# -------------------------------------------------
+
+def known_districts() -> List[str]:
+    return sorted(rollups.read([DISTRICTS_ROLLUP_ID])[DISTRICTS_ROLLUP_ID])
+
+
+def dx_counts(district: str, days: List[date]) -> Dict[date, Counter]:
+    """Per day: "<block>|<icd10 category>" -> cases created."""
+    buckets = rollups.read([dx_rollup_id(district, d) for d in days])
+    return {day: buckets[dx_rollup_id(district, day)] for day in days}
+
+
+# -------------------------------------------------
+# One-off Backfill
+# -------------------------------------------------
+
+def backfill_rollups(segments: int = 4) -> int:
+    """
+    Build rollups from the existing cases table. Run once, against an
+    empty analytics table, before live recording starts counting.
+    """
+    buffer = RollupBuffer(analytics_table)
+    patients: Dict[str, Dict[str, Any]] = {}
+    batch: List[Dict[str, Any]] = []
+    count = 0
+
+    def drain():
+        missing = [{"PatientID": c["PatientID"]} for c in batch if c["PatientID"] not in patients]
+        for p in batch_get_items(patients_table, missing, projection=["PatientID", "District", "Block"]):
+            patients[p["PatientID"]] = p
+
+        for case in batch:
+            patient = patients.get(case["PatientID"], {})
+            status = case.get("Status", "PENDING")
+            deltas = _case_deltas({**case, "Status": "PENDING"}, patient)
+
+            # Replay the funnel PENDING -> ... -> current status. Only a
+            # case still DOCTOR_ASSIGNED has a known assignment time
+            # (UpdatedAt), so only those feed time-to-doctor.
+            if status in FUNNEL_STAGES:
+                path = FUNNEL_STAGES[:FUNNEL_STAGES.index(status) + 1]
+            else:
+                path = ["PENDING", status]
+
+            for old, new in zip(path, path[1:]):
+                changed_at = case.get("UpdatedAt") if new == status == "DOCTOR_ASSIGNED" else None
+                deltas += _status_deltas(case, patient, old, new, changed_at)
+            buffer.add(deltas)
+        batch.clear()
+
+    for case in iter_scan(cases_table, segments=segments):
+        batch.append(case)
+        count += 1
+        if len(batch) >= 100:
+            drain()
+    drain()
+
+    buffer.flush()
+    return count
+
+
+if __name__ == "__main__":
+    print(f"Backfilled rollups from {backfill_rollups()} cases")
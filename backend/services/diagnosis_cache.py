@@ -0,0 +1,248 @@
+# backend/services/diagnosis_cache.py
+
+import hashlib
+import json
+import threading
+import time
+import unicodedata
+from collections import OrderedDict
+from typing import Optional, Dict, Any, List, Tuple
+
+from backend.config import settings
+from backend.models.case import DiagnosisAIOutput
+
+
+# Bump when the prompt template changes so old answers are not reused
+PROMPT_VERSION = "2"
+
+
+# -------------------------------------------------
+# Key Normalization
+# -------------------------------------------------
+
+AGE_BANDS = [(1, "0-1"), (5, "1-4"), (12, "5-11"), (18, "12-17"), (40, "18-39"), (60, "40-59")]
+
+
+def age_band(age) -> str:
+    age = int(age)
+    for upper, label in AGE_BANDS:
+        if age < upper:
+            return label
+    return "60+"
+
+
+def normalize_text(text: str) -> str:
+    """
+    Case-fold, drop punctuation/symbols and collapse whitespace, so
+    "Bukhar, sir-dard " and "bukhar sir dard" share a key.
+    """
+    text = unicodedata.normalize("NFKC", text or "").casefold()
+    text = "".join(
+        " " if unicodedata.category(ch)[0] in ("P", "S") else ch
+        for ch in text
+    )
+    return " ".join(text.split())
+
+
+def _normalize_list(values: Optional[List[str]]) -> List[str]:
+    return sorted({normalize_text(v) for v in values or [] if v})
+
+
+def diagnosis_cache_key(
+    symptoms: str,
+    age,
+    gender: str,
+    known_conditions: Optional[List[str]],
+    known_allergies: Optional[List[str]],
+    language: str,
+    model_id: str,
+) -> str:
+    parts = {
+        "v": PROMPT_VERSION,
+        "symptoms": normalize_text(symptoms),
+        "age": age_band(age),
+        "gender": normalize_text(gender),
+        "conditions": _normalize_list(known_conditions),
+        "allergies": _normalize_list(known_allergies),
+        "language": normalize_text(language),
+        "model": model_id,
+    }
+    raw = json.dumps(parts, sort_keys=True, ensure_ascii=False)
+    return hashlib.sha256(raw.encode("utf-8")).hexdigest()
+
+
+# -------------------------------------------------
+# Storage Backends
+# -------------------------------------------------
+
+class MemoryCacheBackend:
+    """
+    LRU dict of key -> (expires_at, value).
+    """
+
+    def __init__(self, max_entries: int):
+        self.max_entries = max_entries
+        self._data: "OrderedDict[str, Tuple[float, str]]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key: str) -> Optional[Tuple[float, str]]:
+        with self._lock:
+            entry = self._data.get(key)
+            if entry is not None:
+                self._data.move_to_end(key)
+            return entry
+
+    def set(self, key: str, expires_at: float, value: str) -> int:
+        with self._lock:
+            self._data[key] = (expires_at, value)
+            self._data.move_to_end(key)
+
+            evicted = 0
+            while len(self._data) > self.max_entries:
+                self._data.popitem(last=False)
+                evicted += 1
+            return evicted
+
+    def delete(self, key: str):
+        with self._lock:
+            self._data.pop(key, None)
+
+    def size(self) -> int:
+        return len(self._data)
+
+
+class SQLiteCacheBackend:
+    """
+    Same contract as MemoryCacheBackend, persisted to a SQLite file so
+    entries survive restarts and can be shared by workers on one host.
+    """
+
+    def __init__(self, path: str, max_entries: int):
+        self.max_entries = max_entries
+        self._lock = threading.Lock()
+
+        # Only the sqlite backend needs the module; keep it out of app import
+        import sqlite3
+        self._conn = sqlite3.connect(path, check_same_thread=False, isolation_level=None)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS diagnosis_cache ("
+            " key TEXT PRIMARY KEY,"
+            " value TEXT NOT NULL,"
+            " expires_at REAL NOT NULL,"
+            " last_access REAL NOT NULL)"
+        )
+        self._conn.execute(
+            "CREATE INDEX IF NOT EXISTS diagnosis_cache_lru ON diagnosis_cache (last_access)"
+        )
+
+    def get(self, key: str) -> Optional[Tuple[float, str]]:
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT expires_at, value FROM diagnosis_cache WHERE key = ?", (key,)
+            ).fetchone()
+            if row is not None:
+                self._conn.execute(
+                    "UPDATE diagnosis_cache SET last_access = ? WHERE key = ?",
+                    (time.time(), key),
+                )
+            return row
+
+    def set(self, key: str, expires_at: float, value: str) -> int:
+        with self._lock:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO diagnosis_cache VALUES (?, ?, ?, ?)",
+                (key, value, expires_at, time.time()),
+            )
+            overflow = self._size() - self.max_entries
+            if overflow > 0:
+                self._conn.execute(
+                    "DELETE FROM diagnosis_cache WHERE key IN ("
+                    " SELECT key FROM diagnosis_cache ORDER BY last_access LIMIT ?)",
+                    (overflow,),
+                )
+                return overflow
+            return 0
+
+    def delete(self, key: str):
+        with self._lock:
+            self._conn.execute("DELETE FROM diagnosis_cache WHERE key = ?", (key,))
+
+    def size(self) -> int:
+        with self._lock:
+            return self._size()
+
+    def _size(self) -> int:
+        return self._conn.execute("SELECT COUNT(*) FROM diagnosis_cache").fetchone()[0]
+
+
+# -------------------------------------------------
+# Diagnosis Cache
+# -------------------------------------------------
+
+class DiagnosisCache:
+
+    def __init__(self, backend, ttl_seconds: float):
+        self.backend = backend
+        self.ttl_seconds = ttl_seconds
+        self.hits = 0
+        self.misses = 0
+        self.expired = 0
+        self.evictions = 0
+
+    def get(self, key: str) -> Optional[DiagnosisAIOutput]:
+        entry = self.backend.get(key)
+
+        if entry is None:
+            self.misses += 1
+            return None
+
+        expires_at, value = entry
+        if expires_at < time.time():
+            self.backend.delete(key)
+            self.expired += 1
+            self.misses += 1
+            return None
+
+        self.hits += 1
+        return DiagnosisAIOutput.model_validate_json(value)
+
+    def put(self, key: str, output: DiagnosisAIOutput):
+        self.evictions += self.backend.set(
+            key,
+            time.time() + self.ttl_seconds,
+            output.model_dump_json(),
+        )
+
+    def stats(self) -> Dict[str, Any]:
+        lookups = self.hits + self.misses
+        return {
+            "backend": type(self.backend).__name__,
+            "size": self.backend.size(),
+            "hits": self.hits,
+            "misses": self.misses,
+            "expired": self.expired,
+            "evictions": self.evictions,
+            "hit_rate": round(self.hits / lookups, 4) if lookups else 0.0,
+        }
+
+
+def build_diagnosis_cache() -> Optional[DiagnosisCache]:
+    kind = settings.DIAGNOSIS_CACHE_BACKEND
+
+    if kind == "off":
+        return None
+    if kind == "sqlite":
+        backend = SQLiteCacheBackend(
+            settings.DIAGNOSIS_CACHE_PATH,
+            settings.DIAGNOSIS_CACHE_MAX_ENTRIES,
+        )
+    elif kind == "memory":
+        backend = MemoryCacheBackend(settings.DIAGNOSIS_CACHE_MAX_ENTRIES)
+    else:
+        raise Exception(f"Unknown DIAGNOSIS_CACHE_BACKEND: {kind}")
+
+    return DiagnosisCache(backend, settings.DIAGNOSIS_CACHE_TTL_SECONDS)
+
+
+diagnosis_cache = build_diagnosis_cache()
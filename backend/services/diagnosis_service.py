@@ -1,54 +1,127 @@
 # backend/services/diagnosis_service.py
 
+import asyncio
 import json
+import random
 from datetime import datetime
-from typing import Dict, Any
+from typing import Dict, Any, List, Optional, Tuple, Set
 
-import boto3
 from botocore.exceptions import ClientError
 
 from backend.config import settings
+from backend.core.aws import get_bedrock_runtime
+from backend.core.concurrency import run_db, SingleFlight
+from backend.core.metrics import stage, record_tokens, record_failure
+from backend.core.model_scheduler import model_scheduler, EMERGENCY, URGENT
 from backend.core.database import (
     cases_table,
     patients_table,
     generate_uuid,
+    deterministic_id,
+    transact_write_items,
+    cancellation_reasons,
 )
 from backend.models.case import DiagnosisAIOutput
+from backend.services.diagnosis_cache import diagnosis_cache, diagnosis_cache_key, normalize_text
+from backend.services.analytics_service import record_case, record_status_change
+from backend.services.doctor_match_service import match_doctor, patient_location
+from backend.services.emergency_triage import triage, first_actions
+from backend.services.live_events import case_created, case_assigned, case_diagnosed
+from backend.services.outbreak_service import outbreak_detector, claim_alerts
 
 
 # --------------------------------------------
 # Initialize Bedrock Client
 # --------------------------------------------
 
-bedrock = boto3.client(
-    service_name="bedrock-runtime",
-    region_name=settings.AWS_REGION,
-    aws_access_key_id=settings.AWS_ACCESS_KEY_ID,
-    aws_secret_access_key=settings.AWS_SECRET_ACCESS_KEY,
-)
+_bedrock_client = None
+
+
+def get_bedrock():
+    """bedrock-runtime client (or the offline fake), built on first use."""
+    global _bedrock_client
+
+    if _bedrock_client is None:
+        if settings.BEDROCK_BACKEND == "fake":
+            from backend.services.fake_bedrock import FakeBedrockClient
+
+            _bedrock_client = FakeBedrockClient(
+                first_token_ms=settings.FAKE_BEDROCK_FIRST_TOKEN_MS,
+                per_token_ms=settings.FAKE_BEDROCK_PER_TOKEN_MS,
+                max_tps=settings.FAKE_BEDROCK_MAX_TPS,
+            )
+        else:
+            _bedrock_client = get_bedrock_runtime()
+
+    return _bedrock_client
+
+
+def set_bedrock_client(client) -> None:
+    """Swap the model client, e.g. for a FakeBedrockClient in benchmarks."""
+    global _bedrock_client
+    _bedrock_client = client
 
 
 # --------------------------------------------
 # Emergency Keyword Failsafe
 # --------------------------------------------
+# Keyword set and matcher live in emergency_triage (Aho-Corasick over
+# English, Hinglish and Devanagari forms).
 
-EMERGENCY_KEYWORDS = [
-    "pre-eclampsia", "eclampsia", "convulsion", "seizure",
-    "heavy bleeding", "hemorrhage", "unconscious", "not breathing",
-    "behoshi", "zyada khoon", "dauraa",
-    "chest pain", "no pulse", "heart attack", "stroke"
-]
+def emergency_override(text: str) -> bool:
+    return bool(triage(text)["Categories"])
 
 
-def emergency_override(text: str) -> bool:
-    text = text.lower()
-    return any(keyword in text for keyword in EMERGENCY_KEYWORDS)
+def _emergency_reason(signals: Dict[str, Any]) -> str:
+    return "Detected high-risk emergency keywords in symptoms: " + ", ".join(signals["Keywords"])
 
 
 # --------------------------------------------
 # Bedrock Diagnosis Call
 # --------------------------------------------
 
+class JSONObjectExtractor:
+    """
+    Incremental brace matcher. Feed model text as it arrives; returns the
+    first complete top-level JSON object as soon as its closing brace is
+    seen. Braces inside JSON strings are ignored.
+    """
+
+    def __init__(self):
+        self.buffer = []
+        self.depth = 0
+        self.in_string = False
+        self.escaped = False
+
+    def feed(self, text: str):
+        for i, ch in enumerate(text):
+            if self.depth == 0:
+                if ch != "{":
+                    continue
+            elif self.in_string:
+                if self.escaped:
+                    self.escaped = False
+                elif ch == "\\":
+                    self.escaped = True
+                elif ch == '"':
+                    self.in_string = False
+                self.buffer.append(ch)
+                continue
+            elif ch == '"':
+                self.in_string = True
+
+            self.buffer.append(ch)
+
+            if ch == "{":
+                self.depth += 1
+            elif ch == "}":
+                self.depth -= 1
+                if self.depth == 0:
+                    return "".join(self.buffer)
+
+        return None
+
+
 def clean_model_output(text: str) -> str:
     """
     Extract first complete JSON object using brace counting.
@@ -56,65 +129,111 @@ def clean_model_output(text: str) -> str:
 
     text = text.replace("```json", "").replace("```", "")
 
-    start = text.find("{")
-    if start == -1:
+    if "{" not in text:
         raise Exception("No JSON object found")
 
-    brace_count = 0
-    for i in range(start, len(text)):
-        if text[i] == "{":
-            brace_count += 1
-        elif text[i] == "}":
-            brace_count -= 1
-            if brace_count == 0:
-                return text[start:i+1]
-
-    raise Exception("Incomplete JSON object")
+    obj = JSONObjectExtractor().feed(text)
+    if obj is None:
+        raise Exception("Incomplete JSON object")
 
+    return obj
 
-def call_bedrock(prompt: str):
 
-    body = {
+def _bedrock_request_body(prompt: str) -> str:
+    return json.dumps({
         "prompt": prompt,
         "max_gen_len": 800,
         "temperature": 0.0,
         "top_p": 0.9
-    }
+    })
 
-    response = bedrock.invoke_model(
-        modelId=settings.BEDROCK_MODEL_ID,
-        body=json.dumps(body),
-        contentType="application/json",
-        accept="application/json",
-    )
 
-    response_body = json.loads(response["body"].read())
+def call_bedrock(prompt: str):
+
+    if settings.BEDROCK_STREAMING:
+        return call_bedrock_stream(prompt)
+
+    with stage("bedrock_invoke"):
+        response = get_bedrock().invoke_model(
+            modelId=settings.BEDROCK_MODEL_ID,
+            body=_bedrock_request_body(prompt),
+            contentType="application/json",
+            accept="application/json",
+        )
+
+        response_body = json.loads(response["body"].read())
+
+    record_tokens(
+        response_body.get("prompt_token_count"),
+        response_body.get("generation_token_count"),
+    )
 
     output_text = response_body.get("generation", "")
 
     if not output_text:
         raise Exception("Empty response from model")
 
-    cleaned_json = clean_model_output(output_text)
+    with stage("output_parse"):
+        cleaned_json = clean_model_output(output_text)
+        return json.loads(cleaned_json)
 
-    return json.loads(cleaned_json)
 
-# --------------------------------------------
-# Main Diagnosis Function
-# --------------------------------------------
+def call_bedrock_stream(prompt: str):
+    """
+    Read the generation as a response stream and stop as soon as the
+    first JSON object closes, instead of waiting for max_gen_len.
+    """
 
-def diagnose_case(payload):
+    # Llama reports token counts on its chunks; otherwise one chunk is
+    # roughly one token
+    prompt_tokens = None
+    generated_tokens = None
+    chunks = 0
+
+    with stage("bedrock_stream"):
+        response = get_bedrock().invoke_model_with_response_stream(
+            modelId=settings.BEDROCK_MODEL_ID,
+            body=_bedrock_request_body(prompt),
+            contentType="application/json",
+            accept="application/json",
+        )
 
-    # Fetch Patient
-    patient_response = patients_table.get_item(
-        Key={"PatientID": payload.PatientID}
-    )
-    patient = patient_response.get("Item")
+        stream = response["body"]
+        extractor = JSONObjectExtractor()
+        received = False
 
-    if not patient:
-        raise Exception("Patient not found")
+        try:
+            for event in stream:
+                chunk = event.get("chunk")
+                if not chunk:
+                    continue
+
+                data = json.loads(chunk["bytes"])
+                chunks += 1
+                prompt_tokens = data.get("prompt_token_count") or prompt_tokens
+                generated_tokens = data.get("generation_token_count") or generated_tokens
+
+                text = data.get("generation", "")
+                received = received or bool(text)
+
+                obj = extractor.feed(text)
+                if obj is not None:
+                    return json.loads(obj)
+        finally:
+            stream.close()
+            record_tokens(prompt_tokens, generated_tokens or chunks)
+
+    if not received:
+        raise Exception("Empty response from model")
+
+    raise Exception("Incomplete JSON object")
+
+# --------------------------------------------
+# Prompt
+# --------------------------------------------
+
+def build_prompt(payload, patient: Dict[str, Any]) -> str:
 
-    # Build Prompt
     system_prompt = """
     You are MediConnect AI, an expert rural diagnosis assistant.
 
@@ -130,7 +249,7 @@ def diagnose_case(payload):
 
     user_prompt = f"""
 Patient: {patient['Name']}, {patient['Age']}yr, {patient['Gender']}
-Known conditions: {patient.get('KnownConditions', [])}
+Known conditions: {sorted(patient.get('KnownConditions', []))}
 Known allergies: {patient.get('KnownAllergies', [])}
 Current symptoms: "{payload.SymptomsRaw}"
 Language: {payload.Language}
@@ -152,21 +271,77 @@ Return STRICT JSON in this exact structure:
 }}
 """
 
-    full_prompt = system_prompt + "\n" + user_prompt
+    return system_prompt + "\n" + user_prompt
+
 
-    # Call Bedrock
-    ai_output_raw = call_bedrock(full_prompt)
+# --------------------------------------------
+# Main Diagnosis Function
+# --------------------------------------------
 
-    # Validate against schema
-    ai_output = DiagnosisAIOutput(**ai_output_raw)
+async def prepare_case(
+    payload,
+    case_id: Optional[str] = None,
+    created_at: Optional[str] = None,
+    patient: Optional[Dict[str, Any]] = None,
+    priority: int = URGENT,
+) -> Tuple[Dict[str, Any], DiagnosisAIOutput, Dict[str, Any]]:
+    """
+    Run the diagnosis and build the case record without writing it.
+    Returns (case_item, ai_output, patient). priority is the model
+    scheduler lane; emergency keywords always move the call to the
+    front lane.
+    """
+
+    # Fetch Patient
+    if patient is None:
+        patient = await fetch_patient(payload.PatientID)
+
+    if not patient:
+        raise Exception("Patient not found")
+
+    with stage("prompt_build"):
+        full_prompt = build_prompt(payload, patient)
+
+    # Cached answer for an equivalent prompt?
+    cache_key = diagnosis_cache_key(
+        symptoms=payload.SymptomsRaw,
+        age=patient["Age"],
+        gender=patient["Gender"],
+        known_conditions=patient.get("KnownConditions"),
+        known_allergies=patient.get("KnownAllergies"),
+        language=payload.Language,
+        model_id=settings.BEDROCK_MODEL_ID,
+    )
+
+    ai_output = diagnosis_cache.get(cache_key) if diagnosis_cache else None
+
+    with stage("emergency_triage"):
+        signals = triage(payload.SymptomsRaw)
+
+    if ai_output is None:
+        # Call Bedrock (queued behind higher-priority calls when busy)
+        with stage("model"):
+            ai_output_raw = await model_scheduler.submit(
+                call_bedrock,
+                full_prompt,
+                priority=EMERGENCY if signals["Categories"] else priority,
+            )
+
+        # Validate against schema
+        with stage("output_validate"):
+            ai_output = DiagnosisAIOutput(**ai_output_raw)
+
+        if diagnosis_cache:
+            diagnosis_cache.put(cache_key, ai_output)
 
     # Emergency Override
-    if emergency_override(payload.SymptomsRaw):
+    if signals["Categories"]:
         ai_output.risk_level = "EMERGENCY"
-        ai_output.risk_reason = "Detected high-risk emergency keywords in symptoms"
+        ai_output.risk_reason = _emergency_reason(signals)
 
     # Create Case ID
-    case_id = generate_uuid("CASE")
+    case_id = case_id or generate_uuid("CASE")
+    now = datetime.utcnow().isoformat()
 
     case_item = {
         "CaseID": case_id,
@@ -189,24 +364,405 @@ Return STRICT JSON in this exact structure:
         "ICD10Description": ai_output.icd10_description,
 
         "Status": "PENDING",
-        "CreatedAt": datetime.utcnow().isoformat(),
-        "UpdatedAt": datetime.utcnow().isoformat(),
+        "CreatedAt": created_at or now,
+        "UpdatedAt": now,
     }
 
-    # Store Case
-    cases_table.put_item(Item=case_item)
+    return case_item, ai_output, patient
+
 
-    # Auto-tag patient conditions
-    if ai_output.auto_tag_conditions:
-        updated_conditions = list(set(
-            patient.get("KnownConditions", []) +
-            ai_output.auto_tag_conditions
-        ))
+async def fetch_patient(patient_id: str) -> Optional[Dict[str, Any]]:
 
-        patients_table.update_item(
-            Key={"PatientID": payload.PatientID},
-            UpdateExpression="SET KnownConditions = :kc",
-            ExpressionAttributeValues={":kc": updated_conditions}
+    with stage("patient_get"):
+        patient_response = await run_db(
+            patients_table.get_item,
+            Key={"PatientID": patient_id}
         )
+    return patient_response.get("Item")
+
+
+# Concurrent diagnoses for one patient can collide inside DynamoDB
+# (TransactionConflict) or find its conditions in a different form than
+# they read; both are retried this many times
+PATIENT_WRITE_ATTEMPTS = 5
+RETRYABLE_CANCELLATIONS = {"TransactionConflict", "ThrottlingError", "ProvisionedThroughputExceeded"}
+
+
+def patient_visit_update(
+    patient: Dict[str, Any],
+    conditions: List[str],
+    visited_at: Optional[str] = None,
+    cases: int = 0,
+) -> Optional[Dict[str, Any]]:
+    """
+    update_item params recording visits on a patient: new conditions,
+    LastVisitDate and CaseCount. Conditions are ADDed to a string set,
+    so concurrent writers never drop each other's tags. A patient whose
+    KnownConditions is still a list (as registered before) is converted
+    in the same write, guarded on the list being unchanged. None when
+    there is nothing to write.
+    """
+    sets, adds = [], []
+    values: Dict[str, Any] = {}
+    conditions_expr = ["attribute_exists(PatientID)"]
+
+    if visited_at:
+        sets.append("LastVisitDate = :visited")
+        values[":visited"] = visited_at
+
+    if cases:
+        adds.append("CaseCount :cases")
+        values[":cases"] = cases
+
+    tags = {c for c in conditions or [] if c}
+    known = patient.get("KnownConditions")
+
+    if tags and isinstance(known, list):
+        sets.append("KnownConditions = :kc")
+        values[":kc"] = set(known) | tags
+        values[":known"] = known
+        conditions_expr.append("KnownConditions = :known")
+    elif tags:
+        adds.append("KnownConditions :kc")
+        values[":kc"] = tags
+
+    if not values:
+        return None
+
+    clauses = []
+    if sets:
+        clauses.append("SET " + ", ".join(sets))
+    if adds:
+        clauses.append("ADD " + ", ".join(adds))
+
+    return {
+        "Key": {"PatientID": patient["PatientID"]},
+        "UpdateExpression": " ".join(clauses),
+        "ConditionExpression": " AND ".join(conditions_expr),
+        "ExpressionAttributeValues": values,
+    }
+
+
+async def _reread_patient(patient_id: str) -> Optional[Dict[str, Any]]:
+    response = await run_db(
+        patients_table.get_item,
+        Key={"PatientID": patient_id},
+        ConsistentRead=True,
+    )
+    return response.get("Item")
+
+
+async def _retry_pause(attempt: int):
+    await asyncio.sleep(0.02 * 2 ** attempt * random.uniform(0.5, 1.5))
+
+
+async def auto_tag_patient(
+    patient: Dict[str, Any],
+    conditions: List[str],
+    visited_at: Optional[str] = None,
+    cases: int = 0,
+):
+    """Apply patient_visit_update on its own (no case write alongside)."""
+
+    for attempt in range(PATIENT_WRITE_ATTEMPTS):
+        params = patient_visit_update(patient, conditions, visited_at, cases)
+        if params is None:
+            return
+
+        try:
+            with stage("patient_tag"):
+                await run_db(patients_table.update_item, **params)
+            return
+        except ClientError as e:
+            if e.response["Error"]["Code"] != "ConditionalCheckFailedException":
+                raise
+
+        # Conditions converted by someone else meanwhile, or patient deleted
+        patient = await _reread_patient(patient["PatientID"])
+        if not patient:
+            return
+
+    raise Exception("Patient record kept changing, conditions not tagged")
+
+
+async def store_new_case(
+    case_item: Dict[str, Any],
+    patient: Dict[str, Any],
+    conditions: List[str] = (),
+) -> Tuple[Dict[str, Any], bool]:
+    """
+    Write case_item unless its CaseID already exists (a retry that
+    another worker got to first) and record the visit on the patient,
+    in one TransactWriteItems round trip: both land or neither does,
+    so a retried diagnosis is never counted twice. Returns (stored
+    case, created).
+    """
+
+    for attempt in range(PATIENT_WRITE_ATTEMPTS):
+        visit = patient_visit_update(patient, conditions, case_item["CreatedAt"], cases=1)
+
+        try:
+            with stage("case_write"):
+                await run_db(transact_write_items, [
+                    ("Put", cases_table, {
+                        "Item": case_item,
+                        "ConditionExpression": "attribute_not_exists(CaseID)",
+                    }),
+                    ("Update", patients_table, visit),
+                ])
+            return case_item, True
+        except ClientError as e:
+            if e.response["Error"]["Code"] != "TransactionCanceledException":
+                raise
+            case_reason, patient_reason = (cancellation_reasons(e) + ["None", "None"])[:2]
+
+        if case_reason == "ConditionalCheckFailed":
+            response = await run_db(cases_table.get_item, Key={"CaseID": case_item["CaseID"]})
+            return response["Item"], False
+
+        if patient_reason == "ConditionalCheckFailed":
+            patient = await _reread_patient(patient["PatientID"])
+            if not patient:
+                raise Exception("Patient not found")
+        elif not RETRYABLE_CANCELLATIONS & {case_reason, patient_reason}:
+            raise Exception(f"Case write cancelled: {case_reason}, {patient_reason}")
+
+        await _retry_pause(attempt)
+
+    raise Exception("Case write kept conflicting, please retry")
+
+
+# Duplicate taps on "Diagnose" (same patient and symptoms, or the same
+# Idempotency-Key) share one model call and one case
+diagnosis_flights = SingleFlight(window=settings.DIAGNOSIS_DEDUP_SECONDS)
+
+
+async def diagnose_case(payload, idempotency_key: Optional[str] = None):
+
+    if idempotency_key:
+        # Same key -> same CaseID, so retries dedupe across workers too
+        case_id = deterministic_id("CASE", payload.ASHAWorkerID, idempotency_key)
+        key = ("idempotency", case_id)
+    else:
+        case_id = None
+        key = ("symptoms", payload.PatientID, normalize_text(payload.SymptomsRaw))
+
+    return await diagnosis_flights.do(
+        key,
+        lambda: _diagnose_case(payload, case_id),
+    )
+
+
+async def _diagnose_case(payload, case_id: Optional[str]):
+
+    if case_id:
+        existing = await run_db(cases_table.get_item, Key={"CaseID": case_id})
+        if existing.get("Item"):
+            return existing["Item"]
+
+    patient = await fetch_patient(payload.PatientID)
+
+    if not patient:
+        raise Exception("Patient not found")
+
+    # Emergency keywords: don't make the patient wait on the model
+    if settings.EMERGENCY_FAST_PATH:
+        signals = triage(payload.SymptomsRaw)
+        if signals["Categories"]:
+            return await fast_track_emergency(payload, patient, signals, case_id)
+
+    case_item, ai_output, patient = await prepare_case(payload, case_id=case_id, patient=patient)
+
+    # Store the case, tag conditions and count the visit in one write
+    case_item, created = await store_new_case(case_item, patient, ai_output.auto_tag_conditions)
+    if not created:
+        return case_item
+
+    # Feed outbreak detection and district rollups (alerts are claimed
+    # once across workers; rollup counts are flushed in the background)
+    alerts = await claim_alerts(outbreak_detector.observe_case(case_item, patient))
+    record_case(case_item, patient)
+
+    # Live updates for district dashboards
+    await case_created(case_item, patient, alerts)
+
+    return case_item
+
+
+# --------------------------------------------
+# Emergency Fast Path
+# --------------------------------------------
+# On a keyword hit the case is stored as EMERGENCY and a doctor is
+# matched straight away; the model's diagnosis is filled into the same
+# case in the background (DiagnosisPending stays true until then, and
+# DiagnosisFailed is set if the model call fails).
+
+# Fields the background diagnosis overwrites; Status/DoctorID are left alone
+AI_FIELDS = [
+    "SymptomsEnglish", "PrimaryDiagnosis", "DifferentialDiagnoses", "ConfidencePercent",
+    "RiskLevel", "RiskReason", "ImmediateActions", "ICMRProtocol",
+    "ICD10Code", "ICD10Description",
+]
+
+_background_diagnoses: Set[asyncio.Task] = set()
+
+
+def emergency_case_record(payload, signals: Dict[str, Any], case_id: Optional[str] = None) -> Dict[str, Any]:
+
+    now = datetime.utcnow().isoformat()
+
+    return {
+        "CaseID": case_id or generate_uuid("CASE"),
+        "PatientID": payload.PatientID,
+        "ASHAWorkerID": payload.ASHAWorkerID,
+        "DoctorID": None,
+
+        "SymptomsRaw": payload.SymptomsRaw,
+        "SymptomsEnglish": payload.SymptomsRaw,
+        "Language": payload.Language,
+
+        # "Suspected eclampsia" still routes to the right specialist
+        "PrimaryDiagnosis": "Suspected " + ", ".join(signals["Categories"]),
+        "DifferentialDiagnoses": [],
+        "ConfidencePercent": 0,
+        "RiskLevel": "EMERGENCY",
+        "RiskReason": _emergency_reason(signals),
+        "ImmediateActions": first_actions(signals["Categories"]),
+        "ICMRProtocol": "",
+        "ICD10Code": "",
+        "ICD10Description": "",
+
+        "Status": "PENDING",
+        "DiagnosisPending": True,
+        "CreatedAt": now,
+        "UpdatedAt": now,
+    }
+
+
+async def assign_emergency_doctor(
+    case_item: Dict[str, Any],
+    patient: Dict[str, Any],
+) -> Optional[Dict[str, Any]]:
+    """Match and assign the suitable doctor nearest the patient; updates case_item in place."""
+
+    location = patient_location(patient)
+    doctor = await run_db(
+        match_doctor,
+        primary_diagnosis=case_item["PrimaryDiagnosis"],
+        patient_age=int(patient["Age"]),
+        asha_lat=location["Lat"],
+        asha_lng=location["Lng"],
+    )
+
+    if not doctor:
+        return None
+
+    now = datetime.utcnow().isoformat()
+
+    try:
+        await run_db(
+            cases_table.update_item,
+            Key={"CaseID": case_item["CaseID"]},
+            UpdateExpression="SET DoctorID = :d, #st = :s, UpdatedAt = :u",
+            ConditionExpression="#st = :pending",
+            ExpressionAttributeValues={
+                ":d": doctor["DoctorID"],
+                ":s": "DOCTOR_ASSIGNED",
+                ":u": now,
+                ":pending": "PENDING",
+            },
+            ExpressionAttributeNames={
+                "#st": "Status"
+            },
+        )
+    except ClientError as e:
+        if e.response["Error"]["Code"] != "ConditionalCheckFailedException":
+            raise
+        return None
+
+    case_item.update({"DoctorID": doctor["DoctorID"], "Status": "DOCTOR_ASSIGNED", "UpdatedAt": now})
+    await case_assigned(case_item, patient, doctor)
+
+    return doctor
+
+
+async def fast_track_emergency(
+    payload,
+    patient: Dict[str, Any],
+    signals: Dict[str, Any],
+    case_id: Optional[str] = None,
+) -> Dict[str, Any]:
+
+    case_item, created = await store_new_case(emergency_case_record(payload, signals, case_id), patient)
+    if not created:
+        return case_item
+
+    await case_created(case_item, patient)
+
+    try:
+        await assign_emergency_doctor(case_item, patient)
+    except Exception as e:
+        # Case is stored; connect-doctor / assign-pending can still pick it up
+        record_failure("emergency_doctor_match", e)
+
+    task = asyncio.create_task(complete_emergency_diagnosis(payload, dict(case_item), patient))
+    _background_diagnoses.add(task)
+    task.add_done_callback(_background_diagnoses.discard)
+
+    return case_item
+
+
+async def complete_emergency_diagnosis(payload, provisional: Dict[str, Any], patient: Dict[str, Any]):
+
+    try:
+        case_item, ai_output, _ = await prepare_case(
+            payload,
+            case_id=provisional["CaseID"],
+            created_at=provisional["CreatedAt"],
+            patient=patient,
+        )
+    except Exception as e:
+        # The provisional "Suspected ..." record stays as it is, still
+        # pending, and is flagged for a doctor to diagnose by hand. It has
+        # no ICD-10 code, so it stays out of rollups and outbreak counts.
+        record_failure("emergency_diagnosis", e)
+        case_item, ai_output = None, None
+
+    if case_item is None:
+        fields = {"DiagnosisFailed": True}
+    else:
+        fields = {name: case_item[name] for name in AI_FIELDS}
+        fields["DiagnosisPending"] = False
+    fields["UpdatedAt"] = datetime.utcnow().isoformat()
+
+    try:
+        await run_db(
+            cases_table.update_item,
+            Key={"CaseID": provisional["CaseID"]},
+            UpdateExpression="SET " + ", ".join(f"#f{i} = :f{i}" for i in range(len(fields))),
+            ExpressionAttributeNames={f"#f{i}": name for i, name in enumerate(fields)},
+            ExpressionAttributeValues={f":f{i}": value for i, value in enumerate(fields.values())},
+        )
+    except Exception as e:
+        # Runs as a background task; nobody else would see this
+        record_failure("emergency_diagnosis_write", e)
+        return
+
+    if ai_output is None:
+        return
+
+    case_item = {**provisional, **fields}
+
+    # Rollups and outbreak detection want the ICD-10 code, so they are fed
+    # here: as a PENDING case, then the assignment if one was made
+    alerts = await claim_alerts(outbreak_detector.observe_case(case_item, patient))
+    record_case({**case_item, "Status": "PENDING"}, patient)
+    if provisional["Status"] == "DOCTOR_ASSIGNED":
+        record_status_change(case_item, patient, "PENDING", "DOCTOR_ASSIGNED", provisional["UpdatedAt"])
+
+    await case_diagnosed(case_item, patient, alerts)
 
-    return case_item
\ No newline at end of file
+    try:
+        await auto_tag_patient(patient, ai_output.auto_tag_conditions)
+    except Exception as e:
+        record_failure("emergency_auto_tag", e)
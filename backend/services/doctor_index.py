@@ -0,0 +1,262 @@
+# backend/services/doctor_index.py
+
+import threading
+from math import radians, cos, sin, asin, sqrt, floor
+from typing import Optional, Dict, Any, List, Tuple, Iterable
+
+
+# -------------------------------------------------
+# Grid Configuration
+# -------------------------------------------------
+
+CELL_SIZE_DEG = 0.1          # ~11 km per cell at Indian latitudes
+EARTH_RADIUS_KM = 6371
+KM_PER_DEG = 6371 * 3.141592653589793 / 180
+
+# Great circles bulge slightly poleward, so the planar ring bound
+# is shrunk a little to stay a true lower bound.
+RING_BOUND_SLACK = 0.995
+
+ANY_SPECIALIZATION = "*"
+
+
+def _haversine_km(lat1: float, lon1: float, lat2: float, lon2: float) -> float:
+    lat1, lon1, lat2, lon2 = map(radians, [lat1, lon1, lat2, lon2])
+
+    dlon = lon2 - lon1
+    dlat = lat2 - lat1
+
+    a = sin(dlat/2)**2 + cos(lat1) * cos(lat2) * sin(dlon/2)**2
+    return 2 * EARTH_RADIUS_KM * asin(sqrt(a))
+
+
+def _cell_of(lat: float, lng: float) -> Tuple[int, int]:
+    return floor(lat / CELL_SIZE_DEG), floor(lng / CELL_SIZE_DEG)
+
+
+# -------------------------------------------------
+# Per-Specialization Grid
+# -------------------------------------------------
+
+class _Grid:
+    """
+    Uniform lat/lng grid of doctors for one specialization.
+    """
+
+    def __init__(self):
+        self.cells: Dict[Tuple[int, int], Dict[str, Tuple[float, float]]] = {}
+        self.count = 0
+        self.min_i = self.max_i = self.min_j = self.max_j = None
+
+    def add(self, doctor_id: str, lat: float, lng: float):
+        cell = _cell_of(lat, lng)
+        bucket = self.cells.setdefault(cell, {})
+        if doctor_id not in bucket:
+            self.count += 1
+        bucket[doctor_id] = (lat, lng)
+
+        i, j = cell
+        if self.min_i is None:
+            self.min_i = self.max_i = i
+            self.min_j = self.max_j = j
+        else:
+            self.min_i, self.max_i = min(self.min_i, i), max(self.max_i, i)
+            self.min_j, self.max_j = min(self.min_j, j), max(self.max_j, j)
+
+    def remove(self, doctor_id: str, lat: float, lng: float):
+        cell = _cell_of(lat, lng)
+        bucket = self.cells.get(cell)
+        if bucket and bucket.pop(doctor_id, None) is not None:
+            self.count -= 1
+            if not bucket:
+                del self.cells[cell]
+
+    def _ring_lower_bound_km(self, lat: float, lng: float, ci: int, cj: int, r: int) -> float:
+        """
+        Minimum distance from (lat, lng) to any point outside the
+        (2r+1)x(2r+1) block of cells centred on (ci, cj).
+        """
+        south = (ci - r) * CELL_SIZE_DEG
+        north = (ci + r + 1) * CELL_SIZE_DEG
+        west = (cj - r) * CELL_SIZE_DEG
+        east = (cj + r + 1) * CELL_SIZE_DEG
+
+        lat_gap = min(lat - south, north - lat) * KM_PER_DEG
+
+        poleward = min(max(abs(south), abs(north)), 89.9)
+        lng_gap = min(lng - west, east - lng) * KM_PER_DEG * cos(radians(poleward))
+
+        return min(lat_gap, lng_gap) * RING_BOUND_SLACK
+
+    def nearest(
+        self,
+        lat: float,
+        lng: float,
+        k: int,
+        max_distance_km: Optional[float] = None,
+    ) -> List[Tuple[float, str]]:
+
+        if not self.count:
+            return []
+
+        ci, cj = _cell_of(lat, lng)
+
+        # Rings needed to cover every populated cell
+        max_r = max(
+            abs(ci - self.min_i), abs(ci - self.max_i),
+            abs(cj - self.min_j), abs(cj - self.max_j),
+        )
+
+        found: List[Tuple[float, str]] = []
+
+        for r in range(max_r + 1):
+            for i, j in _ring_cells(ci, cj, r):
+                bucket = self.cells.get((i, j))
+                if not bucket:
+                    continue
+                for doctor_id, (dlat, dlng) in bucket.items():
+                    found.append((_haversine_km(lat, lng, dlat, dlng), doctor_id))
+
+            bound = self._ring_lower_bound_km(lat, lng, ci, cj, r)
+
+            if max_distance_km is not None and bound > max_distance_km:
+                break
+
+            if len(found) >= k:
+                found.sort()
+                del found[k:]
+                if found[-1][0] <= bound:
+                    break
+
+        found.sort()
+        if max_distance_km is not None:
+            found = [f for f in found if f[0] <= max_distance_km]
+        return found[:k]
+
+
+def _ring_cells(ci: int, cj: int, r: int) -> Iterable[Tuple[int, int]]:
+    if r == 0:
+        yield ci, cj
+        return
+
+    for j in range(cj - r, cj + r + 1):
+        yield ci - r, j
+        yield ci + r, j
+    for i in range(ci - r + 1, ci + r):
+        yield i, cj - r
+        yield i, cj + r
+
+
+# -------------------------------------------------
+# Doctor Spatial Index
+# -------------------------------------------------
+
+class DoctorSpatialIndex:
+    """
+    In-process nearest-doctor index, one grid per specialization plus
+    a combined grid for the "any specialization" fallback.
+
+    Only available doctors are indexed. Changes are applied
+    incrementally via upsert/remove/sync instead of a rebuild.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._doctors: Dict[str, Dict[str, Any]] = {}
+        self._seen: Dict[str, Dict[str, Any]] = {}
+        self._grids: Dict[str, _Grid] = {ANY_SPECIALIZATION: _Grid()}
+
+    def __len__(self) -> int:
+        return len(self._doctors)
+
+    # ---------- mutation ----------
+
+    def upsert(self, doctor: Dict[str, Any]):
+        with self._lock:
+            self._upsert(doctor)
+
+    def remove(self, doctor_id: str):
+        with self._lock:
+            self._remove(doctor_id)
+
+    def sync(self, doctors: Iterable[Dict[str, Any]]) -> Dict[str, int]:
+        """
+        Bring the index in line with a full doctor listing, touching
+        only the doctors that were added, changed or dropped.
+        """
+        with self._lock:
+            seen = set()
+            changed = 0
+
+            for doc in doctors:
+                doctor_id = doc["DoctorID"]
+                seen.add(doctor_id)
+                if self._seen.get(doctor_id) != doc:
+                    self._upsert(doc)
+                    changed += 1
+
+            stale = [d for d in self._seen if d not in seen]
+            for doctor_id in stale:
+                self._remove(doctor_id)
+
+            return {"changed": changed, "removed": len(stale), "size": len(self._doctors)}
+
+    def _upsert(self, doctor: Dict[str, Any]):
+        doctor_id = doctor["DoctorID"]
+
+        self._remove(doctor_id)
+        self._seen[doctor_id] = doctor
+
+        if doctor.get("IsAvailable") is not True:
+            return
+
+        lat, lng = float(doctor["Lat"]), float(doctor["Lng"])
+        spec = doctor.get("Specialization") or ""
+
+        self._doctors[doctor_id] = doctor
+        self._grids.setdefault(spec, _Grid()).add(doctor_id, lat, lng)
+        self._grids[ANY_SPECIALIZATION].add(doctor_id, lat, lng)
+
+    def _remove(self, doctor_id: str):
+        self._seen.pop(doctor_id, None)
+        doctor = self._doctors.pop(doctor_id, None)
+        if doctor is None:
+            return
+
+        lat, lng = float(doctor["Lat"]), float(doctor["Lng"])
+        spec = doctor.get("Specialization") or ""
+
+        self._grids[spec].remove(doctor_id, lat, lng)
+        self._grids[ANY_SPECIALIZATION].remove(doctor_id, lat, lng)
+
+    # ---------- lookup ----------
+
+    def available(self) -> List[Dict[str, Any]]:
+        with self._lock:
+            return list(self._doctors.values())
+
+    def nearest(
+        self,
+        lat: float,
+        lng: float,
+        k: int = 1,
+        specialization: Optional[str] = None,
+        max_distance_km: Optional[float] = None,
+    ) -> List[Dict[str, Any]]:
+        """
+        Return up to k available doctors ordered by distance, each a
+        copy of the stored record with DistanceKm set.
+        """
+        lat, lng = float(lat), float(lng)
+
+        with self._lock:
+            grid = self._grids.get(specialization or ANY_SPECIALIZATION)
+            if grid is None:
+                return []
+
+            hits = grid.nearest(lat, lng, k, max_distance_km)
+
+            return [
+                {**self._doctors[doctor_id], "DistanceKm": distance}
+                for distance, doctor_id in hits
+            ]
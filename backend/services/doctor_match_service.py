@@ -1,9 +1,16 @@
 # backend/services/doctor_match_service.py
 
 from math import radians, cos, sin, asin, sqrt
-from typing import Optional, Dict, Any, List
+from typing import Optional, Dict, Any, List, Tuple, TYPE_CHECKING
 
+from backend.config import settings
 from backend.core.database import doctors_table
+from backend.core.metrics import stage
+from backend.services.doctor_index import DoctorSpatialIndex
+from backend.services.doctor_roster import DoctorRoster, HostLease, feed_kind
+
+if TYPE_CHECKING:
+    import numpy as np
 
 
 # -------------------------------------------------
@@ -21,6 +28,22 @@ SPECIALIZATION_MAP = {
 }
 
 
+# -------------------------------------------------
+# Patient Location
+# -------------------------------------------------
+
+# Demo ASHA coordinates (Bikram)
+ASHA_LAT = 25.5921
+ASHA_LNG = 85.1376
+
+
+def patient_location(patient) -> Dict[str, float]:
+    """Patient's home coordinates; the ASHA's for patients registered without them."""
+    if patient.get("Lat") is not None and patient.get("Lng") is not None:
+        return {"Lat": float(patient["Lat"]), "Lng": float(patient["Lng"])}
+    return {"Lat": ASHA_LAT, "Lng": ASHA_LNG}
+
+
 # -------------------------------------------------
 # Haversine Distance Formula
 # -------------------------------------------------
@@ -41,6 +64,25 @@ def haversine(lat1, lon1, lat2, lon2):
     return km
 
 
+def haversine_matrix(lats1, lngs1, lats2, lngs2) -> "np.ndarray":
+    """
+    Pairwise distances in KM, shape (len(lats1), len(lats2)).
+    """
+    # numpy is only needed by batch paths; keep it out of app import
+    import numpy as np
+
+    lat1 = np.radians(np.asarray(lats1, dtype=np.float64))[:, None]
+    lon1 = np.radians(np.asarray(lngs1, dtype=np.float64))[:, None]
+    lat2 = np.radians(np.asarray(lats2, dtype=np.float64))[None, :]
+    lon2 = np.radians(np.asarray(lngs2, dtype=np.float64))[None, :]
+
+    a = (
+        np.sin((lat2 - lat1) / 2) ** 2
+        + np.cos(lat1) * np.cos(lat2) * np.sin((lon2 - lon1) / 2) ** 2
+    )
+    return 6371 * 2 * np.arcsin(np.sqrt(np.clip(a, 0.0, 1.0)))
+
+
 # -------------------------------------------------
 # Determine Required Specialization
 # -------------------------------------------------
@@ -64,17 +106,31 @@ def get_required_specialization(
 
 
 # -------------------------------------------------
-# Fetch Available Doctors
+# Spatial Index (kept current from the doctors change feed)
 # -------------------------------------------------
 
-def get_available_doctors() -> List[Dict[str, Any]]:
+doctor_index = DoctorSpatialIndex()
 
-    response = doctors_table.scan()
+doctor_roster = DoctorRoster(
+    doctor_index,
+    doctors_table,
+    max_staleness=settings.DOCTOR_ROSTER_MAX_STALENESS_SECONDS,
+    resync_seconds=settings.DOCTOR_ROSTER_RESYNC_SECONDS,
+    page_size=settings.DOCTOR_SCAN_PAGE_SIZE,
+    segments=settings.DOCTOR_SCAN_SEGMENTS,
+    # The memory feed is per process anyway; Streams limits readers per shard
+    lease=HostLease(settings.DOCTOR_ROSTER_SHARE_PATH)
+    if settings.DOCTOR_ROSTER_SHARE_PATH and feed_kind() == "streams" else None,
+)
 
-    doctors = response.get("Items", [])
 
-    # Filter only available doctors
-    return [doc for doc in doctors if doc.get("IsAvailable") is True]
+# -------------------------------------------------
+# Fetch Available Doctors
+# -------------------------------------------------
+
+def get_available_doctors() -> List[Dict[str, Any]]:
+    doctor_roster.ensure_fresh()
+    return doctor_index.available()
 
 
 # -------------------------------------------------
@@ -93,28 +149,85 @@ def match_doctor(
         patient_age
     )
 
-    available_doctors = get_available_doctors()
+    with stage("doctor_match"):
+        doctor_roster.ensure_fresh()
 
-    if not available_doctors:
-        return None
+        # Nearest specialist first, otherwise nearest available doctor
+        nearest = doctor_index.nearest(asha_lat, asha_lng, k=1, specialization=required_spec)
 
-    # Filter by specialization first
-    specialists = [
-        doc for doc in available_doctors
-        if doc.get("Specialization") == required_spec
-    ]
+        if not nearest:
+            nearest = doctor_index.nearest(asha_lat, asha_lng, k=1)
 
-    pool = specialists if specialists else available_doctors
+    return nearest[0] if nearest else None
 
-    # Sort by distance
-    for doc in pool:
-        doc["DistanceKm"] = haversine(
-            asha_lat,
-            asha_lng,
-            doc["Lat"],
-            doc["Lng"]
+
+
+# -------------------------------------------------
+# Batch Assignment (many PENDING cases at once)
+# -------------------------------------------------
+
+RISK_PRIORITY = {"EMERGENCY": 0, "URGENT": 1, "ROUTINE": 2}
+
+
+def assign_doctors_batch(
+    cases: List[Dict[str, Any]],
+    doctors: List[Dict[str, Any]],
+    capacity: Dict[str, int],
+) -> Tuple[List[Dict[str, Any]], List[str]]:
+    """
+    Greedily assign each case (given as dicts with CaseID, PrimaryDiagnosis,
+    PatientAge, Lat, Lng, RiskLevel, CreatedAt) to the nearest doctor with
+    spare capacity, specialists first. Higher-risk and older cases pick
+    first. Returns (assignments, unassigned case IDs).
+    """
+    import numpy as np
+
+    if not cases:
+        return [], []
+
+    if not doctors:
+        return [], [c["CaseID"] for c in cases]
+
+    cases = sorted(
+        cases,
+        key=lambda c: (RISK_PRIORITY.get(c.get("RiskLevel"), 3), c.get("CreatedAt", ""))
+    )
+
+    distances = haversine_matrix(
+        [c["Lat"] for c in cases],
+        [c["Lng"] for c in cases],
+        [float(d["Lat"]) for d in doctors],
+        [float(d["Lng"]) for d in doctors],
+    )
+
+    doctor_specs = np.array([d.get("Specialization", "") for d in doctors])
+    remaining = np.array([capacity.get(d["DoctorID"], 0) for d in doctors])
+
+    assignments = []
+    unassigned = []
+
+    for row, case in enumerate(cases):
+        free = remaining > 0
+
+        if not free.any():
+            unassigned.extend(c["CaseID"] for c in cases[row:])
+            break
+
+        required_spec = get_required_specialization(
+            case["PrimaryDiagnosis"],
+            case["PatientAge"]
         )
 
-    pool.sort(key=lambda x: x["DistanceKm"])
+        candidates = free & (doctor_specs == required_spec)
+        if not candidates.any():
+            candidates = free
+
+        col = int(np.argmin(np.where(candidates, distances[row], np.inf)))
+        remaining[col] -= 1
+
+        assignments.append({
+            "CaseID": case["CaseID"],
+            "Doctor": {**doctors[col], "DistanceKm": float(distances[row, col])},
+        })
 
-    return pool[0] if pool else None
\ No newline at end of file
+    return assignments, unassigned
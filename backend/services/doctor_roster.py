@@ -0,0 +1,530 @@
+# backend/services/doctor_roster.py
+
+import asyncio
+import fcntl
+import json
+import os
+import tempfile
+import threading
+import time
+from typing import Optional, Dict, Any, List, Callable, Tuple
+
+from botocore.exceptions import ClientError
+
+from backend.config import settings
+from backend.core.concurrency import run_db
+from backend.core.database import iter_scan
+from backend.core.metrics import stage, record_failure
+from backend.services.doctor_index import DoctorSpatialIndex
+
+
+# -------------------------------------------------
+# Change Feeds
+# -------------------------------------------------
+# A feed yields the doctors table's writes since the last poll as
+# {"event": INSERT / MODIFY / REMOVE, "keys": {...}, "image": {...}},
+# image being the full new item (None on REMOVE).
+
+GAP_ERRORS = {
+    "ExpiredIteratorException",
+    "TrimmedDataAccessException",
+    "ResourceNotFoundException",
+}
+
+
+class FeedGap(Exception):
+    """Changes were lost; the roster has to be rebuilt from a scan."""
+
+
+def _change(record: Dict[str, Any], image=None, keys=None) -> Dict[str, Any]:
+    data = record["dynamodb"]
+    return {
+        "event": record["eventName"],
+        "keys": keys if keys is not None else data["Keys"],
+        "image": image if image is not None else data.get("NewImage"),
+    }
+
+
+class MemoryStreamFeed:
+    """
+    Reads the change stream of a MemoryTable (STORAGE_BACKEND=memory),
+    the local stand-in for DynamoDB Streams.
+    """
+
+    kind = "memory"
+
+    def __init__(self, table, batch_size: int = 1000):
+        self.table = table
+        self.batch_size = batch_size
+        self._stream = None
+        self._position = 0
+
+    def start(self):
+        """Position at the newest record; later writes will be polled."""
+        self._stream = self.table.resolve().enable_stream()
+        self._position = self._stream.latest()
+
+    def poll(self) -> List[Dict[str, Any]]:
+        changes: List[Dict[str, Any]] = []
+        while True:
+            try:
+                records, self._position = self._stream.read(self._position, self.batch_size)
+            except ClientError as e:
+                raise FeedGap(e.response["Error"]["Message"]) from e
+
+            changes.extend(_change(r) for r in records)
+            if len(records) < self.batch_size:
+                return changes
+
+
+class DynamoDBStreamFeed:
+    """
+    Reads the doctors table's DynamoDB Stream (view type NEW_IMAGE or
+    NEW_AND_OLD_IMAGES, see seed.py). Every open shard is followed from
+    LATEST at start; shards that appear later (splits, rollovers) are
+    read from TRIM_HORIZON, each only after its parent is drained, so
+    per-doctor order is kept.
+    """
+
+    kind = "streams"
+
+    def __init__(self, table_name: str, batch_size: int = 1000, discover_seconds: float = 60):
+        self.table_name = table_name
+        self.batch_size = batch_size
+        self.discover_seconds = discover_seconds
+
+        self._stream_arn: Optional[str] = None
+        self._iterators: Dict[str, str] = {}
+        self._parents: Dict[str, Optional[str]] = {}
+        self._known: set = set()
+        self._discovered_at = 0.0
+
+    @staticmethod
+    def _client():
+        from backend.core.aws import get_dynamodb_streams
+
+        return get_dynamodb_streams()
+
+    def _shards(self) -> List[Dict[str, Any]]:
+        shards: List[Dict[str, Any]] = []
+        params: Dict[str, Any] = {"StreamArn": self._stream_arn}
+        while True:
+            description = self._client().describe_stream(**params)["StreamDescription"]
+            shards.extend(description.get("Shards", []))
+
+            last = description.get("LastEvaluatedShardId")
+            if not last:
+                return shards
+            params["ExclusiveStartShardId"] = last
+
+    def _iterator(self, shard_id: str, iterator_type: str) -> str:
+        return self._client().get_shard_iterator(
+            StreamArn=self._stream_arn,
+            ShardId=shard_id,
+            ShardIteratorType=iterator_type,
+        )["ShardIterator"]
+
+    def start(self):
+        from backend.core.aws import get_dynamodb_resource
+
+        table = get_dynamodb_resource().meta.client.describe_table(TableName=self.table_name)["Table"]
+        self._stream_arn = table.get("LatestStreamArn")
+        if not self._stream_arn:
+            raise RuntimeError(f"Streams are not enabled on {self.table_name}")
+
+        self._iterators.clear()
+        self._parents.clear()
+        self._known.clear()
+
+        for shard in self._shards():
+            self._known.add(shard["ShardId"])
+            if "EndingSequenceNumber" not in shard.get("SequenceNumberRange", {}):
+                self._iterators[shard["ShardId"]] = self._iterator(shard["ShardId"], "LATEST")
+
+        self._discovered_at = time.monotonic()
+
+    def _discover(self):
+        if time.monotonic() - self._discovered_at < self.discover_seconds:
+            return
+
+        for shard in self._shards():
+            shard_id = shard["ShardId"]
+            if shard_id not in self._known:
+                self._known.add(shard_id)
+                self._parents[shard_id] = shard.get("ParentShardId")
+                self._iterators[shard_id] = self._iterator(shard_id, "TRIM_HORIZON")
+
+        self._discovered_at = time.monotonic()
+
+    def poll(self) -> List[Dict[str, Any]]:
+        from boto3.dynamodb.types import TypeDeserializer
+
+        deserializer = TypeDeserializer()
+
+        def plain(image):
+            return {k: deserializer.deserialize(v) for k, v in image.items()} if image else None
+
+        changes: List[Dict[str, Any]] = []
+
+        try:
+            self._discover()
+
+            for shard_id in list(self._iterators):
+                if self._parents.get(shard_id) in self._iterators:
+                    continue
+
+                response = self._client().get_records(
+                    ShardIterator=self._iterators[shard_id],
+                    Limit=self.batch_size,
+                )
+                for record in response.get("Records", []):
+                    data = record["dynamodb"]
+                    changes.append(_change(record, plain(data.get("NewImage")), plain(data["Keys"])))
+
+                next_iterator = response.get("NextShardIterator")
+                if next_iterator:
+                    self._iterators[shard_id] = next_iterator
+                else:
+                    # Closed shard fully read
+                    del self._iterators[shard_id]
+        except ClientError as e:
+            if e.response.get("Error", {}).get("Code") in GAP_ERRORS:
+                raise FeedGap(e.response["Error"]["Message"]) from e
+            raise
+
+        return changes
+
+
+def feed_kind() -> str:
+    """DOCTOR_FEED, with auto resolved from STORAGE_BACKEND."""
+    kind = settings.DOCTOR_FEED
+    if kind == "auto":
+        kind = "memory" if settings.STORAGE_BACKEND == "memory" else "streams"
+    return kind
+
+
+def default_feed(table) -> Optional[Any]:
+    """The feed for DOCTOR_FEED; auto follows STORAGE_BACKEND."""
+    kind = feed_kind()
+
+    if kind == "memory":
+        return MemoryStreamFeed(table)
+    if kind == "streams":
+        return DynamoDBStreamFeed(table.name)
+    return None
+
+
+# -------------------------------------------------
+# Host Lease (one feed reader per host)
+# -------------------------------------------------
+
+class HostLease:
+    """
+    Elects one feed reader among the worker processes of a host.
+    DynamoDB Streams serves about two concurrent readers per shard, so N
+    uvicorn workers must not all poll it.
+
+    The worker holding an exclusive lock on <path>.lock reads the feed.
+    It rewrites the roster snapshot at <path> after every change and
+    touches it after every poll. The other workers load the snapshot
+    when it is replaced; its mtime tells them how current it is. The OS
+    drops the lock when its holder exits, and the next worker to try
+    takes over.
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        self._lock_file = None
+        self._loaded: Optional[Tuple[int, int]] = None   # (inode, size) of the snapshot last read
+
+    @property
+    def held(self) -> bool:
+        return self._lock_file is not None
+
+    def acquire(self) -> bool:
+        """Non-blocking; True while this worker is the reader."""
+        if self._lock_file is not None:
+            return True
+
+        directory = os.path.dirname(os.path.abspath(self.path))
+        os.makedirs(directory, exist_ok=True)
+        lock_file = open(self.path + ".lock", "a")
+        try:
+            fcntl.flock(lock_file, fcntl.LOCK_EX | fcntl.LOCK_NB)
+        except OSError:
+            lock_file.close()
+            return False
+
+        self._lock_file = lock_file
+        return True
+
+    def release(self):
+        if self._lock_file is not None:
+            self._lock_file.close()
+            self._lock_file = None
+
+    # ---------- reader side ----------
+
+    def publish(self, doctors: List[Dict[str, Any]]):
+        """Atomically replace the snapshot (DynamoDB JSON, so Decimals survive)."""
+        from boto3.dynamodb.types import TypeSerializer
+
+        serializer = TypeSerializer()
+        items = [{k: serializer.serialize(v) for k, v in doctor.items()} for doctor in doctors]
+
+        directory = os.path.dirname(os.path.abspath(self.path))
+        fd, tmp = tempfile.mkstemp(dir=directory, prefix=".doctor_roster.")
+        try:
+            with os.fdopen(fd, "w") as f:
+                json.dump(items, f)
+            os.replace(tmp, self.path)
+        except BaseException:
+            os.unlink(tmp)
+            raise
+
+    def touch(self):
+        """Heartbeat: the snapshot is still current."""
+        try:
+            os.utime(self.path)
+        except FileNotFoundError:
+            pass
+
+    # ---------- follower side ----------
+
+    def read(self) -> Optional[Tuple[float, Optional[List[Dict[str, Any]]]]]:
+        """
+        (age in seconds, doctors), doctors being None when the snapshot
+        has not been replaced since the last read; None without a snapshot.
+        """
+        from boto3.dynamodb.types import TypeDeserializer
+
+        try:
+            with open(self.path) as f:
+                info = os.fstat(f.fileno())
+                age = max(0.0, time.time() - info.st_mtime)
+                version = (info.st_ino, info.st_size)
+                if version == self._loaded:
+                    return age, None
+                items = json.load(f)
+        except FileNotFoundError:
+            return None
+
+        deserializer = TypeDeserializer()
+        doctors = [{k: deserializer.deserialize(v) for k, v in item.items()} for item in items]
+        self._loaded = version
+        return age, doctors
+
+
+# -------------------------------------------------
+# Roster
+# -------------------------------------------------
+
+class DoctorRoster:
+    """
+    Available doctors held in memory (a DoctorSpatialIndex) and kept
+    current from the doctors table's change feed, so matching never
+    reads the table.
+
+    The roster is rebuilt from a paginated full scan on first use, when
+    the feed reports a gap, every resync_seconds as a safety net, and
+    on read when nothing has refreshed it for max_staleness seconds
+    (the poller is stuck or not running). Without a feed it falls back
+    to those resyncs alone.
+
+    With a HostLease only the lease holder reads the feed; the other
+    workers on the host follow its snapshot, and fall back to their own
+    scan only when that snapshot goes stale.
+    """
+
+    def __init__(
+        self,
+        index: DoctorSpatialIndex,
+        table,
+        feed_factory: Callable[[Any], Optional[Any]] = default_feed,
+        max_staleness: float = 30,
+        resync_seconds: float = 900,
+        page_size: int = 1000,
+        segments: int = 1,
+        lease: Optional[HostLease] = None,
+    ):
+        self.index = index
+        self.table = table
+        self.feed_factory = feed_factory
+        self.max_staleness = max_staleness
+        self.resync_seconds = resync_seconds
+        self.page_size = page_size
+        self.segments = segments
+        self.lease = lease
+
+        self.feed = None
+        self._lock = threading.RLock()
+
+        self.synced_at: Optional[float] = None   # last full resync
+        self.fresh_at: Optional[float] = None    # last resync or successful poll
+        self.last_event_at: Optional[float] = None
+
+        self.events = 0
+        self.resyncs = 0
+        self.gaps = 0
+        self.errors = 0
+        self.snapshots_loaded = 0
+
+    # ---------- refresh ----------
+
+    @property
+    def following(self) -> bool:
+        """Another worker on this host reads the feed."""
+        return self.lease is not None and not self.lease.held
+
+    def resync(self) -> Dict[str, int]:
+        """
+        Rebuild from a full scan. The feed is positioned first, so writes
+        landing during the scan are replayed afterwards (full images,
+        applied in order, so replaying ones the scan already saw is
+        harmless).
+        """
+        with self._lock:
+            started = time.monotonic()
+            try:
+                if self.feed is None and not self.following:
+                    self.feed = self.feed_factory(self.table)
+                if self.feed is not None:
+                    self.feed.start()
+            except Exception as e:
+                # No change feed: resync by scan only
+                record_failure("doctor_feed_start", e)
+                self.feed = None
+
+            with stage("doctor_roster_resync"):
+                result = self.index.sync(
+                    iter_scan(self.table, segments=self.segments, page_size=self.page_size)
+                )
+            self.synced_at = self.fresh_at = started
+            self.resyncs += 1
+            self._publish(changed=True)
+            return result
+
+    def _publish(self, changed: bool):
+        if self.lease is None or not self.lease.held:
+            return
+        try:
+            if changed:
+                self.lease.publish(self.index.available())
+            else:
+                self.lease.touch()
+        except Exception as e:
+            # Followers resync on their own once the snapshot is stale
+            record_failure("doctor_roster_publish", e)
+
+    def poll(self) -> int:
+        """Apply the feed's changes since the last poll."""
+        with self._lock:
+            if self.feed is None:
+                return 0
+
+            started = time.monotonic()
+            changes = self.feed.poll()
+
+            for change in changes:
+                if change["event"] == "REMOVE":
+                    self.index.remove(change["keys"]["DoctorID"])
+                else:
+                    self.index.upsert(change["image"])
+
+            self.fresh_at = started
+            if changes:
+                self.events += len(changes)
+                self.last_event_at = started
+            self._publish(changed=bool(changes))
+            return len(changes)
+
+    def follow(self) -> bool:
+        """Load the lease holder's snapshot if it changed; False when there is none yet."""
+        snapshot = self.lease.read()
+        if snapshot is None:
+            return False
+
+        age, doctors = snapshot
+        with self._lock:
+            if doctors is not None:
+                self.index.sync(doctors)
+                self.snapshots_loaded += 1
+            self.fresh_at = max(self.fresh_at or 0.0, time.monotonic() - age)
+        return True
+
+    def _age(self, at: Optional[float]) -> Optional[float]:
+        return None if at is None else time.monotonic() - at
+
+    @property
+    def stale(self) -> bool:
+        age = self._age(self.fresh_at)
+        return age is None or age > self.max_staleness
+
+    def ensure_fresh(self):
+        """Called before reading; resyncs inline only past the staleness bound."""
+        if not self.stale:
+            return
+        with self._lock:
+            if self.stale:
+                self.resync()
+
+    def refresh(self):
+        """One poller step: poll the feed, or resync when one is due."""
+        if self.lease is not None:
+            was_reader = self.lease.held
+            if not self.lease.acquire():
+                self.follow()
+                return
+            if not was_reader:
+                # Taking over the feed: start it from a fresh scan
+                self.synced_at = None
+
+        synced_age = self._age(self.synced_at)
+        fresh_age = self._age(self.fresh_at)
+
+        try:
+            if (
+                synced_age is None
+                or synced_age >= self.resync_seconds
+                or (self.feed is None and fresh_age >= self.max_staleness / 2)
+            ):
+                self.resync()
+            else:
+                self.poll()
+        except FeedGap as e:
+            record_failure("doctor_feed_gap", e)
+            self.gaps += 1
+            self.resync()
+
+    async def run(self, interval: float):
+        """Background poller, started from the app lifespan."""
+        while True:
+            try:
+                await run_db(self.refresh)
+            except Exception as e:
+                # The staleness bound in ensure_fresh covers a failing poller
+                record_failure("doctor_roster_refresh", e)
+                self.errors += 1
+            await asyncio.sleep(interval)
+
+    # ---------- stats ----------
+
+    def stats(self) -> Dict[str, Any]:
+        def rounded(age):
+            return None if age is None else round(age, 3)
+
+        return {
+            "available": len(self.index),
+            "feed": getattr(self.feed, "kind", None),
+            "feed_role": None if self.lease is None else ("follower" if self.following else "reader"),
+            "snapshots_loaded": self.snapshots_loaded,
+            "events_applied": self.events,
+            "resyncs": self.resyncs,
+            "feed_gaps": self.gaps,
+            "errors": self.errors,
+            "seconds_since_refresh": rounded(self._age(self.fresh_at)),
+            "seconds_since_resync": rounded(self._age(self.synced_at)),
+            "seconds_since_event": rounded(self._age(self.last_event_at)),
+            "stale": self.stale,
+            "max_staleness_seconds": self.max_staleness,
+        }
@@ -0,0 +1,384 @@
+# backend/services/drug_index.py
+
+import hashlib
+import json
+import mmap
+import os
+import re
+import struct
+import tempfile
+import unicodedata
+from functools import lru_cache
+from typing import Dict, Any, List, Optional, Tuple, TYPE_CHECKING
+
+from backend.core.metrics import record_failure
+
+if TYPE_CHECKING:
+    import numpy as np
+
+
+# -------------------------------------------------
+# Precomputed Drug Interaction Index
+# -------------------------------------------------
+# The interaction dataset (drugs, drug classes, interacting pairs,
+# allergy cross-reactions) is compiled once into a flat binary file and
+# mmap'd read-only, so every worker process on the host shares the same
+# page-cache copy and opening it costs nothing.
+#
+# Drugs and classes are both "concepts". Each concept's expansion (the
+# concept plus every class it belongs to, transitively) is stored
+# precomputed, so "warfarin x NSAIDs" matches ibuprofen without walking
+# the class tree at check time. Interactions are stored as adjacency:
+# for each concept, its partners (sorted) and the record describing
+# each pair, in both directions. Names and aliases live in an
+# open-addressing hash table keyed by a 64-bit hash of the normalized
+# name.
+#
+# Layout (little-endian, every section 8-byte aligned):
+#   header
+#   name_keys       u64[name_slots]    name hash, 0 = empty
+#   name_values     u32[name_slots]    concept id
+#   expand_offsets  u32[concepts + 1]
+#   expand          u32[...]           concept id, then its classes
+#   adj_offsets     u32[concepts + 1]
+#   adj_partners    u32[...]           kind << 31 | partner concept
+#   adj_records     u32[...]           record id
+#   display_offsets u32[concepts + 1]
+#   note_offsets    u32[records + 1]
+#   severity        u8[records]
+#   display         utf-8 names
+#   notes           utf-8 notes
+
+MAGIC = b"MCDX"
+FORMAT_VERSION = 2   # bump when the layout or normalize_drug_name changes
+
+# Severity is stored as its position here, so a larger value is worse
+SEVERITIES = ["MINOR", "MODERATE", "MAJOR", "CONTRAINDICATED"]
+
+INTERACTION = 0
+CROSS_REACTIVITY = 1
+
+_HEADER = struct.Struct("<4sI32s8I")
+
+_GOLDEN = 0x9E3779B97F4A7C15
+_MASK64 = (1 << 64) - 1
+_KIND_BIT = 31
+_PARTNER_MASK = (1 << _KIND_BIT) - 1
+
+
+# -------------------------------------------------
+# Names
+# -------------------------------------------------
+# "Tab. Paracetamol 500 mg", "PARACETAMOL" and "paracetamol 650mg BD"
+# all resolve to paracetamol: dose, form and frequency words are dropped.
+
+_NON_WORD_RE = re.compile(r"[^a-z0-9]+")
+_DOSE_RE = re.compile(r"^\d[\d.]*(?:mg|mcg|g|ml|iu|units?|%)?$")
+_DROP_WORDS = {
+    "tab", "tabs", "tablet", "tablets", "cap", "caps", "capsule", "capsules",
+    "syp", "syrup", "susp", "suspension", "inj", "injection", "drops", "cream", "ointment", "gel",
+    "mg", "mcg", "g", "ml", "iu", "od", "bd", "bid", "tds", "tid", "qid", "hs", "sos", "prn", "stat",
+    "ds", "forte", "sr", "er", "xr", "cr", "mr", "oral", "po", "iv", "im",
+    # Allergy lists are written as "penicillin allergy", "allergic to sulfa"
+    "allergy", "allergies", "allergic", "to",
+}
+
+
+def normalize_drug_name(name: str) -> str:
+    text = unicodedata.normalize("NFKC", name or "").casefold()
+    words = _NON_WORD_RE.sub(" ", text).split()
+    return " ".join(w for w in words if w not in _DROP_WORDS and not _DOSE_RE.match(w))
+
+
+def name_hash(normalized: str) -> int:
+    digest = hashlib.blake2b(normalized.encode("utf-8"), digest_size=8).digest()
+    return int.from_bytes(digest, "little") | 1   # never 0 (empty slot)
+
+
+def _slot(key: int, bits: int) -> int:
+    return ((key * _GOLDEN) & _MASK64) >> (64 - bits)
+
+
+def dataset_fingerprint(dataset: Dict[str, Any]) -> bytes:
+    raw = json.dumps(dataset, sort_keys=True, ensure_ascii=False)
+    return hashlib.sha256(f"{FORMAT_VERSION}:{raw}".encode("utf-8")).digest()
+
+
+# -------------------------------------------------
+# Build
+# -------------------------------------------------
+
+def _name_table(entries: Dict[int, int]) -> Tuple[int, "np.ndarray", "np.ndarray", int]:
+    import numpy as np
+
+    # Load factor <= 0.5 keeps probe sequences short
+    bits = max(4, (2 * len(entries)).bit_length())
+    mask = (1 << bits) - 1
+    keys = np.zeros(1 << bits, dtype="<u8")
+    values = np.zeros(1 << bits, dtype="<u4")
+    max_probe = 0
+
+    for key, value in entries.items():
+        slot = _slot(key, bits)
+        probe = 0
+        while keys[slot]:
+            slot = (slot + 1) & mask
+            probe += 1
+        keys[slot] = key
+        values[slot] = value
+        max_probe = max(max_probe, probe)
+
+    return bits, keys, values, max_probe
+
+
+def _offsets(lengths: List[int]) -> "np.ndarray":
+    import numpy as np
+
+    offsets = np.zeros(len(lengths) + 1, dtype="<u4")
+    if lengths:
+        offsets[1:] = np.cumsum(lengths)
+    return offsets
+
+
+def _strings(values: List[str]) -> Tuple["np.ndarray", bytes]:
+    encoded = [v.encode("utf-8") for v in values]
+    return _offsets([len(e) for e in encoded]), b"".join(encoded)
+
+
+def compile_dataset(dataset: Dict[str, Any]) -> bytes:
+    """
+    dataset:
+      classes:         {key: {"name", "parents": [class keys], "aliases"}}
+      drugs:           {key: {"name", "classes": [class keys], "aliases"}}
+      interactions:    [[ref, ref, severity, note]]
+      cross_reactions: [[allergy ref, drug ref, severity, note]]
+    A ref is a drug key or "class:<key>".
+    """
+    # numpy is only needed to build the file; workers that just open it skip the import
+    import numpy as np
+
+    classes = dataset.get("classes", {})
+    drugs = dataset.get("drugs", {})
+
+    refs = [f"class:{key}" for key in classes] + list(drugs)
+    ids = {ref: i for i, ref in enumerate(refs)}
+    display = [classes[key].get("name", key) for key in classes] + [drugs[key].get("name", key) for key in drugs]
+
+    def resolve(ref: str) -> int:
+        if ref not in ids:
+            raise Exception(f"Unknown drug or class in interaction dataset: {ref}")
+        return ids[ref]
+
+    # Expansion: the concept, then its classes and their parents
+    def ancestors(class_keys: List[str], seen: List[int]):
+        for key in class_keys:
+            concept = resolve(f"class:{key}")
+            if concept not in seen:
+                seen.append(concept)
+                ancestors(classes[key].get("parents", []), seen)
+        return seen
+
+    expansions = []
+    for key, spec in classes.items():
+        expansions.append(ancestors(spec.get("parents", []), [ids[f"class:{key}"]]))
+    for key, spec in drugs.items():
+        expansions.append(ancestors(spec.get("classes", []), [ids[key]]))
+
+    names: Dict[int, int] = {}
+    for ref, spec in [(f"class:{k}", v) for k, v in classes.items()] + list(drugs.items()):
+        for alias in [ref.split(":", 1)[-1], spec.get("name", "")] + spec.get("aliases", []):
+            normalized = normalize_drug_name(alias)
+            if normalized:
+                # Drugs come after classes: a drug wins a name it shares with a class
+                names[name_hash(normalized)] = ids[ref]
+
+    # One record per (kind, pair); a repeated pair keeps its worst severity
+    records: List[Tuple[int, str]] = []
+    pairs: Dict[Tuple[int, int, int], int] = {}
+    for kind, rows in ((INTERACTION, dataset.get("interactions", [])), (CROSS_REACTIVITY, dataset.get("cross_reactions", []))):
+        for a, b, severity, note in rows:
+            a, b = sorted((resolve(a), resolve(b)))
+            level = SEVERITIES.index(severity)
+            if (kind, a, b) in pairs and records[pairs[(kind, a, b)]][0] >= level:
+                continue
+            pairs[(kind, a, b)] = len(records)
+            records.append((level, note))
+
+    adjacency: List[List[Tuple[int, int]]] = [[] for _ in refs]
+    for (kind, a, b), record in pairs.items():
+        adjacency[a].append(((kind << _KIND_BIT) | b, record))
+        if a != b:
+            adjacency[b].append(((kind << _KIND_BIT) | a, record))
+    for partners in adjacency:
+        partners.sort()
+
+    name_bits, name_keys, name_values, name_probe = _name_table(names)
+    expand = np.array([c for e in expansions for c in e], dtype="<u4")
+    adj_partners = np.array([p for partners in adjacency for p, _ in partners], dtype="<u4")
+    adj_records = np.array([r for partners in adjacency for _, r in partners], dtype="<u4")
+    display_offsets, display_blob = _strings(display)
+    note_offsets, note_blob = _strings([note for _, note in records])
+    severity = np.array([level for level, _ in records], dtype="u1")
+
+    header = _HEADER.pack(
+        MAGIC, FORMAT_VERSION, dataset_fingerprint(dataset),
+        len(refs), len(records), name_bits, name_probe,
+        len(expand), len(adj_partners), len(display_blob), len(note_blob),
+    )
+
+    out = bytearray()
+    for section in (
+        header, name_keys, name_values,
+        _offsets([len(e) for e in expansions]), expand,
+        _offsets([len(p) for p in adjacency]), adj_partners, adj_records,
+        display_offsets, note_offsets, severity, display_blob, note_blob,
+    ):
+        out += section if isinstance(section, bytes) else section.tobytes()
+        out += b"\0" * (-len(out) % 8)
+    return bytes(out)
+
+
+def write_index(dataset: Dict[str, Any], path: str) -> None:
+    """Compile and atomically replace the index file (safe with several workers racing)."""
+    directory = os.path.dirname(os.path.abspath(path))
+    os.makedirs(directory, exist_ok=True)
+    fd, tmp = tempfile.mkstemp(dir=directory, prefix=".drug_index.")
+    try:
+        with os.fdopen(fd, "wb") as f:
+            f.write(compile_dataset(dataset))
+        os.replace(tmp, path)
+    except BaseException:
+        os.unlink(tmp)
+        raise
+
+
+# -------------------------------------------------
+# Read
+# -------------------------------------------------
+
+class DrugIndex:
+    """
+    Read-only view over a compiled index file, through memoryviews on
+    the mmap. Resolved names, expansions and partner maps of the
+    concepts actually prescribed are memoized per worker (bounded);
+    everything else stays in the shared pages.
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        with open(path, "rb") as f:
+            self._mm = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+
+        (
+            magic, version, self.fingerprint,
+            self.concepts, self.records, self.name_bits, self.name_probe,
+            expand_len, adj_len, display_len, notes_len,
+        ) = _HEADER.unpack_from(self._mm, 0)
+
+        if magic != MAGIC or version != FORMAT_VERSION:
+            raise Exception(f"Not a drug index (or an older format): {path}")
+
+        name_slots = 1 << self.name_bits
+        self._offset = _HEADER.size + (-_HEADER.size % 8)
+
+        self._name_keys = self._section("Q", name_slots)
+        self._name_values = self._section("I", name_slots)
+        self._expand_offsets = self._section("I", self.concepts + 1)
+        self._expansions = self._section("I", expand_len)
+        self._adj_offsets = self._section("I", self.concepts + 1)
+        self._adj_partners = self._section("I", adj_len)
+        self._adj_records = self._section("I", adj_len)
+        self._display_offsets = self._section("I", self.concepts + 1)
+        self._note_offsets = self._section("I", self.records + 1)
+        self._severity = self._section("B", self.records)
+        self._display = self._section("B", display_len)
+        self._notes = self._section("B", notes_len)
+
+        self._name_mask = name_slots - 1
+        self._name_shift = 64 - self.name_bits
+
+        # Prescriptions repeat the same few hundred names all day
+        self.resolve = lru_cache(maxsize=65536)(self._resolve)
+        self.expand = lru_cache(maxsize=None)(self._expand)
+        self.partners = lru_cache(maxsize=8192)(self._partners)
+
+    def _section(self, fmt: str, count: int) -> memoryview:
+        size = struct.calcsize(fmt) * count
+        view = memoryview(self._mm)[self._offset:self._offset + size].cast(fmt)
+        self._offset += size + (-size % 8)
+        return view
+
+    def _resolve(self, name: str) -> Optional[int]:
+        """Concept id for a drug / class name or alias, or None."""
+        normalized = normalize_drug_name(name)
+        if not normalized:
+            return None
+        key = name_hash(normalized)
+        slot = ((key * _GOLDEN) & _MASK64) >> self._name_shift
+        for _ in range(self.name_probe + 1):
+            found = self._name_keys[slot]
+            if found == key:
+                return self._name_values[slot]
+            if not found:
+                return None
+            slot = (slot + 1) & self._name_mask
+        return None
+
+    def _expand(self, concept: int) -> Tuple[int, ...]:
+        """The concept followed by every class it belongs to."""
+        return tuple(self._expansions[self._expand_offsets[concept]:self._expand_offsets[concept + 1]])
+
+    def _partners(self, concept: int, kind: int = INTERACTION) -> Dict[int, int]:
+        """{partner concept: record id} for pairs of this kind."""
+        start, end = self._adj_offsets[concept], self._adj_offsets[concept + 1]
+        tag = kind << _KIND_BIT
+        return {
+            partner & _PARTNER_MASK: record
+            for partner, record in zip(self._adj_partners[start:end], self._adj_records[start:end])
+            if partner & ~_PARTNER_MASK == tag
+        }
+
+    def pair(self, a: int, b: int, kind: int = INTERACTION) -> int:
+        """Record id for the pair, or -1."""
+        return self.partners(a, kind).get(b, -1)
+
+    def severity(self, record: int) -> int:
+        return self._severity[record]
+
+    def note(self, record: int) -> str:
+        return bytes(self._notes[self._note_offsets[record]:self._note_offsets[record + 1]]).decode("utf-8")
+
+    def display(self, concept: int) -> str:
+        return bytes(self._display[self._display_offsets[concept]:self._display_offsets[concept + 1]]).decode("utf-8")
+
+    def stats(self) -> Dict[str, Any]:
+        partners = self.partners.cache_info()
+        lookups = partners.hits + partners.misses
+        return {
+            "path": self.path,
+            "bytes": len(self._mm),
+            "concepts": self.concepts,
+            "records": self.records,
+            "name_slots": 1 << self.name_bits,
+            "max_name_probe": self.name_probe,
+            "cached_names": self.resolve.cache_info().currsize,
+            "cached_partner_maps": partners.currsize,
+            "partner_cache_hit_rate": round(partners.hits / lookups, 4) if lookups else 0.0,
+        }
+
+
+def open_index(dataset: Dict[str, Any], path: str) -> DrugIndex:
+    """Open the compiled index at path, (re)building it first if missing or built from other data."""
+    fingerprint = dataset_fingerprint(dataset)
+
+    if os.path.exists(path):
+        try:
+            index = DrugIndex(path)
+            if index.fingerprint == fingerprint:
+                return index
+        except Exception as e:
+            # Corrupt or truncated file: counted, then rebuilt below
+            record_failure("drug_index_open", e)
+
+    write_index(dataset, path)
+    return DrugIndex(path)
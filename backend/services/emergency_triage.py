@@ -0,0 +1,294 @@
+# backend/services/emergency_triage.py
+
+import re
+import unicodedata
+from collections import deque
+from typing import Dict, Any, List, Tuple, Iterable
+
+from backend.services.patient_search import transliterate
+
+
+# -------------------------------------------------
+# Normalization
+# -------------------------------------------------
+# Keywords and symptom text go through the same folding, so Devanagari,
+# Hinglish spellings and common vowel slips meet on one form:
+# "ज्यादा खून" / "zyada khoon" / "jyaada khun" -> " jyada khun".
+
+_FOLDS = [
+    ("ee", "i"), ("ii", "i"), ("oo", "u"), ("uu", "u"), ("aa", "a"),
+    ("z", "j"), ("w", "v"),
+]
+
+_NON_WORD_RE = re.compile(r"[^a-z0-9]+")
+_REPEAT_RE = re.compile(r"(.)\1+")
+
+
+def normalize(text: str) -> str:
+    """Folded words, each preceded and followed by a space."""
+    text = unicodedata.normalize("NFC", text or "").casefold()
+    if not text.isascii():
+        text = unicodedata.normalize("NFKD", transliterate(text))
+        text = text.encode("ascii", "ignore").decode()
+    text = _NON_WORD_RE.sub(" ", text)
+    for src, dst in _FOLDS:
+        text = text.replace(src, dst)
+    text = _REPEAT_RE.sub(r"\1", text)
+    return " " + " ".join(text.split()) + " "
+
+
+# -------------------------------------------------
+# Aho-Corasick Automaton
+# -------------------------------------------------
+
+class KeywordAutomaton:
+    """
+    Aho-Corasick over normalized keywords: one pass over the text finds
+    every keyword in it, however many keywords there are. Keywords match
+    at the start of a word, so inflections and plurals hit too
+    ("chest pain" in "chest pains", "unconscious" in "unconsciousness");
+    keywords in whole_words only match as whole words.
+
+    Overlapping hits resolve leftmost-longest: "behoshi" is reported
+    once rather than as "behos", "behosh" and "behoshi", and the
+    "daura" inside "dil ka daura" is not a second hit.
+    """
+
+    def __init__(self, keywords: Iterable[Tuple[str, Any]], whole_words: Iterable[str] = ()):
+        whole_words = {normalize(keyword) for keyword in whole_words}
+
+        self._goto: List[Dict[str, int]] = [{}]
+        self._fail: List[int] = [0]
+        self._out: List[Tuple[Tuple[str, Any, int, int], ...]] = [()]
+        self.size = 0
+
+        for keyword, value in keywords:
+            pattern = normalize(keyword)
+            if pattern not in whole_words:
+                pattern = pattern.rstrip()
+            if pattern.strip():
+                self._add(pattern, (keyword, value))
+
+        self._link()
+
+    def _add(self, pattern: str, entry: Tuple[str, Any]):
+        # Spans cover the words only: a leading space always, a trailing
+        # one for whole words
+        trail = 1 if pattern.endswith(" ") else 0
+        entry = (*entry, len(pattern.strip()), trail)
+
+        state = 0
+        for ch in pattern:
+            nxt = self._goto[state].get(ch)
+            if nxt is None:
+                nxt = len(self._goto)
+                self._goto[state][ch] = nxt
+                self._goto.append({})
+                self._fail.append(0)
+                self._out.append(())
+            state = nxt
+
+        # Spellings that fold to the same pattern report the first one
+        if not self._out[state]:
+            self._out[state] = (entry,)
+            self.size += 1
+
+    def _link(self):
+        # Breadth-first, so a state's fail target is final before its children
+        queue = deque(self._goto[0].values())
+        while queue:
+            state = queue.popleft()
+            for ch, nxt in self._goto[state].items():
+                queue.append(nxt)
+
+                fail = self._fail[state]
+                while fail and ch not in self._goto[fail]:
+                    fail = self._fail[fail]
+                target = self._goto[fail].get(ch, 0)
+
+                self._fail[nxt] = target if target != nxt else 0
+                self._out[nxt] += self._out[self._fail[nxt]]
+
+    def spans(self, normalized: str) -> List[Tuple[int, int, str, Any]]:
+        """
+        (start, end, keyword, value) over already-normalized text,
+        leftmost-longest and non-overlapping, in text order.
+        """
+        goto, fail, out = self._goto, self._fail, self._out
+        state = 0
+        hits = []
+
+        for i, ch in enumerate(normalized):
+            while state and ch not in goto[state]:
+                state = fail[state]
+            state = goto[state].get(ch, 0)
+            for keyword, value, length, trail in out[state]:
+                end = i + 1 - trail
+                hits.append((end - length, end, keyword, value))
+
+        hits.sort(key=lambda h: (h[0], h[0] - h[1]))
+        kept, covered = [], 0
+        for hit in hits:
+            if hit[0] >= covered:
+                kept.append(hit)
+                covered = hit[1]
+        return kept
+
+    def find(self, text: str) -> List[Tuple[str, Any]]:
+        """(keyword, value) for each distinct keyword found, in text order."""
+        found: Dict[str, Any] = {}
+        for _, _, keyword, value in self.spans(normalize(text)):
+            found.setdefault(keyword, value)
+        return list(found.items())
+
+
+# -------------------------------------------------
+# Emergency Keywords
+# -------------------------------------------------
+# Category -> phrases. Devanagari, Hinglish and frequent misspellings sit
+# next to the English term. Matching is at word start, so a phrase also
+# covers its inflections; every phrase must mean an emergency on its own,
+# whatever follows it ("not responding" does not: "fever not responding
+# to paracetamol").
+
+EMERGENCY_KEYWORDS: Dict[str, List[str]] = {
+    "eclampsia": [
+        "pre-eclampsia", "preeclampsia", "eclampsia", "eklampsia", "eclamsia",
+        "pregnancy fits", "garbhavastha mein daura", "गर्भावस्था में दौरा",
+    ],
+    "seizure": [
+        "convulsion", "convulsions", "convulsing", "seizure", "seizures", "seizer", "siezure",
+        "fits", "fitting", "daura", "dauraa", "dora pad raha", "mirgi", "mirgi ka daura",
+        "jhatke", "jhatka aa raha", "दौरा", "मिर्गी", "झटके",
+    ],
+    "bleeding": [
+        "heavy bleeding", "severe bleeding", "bleeding heavily", "hemorrhage", "haemorrhage",
+        "hemorage", "hemmorhage", "postpartum hemorrhage", "pph",
+        "zyada khoon", "jyada khoon", "bahut khoon", "khoon band nahi", "khoon ruk nahi raha",
+        "khoon ki ulti", "vomiting blood", "blood in vomit",
+        "ज्यादा खून", "बहुत खून", "खून बंद नहीं", "खून की उल्टी",
+    ],
+    "unconscious": [
+        "unconscious", "unconcious", "unresponsive", "fainted", "collapsed",
+        "behoshi", "behosh", "be hosh", "behos", "hosh nahi", "hosh mein nahi",
+        "बेहोशी", "बेहोश", "होश नहीं",
+    ],
+    "breathing": [
+        "not breathing", "stopped breathing", "cant breathe", "can't breathe", "cannot breathe",
+        "unable to breathe", "choking", "gasping", "blue lips",
+        "saans nahi", "saans nahi le raha", "saans nahi aa rahi", "saans ruk gayi", "dam ghut raha",
+        "सांस नहीं", "साँस नहीं", "सांस रुक गई", "दम घुट रहा",
+    ],
+    "cardiac": [
+        "chest pain", "heart attack", "cardiac arrest", "no pulse", "pulse nahi",
+        "seene mein dard", "sine me dard", "chhati mein dard", "dil ka daura",
+        "सीने में दर्द", "छाती में दर्द", "दिल का दौरा",
+    ],
+    "stroke": [
+        "stroke", "paralysis", "face drooping", "slurred speech", "lakwa", "laqwa", "lakva",
+        "लकवा",
+    ],
+    "poisoning": [
+        "poisoning", "poisoned", "swallowed poison", "pesticide", "keetnashak", "zeher", "zehar", "jahar",
+        "snake bite", "snakebite", "saanp ne kata", "sanp kat liya",
+        "ज़हर", "जहर", "सांप ने काटा",
+    ],
+    "trauma": [
+        "severe burn", "severe burns", "head injury", "road accident",
+        "jal gaya", "jal gayi", "sir mein chot", "दुर्घटना",
+    ],
+}
+
+
+# First steps for the ASHA while the doctor and the full diagnosis come in
+FIRST_ACTIONS: Dict[str, str] = {
+    "eclampsia": "Lay her on her left side, do not give anything by mouth",
+    "seizure": "Turn the patient on their side, keep them away from hard objects",
+    "bleeding": "Apply firm pressure; for bleeding after delivery, massage the uterus",
+    "unconscious": "Place in recovery position and check breathing",
+    "breathing": "Clear the airway and start rescue breaths if trained",
+    "cardiac": "Keep the patient at rest, sitting up; loosen tight clothing",
+    "stroke": "Note the time symptoms started; nothing by mouth",
+    "poisoning": "Keep the container or note the snake; do not induce vomiting",
+    "trauma": "Keep the patient still; cool burns with clean running water",
+}
+
+
+def first_actions(categories: List[str]) -> List[str]:
+    return ["Call 108 ambulance now"] + [FIRST_ACTIONS[c] for c in categories if c in FIRST_ACTIONS]
+
+
+def _entries(keywords: Dict[str, List[str]]) -> Iterable[Tuple[str, str]]:
+    for category, phrases in keywords.items():
+        for phrase in phrases:
+            yield phrase, category
+
+
+# Stems that start everyday words ("dauran" = during, "strokes of luck")
+WHOLE_WORD_KEYWORDS = ["daura", "dauraa", "stroke"]
+
+# Phrases that contain a keyword but are not an emergency. They match
+# like keywords and win as the longer hit, then are dropped.
+NOT_EMERGENCY = ["stroke of luck"]
+
+emergency_matcher = KeywordAutomaton(
+    list(_entries(EMERGENCY_KEYWORDS)) + [(phrase, None) for phrase in NOT_EMERGENCY],
+    WHOLE_WORD_KEYWORDS,
+)
+
+
+# -------------------------------------------------
+# Negation
+# -------------------------------------------------
+# "no chest pain", "denies fits", "pehle behoshi nahi thi". English (and
+# "bina") negates the next few words; Hindi "nahi" follows what it
+# negates and counts when the clause ends there or a copula follows
+# ("nahi hai / thi"), so "dard nahi ruk raha" still counts. Negation
+# never crosses a clause: punctuation, "but", "lekin" and "par" close it.
+
+_CLAUSE_RE = re.compile(r"[.,;:!?\n।|]+|\b(?:but|lekin|magar|par|however)\b", re.IGNORECASE)
+
+NEGATION_BEFORE = {normalize(w).strip() for w in ["no", "not", "never", "without", "denies", "denied", "deny", "bina"]}
+NEGATION_AFTER = {normalize(w).strip() for w in ["nahi", "nahin", "nhi", "नहीं"]}
+COPULAS = {normalize(w).strip() for w in ["hai", "hain", "tha", "thi", "the", "hua", "hui", "hota", "hoti", "है", "था", "थी"]}
+NEGATION_WINDOW = 3
+
+
+def _negated(clause: str, start: int, end: int) -> bool:
+    before = clause[:start].split()[-NEGATION_WINDOW:]
+    if any(word in NEGATION_BEFORE for word in before):
+        return True
+
+    after = clause[end:].split()[:2]
+    return bool(after) and after[0] in NEGATION_AFTER and (len(after) == 1 or after[1] in COPULAS)
+
+
+def triage(text: str) -> Dict[str, Any]:
+    """
+    Emergency keywords in the raw symptoms. Any hit makes the case
+    EMERGENCY whatever the model later says; no hit leaves risk to the
+    model. Negated mentions are listed but do not count.
+    """
+    keywords: List[str] = []
+    negated: List[str] = []
+    categories: List[str] = []
+
+    for part in _CLAUSE_RE.split(text or ""):
+        clause = normalize(part)
+        for start, end, keyword, category in emergency_matcher.spans(clause):
+            if category is None:
+                continue
+            if _negated(clause, start, end):
+                if keyword not in negated:
+                    negated.append(keyword)
+                continue
+            if keyword not in keywords:
+                keywords.append(keyword)
+            if category not in categories:
+                categories.append(category)
+
+    return {
+        "Categories": categories,
+        "Keywords": keywords,
+        "Negated": negated,
+    }
@@ -0,0 +1,162 @@
+# backend/services/fake_bedrock.py
+
+import io
+import json
+import threading
+import time
+from collections import deque
+from typing import Optional, Dict, Any, List
+
+from botocore.exceptions import ClientError
+
+
+# -------------------------------------------------
+# Canned Model Output
+# -------------------------------------------------
+
+DEFAULT_DIAGNOSIS = {
+    "symptoms_english": "fever and headache for three days",
+    "primary_diagnosis": "Dengue fever",
+    "differential_diagnoses": ["Malaria", "Typhoid"],
+    "confidence_percent": 78,
+    "risk_level": "URGENT",
+    "risk_reason": "High fever with headache during dengue season",
+    "immediate_actions": ["Check platelet count", "Oral rehydration"],
+    "icmr_protocol": "ICMR dengue case management guideline",
+    "icd10_code": "A90",
+    "icd10_description": "Dengue fever [classical dengue]",
+    "auto_tag_conditions": ["dengue"],
+}
+
+# Plain-text answer to the SOAP-note prompt (soap_service)
+DEFAULT_SOAP_NOTE = """SUBJECTIVE:
+30-year-old woman with fever and headache for three days, body ache and
+loss of appetite. No bleeding, no vomiting. No known drug allergies.
+
+OBJECTIVE:
+Febrile on ASHA visit. AI triage: Dengue fever (78% confidence), risk URGENT.
+Vitals and platelet count not yet recorded.
+
+ASSESSMENT:
+Probable dengue fever without warning signs. Differentials: malaria, typhoid.
+
+PLAN:
+1. Platelet count and NS1 antigen today.
+2. Oral rehydration, paracetamol for fever; avoid NSAIDs.
+3. Review in 24 hours or earlier if warning signs appear.
+Follow ICMR dengue case management guideline.
+END OF NOTE"""
+
+SOAP_PROMPT_MARKER = "SOAP note"
+
+# What Llama tends to append after the JSON despite the prompt
+DEFAULT_RAMBLE = (
+    "\n\nNote: This diagnosis is generated by an AI model and should be "
+    "confirmed by a qualified medical practitioner. Please refer to the "
+    "nearest PHC if symptoms worsen. "
+) * 6
+
+
+def _tokenize(text: str, size: int = 4) -> List[str]:
+    return [text[i:i + size] for i in range(0, len(text), size)]
+
+
+# -------------------------------------------------
+# Fake bedrock-runtime Client
+# -------------------------------------------------
+
+class _FakeEventStream:
+
+    def __init__(self, client: "FakeBedrockClient", tokens: List[str]):
+        self.client = client
+        self.tokens = tokens
+        self.closed = False
+
+    def __iter__(self):
+        time.sleep(self.client.first_token_ms / 1000)
+
+        for token in self.tokens:
+            if self.closed:
+                return
+            time.sleep(self.client.per_token_ms / 1000)
+            self.client.tokens_generated += 1
+            yield {"chunk": {"bytes": json.dumps({"generation": token}).encode()}}
+
+    def close(self):
+        self.closed = True
+
+
+class FakeBedrockClient:
+    """
+    Offline stand-in for boto3's bedrock-runtime client. Simulates
+    time-to-first-token and per-token generation latency for both
+    invoke_model and invoke_model_with_response_stream.
+
+    With max_tps set, calls beyond that many in any one-second window
+    fail with ThrottlingException, as Bedrock does past its quota.
+    """
+
+    def __init__(
+        self,
+        output: Optional[Dict[str, Any]] = None,
+        soap_note: str = DEFAULT_SOAP_NOTE,
+        ramble: str = DEFAULT_RAMBLE,
+        first_token_ms: float = 200.0,
+        per_token_ms: float = 5.0,
+        max_tps: float = 0.0,
+    ):
+        self.output = output or DEFAULT_DIAGNOSIS
+        self.soap_note = soap_note
+        self.ramble = ramble
+        self.first_token_ms = first_token_ms
+        self.per_token_ms = per_token_ms
+        self.max_tps = max_tps
+        self.calls = 0
+        self.throttled = 0
+        self.tokens_generated = 0
+
+        self._recent = deque()
+        self._lock = threading.Lock()
+
+    def _admit(self, operation: str):
+        if self.max_tps <= 0:
+            return
+
+        with self._lock:
+            now = time.monotonic()
+            while self._recent and self._recent[0] <= now - 1.0:
+                self._recent.popleft()
+
+            if len(self._recent) >= self.max_tps:
+                self.throttled += 1
+                raise ClientError(
+                    {"Error": {"Code": "ThrottlingException", "Message": "Too many requests, please wait before trying again."}},
+                    operation,
+                )
+            self._recent.append(now)
+
+    def _tokens(self, body: str) -> List[str]:
+        if SOAP_PROMPT_MARKER in json.loads(body).get("prompt", ""):
+            return _tokenize(self.soap_note + self.ramble)
+        return _tokenize(json.dumps(self.output, ensure_ascii=False) + self.ramble)
+
+    def invoke_model(self, modelId: str, body: str, **kwargs) -> Dict[str, Any]:
+        self._admit("InvokeModel")
+        tokens = self._tokens(body)
+        self.calls += 1
+        self.tokens_generated += len(tokens)
+
+        time.sleep((self.first_token_ms + self.per_token_ms * len(tokens)) / 1000)
+
+        payload = {
+            "generation": "".join(tokens),
+            "prompt_token_count": len(_tokenize(json.loads(body).get("prompt", ""))),
+            "generation_token_count": len(tokens),
+            "stop_reason": "stop",
+        }
+        return {"body": io.BytesIO(json.dumps(payload).encode())}
+
+    def invoke_model_with_response_stream(self, modelId: str, body: str, **kwargs) -> Dict[str, Any]:
+        self._admit("InvokeModelWithResponseStream")
+        self.calls += 1
+        return {"body": _FakeEventStream(self, self._tokens(body))}
@@ -0,0 +1,292 @@
+# backend/services/forecast_service.py
+
+import threading
+from itertools import islice
+from datetime import date, datetime, timedelta
+from typing import Optional, Dict, Any, List, Tuple
+
+import numpy as np
+
+from backend.config import settings
+from backend.services.analytics_service import SEP, dx_rollup_id, rollups
+
+
+SeriesKey = Tuple[str, str]   # (Block, ICD-10 category)
+
+SEASON_DAYS = 7
+HORIZON_DAYS = 7
+
+# Days per chunk when scattering history into the dense (day, series)
+# buffer, so a long history never needs one huge matrix
+CHUNK_DAYS = 64
+
+
+# -------------------------------------------------
+# Vectorized Holt-Winters
+# -------------------------------------------------
+
+class SeasonalForecaster:
+    """
+    Additive Holt-Winters (damped trend, weekly season) fitted to every
+    series at once. State lives in arrays over (alpha, series), so one
+    day of history costs a handful of numpy operations no matter how
+    many series there are. Each series is forecast with whichever alpha
+    has the lowest (decayed) one-step-ahead squared error so far.
+
+    update() only consumes days after last_day, so refitting when a new
+    day arrives costs one step rather than a pass over the history.
+    """
+
+    def __init__(
+        self,
+        alphas=(0.05, 0.2, 0.5),
+        beta: float = 0.02,
+        gamma: float = 0.1,
+        phi: float = 0.9,
+        sse_decay: float = 0.99,
+    ):
+        self.alphas = np.asarray(alphas, dtype=np.float32)[:, None]
+        self.beta = beta
+        self.gamma = gamma
+        self.phi = phi
+        self.sse_decay = sse_decay
+
+        self.keys: List[SeriesKey] = []
+        self.index: Dict[SeriesKey, int] = {}
+        self.last_day: Optional[int] = None
+
+        k = len(alphas)
+        self.level = np.zeros((k, 0), dtype=np.float32)
+        self.trend = np.zeros((k, 0), dtype=np.float32)
+        self.season = np.zeros((SEASON_DAYS, k, 0), dtype=np.float32)
+        self.sse = np.zeros((k, 0), dtype=np.float32)
+
+    @property
+    def size(self) -> int:
+        return len(self.keys)
+
+    def nbytes(self) -> int:
+        return self.level.nbytes + self.trend.nbytes + self.season.nbytes + self.sse.nbytes
+
+    def _rows(self, keys: List[SeriesKey]) -> np.ndarray:
+        """Row of each key, adding unseen keys as new series."""
+        index = self.index
+        known = len(index)
+        rows = np.fromiter(
+            (index.setdefault(key, len(index)) for key in keys),
+            dtype=np.intp,
+            count=len(keys),
+        )
+
+        added = len(index) - known
+        if added:
+            self.keys.extend(islice(index, known, None))
+            self._grow(added)
+        return rows
+
+    def _grow(self, added: int):
+        # New series start flat at zero and learn from their first day
+        def pad(a):
+            return np.concatenate([a, np.zeros(a.shape[:-1] + (added,), dtype=a.dtype)], axis=-1)
+
+        self.level = pad(self.level)
+        self.trend = pad(self.trend)
+        self.season = pad(self.season)
+        self.sse = pad(self.sse)
+
+    def _step(self, day: int, y: np.ndarray, scratch: np.ndarray):
+        """
+        One day of the recursion, in place (temporaries dominate at this
+        size). scratch is a spare array shaped like level:
+
+            fitted  = level + phi * trend
+            err     = y - fitted - season
+            level'  = alpha * (y - season) + (1 - alpha) * fitted
+            trend'  = beta * (level' - level) + (1 - beta) * phi * trend
+            season' = gamma * (y - level') + (1 - gamma) * season
+        """
+        season = self.season[day % SEASON_DAYS]
+        trend, level, new_level = self.trend, self.level, scratch
+
+        trend *= self.phi                       # trend := phi * trend
+        np.subtract(y, season, out=new_level)   # y - season
+
+        # err = (y - season) - level - phi*trend
+        err = new_level - level
+        err -= trend
+        self.sse *= self.sse_decay
+        err *= err
+        self.sse += err
+
+        level += trend                          # level := fitted
+        new_level *= self.alphas
+        new_level += level * (1 - self.alphas)
+
+        # level := level' - fitted + phi*trend = level' - old level
+        level -= trend
+        np.subtract(new_level, level, out=level)
+        level *= self.beta
+        trend *= 1 - self.beta
+        trend += level
+
+        np.subtract(y, new_level, out=err)
+        err *= self.gamma
+        season *= 1 - self.gamma
+        season += err
+
+        # Swap buffers: scratch becomes the next step's spare
+        self.level, scratch = new_level, level
+        return scratch
+
+    def update(self, first_day: int, keys: List[SeriesKey], matrix: np.ndarray):
+        """
+        matrix[i, j] is the count for keys[i] on day first_day + j.
+        Series not in keys count as zero on those days.
+        """
+        if self.last_day is not None and first_day != self.last_day + 1:
+            raise ValueError(f"Expected history from day {self.last_day + 1}, got {first_day}")
+
+        rows = self._rows(keys)
+        days = matrix.shape[1]
+        scratch = np.empty_like(self.level)
+
+        for start in range(0, days, CHUNK_DAYS):
+            chunk = matrix[:, start:start + CHUNK_DAYS]
+            dense = np.zeros((chunk.shape[1], self.size), dtype=np.float32)
+            dense[:, rows] = chunk.T
+
+            for j in range(chunk.shape[1]):
+                scratch = self._step(first_day + start + j, dense[j], scratch)
+
+        if days:
+            self.last_day = first_day + days - 1
+
+    def forecast(self, horizon: int = HORIZON_DAYS) -> np.ndarray:
+        """Expected counts, shape (series, horizon), for the days after last_day."""
+        best = np.argmin(self.sse, axis=0)
+        cols = np.arange(self.size)
+        level = self.level[best, cols]
+        trend = self.trend[best, cols]
+
+        out = np.empty((self.size, horizon))
+        damping = 0.0
+        for h in range(1, horizon + 1):
+            damping += self.phi ** h
+            season = self.season[(self.last_day + h) % SEASON_DAYS][best, cols]
+            out[:, h - 1] = level + damping * trend + season
+
+        return np.clip(out, 0, None)
+
+
+# -------------------------------------------------
+# History from Rollups
+# -------------------------------------------------
+
+def history_matrix(district: str, start: date, end: date) -> Tuple[List[SeriesKey], np.ndarray]:
+    """Daily case counts per (block, ICD-10 category), shape (series, days)."""
+    days = [start + timedelta(days=i) for i in range((end - start).days + 1)]
+    buckets = rollups.read([dx_rollup_id(district, d) for d in days])
+
+    index: Dict[SeriesKey, int] = {}
+    rows, cols, counts = [], [], []
+    for j, day in enumerate(days):
+        for attribute, n in buckets[dx_rollup_id(district, day)].items():
+            block, category = attribute.split(SEP, 1)
+            rows.append(index.setdefault((block, category), len(index)))
+            cols.append(j)
+            counts.append(n)
+
+    matrix = np.zeros((len(index), len(days)), dtype=np.int32)
+    matrix[rows, cols] = counts
+    return list(index), matrix
+
+
+# -------------------------------------------------
+# Per-District Model Cache
+# -------------------------------------------------
+
+class DistrictForecasts:
+    """
+    One fitted model per district, extended with newly completed days
+    (up to yesterday, UTC) the next time that district is asked for.
+    """
+
+    def __init__(self, history_days: int):
+        self.history_days = history_days
+        self._models: Dict[str, SeasonalForecaster] = {}
+        self._locks: Dict[str, threading.Lock] = {}
+        self._lock = threading.Lock()
+
+    def _refresh(self, district: str) -> SeasonalForecaster:
+        """Caller holds the district lock."""
+        yesterday = datetime.utcnow().date() - timedelta(days=1)
+        model = self._models.get(district)
+
+        if model is None:
+            model = SeasonalForecaster()
+            start = yesterday - timedelta(days=self.history_days - 1)
+        else:
+            start = date.fromordinal(model.last_day + 1)
+
+        if start <= yesterday:
+            keys, matrix = history_matrix(district, start, yesterday)
+            model.update(start.toordinal(), keys, matrix)
+
+        self._models[district] = model
+        return model
+
+    def next_week(self, district: str, block: Optional[str] = None, limit: int = 50) -> Dict[str, Any]:
+        with self._lock:
+            lock = self._locks.setdefault(district, threading.Lock())
+
+        with lock:
+            model = self._refresh(district)
+            forecast = model.forecast(HORIZON_DAYS)
+            keys = list(model.keys)
+            last_day = model.last_day
+
+        if block is not None:
+            selected = [i for i, (b, _) in enumerate(keys) if b == block]
+            keys = [keys[i] for i in selected]
+            forecast = forecast[selected]
+
+        totals = forecast.sum(axis=1)
+
+        # Block totals across all diagnoses, for doctor pre-positioning
+        block_names = sorted({b for b, _ in keys})
+        block_index = {name: i for i, name in enumerate(block_names)}
+        block_ids = np.fromiter((block_index[b] for b, _ in keys), dtype=np.intp, count=len(keys))
+        block_daily = np.zeros((len(block_names), HORIZON_DAYS))
+        np.add.at(block_daily, block_ids, forecast)
+
+        first = date.fromordinal(last_day + 1)
+        top = np.argsort(-totals)[:limit]
+
+        return {
+            "District": district,
+            "FittedThrough": date.fromordinal(last_day).isoformat(),
+            "Days": [(first + timedelta(days=h)).isoformat() for h in range(HORIZON_DAYS)],
+            "Blocks": sorted(
+                (
+                    {
+                        "Block": name,
+                        "ExpectedCases": round(float(block_daily[i].sum()), 1),
+                        "Daily": [round(float(v), 2) for v in block_daily[i]],
+                    }
+                    for i, name in enumerate(block_names)
+                ),
+                key=lambda b: -b["ExpectedCases"],
+            ),
+            "Series": [
+                {
+                    "Block": keys[i][0],
+                    "ICD10Category": keys[i][1],
+                    "ExpectedCases": round(float(totals[i]), 1),
+                    "Daily": [round(float(v), 2) for v in forecast[i]],
+                }
+                for i in top
+            ],
+        }
+
+
+district_forecasts = DistrictForecasts(history_days=settings.FORECAST_HISTORY_DAYS)
@@ -0,0 +1,74 @@
+# backend/services/live_events.py
+
+from typing import Dict, Any, List
+
+from backend.core.websocket import hub, case_topic, doctor_topic, district_topic
+from backend.services.doctor_match_service import doctor_index
+from backend.services.notification_service import notify_case_assigned, notify_outbreak
+
+
+# -------------------------------------------------
+# Case Events -> WebSocket Topics
+# -------------------------------------------------
+# Payloads carry just enough for a list row; clients fetch the full
+# case over REST when they open it.
+
+def _case_summary(case: Dict[str, Any], patient: Dict[str, Any]) -> Dict[str, Any]:
+    return {
+        "CaseID": case["CaseID"],
+        "PatientID": case["PatientID"],
+        "Status": case.get("Status"),
+        "RiskLevel": case.get("RiskLevel"),
+        "PrimaryDiagnosis": case.get("PrimaryDiagnosis"),
+        "ICD10Code": case.get("ICD10Code"),
+        "Village": patient.get("Village"),
+        "Block": patient.get("Block"),
+        "UpdatedAt": case.get("UpdatedAt"),
+    }
+
+
+async def case_created(case: Dict[str, Any], patient: Dict[str, Any], alerts: List[Dict[str, Any]] = ()):
+    district = district_topic(patient.get("District") or "UNKNOWN")
+
+    await hub.publish(district, {"type": "case_created", "case": _case_summary(case, patient)})
+    await _outbreak_alerts(district, alerts)
+
+
+async def _outbreak_alerts(district: str, alerts: List[Dict[str, Any]]):
+    for alert in alerts:
+        await hub.publish(district, {"type": "outbreak_alert", "alert": alert})
+        # WhatsApp to the district's available doctors (queued, sent in the background)
+        notify_outbreak(alert, doctor_index.available())
+
+
+async def outbreaks_detected(alerts: List[Dict[str, Any]]):
+    """Alerts raised by the periodic sync of all workers' counts, not by a case write."""
+    for alert in alerts:
+        await _outbreak_alerts(district_topic(alert["District"]), [alert])
+
+
+async def case_assigned(case: Dict[str, Any], patient: Dict[str, Any], doctor: Dict[str, Any]):
+    summary = {**_case_summary(case, patient), "DoctorID": doctor["DoctorID"], "DoctorName": doctor.get("Name")}
+    event = {"type": "case_status", "case": summary}
+
+    # Only the latest status matters to a client that is behind
+    await hub.publish(case_topic(case["CaseID"]), event, coalesce_key=f"status:{case['CaseID']}")
+    await hub.publish(doctor_topic(doctor["DoctorID"]), {"type": "case_assigned", "case": summary})
+    await hub.publish(
+        district_topic(patient.get("District") or "UNKNOWN"),
+        event,
+        coalesce_key=f"status:{case['CaseID']}",
+    )
+
+    # Case report to the doctor's WhatsApp (queued, sent in the background)
+    notify_case_assigned(case, patient, doctor)
+
+
+async def case_diagnosed(case: Dict[str, Any], patient: Dict[str, Any], alerts: List[Dict[str, Any]] = ()):
+    """Model diagnosis landed on a case that was fast-tracked as an emergency."""
+    district = district_topic(patient.get("District") or "UNKNOWN")
+    event = {"type": "case_diagnosed", "case": _case_summary(case, patient)}
+
+    await hub.publish(case_topic(case["CaseID"]), event)
+    await hub.publish(district, event)
+    await _outbreak_alerts(district, alerts)
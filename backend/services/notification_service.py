@@ -1,6 +1,126 @@
 # backend/services/notification_service.py
 
-from typing import Dict
+import asyncio
+import hashlib
+import heapq
+import itertools
+import random
+import string
+import time
+import uuid
+from collections import deque
+from datetime import datetime
+from typing import Optional, Dict, Any, List, Iterable
+
+from backend.config import settings
+from backend.core.metrics import logger, record_failure
+from backend.core.model_scheduler import TokenBucket
+
+
+# -------------------------------------------------
+# Message Templates (parsed once at import)
+# -------------------------------------------------
+
+class MessageTemplate:
+    """
+    A str.format-style template split into literal/field pairs up
+    front, so rendering is one pass of lookups and a join. Fields are
+    plain names (no attribute or index access).
+    """
+
+    def __init__(self, name: str, source: str):
+        self.name = name
+        self.parts = []
+        for literal, field, spec, conversion in string.Formatter().parse(source):
+            if field is not None and (not field.isidentifier() or conversion):
+                raise ValueError(f"Template {name}: unsupported field {{{field}}}")
+            self.parts.append((literal, field, spec))
+        self.fields = {field for _, field, _ in self.parts if field}
+
+    def render(self, values: Dict[str, Any]) -> str:
+        out = []
+        for literal, field, spec in self.parts:
+            out.append(literal)
+            if field is not None:
+                value = values[field]
+                out.append(format(value, spec) if spec else str(value))
+        return "".join(out)
+
+
+TEMPLATES: Dict[str, MessageTemplate] = {}
+
+
+def register_template(name: str, source: str) -> MessageTemplate:
+    template = TEMPLATES[name] = MessageTemplate(name, source)
+    return template
+
+
+CASE_ASSIGNED = register_template("case_assigned", """🏥 *MediConnect AI — Case Report*
+Case ID: {case_id}
+
+👤 *Patient:* {patient_name}, {patient_age}yr ({patient_gender})
+📋 *Symptoms:* {symptoms}
+
+🔬 *AI Diagnosis:* {diagnosis}
+📊 *Confidence:* {confidence}%
+🏷️ *ICD-10:* {icd10_code} — {icd10_description}
+
+🚨 *Risk Level:* {risk_level}
+💡 _{risk_reason}_
+
+📌 *Immediate Actions:*
+{actions}
+📖 *Protocol:* {protocol}
+
+👨‍⚕️ *Assigned Doctor:* {doctor_name}
+🏥 Specialization: {specialization}
+📍 Distance: {distance_km} km
+
+_Powered by MediConnect AI | AWS Bedrock_""")
+
+OUTBREAK_ALERT = register_template("outbreak_alert", """⚠️ *MediConnect AI — Outbreak Alert*
+District: {district}
+Block: {block} | Village: {village}
+
+🦠 *ICD-10:* {icd10_code}
+📈 *Cases today:* {count} (expected {expected}, z = {z_score})
+🗓️ Date: {date}
+
+Please watch for similar presentations and report new cases promptly.""")
+
+
+def case_assigned_values(case: Dict, patient: Dict, doctor: Dict) -> Dict[str, Any]:
+    return {
+        "case_id": case["CaseID"],
+        "patient_name": patient["Name"],
+        "patient_age": patient["Age"],
+        "patient_gender": patient["Gender"],
+        "symptoms": case["SymptomsRaw"],
+        "diagnosis": case["PrimaryDiagnosis"],
+        "confidence": case["ConfidencePercent"],
+        "icd10_code": case["ICD10Code"],
+        "icd10_description": case["ICD10Description"],
+        "risk_level": case["RiskLevel"],
+        "risk_reason": case["RiskReason"],
+        "actions": "".join(f"  {i}. {action}\n" for i, action in enumerate(case["ImmediateActions"], 1)),
+        "protocol": case["ICMRProtocol"],
+        "doctor_name": doctor["Name"],
+        "specialization": doctor["Specialization"],
+        "distance_km": round(doctor.get("DistanceKm", 0), 2),
+    }
+
+
+def outbreak_alert_values(alert: Dict[str, Any]) -> Dict[str, Any]:
+    return {
+        "district": alert["District"],
+        "block": alert["Block"],
+        "village": alert["Village"],
+        "icd10_code": alert["ICD10Code"],
+        "count": alert["Count"],
+        "expected": alert["Expected"],
+        "z_score": alert["ZScore"],
+        "date": alert["Date"],
+    }
 
 
 def format_whatsapp_case_message(
@@ -9,34 +129,359 @@ def format_whatsapp_case_message(
     doctor: Dict
 ) -> str:
 
-    message = f"""
-🏥 *MediConnect AI — Case Report*
-Case ID: {case['CaseID']}
+    return CASE_ASSIGNED.render(case_assigned_values(case, patient, doctor))
 
-👤 *Patient:* {patient['Name']}, {patient['Age']}yr ({patient['Gender']})
-📋 *Symptoms:* {case['SymptomsRaw']}
 
-🔬 *AI Diagnosis:* {case['PrimaryDiagnosis']}
-📊 *Confidence:* {case['ConfidencePercent']}%
-🏷️ *ICD-10:* {case['ICD10Code']} — {case['ICD10Description']}
+# -------------------------------------------------
+# Sinks
+# -------------------------------------------------
+# send_batch(messages) -> one result per message: None when accepted,
+# otherwise an error code. Codes in RETRYABLE_ERRORS are retried with
+# backoff; anything else is dead-lettered straight away. A WhatsApp
+# Business API client implements the same method.
 
-🚨 *Risk Level:* {case['RiskLevel']}
-💡 _{case['RiskReason']}_
+RETRYABLE_ERRORS = {"rate_limited", "unavailable", "timeout"}
 
-📌 *Immediate Actions:*
-"""
 
-    for i, action in enumerate(case["ImmediateActions"], 1):
-        message += f"  {i}. {action}\n"
+class MockWhatsAppSink:
+    """
+    Stands in for the WhatsApp API (MOCK_WHATSAPP): each batch takes
+    latency_ms plus per_message_ms per message, and failure_rate of
+    messages come back "unavailable". Deliveries are kept in memory.
+    """
+
+    def __init__(
+        self,
+        latency_ms: float = 50.0,
+        per_message_ms: float = 0.0,
+        failure_rate: float = 0.0,
+        keep: int = 1000,
+        seed: Optional[int] = None,
+    ):
+        self.latency_ms = latency_ms
+        self.per_message_ms = per_message_ms
+        self.failure_rate = failure_rate
+        self.delivered: deque = deque(maxlen=keep)
+        self.batches = 0
+        self.accepted = 0
+        self._random = random.Random(seed)
+
+    async def send_batch(self, messages: List[Dict[str, Any]]) -> List[Optional[str]]:
+        await asyncio.sleep((self.latency_ms + self.per_message_ms * len(messages)) / 1000)
+        self.batches += 1
+
+        results = []
+        for message in messages:
+            if self.failure_rate and self._random.random() < self.failure_rate:
+                results.append("unavailable")
+            else:
+                results.append(None)
+                self.accepted += 1
+                self.delivered.append(message)
+        return results
+
+
+# -------------------------------------------------
+# Outbound Queue
+# -------------------------------------------------
+
+class NotificationQueue:
+    """
+    Outbound WhatsApp messages, sent by background workers so callers
+    never wait on the provider. enqueue() renders and queues; workers
+    take whatever is due (up to batch_size) and send it as one batch,
+    so batches grow on their own when the provider is slower than the
+    arrivals and stay at one message when it isn't.
+
+    Two token buckets gate each message: one for the provider account
+    (messages per second) and one per recipient (messages per minute,
+    WhatsApp's per-user pacing). A message over either limit is simply
+    scheduled for when its token is due. Failed sends are retried with
+    jittered exponential backoff; after max_attempts, or on a
+    non-retryable error, the message is dead-lettered.
+
+    In-memory and per worker process: messages still queued at
+    shutdown are lost. Call enqueue() from the event loop.
+    """
+
+    def __init__(
+        self,
+        sink=None,
+        workers: int = 4,
+        batch_size: int = 50,
+        provider_rate: float = 80.0,
+        provider_burst: float = 80.0,
+        recipient_per_minute: float = 10.0,
+        recipient_burst: float = 5.0,
+        max_attempts: int = 5,
+        retry_base_seconds: float = 1.0,
+        max_queue: int = 100_000,
+        dead_letter_keep: int = 1000,
+    ):
+        self.sink = sink
+        self.workers = workers
+        self.batch_size = batch_size
+        self.provider = TokenBucket(provider_rate, provider_burst)
+        self.recipient_rate = recipient_per_minute / 60
+        self.recipient_burst = recipient_burst
+        self.max_attempts = max_attempts
+        self.retry_base_seconds = retry_base_seconds
+        self.max_queue = max_queue
+
+        self._queue: List[tuple] = []   # heap of (due, seq, message)
+        self._seq = itertools.count()
+        self._recipients: Dict[str, TokenBucket] = {}
+        self._next_prune = 0.0
+        self._wakeup = asyncio.Event()
+        self._tasks: List[asyncio.Task] = []
+
+        self.dead_letters: deque = deque(maxlen=dead_letter_keep)   # see _dead_letter: no text or number
+        self.delays: deque = deque(maxlen=10_000)   # enqueue -> accepted, seconds
+        self.enqueued = 0
+        self.sent = 0
+        self.retried = 0
+        self.dead_lettered = 0
+        self.dropped = 0
+        self.batches = 0
+        self.in_flight = 0
+
+    # ---------- lifecycle ----------
+
+    async def start(self):
+        if self.sink is None:
+            # Messages are still accepted, and dead-lettered as "no_sink"
+            logger.warning("No WhatsApp sink configured (MOCK_WHATSAPP is off); notifications are dead-lettered")
+            return
+        self._wakeup = asyncio.Event()   # bound to this loop
+        self._tasks = [asyncio.create_task(self._worker()) for _ in range(self.workers)]
+
+    async def stop(self):
+        for task in self._tasks:
+            task.cancel()
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+        self._tasks = []
+
+    async def drain(self, timeout: float):
+        """Wait until nothing is queued or in flight (benchmarks, shutdown)."""
+        deadline = time.monotonic() + timeout
+        while (self._queue or self.in_flight) and time.monotonic() < deadline:
+            await asyncio.sleep(0.01)
+
+    # ---------- producers ----------
+
+    def enqueue(self, recipient: str, template: str, values: Dict[str, Any]) -> Optional[str]:
+        """Queue one message; returns its MessageID, or None if not queued."""
+        if self.sink is not None and len(self._queue) >= self.max_queue:
+            self.dropped += 1
+            return None
+
+        message = {
+            "MessageID": uuid.uuid4().hex,
+            "Recipient": recipient,
+            "Template": template,
+            "Text": TEMPLATES[template].render(values),
+            "Attempts": 0,
+            "CreatedAt": datetime.utcnow().isoformat(),
+            "EnqueuedAt": time.monotonic(),
+        }
+        if self.sink is None:
+            # Nothing can send it: a dead letter, not a silent drop
+            self._dead_letter(message, "no_sink")
+            return None
+
+        self._push(message, message["EnqueuedAt"])
+        self.enqueued += 1
+        return message["MessageID"]
+
+    def broadcast(self, recipients: Iterable[str], template: str, values: Dict[str, Any]) -> int:
+        """Same message to many recipients (district alerts); returns how many were queued."""
+        return sum(1 for r in recipients if self.enqueue(r, template, values))
+
+    def _push(self, message: Dict[str, Any], due: float):
+        heapq.heappush(self._queue, (due, next(self._seq), message))
+        self._wakeup.set()
+
+    # ---------- workers ----------
+
+    def _recipient_bucket(self, recipient: str) -> TokenBucket:
+        bucket = self._recipients.get(recipient)
+        if bucket is None:
+            bucket = self._recipients[recipient] = TokenBucket(self.recipient_rate, self.recipient_burst)
+        return bucket
+
+    def _prune_recipients(self, now: float):
+        """Drop buckets that have refilled completely; they'd be recreated full."""
+        if now < self._next_prune or self.recipient_rate <= 0:
+            return
+        self._next_prune = now + 60
+        full_after = self.recipient_burst / self.recipient_rate
+        for recipient in [r for r, b in self._recipients.items() if now - b.updated > full_after]:
+            del self._recipients[recipient]
+
+    def _take_batch(self) -> tuple:
+        """(due messages that got both tokens, seconds until the next is due or None)."""
+        now = time.monotonic()
+        self._prune_recipients(now)
+
+        batch = []
+        while self._queue and len(batch) < self.batch_size:
+            due, _, message = self._queue[0]
+            if due > now:
+                return batch, due - now
+            heapq.heappop(self._queue)
+
+            recipient = self._recipient_bucket(message["Recipient"])
+            wait = recipient.take()
+            if wait > 0:
+                self._push(message, now + wait)
+                continue
+
+            wait = self.provider.take()
+            if wait > 0:
+                recipient.tokens += 1   # not sent after all
+                self._push(message, now + wait)
+                return batch, wait
+
+            batch.append(message)
+
+        return batch, None
+
+    async def _worker(self):
+        while True:
+            batch, wait = self._take_batch()
+
+            if not batch:
+                self._wakeup.clear()
+                try:
+                    await asyncio.wait_for(self._wakeup.wait(), timeout=wait)
+                except asyncio.TimeoutError:
+                    pass
+                continue
+
+            self.in_flight += len(batch)
+            try:
+                results = await self.sink.send_batch(batch)
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                record_failure("whatsapp_batch", e)
+                results = ["unavailable"] * len(batch)
+            finally:
+                self.in_flight -= len(batch)
+
+            self.batches += 1
+            self._settle(batch, results)
+
+    def _settle(self, batch: List[Dict[str, Any]], results: List[Optional[str]]):
+        now = time.monotonic()
+
+        for message, error in zip(batch, results):
+            message["Attempts"] += 1
+
+            if error is None:
+                self.sent += 1
+                self.delays.append(now - message["EnqueuedAt"])
+                continue
+
+            if error == "rate_limited":
+                self.provider.drain()
+
+            if error not in RETRYABLE_ERRORS or message["Attempts"] >= self.max_attempts:
+                self._dead_letter(message, error)
+                continue
+
+            self.retried += 1
+            backoff = self.retry_base_seconds * 2 ** (message["Attempts"] - 1) * random.uniform(0.5, 1.5)
+            self._push(message, now + backoff)
+
+    def _dead_letter(self, message: Dict[str, Any], error: str):
+        # Message text carries patient details; keep only what identifies
+        # the message and the failure
+        self.dead_lettered += 1
+        self.dead_letters.append({
+            "MessageID": message["MessageID"],
+            "Template": message["Template"],
+            "RecipientHash": hashlib.sha256(message["Recipient"].encode("utf-8")).hexdigest()[:16],
+            "Attempts": message["Attempts"],
+            "Error": error,
+            "CreatedAt": message["CreatedAt"],
+            "DeadLetteredAt": datetime.utcnow().isoformat(),
+        })
+
+    # ---------- inspection ----------
+
+    def stats(self) -> Dict[str, Any]:
+        delays = sorted(self.delays)
+
+        def pct(p: float) -> Optional[float]:
+            if not delays:
+                return None
+            return round(delays[min(len(delays) - 1, int(p * len(delays)))] * 1000, 1)
+
+        return {
+            "queued": len(self._queue),
+            "in_flight": self.in_flight,
+            "enqueued": self.enqueued,
+            "sent": self.sent,
+            "retried": self.retried,
+            "dead_lettered": self.dead_lettered,
+            "dropped": self.dropped,
+            "batches": self.batches,
+            "avg_batch_size": round(self.sent / self.batches, 2) if self.batches else 0,
+            "delay_ms_p50": pct(0.50),
+            "delay_ms_p99": pct(0.99),
+            "recipients_tracked": len(self._recipients),
+        }
+
+
+def _default_sink():
+    if settings.MOCK_WHATSAPP:
+        return MockWhatsAppSink(latency_ms=settings.MOCK_WHATSAPP_LATENCY_MS)
+    return None
+
+
+notification_queue = NotificationQueue(
+    sink=_default_sink(),
+    workers=settings.NOTIFY_WORKERS,
+    batch_size=settings.NOTIFY_BATCH_SIZE,
+    provider_rate=settings.NOTIFY_PROVIDER_RATE,
+    provider_burst=settings.NOTIFY_PROVIDER_BURST,
+    recipient_per_minute=settings.NOTIFY_RECIPIENT_PER_MINUTE,
+    recipient_burst=settings.NOTIFY_RECIPIENT_BURST,
+    max_attempts=settings.NOTIFY_MAX_ATTEMPTS,
+    retry_base_seconds=settings.NOTIFY_RETRY_BASE_SECONDS,
+    max_queue=settings.NOTIFY_MAX_QUEUE,
+)
+
+
+def set_notification_sink(sink):
+    """Swap the sink (a WhatsApp Business API client, or a mock in benchmarks)."""
+    notification_queue.sink = sink
+
+
+# -------------------------------------------------
+# Events -> Messages
+# -------------------------------------------------
+# Demo doctor records carry no Phone; they are addressed by DoctorID,
+# which the mock sink accepts as is.
+
+def _doctor_recipient(doctor: Dict[str, Any]) -> str:
+    return doctor.get("Phone") or doctor["DoctorID"]
 
-    message += f"""
-📖 *Protocol:* {case['ICMRProtocol']}
 
-👨‍⚕️ *Assigned Doctor:* {doctor['Name']}
-🏥 Specialization: {doctor['Specialization']}
-📍 Distance: {round(doctor.get('DistanceKm', 0), 2)} km
+def notify_case_assigned(case: Dict, patient: Dict, doctor: Dict) -> Optional[str]:
+    return notification_queue.enqueue(
+        _doctor_recipient(doctor),
+        CASE_ASSIGNED.name,
+        case_assigned_values(case, patient, doctor),
+    )
 
-_Powered by MediConnect AI | AWS Bedrock_
-"""
 
-    return message.strip()
\ No newline at end of file
+def notify_outbreak(alert: Dict[str, Any], doctors: Iterable[Dict[str, Any]]) -> int:
+    """Alert every given doctor in the alert's district (or with no district on record)."""
+    recipients = {
+        _doctor_recipient(d)
+        for d in doctors
+        if d.get("District", alert["District"]) == alert["District"]
+    }
+    return notification_queue.broadcast(sorted(recipients), OUTBREAK_ALERT.name, outbreak_alert_values(alert))
@@ -0,0 +1,465 @@
+# backend/services/outbreak_service.py
+
+import asyncio
+import json
+import threading
+from array import array
+from collections import Counter, deque
+from datetime import date, datetime, timedelta
+from math import sqrt
+from typing import Optional, Dict, Any, List, Tuple
+
+from botocore.exceptions import ClientError
+
+from backend.config import settings
+from backend.core.concurrency import run_db
+from backend.core.database import analytics_table, batch_get_items
+from backend.core.metrics import record_failure
+from backend.services.analytics_service import SEP, dx_counts, icd10_category, known_districts
+
+
+# -------------------------------------------------
+# Series Keys
+# -------------------------------------------------
+# Every case is counted at village level and again at block level
+# (Village = "*"), so a cluster spread thinly over neighbouring
+# villages still shows up. Block-level keys use the three-character
+# ICD-10 category, the same keys as the DX# rollups they sync with.
+
+ANY_VILLAGE = "*"
+
+SeriesKey = Tuple[str, str, str, str]   # (District, Block, Village, ICD10Code)
+
+# Variance floor so a key with a near-zero baseline does not turn one
+# extra case into a huge z-score
+MIN_VARIANCE = 1.0
+
+
+def day_of(timestamp: str) -> int:
+    """Day ordinal of an ISO timestamp ("2025-08-14T09:30:00" -> 739112)."""
+    return date.fromisoformat(timestamp[:10]).toordinal()
+
+
+def _clean(value: Optional[str], default: str = "UNKNOWN") -> str:
+    # Cleaned like the rollups, so block names meet theirs
+    value = (value or "").strip().replace(SEP, "/")
+    return value or default
+
+
+# -------------------------------------------------
+# Per-Key State
+# -------------------------------------------------
+
+class _Series:
+    """
+    Daily counts for the last `window` days in a ring buffer, plus an
+    EWMA mean/variance of closed days and a one-sided CUSUM of their
+    standardized residuals.
+    """
+
+    __slots__ = ("counts", "day", "mean", "var", "cusum", "days_seen", "alerted_day")
+
+    def __init__(self, window: int, day: int):
+        self.counts = array("I", bytes(4 * window))
+        self.day = day
+        self.mean = 0.0
+        self.var = 0.0
+        self.cusum = 0.0
+        self.days_seen = 0
+        self.alerted_day = -1
+
+    def std(self) -> float:
+        # Counts are roughly Poisson, so variance is at least the mean
+        return sqrt(max(self.var, self.mean, MIN_VARIANCE))
+
+    def window_count(self) -> int:
+        return sum(self.counts)
+
+
+# -------------------------------------------------
+# Detector
+# -------------------------------------------------
+
+class OutbreakDetector:
+    """
+    Incremental outbreak detection over the case stream.
+
+    observe() is O(1) amortized: it bumps today's ring slot and checks it
+    against the baseline. A day is folded into the EWMA/CUSUM once, when
+    the first event of a later day arrives for that key, so nothing is
+    ever rescanned. Events older than the window are dropped.
+
+    A key alerts at most once per day, when today's count reaches
+    min_cases and either its z-score against the baseline reaches
+    z_threshold or the CUSUM (including today) reaches cusum_h. The CUSUM
+    restarts from zero after each alert. Keys with fewer than
+    min_baseline_days closed days have no baseline yet and never alert.
+    """
+
+    def __init__(
+        self,
+        window_days: int = 28,
+        alpha: float = 0.1,
+        z_threshold: float = 3.0,
+        cusum_k: float = 0.5,
+        cusum_h: float = 5.0,
+        min_cases: int = 3,
+        min_baseline_days: int = 7,
+        max_alerts: int = 1000,
+    ):
+        self.window = window_days
+        self.alpha = alpha
+        self.z_threshold = z_threshold
+        self.cusum_k = cusum_k
+        self.cusum_h = cusum_h
+        self.min_cases = min_cases
+        self.min_baseline_days = min_baseline_days
+
+        self._series: Dict[SeriesKey, _Series] = {}
+        self._alerts: deque = deque(maxlen=max_alerts)
+        self._lock = threading.Lock()
+
+        self.events = 0
+        self.late_dropped = 0
+
+    # ---------- baseline ----------
+
+    def _fold(self, s: _Series, count: int):
+        residual = count - s.mean
+        s.cusum = max(0.0, s.cusum + residual / s.std() - self.cusum_k)
+        s.mean += self.alpha * residual
+        s.var = (1 - self.alpha) * (s.var + self.alpha * residual * residual)
+        s.days_seen += 1
+
+    def _fold_empty(self, s: _Series, days: int):
+        """Fold `days` zero-count days."""
+        # Zero days only ever lower the CUSUM, so step until it bottoms out
+        while days and s.cusum > 0:
+            self._fold(s, 0)
+            days -= 1
+        if not days:
+            return
+
+        # Then closed form: mean_n = q^n m, var_n = q^n (v + m^2 (1 - q^n))
+        decay = (1 - self.alpha) ** days
+        s.var = decay * (s.var + s.mean * s.mean * (1 - decay))
+        s.mean *= decay
+        s.days_seen += days
+
+    def _advance(self, s: _Series, day: int):
+        """Close every day from s.day up to (not including) day."""
+        gap = day - s.day
+
+        self._fold(s, s.counts[s.day % self.window])
+        self._fold_empty(s, gap - 1)
+
+        if gap >= self.window:
+            s.counts = array("I", bytes(4 * self.window))
+        else:
+            for d in range(s.day + 1, day + 1):
+                s.counts[d % self.window] = 0
+
+        s.day = day
+
+    # ---------- events ----------
+
+    def _observe_key(self, key: SeriesKey, day: int) -> Optional[Dict[str, Any]]:
+        s = self._series.get(key)
+        if s is None:
+            s = self._series[key] = _Series(self.window, day)
+
+        if day > s.day:
+            self._advance(s, day)
+        elif day <= s.day - self.window:
+            self.late_dropped += 1
+            return None
+
+        s.counts[day % self.window] += 1
+
+        # Late (but in-window) events count, they just cannot alert
+        if day != s.day:
+            return None
+        return self._check(key, s)
+
+    def _check(self, key: SeriesKey, s: _Series) -> Optional[Dict[str, Any]]:
+        """Alert on the series' current day, if it has not already."""
+        day = s.day
+        if s.alerted_day == day:
+            return None
+
+        # A fresh series (new key, or an unseeded restart) has mean 0: any
+        # cluster of min_cases would read as a z of 3+, so wait for a baseline
+        today = s.counts[day % self.window]
+        if today < self.min_cases or s.days_seen < self.min_baseline_days:
+            return None
+
+        z = (today - s.mean) / s.std()
+        cusum = max(0.0, s.cusum + z - self.cusum_k)
+
+        if z < self.z_threshold and cusum < self.cusum_h:
+            return None
+
+        # Restart the CUSUM after an alarm, as usual, so one sustained
+        # rise is reported once rather than every following day
+        s.alerted_day = day
+        s.cusum = 0.0
+        district, block, village, icd10 = key
+        alert = {
+            "District": district,
+            "Block": block,
+            "Village": village,
+            "ICD10Code": icd10,
+            "Date": date.fromordinal(day).isoformat(),
+            "Count": today,
+            "Expected": round(s.mean, 2),
+            "ZScore": round(z, 2),
+            "Cusum": round(cusum, 2),
+            "WindowCount": s.window_count(),
+            "BaselineDays": s.days_seen,
+        }
+        self._alerts.append(alert)
+        return alert
+
+    def observe(
+        self,
+        district: str,
+        block: str,
+        village: str,
+        icd10_code: str,
+        day: int,
+    ) -> List[Dict[str, Any]]:
+        """Count one case; returns any alerts it raised."""
+        district = _clean(district)
+        block = _clean(block)
+        village = _clean(village)
+        icd10_code = _clean(icd10_code).upper()
+
+        raised = []
+        with self._lock:
+            self.events += 1
+            for key in (
+                (district, block, village, icd10_code),
+                (district, block, ANY_VILLAGE, icd10_category(icd10_code)),
+            ):
+                alert = self._observe_key(key, day)
+                if alert:
+                    raised.append(alert)
+        return raised
+
+    def observe_case(self, case: Dict[str, Any], patient: Dict[str, Any]) -> List[Dict[str, Any]]:
+        """Count a stored case; location comes from the patient record."""
+        return self.observe(
+            district=patient.get("District"),
+            block=patient.get("Block"),
+            village=patient.get("Village"),
+            icd10_code=case.get("ICD10Code"),
+            day=day_of(case["CreatedAt"]),
+        )
+
+    def merge_counts(
+        self,
+        district: str,
+        counts: Dict[int, Counter],
+        since: Optional[int] = None,
+    ) -> List[Dict[str, Any]]:
+        """
+        Merge block-level counts from every worker: {day: Counter of
+        "<block>|<icd10 category>" -> cases}. A slot keeps the larger of
+        its own count and the shared one, which already includes this
+        worker's cases. New keys start at day `since`, so the empty days
+        before their first case count towards the baseline; without it
+        they start at their first day, with no baseline. Returns alerts
+        raised on the latest day.
+        """
+        if not counts:
+            return []
+        latest = max(counts)
+
+        raised = []
+        with self._lock:
+            for day in sorted(counts):
+                for attribute, n in counts[day].items():
+                    block, category = attribute.split(SEP)
+                    key = (district, block, ANY_VILLAGE, category)
+
+                    s = self._series.get(key)
+                    if s is None:
+                        s = self._series[key] = _Series(self.window, day if since is None else since)
+
+                    if day > s.day:
+                        self._advance(s, day)
+                    elif day <= s.day - self.window:
+                        continue
+
+                    slot = day % self.window
+                    if n <= s.counts[slot]:
+                        continue
+                    s.counts[slot] = n
+
+                    if day == latest == s.day:
+                        alert = self._check(key, s)
+                        if alert:
+                            raised.append(alert)
+        return raised
+
+    # ---------- reads ----------
+
+    def alerts(self, district: Optional[str] = None, limit: int = 100) -> List[Dict[str, Any]]:
+        """Most recent alerts this worker raised, first. All workers' are in read_alerts()."""
+        with self._lock:
+            alerts = list(self._alerts)
+
+        if district:
+            alerts = [a for a in alerts if a["District"] == district]
+        return alerts[::-1][:limit]
+
+    def window_counts(self, district: Optional[str] = None) -> List[Dict[str, Any]]:
+        """Cases per key over the current window, largest first."""
+        with self._lock:
+            rows = [
+                {
+                    "District": key[0],
+                    "Block": key[1],
+                    "Village": key[2],
+                    "ICD10Code": key[3],
+                    "WindowCount": s.window_count(),
+                    "Expected": round(s.mean, 2),
+                    "LastDate": date.fromordinal(s.day).isoformat(),
+                }
+                for key, s in self._series.items()
+                if district is None or key[0] == district
+            ]
+
+        rows.sort(key=lambda r: -r["WindowCount"])
+        return rows
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            return {
+                "events": self.events,
+                "series": len(self._series),
+                "alerts": len(self._alerts),
+                "late_dropped": self.late_dropped,
+                "window_days": self.window,
+            }
+
+
+outbreak_detector = OutbreakDetector(
+    window_days=settings.OUTBREAK_WINDOW_DAYS,
+    alpha=settings.OUTBREAK_EWMA_ALPHA,
+    z_threshold=settings.OUTBREAK_Z_THRESHOLD,
+    cusum_k=settings.OUTBREAK_CUSUM_K,
+    cusum_h=settings.OUTBREAK_CUSUM_H,
+    min_cases=settings.OUTBREAK_MIN_CASES,
+    min_baseline_days=settings.OUTBREAK_MIN_BASELINE_DAYS,
+)
+
+
+# -------------------------------------------------
+# Shared State (DX# rollups in, OUTBREAK# items out)
+# -------------------------------------------------
+# Each worker's detector only sees the cases it stored. All workers'
+# block-level counts already reach the DX# rollups, so a worker seeds
+# its baselines from the last window of them at startup and merges
+# today's every OUTBREAK_SYNC_SECONDS. Village-level keys stay local.
+#
+# Alerts are claimed in the analytics table, one attribute per key and
+# day under OUTBREAK#<district>#<yyyy-mm-dd>: the first worker to raise
+# an alert notifies, the others drop it, and every worker serves the
+# same list.
+
+def alert_rollup_id(district: str, day: str) -> str:
+    return f"OUTBREAK#{district}#{day}"
+
+
+def _claim(alert: Dict[str, Any]) -> bool:
+    attribute = SEP.join([alert["Block"], alert["Village"], alert["ICD10Code"]])
+    try:
+        analytics_table.update_item(
+            Key={"RollupID": alert_rollup_id(alert["District"], alert["Date"])},
+            UpdateExpression="SET #k = :alert",
+            ConditionExpression="attribute_not_exists(#k)",
+            ExpressionAttributeNames={"#k": attribute},
+            ExpressionAttributeValues={":alert": json.dumps(alert)},
+        )
+    except ClientError as e:
+        if e.response["Error"]["Code"] != "ConditionalCheckFailedException":
+            raise
+        return False
+    return True
+
+
+async def claim_alerts(alerts: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+    """The alerts no other worker has raised yet; those are the ones to notify."""
+    claimed = []
+    for alert in alerts:
+        try:
+            if await run_db(_claim, alert):
+                claimed.append(alert)
+        except Exception as e:
+            # Better a duplicate notification than a missed outbreak
+            record_failure("outbreak_claim", e)
+            claimed.append(alert)
+    return claimed
+
+
+def read_alerts(district: str, days: int, limit: int = 100) -> List[Dict[str, Any]]:
+    """Alerts from every worker over the last `days` days, most recent first."""
+    today = datetime.utcnow().date()
+    keys = [
+        {"RollupID": alert_rollup_id(district, (today - timedelta(days=i)).isoformat())}
+        for i in range(days)
+    ]
+
+    alerts = []
+    for item in batch_get_items(analytics_table, keys):
+        item.pop("RollupID")
+        alerts.extend(json.loads(value) for value in item.values())
+
+    alerts.sort(key=lambda a: (a["Date"], a["ZScore"]), reverse=True)
+    return alerts[:limit]
+
+
+def sync_counts(days: int, seed: bool = False) -> List[Dict[str, Any]]:
+    """
+    Merge the last `days` days of shared block counts into the detector.
+    seed: start new keys at the first of those days (startup warm-up).
+    """
+    today = datetime.utcnow().date()
+    window = [today - timedelta(days=i) for i in range(days - 1, -1, -1)]
+
+    raised = []
+    for district in known_districts():
+        counts = {day.toordinal(): counter for day, counter in dx_counts(district, window).items() if counter}
+        raised += outbreak_detector.merge_counts(
+            district,
+            counts,
+            since=window[0].toordinal() if seed else None,
+        )
+    return raised
+
+
+async def _sync(days: int, seed: bool, publish):
+    alerts = await run_db(sync_counts, days, seed)
+    claimed = await claim_alerts(alerts)
+    if claimed:
+        await publish(claimed)
+
+
+async def seed_baselines(publish):
+    """Startup: the whole window, so baselines survive a restart."""
+    try:
+        await _sync(outbreak_detector.window, True, publish)
+    except Exception as e:
+        # Keys then build their baselines from live cases, as before
+        record_failure("outbreak_seed", e)
+
+
+async def sync_periodically(interval: float, publish):
+    """Merge today's shared counts; publish(alerts) for the ones claimed."""
+    while True:
+        await asyncio.sleep(interval)
+        try:
+            await _sync(1, False, publish)
+        except Exception as e:
+            record_failure("outbreak_sync", e)
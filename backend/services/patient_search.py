@@ -0,0 +1,245 @@
+# backend/services/patient_search.py
+
+import re
+import threading
+import time
+import unicodedata
+from typing import Optional, Dict, Any, List, Set, Callable, Iterable
+
+from boto3.dynamodb.conditions import Key
+
+from backend.config import settings
+from backend.core.database import patients_table, iter_query
+
+
+# -------------------------------------------------
+# Devanagari -> Latin (loose, for matching only)
+# -------------------------------------------------
+
+_DEVANAGARI = {
+    # independent vowels
+    "अ": "a", "आ": "aa", "इ": "i", "ई": "ii", "उ": "u", "ऊ": "uu",
+    "ऋ": "ri", "ए": "e", "ऐ": "ai", "ओ": "o", "औ": "au",
+    # vowel signs
+    "ा": "aa", "ि": "i", "ी": "ii", "ु": "u", "ू": "uu", "ृ": "ri",
+    "े": "e", "ै": "ai", "ो": "o", "ौ": "au",
+    # consonants
+    "क": "k", "ख": "kh", "ग": "g", "घ": "gh", "ङ": "n",
+    "च": "ch", "छ": "chh", "ज": "j", "झ": "jh", "ञ": "n",
+    "ट": "t", "ठ": "th", "ड": "d", "ढ": "dh", "ण": "n",
+    "त": "t", "थ": "th", "द": "d", "ध": "dh", "न": "n",
+    "प": "p", "फ": "ph", "ब": "b", "भ": "bh", "म": "m",
+    "य": "y", "र": "r", "ल": "l", "व": "v",
+    "श": "sh", "ष": "sh", "स": "s", "ह": "h",
+    # nasalisation / visarga
+    "ं": "n", "ँ": "n", "ः": "h",
+    # virama and nukta carry no sound of their own here
+    "्": "", "़": "",
+}
+
+_NUKTA_FORMS = {"क": "q", "ख": "kh", "ग": "g", "ज": "z", "ड": "r", "ढ": "rh", "फ": "f"}
+
+_DEVANAGARI_TABLE = str.maketrans(_DEVANAGARI)
+_NUKTA_RE = re.compile("([" + "".join(_NUKTA_FORMS) + "])\u093c")
+
+
+def transliterate(text: str) -> str:
+    text = _NUKTA_RE.sub(lambda m: _NUKTA_FORMS[m.group(1)], text)
+    return text.translate(_DEVANAGARI_TABLE)
+
+
+# -------------------------------------------------
+# Phonetic Folding
+# -------------------------------------------------
+# Both scripts are reduced to a loose consonant skeleton so that
+# "Priya" / "प्रिया", "Bikram" / "Vikram" / "बिक्रम" and
+# "Sunita" / "Suneeta" land on the same key. 'a' is dropped entirely,
+# which sidesteps Hindi schwa deletion (नौबतपुर -> naubatpur).
+
+_LATIN_FOLDS = [
+    ("ee", "i"), ("ii", "i"), ("oo", "u"), ("uu", "u"),
+    ("w", "b"), ("v", "b"), ("z", "j"), ("q", "k"), ("x", "ks"),
+    ("y", "i"), ("h", ""), ("a", ""),
+]
+
+_REPEAT_RE = re.compile(r"(.)\1+")
+
+
+def fold_word(word: str) -> str:
+    word = transliterate(word)
+    word = unicodedata.normalize("NFKD", word)
+    word = "".join(ch for ch in word if ch.isascii() and ch.isalnum())
+    for src, dst in _LATIN_FOLDS:
+        word = word.replace(src, dst)
+    return _REPEAT_RE.sub(r"\1", word)
+
+
+def fold_words(text: str) -> List[str]:
+    text = unicodedata.normalize("NFC", text or "").casefold()
+    words = re.split(r"[\s,.\-_/]+", text)
+    return [f for f in (fold_word(w) for w in words) if f]
+
+
+def _grams(word: str) -> Set[str]:
+    """Bigrams and trigrams of the word anchored with a start marker."""
+    padded = "^" + word
+    grams = set()
+    for n in (2, 3):
+        grams.update(padded[i:i + n] for i in range(len(padded) - n + 1))
+    return grams
+
+
+# -------------------------------------------------
+# Per-ASHA Inverted Index
+# -------------------------------------------------
+
+class _AshaIndex:
+
+    def __init__(self):
+        self.patients: Dict[str, Dict[str, Any]] = {}
+        self.words: Dict[str, List[str]] = {}
+        self.name_words: Dict[str, List[str]] = {}
+        self.postings: Dict[str, Set[str]] = {}
+        self.loaded_at = 0.0
+
+    def upsert(self, patient: Dict[str, Any]):
+        patient_id = patient["PatientID"]
+        self.remove(patient_id)
+
+        name_words = fold_words(patient.get("Name", ""))
+        words = name_words + fold_words(patient.get("Village", ""))
+
+        self.patients[patient_id] = patient
+        self.words[patient_id] = words
+        self.name_words[patient_id] = name_words
+
+        for word in words:
+            for gram in _grams(word):
+                self.postings.setdefault(gram, set()).add(patient_id)
+
+    def remove(self, patient_id: str):
+        if patient_id not in self.patients:
+            return
+
+        for word in self.words.pop(patient_id):
+            for gram in _grams(word):
+                bucket = self.postings.get(gram)
+                if bucket is not None:
+                    bucket.discard(patient_id)
+                    if not bucket:
+                        del self.postings[gram]
+
+        del self.patients[patient_id]
+        del self.name_words[patient_id]
+
+    def search(self, query: str, limit: int) -> List[Dict[str, Any]]:
+        terms = fold_words(query)
+        if not terms:
+            return []
+
+        candidates: Optional[Set[str]] = None
+        for term in terms:
+            grams = _grams(term)
+            # Prefer the more selective trigrams when the term has them
+            trigrams = {g for g in grams if len(g) == 3}
+            for gram in trigrams or grams:
+                posting = self.postings.get(gram, set())
+                candidates = set(posting) if candidates is None else candidates & posting
+                if not candidates:
+                    return []
+
+        # Grams only narrow the set; confirm every term prefixes some word
+        def matches(patient_id: str) -> bool:
+            words = self.words[patient_id]
+            return all(any(w.startswith(t) for w in words) for t in terms)
+
+        # Name matches before village-only matches
+        def rank(patient_id: str):
+            name_words = self.name_words[patient_id]
+            name_hit = all(any(w.startswith(t) for w in name_words) for t in terms)
+            return (not name_hit, self.patients[patient_id].get("Name", ""))
+
+        hits = sorted((pid for pid in candidates if matches(pid)), key=rank)
+        return [self.patients[pid] for pid in hits[:limit]]
+
+
+class PatientSearchIndex:
+    """
+    Typeahead over patient Name and Village, one inverted n-gram index per
+    ASHA. An ASHA's index is filled from DynamoDB on first use (and again
+    after refresh_seconds, to pick up writes made by other workers); local
+    writes are applied immediately via upsert. Upserts that land while an
+    ASHA's index is being (re)loaded are replayed into the new index
+    before it replaces the old one, since the load may have read past them.
+    """
+
+    def __init__(self, loader: Callable[[str], Iterable[Dict[str, Any]]], refresh_seconds: float):
+        self.loader = loader
+        self.refresh_seconds = refresh_seconds
+        self._indexes: Dict[str, _AshaIndex] = {}
+        self._load_locks: Dict[str, threading.Lock] = {}
+        self._loading: Dict[str, List[Dict[str, Any]]] = {}   # ASHA -> upserts during its load
+        self._lock = threading.Lock()
+
+    def _index_for(self, asha_id: str) -> _AshaIndex:
+        if self.is_warm(asha_id):
+            return self._indexes[asha_id]
+
+        with self._lock:
+            load_lock = self._load_locks.setdefault(asha_id, threading.Lock())
+
+        # One loader per ASHA; concurrent cold searches wait for it
+        with load_lock:
+            if self.is_warm(asha_id):
+                return self._indexes[asha_id]
+
+            # Loader does I/O; build outside the index lock then swap in
+            with self._lock:
+                self._loading[asha_id] = []
+            try:
+                fresh = _AshaIndex()
+                for patient in self.loader(asha_id):
+                    fresh.upsert(patient)
+                fresh.loaded_at = time.monotonic()
+
+                with self._lock:
+                    for patient in self._loading[asha_id]:
+                        fresh.upsert(patient)
+                    self._indexes[asha_id] = fresh
+            finally:
+                with self._lock:
+                    del self._loading[asha_id]
+            return fresh
+
+    def is_warm(self, asha_id: str) -> bool:
+        index = self._indexes.get(asha_id)
+        return index is not None and time.monotonic() - index.loaded_at < self.refresh_seconds
+
+    def search(self, asha_id: str, query: str, limit: int = 20) -> List[Dict[str, Any]]:
+        index = self._index_for(asha_id)
+        with self._lock:
+            return index.search(query, limit)
+
+    def upsert(self, patient: Dict[str, Any]):
+        asha_id = patient.get("ASHAWorkerID")
+        with self._lock:
+            index = self._indexes.get(asha_id)
+            # Cold ASHAs pick the patient up on their first load
+            if index is not None:
+                index.upsert(patient)
+            if asha_id in self._loading:
+                self._loading[asha_id].append(patient)
+
+
+def _load_asha_patients(asha_id: str) -> Iterable[Dict[str, Any]]:
+    return iter_query(
+        patients_table,
+        Key("ASHAWorkerID").eq(asha_id),
+        index_name="ASHAWorkerID-index",
+    )
+
+
+patient_search_index = PatientSearchIndex(
+    loader=_load_asha_patients,
+    refresh_seconds=settings.PATIENT_SEARCH_REFRESH_SECONDS,
+)
@@ -0,0 +1,341 @@
+# backend/services/prescription_service.py
+
+import json
+import threading
+from typing import Dict, Any, List, Optional, Tuple
+
+from backend.config import settings
+from backend.services.drug_index import (
+    DrugIndex,
+    open_index,
+    SEVERITIES,
+    INTERACTION,
+    CROSS_REACTIVITY,
+)
+
+
+# -------------------------------------------------
+# Interaction Dataset
+# -------------------------------------------------
+# Built-in set covering what PHC / CHC formularies in the pilot districts
+# stock. DRUG_DATASET_PATH points at a larger JSON dataset of the same
+# shape (see drug_index.compile_dataset) when one is available.
+
+DEFAULT_DRUG_DATASET: Dict[str, Any] = {
+    "classes": {
+        "nsaid": {"name": "NSAIDs", "aliases": ["nsaids", "painkillers nsaid"]},
+        "penicillin": {"name": "Penicillins", "aliases": ["penicillins", "pcn"]},
+        "cephalosporin": {"name": "Cephalosporins", "aliases": ["cephalosporins"]},
+        "sulfonamide": {"name": "Sulfonamide antibiotics", "aliases": ["sulfa", "sulpha", "sulfa drugs", "sulpha drugs", "sulfonamides"]},
+        "fluoroquinolone": {"name": "Fluoroquinolones", "aliases": ["quinolones", "fluoroquinolones"]},
+        "macrolide": {"name": "Macrolides", "aliases": ["macrolides"]},
+        "anticoagulant": {"name": "Oral anticoagulants", "aliases": ["blood thinner", "anticoagulants"]},
+        "ace_inhibitor": {"name": "ACE inhibitors", "aliases": ["ace inhibitors"]},
+        "arb": {"name": "Angiotensin receptor blockers", "aliases": ["arbs"]},
+        "potassium_sparing": {"name": "Potassium-sparing diuretics"},
+        "statin": {"name": "Statins", "aliases": ["statins"]},
+        "sulfonylurea": {"name": "Sulfonylureas", "aliases": ["sulfonylureas"]},
+        "antacid": {"name": "Antacids (Al / Mg / Ca)", "aliases": ["antacids"]},
+        "iron": {"name": "Oral iron", "aliases": ["iron tablets", "ifa"]},
+        "qt_prolonging": {"name": "QT-prolonging drugs"},
+        "opioid": {"name": "Opioids", "aliases": ["opioids"]},
+        "ssri": {"name": "SSRIs", "aliases": ["ssris"]},
+        "benzodiazepine": {"name": "Benzodiazepines", "aliases": ["benzodiazepines"]},
+        "enzyme_inducer": {"name": "Enzyme-inducing antiepileptics"},
+        "aromatic_anticonvulsant": {"name": "Aromatic anticonvulsants"},
+        "hormonal_contraceptive": {"name": "Hormonal contraceptives", "aliases": ["oral contraceptive", "ocp", "mala d"]},
+        "corticosteroid": {"name": "Corticosteroids", "aliases": ["steroids"]},
+    },
+    "drugs": {
+        "paracetamol": {"name": "Paracetamol", "aliases": ["acetaminophen", "crocin", "dolo", "calpol"]},
+        "ibuprofen": {"name": "Ibuprofen", "classes": ["nsaid"], "aliases": ["brufen", "combiflam"]},
+        "diclofenac": {"name": "Diclofenac", "classes": ["nsaid"], "aliases": ["voveran"]},
+        "aspirin": {"name": "Aspirin", "classes": ["nsaid"], "aliases": ["ecosprin", "disprin", "acetylsalicylic acid"]},
+        "naproxen": {"name": "Naproxen", "classes": ["nsaid"]},
+        "mefenamic_acid": {"name": "Mefenamic acid", "classes": ["nsaid"], "aliases": ["meftal"]},
+        "amoxicillin": {"name": "Amoxicillin", "classes": ["penicillin"], "aliases": ["amoxycillin", "mox"]},
+        "amoxicillin_clavulanate": {"name": "Amoxicillin-clavulanate", "classes": ["penicillin"], "aliases": ["amoxyclav", "augmentin", "co amoxiclav"]},
+        "ampicillin": {"name": "Ampicillin", "classes": ["penicillin"]},
+        "cloxacillin": {"name": "Cloxacillin", "classes": ["penicillin"]},
+        "benzathine_penicillin": {"name": "Benzathine penicillin", "classes": ["penicillin"], "aliases": ["penidure"]},
+        "cefixime": {"name": "Cefixime", "classes": ["cephalosporin"], "aliases": ["taxim o"]},
+        "ceftriaxone": {"name": "Ceftriaxone", "classes": ["cephalosporin"]},
+        "cephalexin": {"name": "Cephalexin", "classes": ["cephalosporin"]},
+        "cotrimoxazole": {"name": "Co-trimoxazole", "classes": ["sulfonamide"], "aliases": ["co trimoxazole", "septran", "bactrim", "sulfamethoxazole trimethoprim"]},
+        "ciprofloxacin": {"name": "Ciprofloxacin", "classes": ["fluoroquinolone", "qt_prolonging"], "aliases": ["cipro", "ciplox"]},
+        "ofloxacin": {"name": "Ofloxacin", "classes": ["fluoroquinolone"]},
+        "levofloxacin": {"name": "Levofloxacin", "classes": ["fluoroquinolone", "qt_prolonging"]},
+        "norfloxacin": {"name": "Norfloxacin", "classes": ["fluoroquinolone"]},
+        "azithromycin": {"name": "Azithromycin", "classes": ["macrolide", "qt_prolonging"], "aliases": ["azithral", "azee"]},
+        "erythromycin": {"name": "Erythromycin", "classes": ["macrolide", "qt_prolonging"]},
+        "clarithromycin": {"name": "Clarithromycin", "classes": ["macrolide", "qt_prolonging"]},
+        "metronidazole": {"name": "Metronidazole", "aliases": ["flagyl", "metrogyl"]},
+        "doxycycline": {"name": "Doxycycline"},
+        "warfarin": {"name": "Warfarin", "classes": ["anticoagulant"]},
+        "acenocoumarol": {"name": "Acenocoumarol", "classes": ["anticoagulant"], "aliases": ["acitrom"]},
+        "enalapril": {"name": "Enalapril", "classes": ["ace_inhibitor"]},
+        "ramipril": {"name": "Ramipril", "classes": ["ace_inhibitor"]},
+        "lisinopril": {"name": "Lisinopril", "classes": ["ace_inhibitor"]},
+        "losartan": {"name": "Losartan", "classes": ["arb"]},
+        "telmisartan": {"name": "Telmisartan", "classes": ["arb"], "aliases": ["telma"]},
+        "spironolactone": {"name": "Spironolactone", "classes": ["potassium_sparing"], "aliases": ["aldactone"]},
+        "amlodipine": {"name": "Amlodipine", "aliases": ["amlong"]},
+        "atenolol": {"name": "Atenolol"},
+        "atorvastatin": {"name": "Atorvastatin", "classes": ["statin"]},
+        "simvastatin": {"name": "Simvastatin", "classes": ["statin"]},
+        "rosuvastatin": {"name": "Rosuvastatin", "classes": ["statin"]},
+        "metformin": {"name": "Metformin", "aliases": ["glycomet"]},
+        "glimepiride": {"name": "Glimepiride", "classes": ["sulfonylurea"]},
+        "glibenclamide": {"name": "Glibenclamide", "classes": ["sulfonylurea"], "aliases": ["glyburide", "daonil"]},
+        "gliclazide": {"name": "Gliclazide", "classes": ["sulfonylurea"]},
+        "aluminium_hydroxide": {"name": "Aluminium hydroxide", "classes": ["antacid"], "aliases": ["digene", "gelusil"]},
+        "magnesium_hydroxide": {"name": "Magnesium hydroxide", "classes": ["antacid"]},
+        "calcium_carbonate": {"name": "Calcium carbonate", "classes": ["antacid"], "aliases": ["shelcal"]},
+        "ferrous_sulfate": {"name": "Ferrous sulfate", "classes": ["iron"], "aliases": ["ferrous sulphate", "iron folic acid"]},
+        "ferrous_fumarate": {"name": "Ferrous fumarate", "classes": ["iron"]},
+        "chloroquine": {"name": "Chloroquine", "classes": ["qt_prolonging"]},
+        "hydroxychloroquine": {"name": "Hydroxychloroquine", "classes": ["qt_prolonging"], "aliases": ["hcq"]},
+        "artemether_lumefantrine": {"name": "Artemether-lumefantrine", "classes": ["qt_prolonging"], "aliases": ["coartem"]},
+        "primaquine": {"name": "Primaquine"},
+        "ondansetron": {"name": "Ondansetron", "classes": ["qt_prolonging"], "aliases": ["emeset"]},
+        "domperidone": {"name": "Domperidone", "classes": ["qt_prolonging"], "aliases": ["domstal"]},
+        "tramadol": {"name": "Tramadol", "classes": ["opioid"]},
+        "codeine": {"name": "Codeine", "classes": ["opioid"]},
+        "fluoxetine": {"name": "Fluoxetine", "classes": ["ssri"]},
+        "sertraline": {"name": "Sertraline", "classes": ["ssri"]},
+        "escitalopram": {"name": "Escitalopram", "classes": ["ssri", "qt_prolonging"]},
+        "diazepam": {"name": "Diazepam", "classes": ["benzodiazepine"], "aliases": ["valium"]},
+        "alprazolam": {"name": "Alprazolam", "classes": ["benzodiazepine"]},
+        "phenytoin": {"name": "Phenytoin", "classes": ["enzyme_inducer", "aromatic_anticonvulsant"], "aliases": ["eptoin"]},
+        "carbamazepine": {"name": "Carbamazepine", "classes": ["enzyme_inducer", "aromatic_anticonvulsant"], "aliases": ["tegretol"]},
+        "rifampicin": {"name": "Rifampicin", "aliases": ["rifampin"]},
+        "isoniazid": {"name": "Isoniazid", "aliases": ["inh"]},
+        "levonorgestrel_ethinylestradiol": {"name": "Levonorgestrel + ethinylestradiol", "classes": ["hormonal_contraceptive"]},
+        "prednisolone": {"name": "Prednisolone", "classes": ["corticosteroid"], "aliases": ["wysolone"]},
+        "dexamethasone": {"name": "Dexamethasone", "classes": ["corticosteroid"]},
+        "theophylline": {"name": "Theophylline", "aliases": ["deriphyllin"]},
+        "digoxin": {"name": "Digoxin"},
+        "methotrexate": {"name": "Methotrexate"},
+        "salbutamol": {"name": "Salbutamol", "aliases": ["asthalin", "albuterol"]},
+        "ors": {"name": "ORS", "aliases": ["oral rehydration salts", "electral"]},
+        "zinc": {"name": "Zinc sulfate", "aliases": ["zinc sulphate"]},
+    },
+    "interactions": [
+        ["class:anticoagulant", "class:nsaid", "MAJOR", "Additive bleeding risk; prefer paracetamol for pain or fever."],
+        ["class:anticoagulant", "class:fluoroquinolone", "MAJOR", "Raises INR; monitor INR or choose another antibiotic."],
+        ["class:anticoagulant", "class:sulfonamide", "MAJOR", "Co-trimoxazole markedly raises INR."],
+        ["class:anticoagulant", "metronidazole", "MAJOR", "Metronidazole inhibits warfarin metabolism; INR rises."],
+        ["class:anticoagulant", "class:macrolide", "MODERATE", "May raise INR; monitor."],
+        ["class:anticoagulant", "rifampicin", "MAJOR", "Rifampicin induces metabolism; anticoagulant effect lost."],
+        ["class:nsaid", "class:nsaid", "MAJOR", "Duplicate NSAID therapy: GI bleeding and renal injury without added benefit."],
+        ["class:nsaid", "class:ace_inhibitor", "MODERATE", "Reduced antihypertensive effect and risk of acute kidney injury."],
+        ["class:nsaid", "class:arb", "MODERATE", "Reduced antihypertensive effect and risk of acute kidney injury."],
+        ["class:nsaid", "class:corticosteroid", "MODERATE", "Higher risk of GI ulceration and bleeding."],
+        ["class:nsaid", "methotrexate", "MAJOR", "Reduced methotrexate clearance; toxicity."],
+        ["class:ace_inhibitor", "class:potassium_sparing", "MAJOR", "Hyperkalaemia; check serum potassium."],
+        ["class:arb", "class:potassium_sparing", "MAJOR", "Hyperkalaemia; check serum potassium."],
+        ["class:ace_inhibitor", "class:arb", "MAJOR", "Dual RAAS blockade: hyperkalaemia, hypotension, renal failure."],
+        ["simvastatin", "clarithromycin", "CONTRAINDICATED", "CYP3A4 inhibition: risk of rhabdomyolysis."],
+        ["simvastatin", "erythromycin", "CONTRAINDICATED", "CYP3A4 inhibition: risk of rhabdomyolysis."],
+        ["atorvastatin", "clarithromycin", "MAJOR", "Raised statin levels; limit dose or pause the statin."],
+        ["class:qt_prolonging", "class:qt_prolonging", "MAJOR", "Additive QT prolongation; risk of torsades de pointes."],
+        ["class:fluoroquinolone", "class:antacid", "MODERATE", "Chelation reduces absorption; give the antibiotic 2 h before."],
+        ["class:fluoroquinolone", "class:iron", "MODERATE", "Chelation reduces absorption; give the antibiotic 2 h before."],
+        ["doxycycline", "class:antacid", "MODERATE", "Chelation reduces absorption; separate doses by 2-3 h."],
+        ["doxycycline", "class:iron", "MODERATE", "Chelation reduces absorption; separate doses by 2-3 h."],
+        ["class:fluoroquinolone", "class:sulfonylurea", "MODERATE", "Dysglycaemia (mostly hypoglycaemia); monitor sugar."],
+        ["class:sulfonamide", "class:sulfonylurea", "MODERATE", "Potentiated hypoglycaemia."],
+        ["class:sulfonamide", "methotrexate", "MAJOR", "Additive antifolate effect; bone marrow suppression."],
+        ["rifampicin", "class:hormonal_contraceptive", "MAJOR", "Contraceptive failure; advise barrier method."],
+        ["class:enzyme_inducer", "class:hormonal_contraceptive", "MAJOR", "Contraceptive failure; advise barrier method."],
+        ["isoniazid", "phenytoin", "MODERATE", "Isoniazid raises phenytoin levels."],
+        ["class:opioid", "class:benzodiazepine", "MAJOR", "Respiratory depression and sedation."],
+        ["tramadol", "class:ssri", "MAJOR", "Serotonin syndrome and lowered seizure threshold."],
+        ["theophylline", "ciprofloxacin", "MAJOR", "Ciprofloxacin raises theophylline levels; seizures."],
+        ["digoxin", "class:macrolide", "MODERATE", "Raised digoxin levels."],
+        ["metronidazole", "class:qt_prolonging", "MINOR", "Case reports of QT prolongation."],
+    ],
+    "cross_reactions": [
+        ["class:penicillin", "class:penicillin", "MAJOR", "Allergy to one penicillin applies to all penicillins."],
+        ["class:penicillin", "class:cephalosporin", "MODERATE", "Cross-reactivity with penicillin allergy (~2%); avoid if the reaction was anaphylaxis."],
+        ["class:cephalosporin", "class:cephalosporin", "MAJOR", "Cephalosporins cross-react, especially with similar side chains."],
+        ["class:sulfonamide", "class:sulfonamide", "MAJOR", "Sulfonamide antibiotic allergy applies to the class."],
+        ["class:fluoroquinolone", "class:fluoroquinolone", "MAJOR", "Fluoroquinolone hypersensitivity often extends across the class."],
+        ["class:macrolide", "class:macrolide", "MODERATE", "Macrolides may cross-react."],
+        ["class:nsaid", "class:nsaid", "MAJOR", "NSAID hypersensitivity (including aspirin-exacerbated disease) extends across the class."],
+        ["class:aromatic_anticonvulsant", "class:aromatic_anticonvulsant", "MAJOR", "Aromatic anticonvulsants share hypersensitivity (SJS / DRESS)."],
+    ],
+}
+
+
+def load_drug_dataset() -> Dict[str, Any]:
+    if not settings.DRUG_DATASET_PATH:
+        return DEFAULT_DRUG_DATASET
+    with open(settings.DRUG_DATASET_PATH, encoding="utf-8") as f:
+        return json.load(f)
+
+
+# -------------------------------------------------
+# Shared Index (one mmap per worker, one file per host)
+# -------------------------------------------------
+
+_drug_index: Optional[DrugIndex] = None
+_drug_index_lock = threading.Lock()
+
+
+def get_drug_index() -> DrugIndex:
+    global _drug_index
+
+    if _drug_index is None:
+        with _drug_index_lock:
+            if _drug_index is None:
+                _drug_index = open_index(load_drug_dataset(), settings.DRUG_INDEX_PATH)
+
+    return _drug_index
+
+
+def set_drug_index(index: DrugIndex) -> None:
+    global _drug_index
+    _drug_index = index
+
+
+# -------------------------------------------------
+# Prescription Checks
+# -------------------------------------------------
+# Every name is resolved once; then each prescribed drug's expansion is
+# looked up against the other prescribed drugs, the current medications
+# (interactions) and the allergies (cross-reactions), through the
+# partner map of each concept. Only the worst finding per pair of
+# names is kept.
+
+def _resolve(index: DrugIndex, names: List[str]) -> Tuple[List[Tuple[str, int, Tuple[int, ...]]], List[str]]:
+    resolved, unknown = [], []
+    seen = set()
+    for name in names or []:
+        concept = index.resolve(name)
+        if concept is None:
+            if name and name.strip():
+                unknown.append(name)
+        elif concept not in seen:
+            seen.add(concept)
+            resolved.append((name, concept, index.expand(concept)))
+    return resolved, unknown
+
+
+def _worst(index: DrugIndex, expansion, other, kind: int) -> Optional[int]:
+    """The most severe record between two expansions, or None."""
+    worst = None
+    for a in expansion:
+        partners = index.partners(a, kind)
+        if not partners:
+            continue
+        for b in other:
+            record = partners.get(b)
+            if record is not None and (worst is None or index.severity(record) > index.severity(worst)):
+                worst = record
+    return worst
+
+
+def _interaction(index: DrugIndex, drug: str, other: str, source: str, record: int) -> Dict[str, Any]:
+    return {
+        "Severity": SEVERITIES[index.severity(record)],
+        "DrugA": drug,
+        "DrugB": other,
+        "With": source,
+        "Note": index.note(record),
+    }
+
+
+def check_prescription(
+    drugs: List[str],
+    current_medications: Optional[List[str]] = None,
+    known_allergies: Optional[List[str]] = None,
+    index: Optional[DrugIndex] = None,
+) -> Dict[str, Any]:
+    """Check prescribed drugs against each other and the patient's medications and allergies."""
+
+    index = index or get_drug_index()
+    prescribed, unknown = _resolve(index, drugs)
+    current, unknown_current = _resolve(index, current_medications)
+    allergic, unknown_allergies = _resolve(index, known_allergies)
+
+    interactions, allergy_conflicts = [], []
+
+    for i, (drug, concept, expansion) in enumerate(prescribed):
+        for other, _, other_expansion in prescribed[i + 1:]:
+            record = _worst(index, expansion, other_expansion, INTERACTION)
+            if record is not None:
+                interactions.append(_interaction(index, drug, other, "PRESCRIPTION", record))
+
+        for medication, medication_concept, medication_expansion in current:
+            if medication_concept == concept:
+                interactions.append({
+                    "Severity": "MODERATE",
+                    "DrugA": drug,
+                    "DrugB": medication,
+                    "With": "CURRENT_MEDICATION",
+                    "Note": f"Patient already takes {medication}: duplicate therapy.",
+                })
+                continue
+            record = _worst(index, expansion, medication_expansion, INTERACTION)
+            if record is not None:
+                interactions.append(_interaction(index, drug, medication, "CURRENT_MEDICATION", record))
+
+        # Allergy to the drug or to a class it is in: contraindicated.
+        # Otherwise only dataset cross-reactions count; sharing a class
+        # such as "QT-prolonging" says nothing about allergy.
+        for allergy, allergen, allergen_expansion in allergic:
+            if allergen in expansion:
+                allergy_conflicts.append({
+                    "Severity": "CONTRAINDICATED",
+                    "Drug": drug,
+                    "Allergy": allergy,
+                    "Reason": f"Recorded allergy to {index.display(allergen)}.",
+                })
+                continue
+            record = _worst(index, allergen_expansion, expansion, CROSS_REACTIVITY)
+            if record is not None:
+                allergy_conflicts.append({
+                    "Severity": SEVERITIES[index.severity(record)],
+                    "Drug": drug,
+                    "Allergy": allergy,
+                    "Reason": index.note(record),
+                })
+
+    order = {name: level for level, name in enumerate(SEVERITIES)}
+    interactions.sort(key=lambda f: -order[f["Severity"]])
+    allergy_conflicts.sort(key=lambda f: -order[f["Severity"]])
+
+    levels = [order[f["Severity"]] for f in interactions + allergy_conflicts]
+    highest = max(levels) if levels else None
+
+    return {
+        # Nothing at MAJOR or above; MINOR / MODERATE are shown but don't
+        # block. An allergy we could not resolve was not checked at all,
+        # so it blocks too until the doctor reviews it.
+        "Safe": (highest is None or highest < order["MAJOR"]) and not unknown_allergies,
+        "HighestSeverity": SEVERITIES[highest] if highest is not None else None,
+        "Interactions": interactions,
+        "AllergyConflicts": allergy_conflicts,
+        "Unrecognized": unknown,
+        "UnrecognizedMedications": unknown_current,
+        "UnrecognizedAllergies": unknown_allergies,
+    }
+
+
+def check_prescriptions(
+    prescriptions: List[Tuple[List[str], List[str], List[str]]],
+    index: Optional[DrugIndex] = None,
+) -> List[Dict[str, Any]]:
+    """check_prescription for many (drugs, medications, allergies); one call, one thread hop."""
+    index = index or get_drug_index()
+    return [check_prescription(drugs, medications, allergies, index) for drugs, medications, allergies in prescriptions]
+
+
+def patient_lists(patient: Optional[Dict[str, Any]], medications=None, allergies=None) -> Tuple[List[str], List[str]]:
+    """The patient's recorded medications / allergies plus any the doctor adds."""
+    patient = patient or {}
+    return (
+        list(patient.get("CurrentMedications") or []) + list(medications or []),
+        list(patient.get("KnownAllergies") or []) + list(allergies or []),
+    )
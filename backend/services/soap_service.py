@@ -0,0 +1,369 @@
+# backend/services/soap_service.py
+
+import asyncio
+import hashlib
+import json
+import re
+import threading
+import time
+from datetime import datetime
+from typing import Optional, Dict, Any, List, Tuple, AsyncIterator
+
+from backend.config import settings
+from backend.core.concurrency import run_db
+from backend.core.database import cases_table, patients_table
+from backend.core.metrics import stage, record_tokens
+from backend.core.model_scheduler import model_scheduler, URGENT
+from backend.services.diagnosis_cache import MemoryCacheBackend, SQLiteCacheBackend, normalize_text
+from backend.services.diagnosis_service import get_bedrock
+
+
+# Bump when the prompt changes so cached notes are regenerated
+SOAP_PROMPT_VERSION = "1"
+
+SECTIONS = ["SUBJECTIVE", "OBJECTIVE", "ASSESSMENT", "PLAN"]
+
+
+# --------------------------------------------
+# Prompt
+# --------------------------------------------
+
+def build_soap_prompt(case: Dict[str, Any], patient: Dict[str, Any], consultation_text: str) -> str:
+
+    actions = "\n".join(f"- {a}" for a in case.get("ImmediateActions") or []) or "- none recorded"
+
+    return f"""
+You are MediConnect AI, writing a SOAP note for a rural tele-consultation.
+
+Write the note in plain text with exactly these four headings, each on
+its own line and in this order: SUBJECTIVE:, OBJECTIVE:, ASSESSMENT:, PLAN:
+Do not use markdown. Be concise and clinical. Use only the facts below.
+After the PLAN section write END OF NOTE on its own line and stop.
+
+Patient: {patient.get('Name', 'Unknown')}, {patient.get('Age', '?')}yr, {patient.get('Gender', '?')}
+Known conditions: {sorted(patient.get('KnownConditions') or [])}
+Known allergies: {patient.get('KnownAllergies') or []}
+
+Symptoms (English): {case.get('SymptomsEnglish') or case.get('SymptomsRaw', '')}
+AI primary diagnosis: {case.get('PrimaryDiagnosis', '')} ({case.get('ConfidencePercent', 0)}% confidence, risk {case.get('RiskLevel', '')})
+ICD-10: {case.get('ICD10Code', '')} {case.get('ICD10Description', '')}
+Immediate actions advised to the ASHA worker:
+{actions}
+ICMR protocol: {case.get('ICMRProtocol', '')}
+
+Doctor's consultation notes:
+{consultation_text.strip() or "(none)"}
+
+SOAP note:
+"""
+
+
+def _soap_request_body(prompt: str) -> str:
+    return json.dumps({
+        "prompt": prompt,
+        "max_gen_len": 1024,
+        "temperature": 0.2,
+        "top_p": 0.9
+    })
+
+
+# --------------------------------------------
+# Incremental Section Parser
+# --------------------------------------------
+# Headings are matched at the start of a line, tolerating the markdown
+# Llama adds anyway ("**Subjective:**", "## PLAN:"). The last line is
+# held back until it is complete (or too long to be a heading), so a
+# heading split across chunks never leaks into the previous section.
+
+HEADING = re.compile(
+    r"^[ \t#*]*(?:(?P<name>subjective|objective|assessment|plan)[ \t*]*:[ \t*]*|(?P<end>end of note)[ \t*.]*$)",
+    re.IGNORECASE | re.MULTILINE,
+)
+MAX_HEADING_LINE = 40
+
+
+class SoapStreamParser:
+
+    def __init__(self):
+        self.buffer = ""
+        self.pos = 0
+        self.current: Optional[str] = None
+        self.sections: Dict[str, str] = {}
+        self.done = False
+
+    def feed(self, text: str) -> List[Tuple[str, str, str]]:
+        """Events for this chunk: ("delta", section, text) and ("section", section, full text)."""
+        events: List[Tuple[str, str, str]] = []
+        if self.done:
+            return events
+        self.buffer += text
+
+        while True:
+            match = HEADING.search(self.buffer, self.pos)
+            if match is None:
+                break
+            if match.group("end") and match.end() == len(self.buffer):
+                break   # may still grow into something else; wait for the line to end
+
+            self._append(self.buffer[self.pos:match.start()], events)
+            self._close(events)
+            self.pos = match.end()
+
+            if match.group("end"):
+                self.done = True
+                self.current = None
+                return events
+            self.current = match.group("name").upper()
+
+        safe = self.buffer.rfind("\n", self.pos) + 1
+        if len(self.buffer) - max(safe, self.pos) > MAX_HEADING_LINE:
+            safe = len(self.buffer)
+        if safe > self.pos:
+            self._append(self.buffer[self.pos:safe], events)
+            self.pos = safe
+
+        return events
+
+    def finish(self) -> List[Tuple[str, str, str]]:
+        events: List[Tuple[str, str, str]] = []
+        if not self.done:
+            match = HEADING.search(self.buffer, self.pos)
+            end = match.start() if match is not None and match.group("end") else len(self.buffer)
+            self._append(self.buffer[self.pos:end], events)
+            self._close(events)
+            self.pos = len(self.buffer)
+            self.done = True
+        return events
+
+    def _append(self, text: str, events: list):
+        if self.current is None or not text:
+            return   # preamble before the first heading
+        self.sections[self.current] = self.sections.get(self.current, "") + text
+        events.append(("delta", self.current, text))
+
+    def _close(self, events: list):
+        if self.current is not None:
+            self.sections[self.current] = self.sections.get(self.current, "").strip()
+            events.append(("section", self.current, self.sections[self.current]))
+
+
+def render_note(sections: Dict[str, str]) -> str:
+    return "\n\n".join(f"{name}:\n{sections[name]}" for name in SECTIONS if sections.get(name))
+
+
+# --------------------------------------------
+# Note Cache (per case version)
+# --------------------------------------------
+# A note is keyed by the case's UpdatedAt plus the consultation text, so
+# any change to the case (the emergency path's late diagnosis, a new
+# assignment) produces a fresh note. The latest note per case version is
+# also kept under its own key for opening without resending the text.
+
+def soap_cache_key(case: Dict[str, Any], consultation_text: str) -> str:
+    parts = {
+        "v": SOAP_PROMPT_VERSION,
+        "case": case["CaseID"],
+        "version": case.get("UpdatedAt"),
+        "consultation": normalize_text(consultation_text),
+        "model": settings.BEDROCK_MODEL_ID,
+    }
+    raw = json.dumps(parts, sort_keys=True, ensure_ascii=False)
+    return hashlib.sha256(raw.encode("utf-8")).hexdigest()
+
+
+def latest_cache_key(case: Dict[str, Any]) -> str:
+    return f"latest:{case['CaseID']}:{case.get('UpdatedAt')}"
+
+
+class SoapNoteCache:
+
+    def __init__(self, backend, ttl_seconds: float):
+        self.backend = backend
+        self.ttl_seconds = ttl_seconds
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, key: str) -> Optional[Dict[str, Any]]:
+        entry = self.backend.get(key)
+        if entry is None or entry[0] < time.time():
+            self.misses += 1
+            return None
+        self.hits += 1
+        return json.loads(entry[1])
+
+    def put(self, case: Dict[str, Any], consultation_text: str, note: Dict[str, Any]):
+        value = json.dumps(note, ensure_ascii=False)
+        expires_at = time.time() + self.ttl_seconds
+        self.backend.set(soap_cache_key(case, consultation_text), expires_at, value)
+        self.backend.set(latest_cache_key(case), expires_at, value)
+
+    def stats(self) -> Dict[str, Any]:
+        lookups = self.hits + self.misses
+        return {
+            "backend": type(self.backend).__name__,
+            "size": self.backend.size(),
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": round(self.hits / lookups, 4) if lookups else 0.0,
+        }
+
+
+def build_soap_cache() -> Optional[SoapNoteCache]:
+    kind = settings.SOAP_CACHE_BACKEND
+
+    if kind == "off":
+        return None
+    if kind == "sqlite":
+        backend = SQLiteCacheBackend(settings.SOAP_CACHE_PATH, settings.SOAP_CACHE_MAX_ENTRIES)
+    elif kind == "memory":
+        backend = MemoryCacheBackend(settings.SOAP_CACHE_MAX_ENTRIES)
+    else:
+        raise Exception(f"Unknown SOAP_CACHE_BACKEND: {kind}")
+
+    return SoapNoteCache(backend, settings.SOAP_CACHE_TTL_SECONDS)
+
+
+soap_cache = build_soap_cache()
+
+
+# --------------------------------------------
+# Generation
+# --------------------------------------------
+
+async def load_note_inputs(case_id: str) -> Tuple[Dict[str, Any], Dict[str, Any]]:
+
+    case_response = await run_db(cases_table.get_item, Key={"CaseID": case_id})
+    case = case_response.get("Item")
+    if not case:
+        raise Exception("Case not found")
+
+    patient_response = await run_db(patients_table.get_item, Key={"PatientID": case["PatientID"]})
+    return case, patient_response.get("Item") or {}
+
+
+def cached_note(case: Dict[str, Any], consultation_text: Optional[str] = None) -> Optional[Dict[str, Any]]:
+    """The note for this case version (and consultation text, when given), if generated before."""
+    if soap_cache is None:
+        return None
+    if consultation_text is None:
+        return soap_cache.get(latest_cache_key(case))
+    return soap_cache.get(soap_cache_key(case, consultation_text))
+
+
+def _generate_blocking(prompt: str, emit, cancelled: threading.Event):
+    """Read the Bedrock stream on the model pool, handing text chunks to emit()."""
+
+    prompt_tokens = None
+    generated_tokens = None
+    chunks = 0
+
+    with stage("soap_note"):
+        response = get_bedrock().invoke_model_with_response_stream(
+            modelId=settings.BEDROCK_MODEL_ID,
+            body=_soap_request_body(prompt),
+            contentType="application/json",
+            accept="application/json",
+        )
+        stream = response["body"]
+
+        try:
+            for event in stream:
+                if cancelled.is_set():
+                    break
+
+                chunk = event.get("chunk")
+                if not chunk:
+                    continue
+
+                data = json.loads(chunk["bytes"])
+                chunks += 1
+                prompt_tokens = data.get("prompt_token_count") or prompt_tokens
+                generated_tokens = data.get("generation_token_count") or generated_tokens
+
+                text = data.get("generation", "")
+                if text:
+                    emit(text)
+        finally:
+            stream.close()
+            record_tokens(prompt_tokens, generated_tokens or chunks)
+
+
+async def stream_soap_note(
+    case: Dict[str, Any],
+    patient: Dict[str, Any],
+    consultation_text: str = "",
+) -> AsyncIterator[Dict[str, Any]]:
+    """
+    Events for the client, in order: "delta" (text as it is generated)
+    and "section" (a finished section) per section, then "done" with
+    the whole note. A cached note is replayed as sections straight
+    away. Generation stops at END OF NOTE, or when the consumer goes
+    away (client disconnect).
+    """
+
+    note = cached_note(case, consultation_text)
+    if note is not None:
+        for name in SECTIONS:
+            if note["Sections"].get(name):
+                yield {"type": "section", "section": name, "text": note["Sections"][name]}
+        yield {"type": "done", "cached": True, "note": note}
+        return
+
+    loop = asyncio.get_running_loop()
+    chunks: asyncio.Queue = asyncio.Queue()
+    cancelled = threading.Event()
+
+    def emit(text: str):
+        loop.call_soon_threadsafe(chunks.put_nowait, text)
+
+    parser = SoapStreamParser()
+    started = time.perf_counter()
+
+    # The doctor is waiting on this one: URGENT lane, behind emergencies only
+    generation = asyncio.ensure_future(model_scheduler.submit(
+        _generate_blocking,
+        build_soap_prompt(case, patient, consultation_text),
+        emit,
+        cancelled,
+        priority=URGENT,
+    ))
+    generation.add_done_callback(lambda _: chunks.put_nowait(None))
+
+    try:
+        while True:
+            text = await chunks.get()
+            events = parser.finish() if text is None else parser.feed(text)
+
+            for kind, section, content in events:
+                yield {"type": kind, "section": section, "text": content}
+
+            if parser.done:
+                break
+
+        cancelled.set()
+        await generation
+    finally:
+        # Consumer gone or generation failed: stop reading the stream,
+        # or give up the scheduler slot if it never started
+        cancelled.set()
+        if not generation.done():
+            generation.cancel()
+            generation.add_done_callback(lambda task: task.cancelled() or task.exception())
+
+    if not parser.sections:
+        raise Exception("Empty response from model")
+
+    note = {
+        "CaseID": case["CaseID"],
+        "CaseVersion": case.get("UpdatedAt"),
+        "Sections": {name: parser.sections.get(name, "") for name in SECTIONS},
+        "Note": render_note(parser.sections),
+        "ModelID": settings.BEDROCK_MODEL_ID,
+        "GeneratedAt": datetime.utcnow().isoformat(),
+        "GenerationMs": round((time.perf_counter() - started) * 1000, 1),
+    }
+
+    if soap_cache:
+        soap_cache.put(case, consultation_text, note)
+
+    yield {"type": "done", "cached": False, "note": note}
@@ -0,0 +1,11 @@
+# backend/tests/conftest.py
+#
+# Tests run offline: in-memory tables, the fake Bedrock client, and no
+# rate limiting. Set before anything imports backend.config.
+
+import os
+
+os.environ.setdefault("STORAGE_BACKEND", "memory")
+os.environ.setdefault("BEDROCK_BACKEND", "fake")
+os.environ.setdefault("BEDROCK_MAX_TPS", "0")
+os.environ.setdefault("MEMORY_DB_LATENCY_MS", "0")
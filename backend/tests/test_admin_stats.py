@@ -0,0 +1,57 @@
+# backend/tests/test_admin_stats.py
+
+import pytest
+from fastapi.testclient import TestClient
+
+from backend.config import settings
+from backend.main import app
+from backend.services.notification_service import notification_queue
+
+
+SECRET = "test-admin-secret"
+
+
+@pytest.fixture
+def client(monkeypatch):
+    monkeypatch.setattr(settings, "PROFILER_SECRET", SECRET)
+    return TestClient(app)
+
+
+@pytest.mark.parametrize("path", [
+    "/admin/db/cache-stats",
+    "/admin/diagnose/cache-stats",
+    "/admin/diagnose/scheduler-stats",
+    "/admin/db/doctor-roster",
+    "/admin/notifications/stats",
+])
+def test_admin_stats_need_the_admin_token(client, path):
+    assert client.get(path).status_code == 404
+    assert client.get(path, headers={"X-Profiler-Token": "wrong"}).status_code == 404
+    assert client.get(path, headers={"X-Profiler-Token": SECRET}).status_code == 200
+
+
+@pytest.mark.parametrize("path", ["/cases/diagnose/cache-stats", "/cases/diagnose/scheduler-stats"])
+def test_internal_stats_are_not_on_the_asha_router(client, path):
+    assert client.get(path, headers={"X-Profiler-Token": SECRET}).status_code == 404
+
+
+def test_dead_letters_carry_no_message_text_or_number(client):
+    notification_queue._dead_letter(
+        {
+            "MessageID": "m-1",
+            "Recipient": "+919876543210",
+            "Template": "case_created",
+            "Text": "Rani, 24 F: behoshi, suspected eclampsia",
+            "Attempts": 3,
+            "CreatedAt": "2026-10-18T06:30:00",
+        },
+        "invalid_number",
+    )
+
+    body = client.get("/admin/notifications/stats", headers={"X-Profiler-Token": SECRET}).json()
+    letter = body["dead_letters"][-1]
+
+    assert letter["MessageID"] == "m-1"
+    assert letter["Error"] == "invalid_number"
+    assert "Text" not in letter and "Recipient" not in letter
+    assert "9876543210" not in str(body) and "Rani" not in str(body)
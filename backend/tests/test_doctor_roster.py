@@ -0,0 +1,47 @@
+# backend/tests/test_doctor_roster.py
+
+from decimal import Decimal
+
+from backend.core.database import doctors_table
+from backend.services.doctor_index import DoctorSpatialIndex
+from backend.services.doctor_roster import DoctorRoster, HostLease, MemoryStreamFeed
+
+
+def _doctor(doctor_id):
+    return {
+        "DoctorID": doctor_id, "Name": doctor_id, "Specialization": "General Physician",
+        "IsAvailable": True, "Lat": Decimal("25.61"), "Lng": Decimal("85.14"),
+    }
+
+
+def _worker(path):
+    return DoctorRoster(DoctorSpatialIndex(), doctors_table, feed_factory=MemoryStreamFeed, lease=HostLease(path))
+
+
+def _available(roster):
+    return {d["DoctorID"] for d in roster.index.available()}
+
+
+def test_one_feed_reader_per_host_and_the_rest_follow(tmp_path):
+    path = str(tmp_path / "doctor_roster.json")
+    doctors_table.put_item(Item=_doctor("DOC-lease-1"))
+
+    reader, follower = _worker(path), _worker(path)
+    reader.refresh()
+    follower.refresh()
+
+    assert reader.stats()["feed_role"] == "reader"
+    assert follower.stats()["feed_role"] == "follower" and follower.feed is None
+    assert "DOC-lease-1" in _available(follower)
+
+    # A change read from the feed reaches the follower through the snapshot
+    doctors_table.put_item(Item=_doctor("DOC-lease-2"))
+    reader.refresh()
+    follower.refresh()
+    assert "DOC-lease-2" in _available(follower)
+    assert not follower.stale
+
+    # The reader goes away: the follower takes the feed over
+    reader.lease.release()
+    follower.refresh()
+    assert follower.stats()["feed_role"] == "reader" and follower.feed is not None
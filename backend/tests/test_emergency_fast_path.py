@@ -0,0 +1,70 @@
+# backend/tests/test_emergency_fast_path.py
+
+import asyncio
+from decimal import Decimal
+
+from backend.core.database import cases_table
+from backend.models.case import CaseDiagnoseRequest
+from backend.services import diagnosis_service
+from backend.services.diagnosis_service import complete_emergency_diagnosis, emergency_case_record
+from backend.services.emergency_triage import triage
+
+
+PATIENT = {"PatientID": "PAT-fast-path", "Name": "Rani", "Age": 24, "Gender": "F", "Village": "Bikram", "Block": "Bikram", "District": "Patna"}
+
+
+def _provisional(case_id):
+    payload = CaseDiagnoseRequest(
+        PatientID=PATIENT["PatientID"],
+        ASHAWorkerID="ASHA-001",
+        SymptomsRaw="behoshi ho gayi, mirgi ka daura",
+        Language="hi-IN",
+    )
+    provisional = emergency_case_record(payload, triage(payload.SymptomsRaw), case_id)
+    cases_table.put_item(Item=provisional)
+    return payload, provisional
+
+
+def test_failed_model_call_keeps_the_case_pending_and_out_of_the_feeds(monkeypatch):
+    async def failing_prepare_case(*args, **kwargs):
+        raise Exception("model unavailable")
+
+    fed = []
+    monkeypatch.setattr(diagnosis_service, "prepare_case", failing_prepare_case)
+    monkeypatch.setattr(diagnosis_service, "record_case", lambda *args: fed.append("rollup"))
+    monkeypatch.setattr(diagnosis_service.outbreak_detector, "observe_case", lambda *args: fed.append("outbreak"))
+
+    payload, provisional = _provisional("CASE-fast-path-failed")
+    asyncio.run(complete_emergency_diagnosis(payload, dict(provisional), PATIENT))
+
+    stored = cases_table.get_item(Key={"CaseID": provisional["CaseID"]})["Item"]
+    assert stored["DiagnosisPending"] is True
+    assert stored["DiagnosisFailed"] is True
+    assert stored["PrimaryDiagnosis"] == provisional["PrimaryDiagnosis"]
+    assert fed == []
+
+
+def test_completed_diagnosis_clears_pending_and_feeds_rollups(monkeypatch):
+    fed = []
+    monkeypatch.setattr(diagnosis_service, "record_case", lambda *args: fed.append("rollup"))
+    monkeypatch.setattr(diagnosis_service.outbreak_detector, "observe_case", lambda *args: fed.append("outbreak") or [])
+
+    payload, provisional = _provisional("CASE-fast-path-done")
+    asyncio.run(complete_emergency_diagnosis(payload, dict(provisional), PATIENT))
+
+    stored = cases_table.get_item(Key={"CaseID": provisional["CaseID"]})["Item"]
+    assert stored["DiagnosisPending"] is False
+    assert "DiagnosisFailed" not in stored
+    assert stored["ICD10Code"]
+    assert fed == ["outbreak", "rollup"]
+
+
+def test_emergency_doctor_is_matched_near_the_patient(monkeypatch):
+    searched = []
+    monkeypatch.setattr(diagnosis_service, "match_doctor", lambda **kwargs: searched.append(kwargs))
+
+    payload, provisional = _provisional("CASE-fast-path-located")
+    patient = {**PATIENT, "Lat": Decimal("25.6100"), "Lng": Decimal("85.1000")}
+    asyncio.run(diagnosis_service.assign_emergency_doctor(dict(provisional), patient))
+
+    assert (searched[0]["asha_lat"], searched[0]["asha_lng"]) == (25.61, 85.1)
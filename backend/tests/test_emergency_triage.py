@@ -0,0 +1,70 @@
+# backend/tests/test_emergency_triage.py
+
+import pytest
+
+from backend.services.emergency_triage import triage
+
+
+@pytest.mark.parametrize("text, expected", [
+    # Inflections and plurals of listed phrases
+    ("episode of unconsciousness this morning", ["unconscious"]),
+    ("chest pains since morning", ["cardiac"]),
+    ("had convulsions twice at night", ["seizure"]),
+    ("seizures since yesterday", ["seizure"]),
+    ("child poisoned by pesticide", ["poisoning"]),
+    ("heavy bleeding after delivery", ["bleeding"]),
+    ("mirgi ka daura pada", ["seizure"]),
+    ("daura pad raha hai", ["seizure"]),
+    ("saans nahi aa rahi bachche ko", ["breathing"]),
+    ("बेहोश हो गई", ["unconscious"]),
+    ("सीने में दर्द हो रहा है", ["cardiac"]),
+    ("snake bite on left leg", ["poisoning"]),
+    ("zyada khoon beh raha hai", ["bleeding"]),
+    ("patient had a stroke", ["stroke"]),
+    ("dil ka daura pada", ["cardiac"]),
+    ("seene mein dard nahi ruk raha", ["cardiac"]),
+])
+def test_emergency_is_flagged(text, expected):
+    assert triage(text)["Categories"] == expected
+
+
+@pytest.mark.parametrize("text", [
+    # Everyday complaints that share words with emergency phrases
+    "fever not responding to paracetamol",
+    "bukhar ke dauran sir dard",
+    "cough and cold since two days",
+    "pet dard aur dast",
+    "mild headache, body ache",
+    "strokes of luck",
+    "what a stroke of luck",
+])
+def test_everyday_text_is_not_flagged(text):
+    assert triage(text)["Categories"] == []
+
+
+@pytest.mark.parametrize("text, negated", [
+    ("no chest pain", "chest pain"),
+    ("pehle behoshi nahi thi", "behoshi"),
+    ("बेहोश नहीं है", "behosh"),   # reported under its first spelling
+    ("denies fits", "fits"),
+    ("chest pain nahi", "chest pain"),
+])
+def test_negated_mention_is_not_flagged(text, negated):
+    result = triage(text)
+
+    assert result["Categories"] == []
+    assert result["Negated"] == [negated]
+
+
+def test_negation_stays_in_its_clause():
+    result = triage("no fever, but heavy bleeding since morning")
+    assert result["Categories"] == ["bleeding"]
+
+    result = triage("chest pain nahi hai par saans nahi le raha")
+    assert result["Categories"] == ["breathing"]
+    assert result["Negated"] == ["chest pain"]
+
+
+def test_only_the_longest_match_is_reported():
+    assert triage("behoshi ho gayi")["Keywords"] == ["behoshi"]
+    assert triage("mirgi ka daura pada")["Keywords"] == ["mirgi ka daura"]
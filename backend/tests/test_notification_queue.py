@@ -0,0 +1,24 @@
+# backend/tests/test_notification_queue.py
+
+import asyncio
+
+from backend.services.notification_service import NotificationQueue
+
+
+ALERT = {
+    "district": "Patna", "block": "Phulwari", "village": "Kurthaul",
+    "icd10_code": "A09", "count": 9, "expected": 2.1, "z_score": 4.2, "date": "2026-10-18",
+}
+
+
+def test_no_sink_dead_letters_instead_of_dropping():
+    queue = NotificationQueue(sink=None)
+    asyncio.run(queue.start())
+
+    assert queue.enqueue("+919876543210", "outbreak_alert", ALERT) is None
+    assert queue.broadcast(["+919800000001", "+919800000002"], "outbreak_alert", ALERT) == 0
+
+    stats = queue.stats()
+    assert stats["dead_lettered"] == 3
+    assert stats["queued"] == 0 and stats["enqueued"] == 0
+    assert {letter["Error"] for letter in queue.dead_letters} == {"no_sink"}
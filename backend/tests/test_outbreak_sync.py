@@ -0,0 +1,81 @@
+# backend/tests/test_outbreak_sync.py
+
+import asyncio
+from collections import Counter
+from datetime import date, datetime, timedelta
+
+from backend.services.analytics_service import record_case, rollups
+from backend.services.outbreak_service import (
+    OutbreakDetector,
+    claim_alerts,
+    outbreak_detector,
+    read_alerts,
+    sync_counts,
+)
+
+
+TODAY = date(2026, 10, 18).toordinal()
+PATIENT = {"District": "Patna", "Block": "Bikram", "Village": "Bikram"}
+
+
+def _history(days: int, per_day: int = 1):
+    return {TODAY - i: Counter({"Bikram|A90": per_day}) for i in range(days, 0, -1)}
+
+
+def _observe(detector, cases: int):
+    alerts = []
+    for _ in range(cases):
+        alerts += detector.observe("Patna", "Bikram", "Bikram", "A90.0", TODAY)
+    return alerts
+
+
+def test_seeded_detector_alerts_right_after_a_restart():
+    cold = OutbreakDetector()
+    assert _observe(cold, 6) == []
+
+    seeded = OutbreakDetector()
+    seeded.merge_counts("Patna", _history(20), since=TODAY - 20)
+    alerts = _observe(seeded, 6)
+
+    assert [(a["Village"], a["ICD10Code"]) for a in alerts] == [("*", "A90")]
+    assert alerts[0]["BaselineDays"] == 20
+
+
+def test_cases_seen_by_other_workers_count():
+    detector = OutbreakDetector()
+    detector.merge_counts("Patna", _history(20), since=TODAY - 20)
+    assert _observe(detector, 1) == []
+
+    # Five more cases today, stored by other workers
+    alerts = detector.merge_counts("Patna", {TODAY: Counter({"Bikram|A90": 6})})
+
+    assert len(alerts) == 1 and alerts[0]["Count"] == 6
+    # Counts already merged are not counted twice
+    assert detector.merge_counts("Patna", {TODAY: Counter({"Bikram|A90": 6})}) == []
+
+
+def test_startup_sync_reads_the_dx_rollups():
+    today = datetime.utcnow().date()
+    for i in range(1, 15):
+        record_case(
+            {"CreatedAt": f"{today - timedelta(days=i)}T10:00:00", "ICD10Code": "B50.9"},
+            {**PATIENT, "District": "Gaya"},
+        )
+    rollups.flush()
+
+    sync_counts(outbreak_detector.window, seed=True)
+
+    rows = {(r["Block"], r["ICD10Code"]): r for r in outbreak_detector.window_counts("Gaya")}
+    assert rows[("Bikram", "B50")]["WindowCount"] == 14
+
+
+def test_an_alert_is_claimed_once_and_served_to_every_worker():
+    alert = {
+        "District": "Nalanda", "Block": "Rajgir", "Village": "*", "ICD10Code": "A09",
+        "Date": datetime.utcnow().date().isoformat(), "Count": 7, "Expected": 1.2,
+        "ZScore": 4.8, "Cusum": 5.1, "WindowCount": 30, "BaselineDays": 27,
+    }
+
+    assert asyncio.run(claim_alerts([alert])) == [alert]
+    assert asyncio.run(claim_alerts([dict(alert)])) == []
+    assert read_alerts("Nalanda", days=1) == [alert]
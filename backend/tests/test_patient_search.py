@@ -0,0 +1,18 @@
+# backend/tests/test_patient_search.py
+
+from backend.services.patient_search import PatientSearchIndex
+
+
+def test_upsert_during_a_reload_is_not_lost():
+    stored = [{"PatientID": "P1", "ASHAWorkerID": "ASHA-1", "Name": "Rani Devi", "Village": "Bikram"}]
+    registered = {"PatientID": "P2", "ASHAWorkerID": "ASHA-1", "Name": "Rekha Kumari", "Village": "Bikram"}
+
+    def loader(asha_id):
+        # Another request registers a patient after the query read its page
+        yield from list(stored)
+        index.upsert(registered)
+
+    index = PatientSearchIndex(loader, refresh_seconds=0)
+
+    assert [p["PatientID"] for p in index.search("ASHA-1", "re")] == ["P2"]
+    assert [p["PatientID"] for p in index.search("ASHA-1", "bikram")] == ["P1", "P2"]
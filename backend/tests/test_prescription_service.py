@@ -0,0 +1,55 @@
+# backend/tests/test_prescription_service.py
+
+import pytest
+
+from backend.services.drug_index import open_index
+from backend.services.prescription_service import DEFAULT_DRUG_DATASET, check_prescription
+
+
+@pytest.fixture(scope="module")
+def index(tmp_path_factory):
+    return open_index(DEFAULT_DRUG_DATASET, str(tmp_path_factory.mktemp("drugs") / "drug_index.bin"))
+
+
+@pytest.mark.parametrize("drug, allergy", [
+    ("Augmentin", "penicillin allergy"),
+    ("Septran", "Sulpha drugs"),
+    ("Tab. Amoxicillin 500mg", "allergic to penicillins"),
+    ("Cefixime 200", "Penicillin"),
+])
+def test_allergy_written_as_free_text_is_checked(index, drug, allergy):
+    result = check_prescription([drug], [], [allergy], index=index)
+
+    assert result["AllergyConflicts"]
+    assert result["UnrecognizedAllergies"] == []
+
+
+def test_unresolved_allergy_is_reported_and_never_safe(index):
+    result = check_prescription(["ORS"], [], ["dust mites"], index=index)
+
+    assert result["UnrecognizedAllergies"] == ["dust mites"]
+    assert result["Safe"] is False
+
+
+def test_unresolved_medication_is_reported(index):
+    result = check_prescription(["Paracetamol"], ["grandmother's tonic"], [], index=index)
+
+    assert result["UnrecognizedMedications"] == ["grandmother's tonic"]
+    assert result["Unrecognized"] == []
+    assert result["Safe"] is True
+
+
+def test_major_interaction_is_unsafe(index):
+    result = check_prescription(["Ibuprofen 400mg"], ["Warfarin 5mg"], [], index=index)
+
+    assert result["Safe"] is False
+    assert result["HighestSeverity"] == "MAJOR"
+
+
+def test_unreadable_index_is_rebuilt(tmp_path):
+    path = tmp_path / "drug_index.bin"
+    path.write_bytes(b"not an index")
+
+    index = open_index(DEFAULT_DRUG_DATASET, str(path))
+
+    assert check_prescription(["Augmentin"], [], ["penicillin"], index=index)["AllergyConflicts"]